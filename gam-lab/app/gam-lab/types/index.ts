@@ -56,7 +56,7 @@ export type ModelInfo = {
 
 // One versioned snapshot of shape functions produced by a training call or manual save.
 export type ShapeFunctionVersion = {
-  versionId: string;        // timestamp-based unique id
+  versionId: string;        // unique id (see timestamp for creation time)
   timestamp: number;        // ms since epoch
   source: "train" | "edit";
   center_shapes: boolean;
@@ -1,21 +1,45 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+import threading
+from itertools import chain
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Iterator
 
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Request
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+
+from compare import build_compare_response
+from cross_validation import build_cross_validation_response, cross_validation_slots
 from dataset_registry import REGISTRY
-from json_utils import to_jsonable
+from feature_selection import stream_feature_selection
+from json_utils import dumps_json, to_jsonable
+from migrate_models import migrate_saved_model_on_read
 from model_store import list_model_names, load_model_payload, normalize_stored_model_payload
-from schemas import SaveModelRequest, TrainRequest
+from projection import covers_sections, parse_fields, project_payload
+from reshape import build_reshape_response
+from saved_model_transfer import EXPORT_MEDIA_TYPES, export_chunks, read_saved_models, resolve_format
+from schemas import CompareModelsRequest, FeatureSelectionRequest, ReshapeRequest, SaveModelRequest, TrainRequest
 from storage import (
+    compact_saved_model_versions,
     get_saved_model_payload,
+    get_saved_model_version_payload,
+    import_saved_model_payloads,
+    iter_saved_model_payloads,
     list_saved_model_names,
+    list_saved_model_versions,
     save_saved_model_payload,
 )
-from training import build_dataset_feature_summary, build_train_response
+from training import build_dataset_feature_summary, build_train_response, train_slots
+from training_jobs import get_training_job, job_event_stream, submit_training_job
+from training_scheduler import get_training_scheduler, training_slot
 
 
 app = FastAPI()
 
+# Import bodies are spooled to disk past this size instead of being held in memory.
+IMPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
 
 @app.get("/datasets")
 def list_datasets():
@@ -29,23 +53,109 @@ def list_datasets():
 
 @app.post("/train")
 def train(request: TrainRequest):
-    response = build_train_response(request)
+    with training_slot(fits=train_slots(request)):
+        response = build_train_response(request)
+    return Response(dumps_json(response), media_type="application/json")
+
+
+@app.post("/train/cross-validate")
+def cross_validate(request: TrainRequest):
+    with training_slot(fits=cross_validation_slots(request)):
+        response = build_cross_validation_response(request)
     return to_jsonable(response)
 
 
+@app.post("/train/feature-selection")
+async def feature_selection(request: FeatureSelectionRequest):
+    stopped = threading.Event()
+    lines = await run_in_threadpool(stream_feature_selection, request, stopped.is_set)
+    return StreamingResponse(_stream_until_stopped(lines, stopped), media_type="application/x-ndjson")
+
+
+async def _stream_until_stopped(lines: Iterator[bytes], stopped: threading.Event) -> AsyncIterator[bytes]:
+    """Stream ``lines``; ``stopped`` is set once streaming ends, also when the client goes away mid-step."""
+    try:
+        async for line in iterate_in_threadpool(lines):
+            yield line
+    finally:
+        stopped.set()
+
+
+@app.post("/train/jobs", status_code=202)
+def create_training_job(request: TrainRequest):
+    job = submit_training_job(request)
+    return {**job.summary(), "events": f"/train/jobs/{job.id}/events"}
+
+
+@app.get("/train/jobs/{job_id}")
+def get_training_job_status(job_id: str):
+    return get_training_job(job_id).summary()
+
+
+@app.get("/train/jobs/{job_id}/result")
+def get_training_job_result(job_id: str):
+    job = get_training_job(job_id)
+    if job.status == "succeeded":
+        return Response(job.result, media_type="application/json")
+    if job.status == "failed":
+        raise HTTPException(status_code=job.error_status or 500, detail=job.error)
+    raise HTTPException(status_code=409, detail=f"Training job is {job.status}.")
+
+
+@app.get("/train/jobs/{job_id}/events")
+def stream_training_job_events(job_id: str, request: Request):
+    job = get_training_job(job_id)
+    try:
+        last_event_id = int(request.headers.get("last-event-id", "-1"))
+    except ValueError:
+        last_event_id = -1
+    return StreamingResponse(
+        job_event_stream(job, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/train/jobs/{job_id}")
+def abort_training_job(job_id: str):
+    job = get_training_job(job_id)
+    job.request_abort()
+    return job.summary()
+
+
+@app.get("/train/queue")
+def training_queue():
+    return get_training_scheduler().stats()
+
+
 @app.get("/models")
 def list_models():
     return {"models": list_model_names()}
 
 
+@app.post("/models/compare")
+def compare_models(request: CompareModelsRequest):
+    return to_jsonable(build_compare_response(request))
+
+
 @app.get("/models/{name}")
-def get_model(name: str):
-    return load_model_payload(name)
+def get_model(name: str, fields: str | None = None):
+    try:
+        field_paths = parse_fields(fields)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return load_model_payload(name, field_paths)
+
+
+@app.post("/models/{version_id}/reshape")
+def reshape_model(version_id: str, request: ReshapeRequest):
+    return to_jsonable(build_reshape_response(version_id, request))
 
 
 @app.get("/datasets/{dataset}/features")
-def get_dataset_features(dataset: str, seed: int = 3):
-    return to_jsonable(build_dataset_feature_summary(dataset, seed))
+def get_dataset_features(dataset: str, seed: int = 3, bins: int | None = None, features: str | None = None):
+    feature_filter = [key.strip() for key in features.split(",") if key.strip()] if features else None
+    return to_jsonable(build_dataset_feature_summary(dataset, seed, bins, feature_filter))
 
 
 @app.get("/saved-models")
@@ -56,10 +166,56 @@ def list_saved_models():
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
+@app.get("/saved-models/export")
+def export_saved_models(format: str = "ndjson", names: str | None = None, prefix: str | None = None):
+    try:
+        fmt = resolve_format(format)
+        name_filter = [name for name in names.split(",") if name.strip()] if names else None
+        items = iter_saved_model_payloads(names=name_filter, prefix=prefix)
+        # Pull the first model eagerly so storage errors still produce a proper status code.
+        first = next(items, None)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    stream = chain([first], items) if first is not None else iter(())
+    extension = "tar" if fmt == "tar" else "ndjson"
+    return StreamingResponse(
+        export_chunks(stream, fmt),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="saved-models.{extension}"'},
+    )
+
+
+@app.post("/saved-models/import")
+async def import_saved_models(request: Request, format: str | None = None):
+    with SpooledTemporaryFile(max_size=IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        try:
+            fmt = resolve_format(format, request.headers.get("content-type"))
+            count = await run_in_threadpool(import_saved_model_payloads, read_saved_models(spool, fmt))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except RuntimeError as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return {"imported": count}
+
+
 @app.get("/saved-models/{name}")
-def get_saved_model(name: str):
+def get_saved_model(name: str, fields: str | None = None):
     try:
-        payload = get_saved_model_payload(name)
+        field_paths = parse_fields(fields)
+        payload = get_saved_model_payload(name, field_paths)
+        if payload is not None and not field_paths:
+            payload = migrate_saved_model_on_read(name, payload)
+        elif payload is not None and not covers_sections(payload, field_paths):
+            # A requested section is missing, e.g. in a legacy payload: read it whole and migrate first.
+            full_payload = get_saved_model_payload(name)
+            if full_payload is not None:
+                payload = project_payload(migrate_saved_model_on_read(name, full_payload), field_paths)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except RuntimeError as exc:
@@ -67,17 +223,46 @@ def get_saved_model(name: str):
 
     if payload is None:
         raise HTTPException(status_code=404, detail="Model not found.")
+    return payload
+
+
+@app.get("/saved-models/{name}/versions")
+def list_saved_model_version_history(name: str):
+    try:
+        versions = list_saved_model_versions(name)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    if versions is None:
+        raise HTTPException(status_code=404, detail="Model not found.")
+    return {"versions": versions}
+
+
+@app.get("/saved-models/{name}/versions/{version_id}")
+def get_saved_model_version(name: str, version_id: str):
+    try:
+        payload = get_saved_model_version_payload(name, version_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Version not found.")
     return normalize_stored_model_payload(payload)
 
 
 @app.post("/saved-models")
-def save_model(request: SaveModelRequest):
+def save_model(request: SaveModelRequest, background_tasks: BackgroundTasks):
     try:
         safe_name = save_saved_model_payload(request.name, request.payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+    background_tasks.add_task(compact_saved_model_versions, safe_name)
     return {"saved": safe_name}
 
 
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+
+from dataset_arena import load_preprocessed
+from dataset_registry import get_dataset
+from json_utils import dumps_json
+from memory_usage import PeakMemoryTracker
+from schemas import TrainRequest
+from training import build_train_response
+
+
+# ── Training memory benchmark ────────────────────────────────────────────────
+# Trains the same request with and without low_memory, each in a fresh
+# process so earlier allocations cannot hide a later peak, and compares the
+# RSS peak above the post-preprocessing baseline. A first process builds the
+# dataset arena, so the measured processes only attach to it (otherwise the
+# heap freed by preprocessing would absorb part of one run's allocations).
+# The figures cover training, response assembly and JSON serialization.
+
+
+def _measure(request: TrainRequest, warm_only: bool = False) -> dict:
+    load_preprocessed(get_dataset(request.dataset), request.seed, request.sample_size)
+    if warm_only:
+        return {}
+    with PeakMemoryTracker() as tracker:
+        response = build_train_response(request)
+        body = dumps_json(response)
+    return {
+        "lowMemory": response["memory"]["lowMemory"],
+        "trainingPeakIncreaseBytes": response["memory"]["peakIncreaseBytes"],
+        "peakIncreaseBytes": tracker.report()["peakIncreaseBytes"],
+        "seconds": tracker.report()["seconds"],
+        "responseBytes": len(body),
+        "trainRows": len(response["data"]["trainY"]),
+    }
+
+
+def _run_child(request: TrainRequest, warm_only: bool = False) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", request.model_dump_json(), *(["--warm-only"] if warm_only else [])],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _mib(value: int | None) -> str:
+    return f"{value / 2**20:9.1f}" if value is not None else "      n/a"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare peak training memory with and without low_memory.")
+    parser.add_argument("--dataset", default="bike_hourly")
+    parser.add_argument("--sample-size", type=int, action="append", dest="sample_sizes",
+                        help="Rows to train on; repeat for several sizes (default: the dataset's default).")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument("--n-estimators", type=int, default=100)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--warm-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_measure(TrainRequest.model_validate_json(args.child), args.warm_only)))
+        return
+
+    print(f"{'rows':>10} {'mode':>10} {'train MiB':>9} {'total MiB':>9} {'seconds':>8} {'response MiB':>12}")
+    for sample_size in args.sample_sizes or [None]:
+        results = []
+        _run_child(TrainRequest(dataset=args.dataset, seed=args.seed, sample_size=sample_size), warm_only=True)
+        for low_memory in (False, True):
+            request = TrainRequest(
+                dataset=args.dataset,
+                seed=args.seed,
+                sample_size=sample_size,
+                n_estimators=args.n_estimators,
+                low_memory=low_memory,
+            )
+            result = _run_child(request)
+            results.append(result)
+            print(
+                f"{result['trainRows']:>10} {'low' if low_memory else 'default':>10} "
+                f"{_mib(result['trainingPeakIncreaseBytes'])} {_mib(result['peakIncreaseBytes'])} "
+                f"{result['seconds']:8.2f} {_mib(result['responseBytes']):>12}"
+            )
+        default, low = (result["peakIncreaseBytes"] for result in results)
+        if default and low is not None:
+            print(f"{'':>10} {'reduction':>10} {'':>9} {100 * (1 - low / default):8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,538 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from dataset_arena import load_preprocessed
+from dataset_registry import get_dataset
+from dataset_stats import stats_fingerprint
+from metrics import calc_metrics
+from migrate_models import migrate_saved_model_on_read
+from model_store import load_model_payload, normalize_stored_model_payload
+from projection import covers_sections, project_payload
+from schemas import CompareModelRef, CompareModelsRequest
+from split_cache import get_train_test_split
+from storage import get_saved_model_payload, get_saved_model_version_payload
+from training import additive_predictions, feature_columns
+
+
+# ── Model comparison ─────────────────────────────────────────────────────────
+# POST /models/compare puts the shapes of several generated or saved models
+# (or saved-model versions) of one dataset on a common grid: numeric shapes
+# and numeric interaction axes span the union of the models' ranges, and
+# categorical axes the union of their categories. Every curve of every model
+# is resampled by a single np.interp call over a shared axis (see
+# interp_curves). The response holds pairwise per-term L1 (mean absolute),
+# L2 (root mean square) and max differences on that grid, how well the
+# models agree on the ranking of term importance, and how far their
+# predictions are apart on the cached test split. A term a model lacks
+# counts as zero there.
+
+MAX_COMPARE_MODELS = 50
+MODEL_SOURCES = {"saved", "model"}
+_MODEL_FIELDS = [("model",), ("version",)]
+
+
+def _clamp_points(points: int) -> int:
+    return max(2, min(250, points))
+
+
+def _clamp_grid_points(grid_points: int) -> int:
+    return max(2, min(100, grid_points))
+
+
+# ── Batched interpolation ──
+
+def _knots(xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+    """Finite (x, y) pairs of a stored curve, sorted by x."""
+    try:
+        xs = np.asarray(xs if xs is not None else [], dtype=float).ravel()
+        ys = np.asarray(ys if ys is not None else [], dtype=float).ravel()
+    except (TypeError, ValueError):
+        return np.zeros(0), np.zeros(0)
+    count = min(len(xs), len(ys))
+    xs, ys = xs[:count], ys[:count]
+    finite = np.isfinite(xs) & np.isfinite(ys)
+    order = np.argsort(xs[finite], kind="stable")
+    return xs[finite][order], ys[finite][order]
+
+
+def interp_curves(curves: Sequence[Tuple[np.ndarray, np.ndarray]], queries: Sequence[np.ndarray]) -> List[np.ndarray]:
+    """Evaluate many sorted piecewise-linear curves, each at its own queries, with one ``np.interp``.
+
+    Curve ``i`` is mapped onto the segment [2i, 2i + 1] of a shared axis and
+    its queries are clamped to its knot range first, so no query reaches a
+    neighbouring curve and every curve stays flat beyond its ends, as
+    ``np.interp`` does. Curves without knots evaluate to zero.
+    """
+    knot_x, knot_y, query_x, sizes = [], [], [], []
+    for index, ((xs, ys), query) in enumerate(zip(curves, queries)):
+        query = np.asarray(query, dtype=float)
+        sizes.append((len(query), len(xs) > 0))
+        if not len(xs):
+            continue
+        low, span = xs[0], (xs[-1] - xs[0]) or 1.0
+        knot_x.append(2.0 * index + (xs - low) / span)
+        knot_y.append(ys)
+        query_x.append(2.0 * index + (np.clip(query, xs[0], xs[-1]) - low) / span)
+
+    values = np.interp(np.concatenate(query_x), np.concatenate(knot_x), np.concatenate(knot_y)) if knot_x else np.zeros(0)
+    results, offset = [], 0
+    for size, has_knots in sizes:
+        if has_knots:
+            results.append(values[offset:offset + size])
+            offset += size
+        else:
+            results.append(np.zeros(size))
+    return results
+
+
+# ── Loading models ──
+
+@dataclass
+class _ComparedModel:
+    name: str
+    source: str
+    model: Dict
+    version: Dict
+    shapes: Dict[str, Dict] = field(default_factory=dict)
+
+
+def _load_saved(name: str, version_id: str | None) -> Dict | None:
+    if version_id is not None:
+        payload = get_saved_model_version_payload(name, version_id)
+        return normalize_stored_model_payload(payload) if payload is not None else None
+    payload = get_saved_model_payload(name, _MODEL_FIELDS)
+    if payload is not None and not covers_sections(payload, _MODEL_FIELDS):
+        # A legacy payload: read it whole and migrate it first.
+        full_payload = get_saved_model_payload(name)
+        payload = project_payload(migrate_saved_model_on_read(name, full_payload), _MODEL_FIELDS) if full_payload else None
+    return payload
+
+
+def _load_model(ref: CompareModelRef) -> _ComparedModel:
+    if ref.source not in MODEL_SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of: {', '.join(sorted(MODEL_SOURCES))}.")
+    if ref.source == "model":
+        payload = load_model_payload(ref.name, _MODEL_FIELDS)
+    else:
+        try:
+            payload = _load_saved(ref.name, ref.version_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except RuntimeError as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        if payload is None:
+            version = f" (version {ref.version_id})" if ref.version_id is not None else ""
+            raise HTTPException(status_code=404, detail=f"Model not found: {ref.name}{version}")
+    model, version = payload.get("model") or {}, payload.get("version") or {}
+    shapes = {str(shape["key"]): shape for shape in version.get("shapes") or [] if shape.get("key")}
+    return _ComparedModel(ref.name, ref.source, model, version, shapes)
+
+
+# ── Terms on the common grid ──
+
+def _term_kind(shape: Dict) -> str:
+    if shape.get("editableZ"):
+        return "interaction"
+    if shape.get("categories"):
+        return "categorical"
+    return "numeric"
+
+
+def _categories(values) -> List[str]:
+    return [str(value) for value in values or []]
+
+
+def _category_values(shape: Dict | None, categories: List[str]) -> np.ndarray:
+    """A categorical shape's values for ``categories``; unknown categories are zero."""
+    if shape is None or _term_kind(shape) != "categorical":
+        return np.zeros(len(categories))
+    ys = shape.get("editableY") or []
+    mapping = {category: float(ys[i]) for i, category in enumerate(_categories(shape["categories"])) if i < len(ys)}
+    return np.array([mapping.get(category, 0.0) for category in categories])
+
+
+def _union(lists: List[List[str]]) -> List[str]:
+    return list(dict.fromkeys(item for values in lists for item in values))
+
+
+@dataclass
+class _Axis:
+    """One axis of an interaction grid: numeric knots or categories."""
+
+    grid: np.ndarray | None = None
+    categories: List[str] | None = None
+
+    @property
+    def size(self) -> int:
+        return len(self.grid) if self.grid is not None else len(self.categories)
+
+
+def _shape_axis(shape: Dict, numeric_key: str, categorical_key: str) -> _Axis | None:
+    if shape.get(numeric_key):
+        try:
+            grid = np.asarray(shape[numeric_key], dtype=float)
+        except (TypeError, ValueError):
+            return None
+        return _Axis(grid=grid) if np.all(np.isfinite(grid)) and np.all(np.diff(grid) >= 0) else None
+    if shape.get(categorical_key):
+        return _Axis(categories=_categories(shape[categorical_key]))
+    return None
+
+
+def _interaction_axes(shape: Dict) -> Tuple[_Axis, _Axis] | None:
+    """The x (columns) and y (rows) axes of a stored grid, if ``editableZ`` matches them."""
+    x_axis = _shape_axis(shape, "gridX", "xCategories")
+    y_axis = _shape_axis(shape, "gridX2", "yCategories")
+    if x_axis is None or y_axis is None:
+        return None
+    try:
+        z = _grid_values(shape)
+    except (TypeError, ValueError):
+        return None
+    return (x_axis, y_axis) if z.shape == (y_axis.size, x_axis.size) else None
+
+
+def _grid_values(shape: Dict) -> np.ndarray:
+    return np.nan_to_num(np.asarray(shape["editableZ"], dtype=float))
+
+
+def _common_axis(axes: List[_Axis], grid_points: int) -> _Axis:
+    numeric = [axis.grid for axis in axes if axis.grid is not None and len(axis.grid)]
+    if numeric:
+        low = min(float(grid[0]) for grid in numeric)
+        high = max(float(grid[-1]) for grid in numeric)
+        return _Axis(grid=np.linspace(low, high, grid_points))
+    return _Axis(categories=_union([axis.categories or [] for axis in axes]))
+
+
+def _reindex_categories(z: np.ndarray, categories: List[str], target: List[str], axis: int) -> np.ndarray:
+    positions = {category: i for i, category in enumerate(categories)}
+    padded = np.concatenate([z, np.zeros_like(z.take([0], axis=axis))], axis=axis)
+    return padded.take([positions.get(category, len(categories)) for category in target], axis=axis)
+
+
+def _resample_grids(grids: List[Tuple[np.ndarray, _Axis, _Axis]], common_x: _Axis, common_y: _Axis) -> List[np.ndarray]:
+    """Put stored interaction grids on the common axes, one batched interpolation per axis."""
+    def along(grids, axis_index: int, common: _Axis):
+        # Resample every row (axis_index=1) or column (0) of every grid in one call.
+        lines, queries, pending = [], [], []
+        resampled = []
+        for z, x_axis, y_axis in grids:
+            axis = x_axis if axis_index == 1 else y_axis
+            if axis.grid is None or common.grid is None:
+                if common.categories is not None and axis.categories is not None:
+                    z = _reindex_categories(z, axis.categories, common.categories, axis_index)
+                else:
+                    z = np.zeros((common.size, z.shape[1]) if axis_index == 0 else (z.shape[0], common.size))
+                resampled.append(z)
+                continue
+            vectors = z if axis_index == 1 else z.T
+            pending.append((len(resampled), len(vectors)))
+            resampled.append(None)
+            lines.extend((axis.grid, vector) for vector in vectors)
+            queries.extend([common.grid] * len(vectors))
+        values = iter(interp_curves(lines, queries))
+        for position, count in pending:
+            stacked = np.array([next(values) for _ in range(count)]).reshape(count, common.size)
+            resampled[position] = stacked if axis_index == 1 else stacked.T
+        return resampled
+
+    along_x = along(grids, 1, common_x)
+    return along([(z, common_x, y_axis) for z, (_, _, y_axis) in zip(along_x, grids)], 0, common_y)
+
+
+@dataclass
+class _Term:
+    key: str
+    label: str
+    kind: str
+    # Per model: its stored shape, or None when it lacks the term (or it has another kind).
+    shapes: List[Dict | None]
+    grid: Dict = field(default_factory=dict)
+    values: np.ndarray | None = None  # models x grid cells
+    sources: Tuple[str, str] | None = None
+    axes: Tuple[_Axis, _Axis] | None = None
+
+
+def _collect_terms(models: List[_ComparedModel]) -> List[_Term]:
+    terms: Dict[str, _Term] = {}
+    for model in models:
+        for key, shape in model.shapes.items():
+            if key not in terms:
+                terms[key] = _Term(key, str(shape.get("label") or key), _term_kind(shape), [])
+    for term in terms.values():
+        term.shapes = [
+            shape if shape is not None and _term_kind(shape) == term.kind else None
+            for shape in (model.shapes.get(term.key) for model in models)
+        ]
+    return list(terms.values())
+
+
+def _interaction_sources(term: _Term, models: List[_ComparedModel]) -> Tuple[str, str] | None:
+    for model in models:
+        for spec in model.model.get("selected_operations") or []:
+            if spec.get("key") == term.key and len(spec.get("sources") or []) == 2:
+                return tuple(spec["sources"])
+    parts = term.key.split("__")
+    return (parts[0], parts[1]) if len(parts) == 2 else None
+
+
+def _place_on_grid(terms: List[_Term], models: List[_ComparedModel], points: int, grid_points: int) -> None:
+    """Fill ``grid`` and ``values`` of every term."""
+    numeric = [term for term in terms if term.kind == "numeric"]
+    curves = [[_knots(shape.get("editableX"), shape.get("editableY")) if shape else (np.zeros(0), np.zeros(0))
+               for shape in term.shapes] for term in numeric]
+    queries = []
+    for term, term_curves in zip(numeric, curves):
+        ranges = [(xs[0], xs[-1]) for xs, _ in term_curves if len(xs)]
+        low = min((low for low, _ in ranges), default=0.0)
+        high = max((high for _, high in ranges), default=0.0)
+        grid = np.linspace(low, high, points)
+        term.grid = {"x": grid}
+        queries.append(grid)
+    values = iter(interp_curves(
+        [curve for term_curves in curves for curve in term_curves],
+        [grid for grid, term_curves in zip(queries, curves) for _ in term_curves],
+    ))
+    for term in numeric:
+        term.values = np.array([next(values) for _ in models]).reshape(len(models), points)
+
+    for term in terms:
+        if term.kind == "categorical":
+            categories = _union([_categories(shape["categories"]) for shape in term.shapes if shape])
+            term.grid = {"categories": categories}
+            term.values = np.array([_category_values(shape, categories) for shape in term.shapes]).reshape(len(models), -1)
+        elif term.kind == "interaction":
+            stored = [(shape, _interaction_axes(shape)) if shape else (None, None) for shape in term.shapes]
+            present = [(_grid_values(shape), *axes) for shape, axes in stored if axes]
+            term.shapes = [shape if axes else None for shape, axes in stored]
+            common_x = _common_axis([x_axis for _, x_axis, _ in present], grid_points)
+            common_y = _common_axis([y_axis for _, _, y_axis in present], grid_points)
+            term.axes = (common_x, common_y)
+            term.sources = _interaction_sources(term, models)
+            grids = iter(_resample_grids(present, common_x, common_y))
+            cells = common_x.size * common_y.size
+            term.values = np.array([
+                next(grids).ravel() if axes else np.zeros(cells) for _, axes in stored
+            ]).reshape(len(models), cells)
+            term.grid = {
+                **({"gridX": common_x.grid} if common_x.grid is not None else {"xCategories": common_x.categories}),
+                **({"gridX2": common_y.grid} if common_y.grid is not None else {"yCategories": common_y.categories}),
+            }
+
+
+def _pairwise_differences(terms: List[_Term]) -> Dict[str, np.ndarray]:
+    """L1, L2 and max differences per term: arrays of shape terms x models x models."""
+    values = np.concatenate([term.values for term in terms], axis=1)
+    sizes = np.array([term.values.shape[1] for term in terms])
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    n_models = len(values)
+    l1 = np.zeros((len(terms), n_models, n_models))
+    l2 = np.zeros_like(l1)
+    largest = np.zeros_like(l1)
+    for i in range(n_models):
+        diff = np.abs(values - values[i])
+        l1[:, :, i] = (np.add.reduceat(diff, starts, axis=1) / sizes).T
+        l2[:, :, i] = np.sqrt(np.add.reduceat(diff * diff, starts, axis=1) / sizes).T
+        largest[:, :, i] = np.maximum.reduceat(diff, starts, axis=1).T
+    return {"l1": l1, "l2": l2, "max": largest}
+
+
+# ── Predictions on the test split ──
+
+def _code_table(shape_categories: List[str], data_categories: List[str], values: np.ndarray, missing: float) -> np.ndarray:
+    """Lookup by dataset category code (one extra trailing slot for unknown codes)."""
+    mapping = dict(zip(shape_categories, values))
+    return np.array([mapping.get(str(category), missing) for category in data_categories] + [missing])
+
+
+def _codes(column: np.ndarray, n_categories: int) -> np.ndarray:
+    codes = np.asarray(column, dtype=np.int64)
+    return np.where((codes >= 0) & (codes < n_categories), codes, n_categories)
+
+
+def _axis_positions(axis: _Axis, column: np.ndarray, data_categories: List[str] | None):
+    """Lower cell index, upper cell index, weight of the upper one, and validity per row."""
+    if axis.grid is not None:
+        if data_categories is not None:
+            return None
+        position = np.interp(np.asarray(column, dtype=float), axis.grid, np.arange(len(axis.grid), dtype=float))
+        lower = np.floor(position).astype(np.int64)
+        upper = np.minimum(lower + 1, len(axis.grid) - 1)
+        return lower, upper, position - lower, np.ones(len(position), dtype=bool)
+    if data_categories is None:
+        return None
+    table = _code_table(axis.categories, data_categories, np.arange(len(axis.categories), dtype=float), -1.0)
+    index = table[_codes(column, len(data_categories))].astype(np.int64)
+    valid = index >= 0
+    index = np.where(valid, index, 0)
+    return index, index, np.zeros(len(index)), valid
+
+
+def _interaction_contributions(shape: Dict, sources, columns: Dict, cat_info: Dict, n_rows: int) -> np.ndarray:
+    axes = _interaction_axes(shape)
+    if axes is None or sources is None or any(source not in columns for source in sources):
+        return np.zeros(n_rows)
+    positions = [
+        _axis_positions(axis, columns[source], cat_info.get(source))
+        for axis, source in zip(axes, sources)
+    ]
+    if any(position is None for position in positions):
+        return np.zeros(n_rows)
+    (x0, x1, wx, x_valid), (y0, y1, wy, y_valid) = positions
+    z = _grid_values(shape)
+    bottom = (1 - wx) * z[y0, x0] + wx * z[y0, x1]
+    top = (1 - wx) * z[y1, x0] + wx * z[y1, x1]
+    return np.where(x_valid & y_valid, (1 - wy) * bottom + wy * top, 0.0)
+
+
+def _test_contributions(terms: List[_Term], n_models: int, columns: Dict, cat_info: Dict, n_rows: int) -> List[np.ndarray]:
+    """Per term, the models' contributions on the test rows (models x rows)."""
+    numeric = [term for term in terms if term.kind == "numeric" and term.key in columns and term.key not in cat_info]
+    curves = [_knots(shape.get("editableX"), shape.get("editableY")) if shape else (np.zeros(0), np.zeros(0))
+              for term in numeric for shape in term.shapes]
+    values = iter(interp_curves(curves, [columns[term.key] for term in numeric for _ in term.shapes]))
+    evaluated = {term.key: np.array([next(values) for _ in term.shapes]) for term in numeric}
+
+    contributions = []
+    for term in terms:
+        if term.key in evaluated:
+            contributions.append(evaluated[term.key])
+        elif term.kind == "categorical" and term.key in cat_info and term.key in columns:
+            data_categories = cat_info[term.key]
+            codes = _codes(columns[term.key], len(data_categories))
+            categories = term.grid["categories"]
+            contributions.append(np.array([
+                _code_table(categories, data_categories, row, 0.0)[codes] for row in term.values
+            ]))
+        elif term.kind == "interaction":
+            contributions.append(np.array([
+                _interaction_contributions(shape, term.sources, columns, cat_info, n_rows) if shape else np.zeros(n_rows)
+                for shape in term.shapes
+            ]))
+        else:
+            contributions.append(np.zeros((n_models, n_rows)))
+    return contributions
+
+
+def _prediction_differences(task_type: str, predictions: np.ndarray) -> Dict[str, np.ndarray]:
+    n_models = len(predictions)
+    mean_abs = np.zeros((n_models, n_models))
+    rms = np.zeros((n_models, n_models))
+    for i in range(n_models):
+        diff = predictions - predictions[i]
+        mean_abs[i] = np.mean(np.abs(diff), axis=1)
+        rms[i] = np.sqrt(np.mean(diff * diff, axis=1))
+    result = {"meanAbsDifference": mean_abs, "rmsDifference": rms}
+    if task_type == "classification":
+        labels = (predictions >= 0.5).astype(float)
+        # Rows where exactly one of the two models predicts the positive class.
+        result["labelDisagreement"] = (labels @ (1 - labels).T + (1 - labels) @ labels.T) / predictions.shape[1]
+    return result
+
+
+def _rank_agreement(importance: np.ndarray) -> np.ndarray:
+    """Spearman correlation of the models' term-importance rankings (models x models)."""
+    if importance.shape[1] < 2:
+        return np.full((len(importance), len(importance)), np.nan)
+    ranks = pd.DataFrame(importance).rank(axis=1).to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.corrcoef(ranks)
+
+
+def _finite(values) -> List:
+    """Nested lists with non-finite entries as None."""
+    array = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(array), array, None).tolist()
+
+
+# ── Response ──
+
+def build_compare_response(request: CompareModelsRequest) -> Dict:
+    if not 2 <= len(request.models) <= MAX_COMPARE_MODELS:
+        raise HTTPException(status_code=400, detail=f"Compare between 2 and {MAX_COMPARE_MODELS} models.")
+    models = [_load_model(ref) for ref in request.models]
+    datasets = {model.model.get("dataset") for model in models}
+    if len(datasets) != 1:
+        raise HTTPException(status_code=400, detail="Models must be trained on the same dataset.")
+    dataset = datasets.pop()
+    try:
+        cfg = get_dataset(dataset)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown dataset: {dataset}")
+    task_type = cfg.task_type
+    first = models[0].model
+    seed = request.seed if request.seed is not None else int(first.get("seed", 3))
+    sample_size = request.sample_size if request.sample_size is not None else first.get("sample_size")
+
+    points = _clamp_points(request.points)
+    grid_points = _clamp_grid_points(request.grid_points)
+    terms = _collect_terms(models)
+    if not terms:
+        raise HTTPException(status_code=400, detail="The models have no shapes to compare.")
+    _place_on_grid(terms, models, points, grid_points)
+    differences = _pairwise_differences(terms)
+
+    x_processed, y_full, cat_info, _, _ = load_preprocessed(cfg, seed, sample_size)
+    split = get_train_test_split(
+        stats_fingerprint(cfg, seed, sample_size), y_full, seed, sample_size, stratify=task_type == "classification"
+    )
+    test_idx = split.test
+    keys = {term.key for term in terms} | {source for term in terms if term.sources for source in term.sources}
+    columns = {key: values[test_idx] for key, values in feature_columns(
+        x_processed, [key for key in x_processed.columns if key in keys], cat_info
+    ).items()}
+    y_test = np.asarray(y_full, dtype=float).ravel()[test_idx]
+    contributions = _test_contributions(terms, len(models), columns, cat_info, len(test_idx))
+    totals = np.sum(contributions, axis=0) if contributions else np.zeros((len(models), len(test_idx)))
+    predictions = np.array([
+        additive_predictions(task_type, total, float(model.version.get("intercept") or 0.0))
+        for model, total in zip(models, totals)
+    ]).reshape(len(models), len(test_idx))
+    # Importance: mean absolute deviation of the term's contribution from its mean.
+    importance = np.array([
+        np.mean(np.abs(values - values.mean(axis=1, keepdims=True)), axis=1) if values.shape[1] else np.zeros(len(models))
+        for values in contributions
+    ]).T
+
+    return {
+        "dataset": dataset,
+        "task": task_type,
+        "points": points,
+        "gridPoints": grid_points,
+        "models": [
+            {
+                "name": model.name,
+                "source": model.source,
+                "versionId": model.version.get("versionId"),
+                "intercept": model.version.get("intercept"),
+                "testMetrics": calc_metrics(task_type, y_test, prediction),
+            }
+            for model, prediction in zip(models, predictions)
+        ],
+        "terms": [
+            {
+                "key": term.key,
+                "label": term.label,
+                "kind": term.kind,
+                "presentIn": [shape is not None for shape in term.shapes],
+                "importance": importance[:, index],
+                "difference": {name: _finite(matrix[index]) for name, matrix in differences.items()},
+                **({"grid": term.grid, "values": term.values} if request.include_shapes else {}),
+            }
+            for index, term in enumerate(terms)
+        ],
+        "importanceAgreement": {"spearman": _finite(_rank_agreement(importance))},
+        "predictions": {
+            "seed": seed,
+            "sampleSize": sample_size,
+            "rows": int(len(test_idx)),
+            **{name: _finite(matrix) for name, matrix in _prediction_differences(task_type, predictions).items()},
+        },
+    }
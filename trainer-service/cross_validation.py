@@ -0,0 +1,573 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+
+from dataset_registry import get_dataset
+from dataset_stats import stats_fingerprint
+from metrics import calc_metrics
+from preprocessing.common import categorical_from_codes
+from schemas import TrainRequest
+from shared_arrays import SharedArrays, SharedArraysHandle, attach_shared_arrays
+from split_cache import get_fold_assignment
+from training import (
+    TrainingData,
+    TrainingParams,
+    additive_intercept,
+    additive_predictions,
+    evaluate_contribs,
+    feature_columns,
+    fit_model,
+    native_shape_functions,
+    normalize_numeric_shape_points,
+    prepare_training_data,
+    resolve_training_params,
+    term_contributions,
+)
+from training_progress import TrainingProgress
+from training_scheduler import get_max_fits_per_request, get_threads_per_fit, pin_fit_threads
+
+
+logger = logging.getLogger(__name__)
+
+
+# ── Parallel k-fold cross-validation ─────────────────────────────────────────
+# The preprocessed dataset is packed once into a shared-memory bundle (numeric
+# columns, category codes, target and fold membership). Each fold is fitted in
+# a process of a long-lived spawn pool that maps the bundle by name, so the
+# dataset itself is never pickled; only a small task description crosses the
+# process boundary. Workers return held-out metrics and every main-effect
+# term evaluated on a common grid, from which per-fold spread is reported.
+#
+# The pool is shared by cross-validation, feature selection and ensembles, and
+# so are the pieces around it: share_training_data packs the bundle,
+# fit_and_score fits and scores one task in a worker, and PoolRun owns the
+# bundle and the submitted fits on the request's side.
+# Its workers are pinned to TRAINING_THREADS_PER_FIT threads like any other
+# fit, and a request keeps at most pool_parallelism(...) of its tasks in
+# flight: the training slots it reserved for pool fits (see training_scheduler).
+#
+# Those slots are only given back once the request's pool fits have stopped.
+# Every bundle carries a one-byte abort flag that pool fits poll at each
+# boosting iteration; when a run is closed early (aborted job, failed main
+# fit, gone client) it skips its queued tasks, raises the flag and waits for
+# the running ones before the request leaves its training slots.
+
+MIN_FOLDS = 2
+MAX_FOLDS = 10
+DEFAULT_FOLDS = 5
+# How often a request waiting for pool results checks whether it was aborted.
+ABORT_POLL_SECONDS = 0.25
+
+
+def get_cv_max_workers() -> int:
+    """Worker processes fitting folds and feature-selection candidates; 0 or 1 fits them in this process."""
+    default = min(4, os.cpu_count() or 1)
+    try:
+        return max(0, int(os.getenv("CV_MAX_WORKERS", str(default))))
+    except ValueError:
+        return default
+
+
+def pool_parallelism(n_tasks: int, in_process_fits: int = 0) -> int:
+    """Pool fits one request runs at once; 0 means its tasks are fitted in the request's own process.
+
+    Bounded by the pool's workers and by the training slots one request may
+    hold, less the ``in_process_fits`` the request runs itself next to the pool.
+    """
+    max_workers = get_cv_max_workers()
+    if max_workers <= 1:
+        return 0
+    return max(0, min(n_tasks, max_workers, get_max_fits_per_request() - in_process_fits))
+
+
+def clamp_folds(n_folds: int | None) -> int:
+    return max(MIN_FOLDS, min(MAX_FOLDS, n_folds or DEFAULT_FOLDS))
+
+
+@dataclass(frozen=True)
+class PoolTask:
+    """One fit on a shared bundle (see ``share_training_data``)."""
+
+    handle: SharedArraysHandle
+    params: TrainingParams
+    # Bundle layout.
+    numeric_cols: Tuple[str, ...]
+    cat_info: Dict
+    # The model's inputs.
+    columns: Tuple[str, ...]
+    feature_keys: Tuple[str, ...]
+    interaction_specs: Tuple[Dict, ...]
+
+
+@dataclass(frozen=True)
+class _FoldTask(PoolTask):
+    fold: int
+    grids: Dict[str, List[float]]
+
+
+# ── Worker side ──
+
+def _init_worker(threads: int) -> None:
+    # Every task is one fit holding one training slot; give it a slot's worth of threads.
+    pin_fit_threads(threads)
+
+
+def gather_rows(arrays: Dict[str, np.ndarray], task, rows: np.ndarray) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Copy the given rows out of the shared bundle as per-column arrays plus targets.
+
+    ``task`` describes the bundle layout through ``numeric_cols`` and ``cat_info``.
+    """
+    numeric = arrays["numeric"][rows]
+    codes = arrays["codes"][rows]
+    columns = {name: numeric[:, i] for i, name in enumerate(task.numeric_cols)}
+    columns.update({name: codes[:, i].astype(np.int64) for i, name in enumerate(task.cat_info)})
+    return columns, arrays["y"][rows]
+
+
+def pool_progress(params: TrainingParams, arrays: Dict[str, np.ndarray]) -> TrainingProgress:
+    """Progress for a fit in a pool worker: reports nothing, but stops once the bundle's abort flag is raised.
+
+    Only valid inside the ``attach_shared_arrays`` block ``arrays`` came from.
+    """
+    return TrainingProgress(params.n_estimators, params.early_stopping, lambda _report: None, lambda: bool(arrays["abort"][0]))
+
+
+def rows_frame(columns: Dict[str, np.ndarray], task) -> pd.DataFrame:
+    return pd.DataFrame({
+        name: categorical_from_codes(columns[name], task.cat_info[name]) if name in task.cat_info else columns[name]
+        for name in task.columns
+    })
+
+
+@dataclass
+class PoolFit:
+    """A pool fit's shape functions and intercept, with predictions for its training and held-out rows."""
+
+    task_type: str
+    # At the model's own resolution, and resampled to ``num_points`` knots.
+    native_shapes: Dict
+    shape_functions: Dict
+    intercept: float
+    y_train: np.ndarray
+    preds_train: np.ndarray
+    y_test: np.ndarray
+    preds_test: np.ndarray
+
+    def metrics(self) -> Dict:
+        return {
+            "trainMetrics": calc_metrics(self.task_type, self.y_train, self.preds_train),
+            "testMetrics": calc_metrics(self.task_type, self.y_test, self.preds_test),
+        }
+
+
+RowSelector = Callable[[Dict[str, np.ndarray]], Tuple[np.ndarray, np.ndarray]]
+
+
+def fit_and_score(task: PoolTask, select_rows: RowSelector) -> PoolFit:
+    """Fit ``task`` on some of the bundle's rows and predict them and the held-out rows additively.
+
+    ``select_rows(arrays)`` returns the training and held-out row positions.
+    """
+    params = task.params
+    feature_keys = list(task.feature_keys)
+    interaction_specs = list(task.interaction_specs)
+    model_keys = feature_keys + [col for spec in interaction_specs for col in spec["dummy_cols"]]
+    with attach_shared_arrays(task.handle) as arrays:
+        train_rows, test_rows = select_rows(arrays)
+        train, y_train = gather_rows(arrays, task, train_rows)
+        test, y_test = gather_rows(arrays, task, test_rows)
+        try:
+            model = fit_model(params, rows_frame(train, task), y_train, pool_progress(params, arrays))
+            native_shapes = native_shape_functions(model)
+        except HTTPException as exc:
+            # Keep the exception picklable across the process boundary.
+            raise RuntimeError(str(exc.detail)) from None
+    shape_functions = normalize_numeric_shape_points(native_shapes, model_keys, task.cat_info, params.num_points)
+
+    def total(columns: Dict[str, np.ndarray], n_rows: int) -> np.ndarray:
+        contribs = term_contributions(
+            shape_functions, columns, feature_keys, task.cat_info, interaction_specs, np.arange(n_rows)
+        )
+        return np.sum(np.stack(list(contribs.values()), axis=0), axis=0) if contribs else np.zeros(n_rows)
+
+    total_train = total(train, len(y_train))
+    intercept = additive_intercept(params.task_type, model, y_train, total_train)
+    return PoolFit(
+        task_type=params.task_type,
+        native_shapes=native_shapes,
+        shape_functions=shape_functions,
+        intercept=intercept,
+        y_train=y_train,
+        preds_train=additive_predictions(params.task_type, total_train, intercept),
+        y_test=y_test,
+        preds_test=additive_predictions(params.task_type, total(test, len(y_test)), intercept),
+    )
+
+
+def _fit_fold(task: _FoldTask) -> Dict:
+    def select_rows(arrays: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        held_out = arrays["folds"] == task.fold
+        return np.flatnonzero(~held_out), np.flatnonzero(held_out)
+
+    fit = fit_and_score(task, select_rows)
+    terms = {}
+    for key in task.feature_keys:
+        shape_fn = fit.shape_functions.get(key, {})
+        if key in task.cat_info:
+            categories = task.cat_info[key]
+            terms[key] = evaluate_contribs(shape_fn, np.arange(len(categories)), categories).tolist()
+        else:
+            terms[key] = evaluate_contribs(shape_fn, np.asarray(task.grids[key], dtype=float)).tolist()
+    return {"fold": task.fold, **fit.metrics(), "terms": terms}
+
+
+# ── Pool ──
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(get_threads_per_fit(),),
+            )
+        return _executor
+
+
+def _reset_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _ThrottledSubmission:
+    """Feeds tasks to the pool keeping at most ``parallelism`` of them in flight.
+
+    Every task gets its own future up front; the next task is submitted from
+    the done callback of a finished one. Cancelling a future that has not
+    been submitted yet skips its task.
+    """
+
+    def __init__(self, executor: ProcessPoolExecutor, fn, tasks: List) -> None:
+        self._executor = executor
+        self._fn = fn
+        self._tasks = tasks
+        self.futures = [Future() for _ in tasks]
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def submit_next(self, raise_errors: bool = False) -> None:
+        while True:
+            with self._lock:
+                index = self._next
+                self._next += 1
+            if index >= len(self._tasks):
+                return
+            future = self.futures[index]
+            if not future.set_running_or_notify_cancel():
+                continue  # cancelled before it was submitted
+            try:
+                inner = self._executor.submit(self._fn, self._tasks[index])
+            except BaseException as exc:
+                if raise_errors:
+                    raise
+                future.set_exception(exc)
+                continue
+            inner.add_done_callback(lambda done, future=future: self._finish(done, future))
+            return
+
+    def _finish(self, done: Future, future: Future) -> None:
+        exc = done.exception() if not done.cancelled() else BrokenProcessPool("The fitting pool was shut down.")
+        if exc is not None:
+            future.set_exception(exc)
+        else:
+            future.set_result(done.result())
+        self.submit_next()
+
+
+def submit_to_pool(fn, tasks: List, parallelism: int) -> List[Future] | None:
+    """Submit ``fn(task)`` for every task to the fitting pool, ``parallelism`` at a time.
+
+    ``None`` means run them inline (no pool, or no pool fits for this request).
+    """
+    max_workers = get_cv_max_workers()
+    if max_workers <= 1 or parallelism <= 0:
+        return None
+    try:
+        executor = _get_executor(max_workers)
+        submission = _ThrottledSubmission(executor, fn, tasks)
+        # Surface a pool broken by an earlier run here rather than through a task's future.
+        submission.submit_next(raise_errors=True)
+    except BrokenProcessPool:
+        # A worker died during an earlier run; start a fresh pool once.
+        _reset_executor()
+        submission = _ThrottledSubmission(_get_executor(max_workers), fn, tasks)
+        submission.submit_next()
+    for _ in range(min(parallelism, len(tasks)) - 1):
+        submission.submit_next()
+    return submission.futures
+
+
+def collect_results(
+    fn,
+    tasks: List,
+    futures: List[Future] | None,
+    check_abort: Callable[[], None] | None = None,
+) -> List:
+    """Results of ``submit_to_pool`` in task order; raises RuntimeError if a worker died.
+
+    ``check_abort`` is called while waiting and raises to stop waiting early;
+    the caller then stops the remaining fits with ``stop_pool_fits``.
+    """
+    if futures is None:
+        results = []
+        for task in tasks:
+            if check_abort is not None:
+                check_abort()
+            results.append(fn(task))
+        return results
+    try:
+        results = []
+        for future in futures:
+            while check_abort is not None and not wait([future], ABORT_POLL_SECONDS).done:
+                check_abort()
+            results.append(future.result())
+        return results
+    except BrokenProcessPool as exc:
+        logger.warning("Model fitting worker pool broke; it will be restarted: %s", exc)
+        _reset_executor()
+        raise RuntimeError("A model fitting worker process died.") from exc
+
+
+def stop_pool_fits(futures: List[Future] | None, shared: SharedArrays) -> None:
+    """Skip queued tasks, ask running fits to abort and wait until they have stopped.
+
+    Returns once no fit of the run is left on the pool, so the caller's
+    training slots are only given back after its fits.
+    """
+    pending = [future for future in futures or [] if not future.done()]
+    if not pending:
+        return
+    shared.fill("abort", 1)
+    for future in pending:
+        future.cancel()
+    wait(pending)
+
+
+# ── Parent side ──
+
+def share_training_data(data: TrainingData, extra: Dict[str, np.ndarray]) -> Tuple[SharedArrays, Dict]:
+    """Pack the dataset's numeric columns, category codes and targets, ``extra`` and an abort flag into a bundle.
+
+    Returns the bundle and the ``PoolTask`` fields describing it (``handle``,
+    ``numeric_cols``, ``cat_info``).
+    """
+    x_processed, cat_info = data.x_processed, data.cat_info
+    cat_cols = [col for col in x_processed.columns if col in cat_info]
+    numeric_cols = [col for col in x_processed.columns if col not in cat_info]
+    columns = feature_columns(x_processed, list(x_processed.columns), cat_info)
+    n_rows = len(x_processed)
+    numeric = np.column_stack([columns[col] for col in numeric_cols]) if numeric_cols else np.zeros((n_rows, 0))
+    codes = np.column_stack([columns[col] for col in cat_cols]).astype(np.int32) if cat_cols else np.zeros((n_rows, 0), dtype=np.int32)
+    shared = SharedArrays({
+        "numeric": numeric,
+        "codes": codes,
+        "y": np.asarray(data.y_full, dtype=float).ravel(),
+        **extra,
+        "abort": np.zeros(1, dtype=np.uint8),
+    })
+    layout = {
+        "handle": shared.handle,
+        "numeric_cols": tuple(numeric_cols),
+        "cat_info": {col: cat_info[col] for col in cat_cols},
+    }
+    return shared, layout
+
+
+class PoolRun:
+    """Fits submitted to the pool over a shared bundle the run owns.
+
+    ``_collect()`` waits for the fits of the last ``_submit()``; leaving the
+    context stops any still running and releases the bundle.
+    """
+
+    def __init__(self, shared: SharedArrays) -> None:
+        self._shared = shared
+        self._fn = None
+        self._tasks: List = []
+        self._futures: List[Future] | None = None
+
+    def _submit(self, fn, tasks: List, parallelism: int) -> None:
+        self._fn, self._tasks = fn, tasks
+        self._futures = submit_to_pool(fn, tasks, parallelism)
+
+    def _collect(self, check_abort: Callable[[], None] | None = None) -> List:
+        # If this raises, the futures stay set so close() stops the remaining fits.
+        results = collect_results(self._fn, self._tasks, self._futures, check_abort)
+        self._futures = None
+        return results
+
+    def close(self) -> None:
+        try:
+            stop_pool_fits(self._futures, self._shared)
+        finally:
+            self._shared.release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _aggregate_metrics(per_fold: List[Dict]) -> Dict:
+    aggregate: Dict = {}
+    for name in per_fold[0]:
+        values = [metrics[name] for metrics in per_fold if metrics.get(name) is not None]
+        if name == "count":
+            aggregate[name] = int(sum(values))
+        elif values:
+            aggregate[name] = {
+                "mean": float(np.mean(values)),
+                "std": float(np.std(values, ddof=1)) if len(values) > 1 else 0.0,
+            }
+        else:
+            aggregate[name] = None
+    return aggregate
+
+
+class CrossValidationRun(PoolRun):
+    """Folds submitted to the pool; ``result()`` waits for them, leaving the context stops them and releases the bundle."""
+
+    def __init__(self, data: TrainingData, tasks: List[_FoldTask], shared: SharedArrays, parallelism: int) -> None:
+        super().__init__(shared)
+        self._labels = dict(data.labels)
+        self._submit(_fit_fold, tasks, parallelism)
+
+    def result(self, check_abort: Callable[[], None] | None = None) -> Dict:
+        task = self._tasks[0]
+        folds = self._collect(check_abort)
+        bands = []
+        for key in task.feature_keys:
+            curves = np.asarray([fold["terms"][key] for fold in folds], dtype=float)
+            band: Dict = {"key": key, "label": self._labels.get(key, key)}
+            if key in task.cat_info:
+                band["categories"] = task.cat_info[key]
+            else:
+                band["x"] = task.grids[key]
+            band.update(
+                mean=curves.mean(axis=0).tolist(),
+                std=(curves.std(axis=0, ddof=1) if len(folds) > 1 else np.zeros(curves.shape[1])).tolist(),
+                min=curves.min(axis=0).tolist(),
+                max=curves.max(axis=0).tolist(),
+            )
+            bands.append(band)
+        return {
+            "folds": len(folds),
+            "seed": task.params.seed,
+            "foldMetrics": [
+                {"fold": fold["fold"], "trainMetrics": fold["trainMetrics"], "testMetrics": fold["testMetrics"]}
+                for fold in folds
+            ],
+            "trainMetrics": _aggregate_metrics([fold["trainMetrics"] for fold in folds]),
+            "testMetrics": _aggregate_metrics([fold["testMetrics"] for fold in folds]),
+            "shapeBands": bands,
+        }
+
+
+def start_cross_validation(
+    data: TrainingData,
+    params: TrainingParams,
+    n_folds: int,
+    fingerprint: str,
+    sample_size: int | None = None,
+    parallelism: int | None = None,
+) -> CrossValidationRun:
+    """Share the dataset and submit one fit per fold; use the result as a context manager.
+
+    ``parallelism`` is the number of folds fitted at once (default: ``pool_parallelism``).
+    """
+    n_folds = clamp_folds(n_folds)
+    if parallelism is None:
+        parallelism = pool_parallelism(n_folds)
+    try:
+        folds = get_fold_assignment(
+            fingerprint, data.y_full, params.seed, n_folds, sample_size, stratify=params.task_type == "classification"
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Cannot split into {n_folds} folds: {exc}") from exc
+
+    grids = {}
+    for key in data.feature_keys:
+        if key in data.cat_info:
+            continue
+        values = data.x_processed[key].to_numpy(dtype=float)
+        finite = values[np.isfinite(values)]
+        low, high = (float(finite.min()), float(finite.max())) if len(finite) else (0.0, 0.0)
+        grids[key] = np.linspace(low, high, params.num_points).tolist()
+
+    shared, layout = share_training_data(data, {"folds": folds})
+    tasks = [
+        _FoldTask(
+            **layout,
+            params=params,
+            columns=tuple(data.x_processed.columns),
+            feature_keys=tuple(data.feature_keys),
+            interaction_specs=tuple(data.interaction_specs),
+            fold=fold,
+            grids=grids,
+        )
+        for fold in range(n_folds)
+    ]
+    try:
+        return CrossValidationRun(data, tasks, shared, parallelism)
+    except BaseException:
+        shared.release()
+        raise
+
+
+def cross_validation_slots(request: TrainRequest) -> int:
+    """Training slots to reserve for a cross-validation request: one per fold fitted at once."""
+    return max(1, pool_parallelism(clamp_folds(request.cv_folds)))
+
+
+def build_cross_validation_response(request: TrainRequest) -> Dict:
+    try:
+        cfg = get_dataset(request.dataset)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown dataset: {request.dataset}")
+
+    params = resolve_training_params(request, cfg.task_type)
+    data = prepare_training_data(request)
+    fingerprint = stats_fingerprint(cfg, request.seed, request.sample_size)
+    with start_cross_validation(data, params, request.cv_folds, fingerprint, request.sample_size) as run:
+        try:
+            result = run.result()
+        except RuntimeError as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return {
+        "dataset": request.dataset,
+        "task": cfg.task_type,
+        "model_type": params.model_type,
+        "selected_features": data.feature_keys,
+        **result,
+    }
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset_registry import DatasetConfig, source_stamps, spec_stamp
+from paths import DATASET_ARENA_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms run without the arena
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# ── Shared dataset arena ─────────────────────────────────────────────────────
+# Preprocessed datasets are materialized once per fingerprint (dataset, seed,
+# sample_size, source and spec file stamps) as one .npy file per column under
+# data/.arena: numeric columns in their dtype, categorical columns as their
+# category codes. Every uvicorn worker memory-maps the same files read-only,
+# so N workers share one copy of each dataset through the page cache instead
+# of preprocessing and holding N copies. The first worker to need an entry
+# builds it under an exclusive file lock while the others wait for it.
+#
+# Each process holds a shared flock on an entry's "refs" file while it is
+# attached, which makes the kernel keep the cross-process reference count.
+# When a fingerprint changes (new data, edited spec, registry reload) the old
+# attachment is dropped and superseded entries are deleted as soon as no
+# process holds a reference.
+#
+# Entries are per (dataset, seed, sample_size), which clients choose freely, so
+# both sides are bounded: a process keeps at most DATASET_ARENA_MAX_ATTACHED
+# entries attached (least recently used ones are detached and deleted once
+# unreferenced), and after each build unreferenced entries are deleted least
+# recently attached first until data/.arena fits DATASET_ARENA_MAX_BYTES.
+
+ARENA_FORMAT_VERSION = 1
+# Attempts at attaching an entry that another process deletes in between.
+ATTACH_ATTEMPTS = 2
+
+Preprocessed = Tuple[pd.DataFrame, np.ndarray, Dict, Dict, list]
+
+
+def arena_enabled() -> bool:
+    """DATASET_ARENA=off preprocesses in every process instead (also the case without fcntl)."""
+    return fcntl is not None and os.getenv("DATASET_ARENA", "auto").strip().lower() not in {"off", "0", "false"}
+
+
+def get_max_attached() -> int:
+    """Entries one process keeps attached (open refs descriptor and mappings)."""
+    try:
+        return max(1, int(os.getenv("DATASET_ARENA_MAX_ATTACHED", "8")))
+    except ValueError:
+        return 8
+
+
+def get_max_bytes() -> int:
+    """Disk budget for data/.arena; 0 disables the cap."""
+    try:
+        return max(0, int(os.getenv("DATASET_ARENA_MAX_BYTES", str(8 * 1024 ** 3))))
+    except ValueError:
+        return 8 * 1024 ** 3
+
+
+def arena_fingerprint(cfg: DatasetConfig, seed: int, sample_size: int | None) -> str:
+    key = {
+        "format": ARENA_FORMAT_VERSION,
+        "dataset": cfg.id,
+        "seed": seed,
+        "sample_size": sample_size,
+        "sources": source_stamps(cfg),
+        "spec": spec_stamp(cfg),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _prefix(cfg: DatasetConfig, seed: int, sample_size: int | None) -> str:
+    return f"{cfg.id}-{seed}-{sample_size if sample_size is not None else 'default'}"
+
+
+def _read_manifest(entry_dir: Path) -> dict | None:
+    try:
+        with (entry_dir / "manifest.json").open("r", encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == ARENA_FORMAT_VERSION else None
+
+
+# ── Building ──
+
+def _write_entry(entry_dir: Path, result: Preprocessed) -> None:
+    x_processed, y, cat_info, labels, interaction_specs = result
+    build_dir = Path(tempfile.mkdtemp(prefix=f".{entry_dir.name}-", dir=entry_dir.parent))
+    try:
+        columns = []
+        for index, name in enumerate(x_processed.columns):
+            series = x_processed[name]
+            file_name = f"x{index}.npy"
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                np.save(build_dir / file_name, series.cat.codes.to_numpy())
+                columns.append({"name": name, "kind": "categorical", "file": file_name,
+                                "categories": [str(value) for value in series.cat.categories]})
+                continue
+            np.save(build_dir / file_name, series.to_numpy())
+            columns.append({"name": name, "kind": "numeric", "file": file_name})
+        np.save(build_dir / "index.npy", x_processed.index.to_numpy())
+        np.save(build_dir / "y.npy", np.asarray(y))
+        (build_dir / "refs").touch()
+        manifest = {
+            "format": ARENA_FORMAT_VERSION,
+            "rows": int(len(x_processed)),
+            "columns": columns,
+            "cat_info": cat_info,
+            "labels": labels,
+            "interaction_specs": interaction_specs,
+        }
+        with (build_dir / "manifest.json").open("w", encoding="utf-8") as file:
+            json.dump(manifest, file)
+        build_dir.rename(entry_dir)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+
+def _shareable(x_processed: pd.DataFrame) -> bool:
+    return all(
+        isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_numeric_dtype(dtype)
+        for dtype in x_processed.dtypes
+    )
+
+
+def _ensure_entry(cfg: DatasetConfig, seed: int, sample_size: int | None, entry_dir: Path) -> Preprocessed | None:
+    """Build the entry unless another process already did; returns the result if this process built it.
+
+    Returns ``None`` when the entry already existed. Results that cannot be
+    stored as plain columns are returned without creating an entry.
+    """
+    DATASET_ARENA_DIR.mkdir(parents=True, exist_ok=True)
+    prefix = entry_dir.name.rsplit("-", 1)[0]
+    with (DATASET_ARENA_DIR / f".{prefix}.lock").open("a+b") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            if _read_manifest(entry_dir) is not None:
+                return None
+            result = cfg.preprocessor(seed, sample_size)
+            if not _shareable(result[0]):
+                logger.warning("Dataset %s has columns the arena cannot share; keeping it per process.", cfg.id)
+                return result
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            _write_entry(entry_dir, result)
+            return None
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _entries(prefix: str | None = None) -> list[Path]:
+    """Entry directories, all of them or those of one (dataset, seed, sample_size) prefix."""
+    if not DATASET_ARENA_DIR.is_dir():
+        return []
+    return [
+        entry_dir
+        for entry_dir in DATASET_ARENA_DIR.iterdir()
+        if entry_dir.is_dir()
+        and not entry_dir.name.startswith(".")
+        and (prefix is None or entry_dir.name.rsplit("-", 1)[0] == prefix)
+    ]
+
+
+def _remove_if_unreferenced(entry_dir: Path) -> bool:
+    """Delete ``entry_dir`` unless some process is attached to it; returns whether it was deleted."""
+    try:
+        refs = (entry_dir / "refs").open("a+b")
+    except OSError:
+        return False
+    with refs:
+        try:
+            fcntl.flock(refs, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False  # still referenced by some process
+        shutil.rmtree(entry_dir, ignore_errors=True)
+    return True
+
+
+def _remove_unreferenced(prefix: str, keep: Path | None = None) -> None:
+    """Delete entries for ``prefix`` (other than ``keep``) that no process is attached to."""
+    for candidate in _entries(prefix):
+        if candidate != keep:
+            _remove_if_unreferenced(candidate)
+
+
+def _entry_bytes(entry_dir: Path) -> int:
+    return sum(path.stat().st_size for path in entry_dir.iterdir() if path.is_file())
+
+
+def _enforce_disk_budget(keep: Path) -> None:
+    """Delete unreferenced entries, least recently attached first, until the arena fits its budget."""
+    max_bytes = get_max_bytes()
+    if not max_bytes:
+        return
+    entries = []
+    for entry_dir in _entries():
+        try:
+            # Attaching touches "refs", so its mtime is the entry's last use on this host.
+            entries.append(((entry_dir / "refs").stat().st_mtime_ns, entry_dir, _entry_bytes(entry_dir)))
+        except OSError:
+            continue
+    total = sum(size for _, _, size in entries)
+    for _, entry_dir, size in sorted(entries, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        if entry_dir != keep and _remove_if_unreferenced(entry_dir):
+            total -= size
+
+
+# ── Attaching ──
+
+@dataclass
+class _Attachment:
+    fingerprint: str
+    entry_dir: Path
+    result: Preprocessed
+    refs: Any
+
+    def release(self) -> None:
+        # Closing the descriptor drops this process's shared lock (its reference).
+        self.refs.close()
+
+
+# Least recently used first.
+_attached: "OrderedDict[Tuple[str, int, int | None], _Attachment]" = OrderedDict()
+_attached_lock = threading.Lock()
+
+
+def _attach(entry_dir: Path) -> Tuple[Preprocessed, Any]:
+    refs = (entry_dir / "refs").open("rb")
+    try:
+        fcntl.flock(refs, fcntl.LOCK_SH)
+        os.utime(entry_dir / "refs")
+        manifest = _read_manifest(entry_dir)
+        if manifest is None:
+            raise OSError(f"Arena entry {entry_dir.name} is incomplete.")
+        data = {}
+        for column in manifest["columns"]:
+            values = np.load(entry_dir / column["file"], mmap_mode="r")
+            if column["kind"] == "categorical":
+                values = pd.Categorical.from_codes(values, categories=column["categories"])
+            data[column["name"]] = values
+        index = pd.Index(np.load(entry_dir / "index.npy", mmap_mode="r"))
+        # copy=False keeps every column a read-only view of its memory-mapped file.
+        x_processed = pd.DataFrame(data, index=index, copy=False)
+        y = np.load(entry_dir / "y.npy", mmap_mode="r")
+    except BaseException:
+        refs.close()
+        raise
+    result = (x_processed, y, manifest["cat_info"], manifest["labels"], manifest["interaction_specs"])
+    return result, refs
+
+
+def load_preprocessed(cfg: DatasetConfig, seed: int, sample_size: int | None = None) -> Preprocessed:
+    """The preprocessor result for (seed, sample_size), attached from the arena when enabled.
+
+    Returned arrays are read-only; callers copy before modifying them.
+    """
+    if not arena_enabled():
+        return cfg.preprocessor(seed, sample_size)
+
+    key = (cfg.id, seed, sample_size)
+    fingerprint = arena_fingerprint(cfg, seed, sample_size)
+    with _attached_lock:
+        attachment = _attached.get(key)
+        if attachment is not None:
+            _attached.move_to_end(key)
+    if attachment is not None and attachment.fingerprint == fingerprint:
+        return attachment.result
+
+    prefix = _prefix(cfg, seed, sample_size)
+    entry_dir = DATASET_ARENA_DIR / f"{prefix}-{fingerprint[:16]}"
+    for attempt in range(ATTACH_ATTEMPTS):
+        try:
+            unshared = _ensure_entry(cfg, seed, sample_size, entry_dir)
+            if unshared is not None:
+                return unshared
+            result, refs = _attach(entry_dir)
+            break
+        except OSError as exc:
+            # The entry may have been evicted by another process between building and attaching.
+            if attempt + 1 < ATTACH_ATTEMPTS:
+                continue
+            logger.warning("Dataset arena unavailable for %s (%s); preprocessing in process.", cfg.id, exc)
+            return cfg.preprocessor(seed, sample_size)
+
+    with _attached_lock:
+        previous = _attached.pop(key, None)
+        _attached[key] = _Attachment(fingerprint, entry_dir, result, refs)
+        evicted = []
+        while len(_attached) > get_max_attached():
+            evicted.append(_attached.popitem(last=False)[1])
+    if previous is not None:
+        previous.release()
+    for attachment in evicted:
+        attachment.release()
+        _remove_if_unreferenced(attachment.entry_dir)
+    _remove_unreferenced(prefix, keep=entry_dir)
+    _enforce_disk_budget(keep=entry_dir)
+    return result
+
+
+def release_dataset_arena(dataset: str | None = None) -> None:
+    """Detach this process (from all datasets when ``dataset`` is None) and delete unreferenced entries.
+
+    Frames already handed out stay valid: their mappings outlive the files.
+    """
+    with _attached_lock:
+        keys = [key for key in _attached if dataset is None or key[0] == dataset]
+        released = [_attached.pop(key) for key in keys]
+    for attachment in released:
+        attachment.release()
+    if fcntl is None:
+        return
+    for attachment in released:
+        _remove_if_unreferenced(attachment.entry_dir)
+    for entry_dir in _entries():
+        if dataset is None or entry_dir.name.startswith(f"{dataset}-"):
+            _remove_unreferenced(entry_dir.name.rsplit("-", 1)[0])
@@ -1,9 +1,16 @@
 from __future__ import annotations
 
+import logging
+import threading
+from collections.abc import Mapping
 from dataclasses import dataclass, field
-from typing import Any, Callable, Literal
+from pathlib import Path
+from typing import Any, Callable, Iterator, Literal
 
-from preprocessing import preprocess_bike_hourly, preprocess_mimic4_mean_100_full
+from paths import DATA_DIR, DATASET_SPECS_DIR
+
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
@@ -20,92 +27,186 @@ class DatasetConfig:
     default_features: list[str] | None = None
     # Per-dataset overrides for training hyperparameter defaults.
     training_defaults: dict[str, Any] = field(default_factory=dict)
+    # Raw files (relative to DATA_DIR) the preprocessor reads; their stamps fingerprint cached statistics.
+    source_files: list[str] = field(default_factory=list)
+    # Spec file the dataset was declared in.
+    spec_path: Path | None = None
+
+
+# ── Declarative dataset specs ────────────────────────────────────────────────
+# Every *.toml (or *.yaml/*.yml with PyYAML installed) file in dataset_specs/
+# declares one dataset: metadata at the top level plus a [preprocessing] table
+# run by preprocessing.engine. Specs are discovered on first registry access,
+# and each one is compiled (importing pandas/scikit-learn) on its first use.
+
+SPEC_SUFFIXES = (".toml", ".yaml", ".yml")
+TASK_TYPES = ("regression", "classification")
+
+
+def _load_toml():
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            return None
+    return tomllib
+
+
+def _load_yaml():
+    try:
+        import yaml
+    except ImportError:
+        return None
+    return yaml
+
+
+def load_spec_file(path: Path) -> dict[str, Any]:
+    """Parse a dataset spec file; raises ``ValueError`` if it cannot be read."""
+    if path.suffix == ".toml":
+        tomllib = _load_toml()
+        if tomllib is None:
+            raise ValueError(f"Reading {path.name} needs Python 3.11+ or the tomli package.")
+        with path.open("rb") as file:
+            try:
+                spec = tomllib.load(file)
+            except tomllib.TOMLDecodeError as exc:
+                raise ValueError(f"Invalid dataset spec {path.name}: {exc}") from exc
+    else:
+        yaml = _load_yaml()
+        if yaml is None:
+            raise ValueError(f"Reading {path.name} needs the PyYAML package.")
+        with path.open("r", encoding="utf-8") as file:
+            try:
+                spec = yaml.safe_load(file)
+            except yaml.YAMLError as exc:
+                raise ValueError(f"Invalid dataset spec {path.name}: {exc}") from exc
+    if not isinstance(spec, dict):
+        raise ValueError(f"Invalid dataset spec {path.name}: expected a table at the top level.")
+    return spec
+
+
+class _SpecPreprocessor:
+    """Preprocessor for a spec, compiled by preprocessing.engine on its first call."""
+
+    def __init__(self, dataset_id: str, preprocessing: dict[str, Any]) -> None:
+        self.dataset_id = dataset_id
+        self.preprocessing = preprocessing
+        self._compiled: Callable[..., Any] | None = None
+        self._lock = threading.Lock()
+
+    def __call__(self, seed: int, sample_size: int | None = None):
+        compiled = self._compiled
+        if compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    from preprocessing.engine import compile_dataset_spec
+
+                    self._compiled = compile_dataset_spec(self.dataset_id, self.preprocessing)
+                compiled = self._compiled
+        return compiled(seed, sample_size)
+
+
+def config_from_spec(spec: dict[str, Any], path: Path | None = None) -> DatasetConfig:
+    """Build a ``DatasetConfig`` from a parsed spec; raises ``ValueError`` if required keys are missing."""
+    name = path.name if path is not None else "<spec>"
+    dataset_id = str(spec.get("id") or (path.stem if path is not None else ""))
+    preprocessing = spec.get("preprocessing")
+    if not dataset_id:
+        raise ValueError(f"Dataset spec {name} needs an id.")
+    if spec.get("task_type") not in TASK_TYPES:
+        raise ValueError(f"Dataset spec {name}: task_type must be one of {list(TASK_TYPES)}.")
+    if not isinstance(preprocessing, dict) or not preprocessing.get("source"):
+        raise ValueError(f"Dataset spec {name} needs a [preprocessing] table with a source.")
+    return DatasetConfig(
+        id=dataset_id,
+        label=str(spec.get("label", dataset_id)),
+        summary=str(spec.get("summary", "")),
+        task_type=spec["task_type"],
+        preprocessor=_SpecPreprocessor(dataset_id, preprocessing),
+        descriptions=dict(spec.get("descriptions", {})),
+        default_features=list(spec["default_features"]) if spec.get("default_features") else None,
+        training_defaults=dict(spec.get("training_defaults", {})),
+        source_files=[str(preprocessing["source"])],
+        spec_path=path,
+    )
+
+
+def discover_datasets(spec_dir: Path = DATASET_SPECS_DIR) -> dict[str, DatasetConfig]:
+    """Read every spec in ``spec_dir``; unreadable specs are logged and skipped."""
+    configs: dict[str, DatasetConfig] = {}
+    paths = sorted(path for path in spec_dir.glob("*") if path.suffix in SPEC_SUFFIXES) if spec_dir.is_dir() else []
+    for path in paths:
+        try:
+            cfg = config_from_spec(load_spec_file(path), path)
+        except ValueError as exc:
+            logger.warning("Skipping dataset spec: %s", exc)
+            continue
+        if cfg.id in configs:
+            logger.warning("Skipping dataset spec %s: duplicate dataset id %s.", path.name, cfg.id)
+            continue
+        configs[cfg.id] = cfg
+    return configs
+
+
+class _Registry(Mapping):
+    """Read-only mapping of dataset id → ``DatasetConfig``, discovered on first access."""
+
+    def __init__(self, spec_dir: Path) -> None:
+        self.spec_dir = spec_dir
+        self._configs: dict[str, DatasetConfig] | None = None
+        self._lock = threading.Lock()
+
+    def _loaded(self) -> dict[str, DatasetConfig]:
+        configs = self._configs
+        if configs is None:
+            with self._lock:
+                if self._configs is None:
+                    self._configs = discover_datasets(self.spec_dir)
+                configs = self._configs
+        return configs
+
+    def reload(self) -> None:
+        """Forget discovered specs so added or edited files are picked up on next access."""
+        with self._lock:
+            self._configs = None
+
+    def __getitem__(self, dataset_id: str) -> DatasetConfig:
+        return self._loaded()[dataset_id]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaded())
+
+    def __len__(self) -> int:
+        return len(self._loaded())
+
+
+REGISTRY = _Registry(DATASET_SPECS_DIR)
+
+
+def source_stamps(cfg: DatasetConfig) -> list[list[Any]]:
+    """[name, size, mtime_ns] per source file (None stamps when missing), for cache fingerprints."""
+    stamps: list[list[Any]] = []
+    for name in cfg.source_files:
+        try:
+            stat = (DATA_DIR / name).stat()
+        except OSError:
+            stamps.append([name, None, None])
+            continue
+        stamps.append([name, stat.st_size, stat.st_mtime_ns])
+    return stamps
 
 
-REGISTRY: dict[str, DatasetConfig] = {
-    "bike_hourly": DatasetConfig(
-        id="bike_hourly",
-        label="Bike sharing (hourly)",
-        summary="Hourly rentals with weather/seasonality.",
-        task_type="regression",
-        preprocessor=lambda seed, sample_size=None: preprocess_bike_hourly(seed),
-        descriptions={
-            "Time of Day":      "Hour of the day when rentals were counted.",
-            "Windspeed":        "Normalized wind speed converted to an estimated km/h scale.",
-            "Temperature":      "Air temperature converted to an estimated Celsius scale.",
-            "Humidity":         "Relative humidity on a 0 to 100 scale.",
-            "Weathersituation": "Observed weather condition, from clear to rain.",
-            "Type of Day":      "Whether the observation falls on a working day, weekend, or holiday.",
-        },
-    ),
-    "mimic4_mean_100_full": DatasetConfig(
-        id="mimic4_mean_100_full",
-        label="MIMIC-IV mortality",
-        summary="ICU cohort with demographics, length of stay, and mean vital/lab features.",
-        task_type="classification",
-        preprocessor=preprocess_mimic4_mean_100_full,
-        descriptions={
-            # Demographics
-            "Age":                   "Patient age at ICU admission.",
-            "Eth":                   "Patient ethnicity.",
-            "Sex":                   "Patient sex.",
-            # Stay info
-            "LOS":                   "Length of ICU stay in days.",
-            # Vitals
-            "HR+100%mean":           "Mean heart rate (beats/min).",
-            "RR+100%mean":           "Mean respiratory rate (breaths/min).",
-            "SBP+100%mean":          "Mean systolic blood pressure (mmHg).",
-            "DBP+100%mean":          "Mean diastolic blood pressure (mmHg).",
-            "MBP+100%mean":          "Mean mean arterial pressure (mmHg).",
-            "Temp+100%mean":         "Mean body temperature (°C).",
-            # Anthropometrics
-            "Weight+100%mean":       "Mean body weight during ICU stay (kg).",
-            "Height+100%mean":       "Mean height during ICU stay (cm).",
-            "Bmi+100%mean":          "Mean body mass index during stay.",
-            # Neurological
-            "GCST+100%mean":         "Mean Glasgow Coma Scale total score (3–15); lower = more impaired.",
-            # Respiratory / blood gas
-            "FiO2+100%mean":         "Mean fraction of inspired oxygen (0–1).",
-            "PaO2+100%mean":         "Mean partial pressure of arterial oxygen (mmHg).",
-            "PaCO2+100%mean":        "Mean partial pressure of arterial CO₂ (mmHg).",
-            "Ph+100%mean":           "Mean arterial blood pH.",
-            "HCO3+100%mean":         "Mean serum bicarbonate (mEq/L) — acid-base balance.",
-            # Metabolic / glucose
-            "GLU+100%mean":          "Mean blood glucose level (mg/dL).",
-            "Lactate+100%mean":      "Mean blood lactate (mmol/L) — tissue perfusion marker.",
-            "AnionGAP+100%mean":     "Mean anion gap (mEq/L) — metabolic acidosis indicator.",
-            # Electrolytes
-            "Kalium+100%mean":       "Mean serum potassium (mEq/L).",
-            "Natrium+100%mean":      "Mean serum sodium (mEq/L).",
-            # Kidney
-            "Kreatinin+100%mean":    "Mean serum creatinine (mg/dL) — kidney function marker.",
-            "Urea+100%mean":         "Mean blood urea nitrogen (mg/dL).",
-            # Liver
-            "Bilirubin+100%mean":    "Mean total bilirubin (mg/dL) — liver function marker.",
-            "ALAT+100%mean":         "Mean alanine aminotransferase (U/L) — liver enzyme.",
-            "ASAT+100%mean":         "Mean aspartate aminotransferase (U/L) — liver enzyme.",
-            "Albumin+100%mean":      "Mean serum albumin (g/dL) — nutritional and hepatic marker.",
-            # Haematology
-            "Hb+100%mean":           "Mean hemoglobin concentration (g/dL).",
-            "Leukocyten+100%mean":   "Mean white blood cell count (10³/μL).",
-            "Thrombocyten+100%mean": "Mean platelet count (10³/μL).",
-            "Quick+100%mean":        "Mean Quick / prothrombin time (%) — coagulation marker.",
-        },
-        # Set to a list of feature key strings to preselect specific features for the study.
-        # Example: default_features=["Age", "LOS", "HR+100%mean", "GCST+100%mean"]
-        default_features=None,
-        training_defaults={
-            "seed": 3,
-            "n_estimators": 100,
-            "boost_rate": 0.1,
-            "init_reg": 1.0,
-            "elm_alpha": 1.0,
-            "early_stopping": 50,
-            "n_hid": 10,
-            "sample_size": 1000,
-        },
-    ),
-}
+def spec_stamp(cfg: DatasetConfig) -> list[int] | None:
+    """[size, mtime_ns] of the spec file (None without one), for cache fingerprints."""
+    if cfg.spec_path is None:
+        return None
+    try:
+        stat = cfg.spec_path.stat()
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
 
 
 def get_dataset(dataset_id: str) -> DatasetConfig:
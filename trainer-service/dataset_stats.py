@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import shutil
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset_arena import load_preprocessed
+from dataset_registry import DatasetConfig, source_stamps, spec_stamp
+from paths import DATASET_STATS_DIR
+from preprocessing.common import category_codes
+from preprocessing.streaming import QuantileSketch
+
+
+# ── Dataset statistics store ─────────────────────────────────────────────────
+# Feature summaries are computed from one preprocessor run per fingerprint
+# (dataset, seed, sample_size and the size/mtime stamps of its source and spec
+# files, as for the dataset arena) and persisted as JSON under data/.dataset_stats. Categorical features keep
+# exact category counts; numeric features keep count/min/max/moments plus
+# either their exact distinct values with counts (when there are few) or a
+# quantile sketch. Histograms for any bin count are derived from those without
+# touching the raw data again.
+
+STATS_FORMAT_VERSION = 1
+
+# Numeric features with at most this many distinct values store them exactly,
+# which makes every derived histogram identical to one over the raw column.
+EXACT_VALUES_LIMIT = 4096
+
+MAX_BINS = 500
+
+# Rendered summaries are memoized per (fingerprint, bins, features); bounded by entry count.
+MAX_MEMOIZED_SUMMARIES = 256
+
+_memory: Dict[Tuple[str, int, int | None], Tuple[str, Dict]] = {}
+_summaries: Dict[Tuple[str, int | None, Tuple[str, ...] | None], List[Dict]] = {}
+_memory_lock = threading.Lock()
+
+
+def default_bin_count(count: int) -> int:
+    return min(24, max(8, int(np.sqrt(count))))
+
+
+def stats_fingerprint(cfg: DatasetConfig, seed: int, sample_size: int | None) -> str:
+    key = {
+        "format": STATS_FORMAT_VERSION,
+        "dataset": cfg.id,
+        "seed": seed,
+        "sample_size": sample_size,
+        "sources": source_stamps(cfg),
+        "spec": spec_stamp(cfg),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _numeric_stats(values: np.ndarray, missing: int) -> Dict:
+    stats: Dict = {"count": int(len(values)), "missing": int(missing)}
+    if len(values) == 0:
+        return {**stats, "min": None, "max": None, "mean": None, "std": None}
+    stats.update(
+        min=float(values.min()),
+        max=float(values.max()),
+        mean=float(values.mean()),
+        std=float(values.std()),
+    )
+    distinct, counts = np.unique(values, return_counts=True)
+    if len(distinct) <= EXACT_VALUES_LIMIT:
+        stats["values"] = distinct.tolist()
+        stats["counts"] = counts.tolist()
+    else:
+        sketch = QuantileSketch()
+        sketch.update(values)
+        stats["sketch"] = sketch.to_dict()
+    return stats
+
+
+def compute_dataset_stats(cfg: DatasetConfig, seed: int, sample_size: int | None = None) -> Dict:
+    """Run the preprocessor once and summarize every (non-interaction) feature."""
+    x_processed, _y_full, cat_info, labels, interaction_specs = load_preprocessed(cfg, seed, sample_size)
+    dummy_keys = {col for spec in interaction_specs for col in spec["dummy_cols"]}
+    features: List[Dict] = []
+    for key in (col for col in x_processed.columns if col not in dummy_keys):
+        entry: Dict = {"key": key, "label": labels.get(key, key)}
+        if key in cat_info:
+            codes = category_codes(key, x_processed, cat_info)
+            counts = np.bincount(codes[codes >= 0], minlength=len(cat_info[key]))
+            entry["kind"] = "categorical"
+            entry["categories"] = [
+                {"label": category, "count": int(count)}
+                for category, count in zip(cat_info[key], counts.tolist())
+            ]
+        else:
+            numeric = pd.to_numeric(x_processed[key], errors="coerce")
+            values = numeric.dropna().to_numpy(dtype=float)
+            entry["kind"] = "continuous"
+            entry.update(_numeric_stats(values, int(numeric.isna().sum())))
+        features.append(entry)
+    return {
+        "format": STATS_FORMAT_VERSION,
+        "dataset": cfg.id,
+        "seed": seed,
+        "sample_size": sample_size,
+        "rows": int(len(x_processed)),
+        "features": features,
+    }
+
+
+def _read_stats(path) -> Dict | None:
+    try:
+        with path.open("r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_stats(path, stats: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as file:
+        json.dump(stats, file, separators=(",", ":"))
+    tmp_path.replace(path)
+
+
+def get_dataset_stats(cfg: DatasetConfig, seed: int, sample_size: int | None = None) -> Dict:
+    """Return stored statistics, computing and persisting them on the first request."""
+    return _load_dataset_stats(cfg, seed, sample_size, stats_fingerprint(cfg, seed, sample_size))
+
+
+def _load_dataset_stats(cfg: DatasetConfig, seed: int, sample_size: int | None, fingerprint: str) -> Dict:
+    memory_key = (cfg.id, seed, sample_size)
+    with _memory_lock:
+        cached = _memory.get(memory_key)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    prefix = f"{cfg.id}-{seed}-{sample_size if sample_size is not None else 'default'}"
+    path = DATASET_STATS_DIR / f"{prefix}-{fingerprint[:16]}.json"
+    stats = _read_stats(path)
+    if stats is None or stats.get("format") != STATS_FORMAT_VERSION:
+        stats = compute_dataset_stats(cfg, seed, sample_size)
+        _write_stats(path, stats)
+        for stale in DATASET_STATS_DIR.glob(f"{prefix}-*.json"):
+            if stale != path:
+                stale.unlink(missing_ok=True)
+
+    with _memory_lock:
+        _memory[memory_key] = (fingerprint, stats)
+    return stats
+
+
+def clear_dataset_stats(dataset: str | None = None) -> None:
+    """Drop cached statistics (all datasets when ``dataset`` is None)."""
+    with _memory_lock:
+        for key in [key for key in _memory if dataset is None or key[0] == dataset]:
+            del _memory[key]
+        _summaries.clear()
+    if dataset is None:
+        shutil.rmtree(DATASET_STATS_DIR, ignore_errors=True)
+        return
+    for path in DATASET_STATS_DIR.glob(f"{dataset}-*.json"):
+        path.unlink(missing_ok=True)
+
+
+def histogram(stats: Dict, bins: int | None = None) -> Tuple[List[int], float | None, float | None]:
+    """Histogram of a stored numeric feature as (counts, min, max)."""
+    if not stats.get("count"):
+        return [], None, None
+    bin_count = max(1, min(MAX_BINS, bins if bins is not None else default_bin_count(stats["count"])))
+    if "values" in stats:
+        counts, edges = np.histogram(stats["values"], bins=bin_count, weights=stats["counts"])
+        return [int(round(count)) for count in counts.tolist()], float(edges[0]), float(edges[-1])
+
+    # Sketch-backed features: bin counts from differences of the approximate CDF.
+    sketch = QuantileSketch.from_dict(stats["sketch"])
+    edges = np.linspace(stats["min"], stats["max"], bin_count + 1)
+    ranks = [0.0] + [sketch.rank(edge) for edge in edges[1:-1]] + [float(stats["count"])]
+    counts = np.diff(np.round(ranks)).clip(min=0)
+    return [int(count) for count in counts.tolist()], float(edges[0]), float(edges[-1])
+
+
+def summarize_features(
+    stats: Dict,
+    descriptions: Dict[str, str],
+    bins: int | None = None,
+    features: List[str] | None = None,
+) -> List[Dict]:
+    """Render stored statistics in the /datasets/{dataset}/features response shape.
+
+    Raises ``KeyError`` listing any requested feature that is not in the dataset.
+    """
+    entries = stats["features"]
+    if features is not None:
+        by_key = {entry["key"]: entry for entry in entries}
+        unknown = [key for key in features if key not in by_key]
+        if unknown:
+            raise KeyError(", ".join(unknown))
+        entries = [by_key[key] for key in features]
+
+    summary: List[Dict] = []
+    for entry in entries:
+        base = {"key": entry["key"], "label": entry["label"], "description": descriptions.get(entry["key"], "")}
+        if entry["kind"] == "categorical":
+            summary.append({**base, "kind": "categorical", "categories": entry["categories"]})
+            continue
+        counts, min_value, max_value = histogram(entry, bins)
+        summary.append({
+            **base,
+            "kind": "continuous",
+            "bins": counts,
+            "min": min_value,
+            "max": max_value,
+            "mean": entry["mean"],
+            "std": entry["std"],
+        })
+    return summary
+
+
+def get_feature_summary(
+    cfg: DatasetConfig,
+    seed: int,
+    bins: int | None = None,
+    features: List[str] | None = None,
+) -> List[Dict]:
+    """Feature summary for the endpoint, answered from the store (see ``summarize_features``)."""
+    fingerprint = stats_fingerprint(cfg, seed, None)
+    memo_key = (fingerprint, bins, tuple(features) if features is not None else None)
+    with _memory_lock:
+        summary = _summaries.get(memo_key)
+    if summary is not None:
+        return summary
+
+    stats = _load_dataset_stats(cfg, seed, None, fingerprint)
+    summary = summarize_features(stats, cfg.descriptions, bins, features)
+    with _memory_lock:
+        if len(_summaries) >= MAX_MEMOIZED_SUMMARIES:
+            _summaries.clear()
+        _summaries[memo_key] = summary
+    return summary
@@ -1,47 +1,193 @@
 from __future__ import annotations
 
-from pathlib import Path
+import argparse
+import hashlib
+import http.client
+import logging
+import os
 import re
+import time
+import urllib.error
 import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict
 
 from paths import DATA_DIR
 
 
-DATASETS = {
-    "bike.csv": "1FhiamQAkPqF0OH8vYfxoo98VLTbxHFjy",
+logger = logging.getLogger(__name__)
+
+# File name → Google Drive id and the expected SHA-256 of the file. A missing
+# checksum skips verification (and resuming from an earlier run's partial
+# file); the digest of the download is logged so it can be pinned here.
+DATASETS: Dict[str, Dict[str, str | None]] = {
+    "bike.csv": {
+        "drive_id": "1FhiamQAkPqF0OH8vYfxoo98VLTbxHFjy",
+        "sha256": "4c8215e0310ab9799ba074b6146c4f8b6e64151e82a9d9d0291688ade0bd10f6",
+    },
 }
 
+DRIVE_DOWNLOAD_URL = "https://drive.google.com/uc?export=download"
+CHUNK_BYTES = 1 << 20
+MAX_ATTEMPTS = 3
+# The confirm-token interstitial is a small HTML page; never buffer more than this of it.
+MAX_CONFIRM_PAGE_BYTES = 1 << 20
+DEFAULT_WORKERS = 4
+
+_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+def _partial_path(dest: Path) -> Path:
+    return dest.with_name(dest.name + ".part")
+
+
+def _hash_existing(path: Path, digest) -> int:
+    size = 0
+    with path.open("rb") as file:
+        for block in iter(lambda: file.read(CHUNK_BYTES), b""):
+            digest.update(block)
+            size += len(block)
+    return size
+
+
+def _open(url: str, offset: int = 0):
+    headers = dict(_HEADERS)
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+    return urllib.request.urlopen(urllib.request.Request(url, headers=headers))
+
+
+def _stream_to_partial(url: str, part: Path):
+    """Append the remainder of ``url`` to ``part``; returns the SHA-256 digest of the whole file."""
+    digest = hashlib.sha256()
+    offset = _hash_existing(part, digest) if part.exists() else 0
+    try:
+        resp = _open(url, offset)
+    except urllib.error.HTTPError as exc:
+        if exc.code == 416 and offset:
+            # Nothing left to fetch: an earlier run already wrote the whole file.
+            return digest
+        raise
+    with resp:
+        if offset and resp.status != 206:
+            # The server ignored the Range header; start over from the first byte.
+            digest = hashlib.sha256()
+            offset = 0
+        expected = resp.headers.get("Content-Length")
+        received = 0
+        with part.open("ab" if offset else "wb") as file:
+            for block in iter(lambda: resp.read(CHUNK_BYTES), b""):
+                file.write(block)
+                digest.update(block)
+                received += len(block)
+    if expected is not None and received < int(expected):
+        # read(amt) reports a dropped connection as a short read; the next attempt resumes.
+        raise http.client.IncompleteRead(b"", int(expected) - received)
+    return digest
 
-def _download_from_drive(file_id: str, dest: Path) -> None:
-    base_url = "https://drive.google.com/uc?export=download"
+
+def download_file(url: str, dest: Path, sha256: str | None = None, attempts: int = MAX_ATTEMPTS) -> str:
+    """Stream ``url`` to ``dest`` and return the file's SHA-256.
+
+    Data is written in chunks to ``<dest>.part`` and renamed into place only
+    once complete (and, with ``sha256`` given, verified). Interrupted
+    transfers resume from the partial file via an HTTP Range request across
+    retries here and, when ``sha256`` is given, across separate runs; without
+    a checksum nothing would catch a partial file that belongs to an older
+    version of the remote file, so an earlier run's partial file is discarded.
+    Raises ``RuntimeError`` on a checksum mismatch or when every attempt fails.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    part = _partial_path(dest)
+    if sha256 is None and part.exists():
+        logger.info("Discarding partial download of %s: no checksum to verify a resumed file.", dest.name)
+        part.unlink()
+    digest = None
+    for attempt in range(1, attempts + 1):
+        try:
+            digest = _stream_to_partial(url, part)
+            break
+        except (urllib.error.URLError, http.client.HTTPException, ConnectionError, TimeoutError) as exc:
+            logger.warning("Download of %s failed (attempt %d/%d): %s", dest.name, attempt, attempts, exc)
+            if attempt == attempts:
+                raise RuntimeError(f"Could not download {dest.name}: {exc}") from exc
+            time.sleep(min(2 ** attempt, 10))
+
+    actual = digest.hexdigest()
+    if sha256 is not None and actual != sha256.lower():
+        part.unlink(missing_ok=True)
+        raise RuntimeError(f"Checksum mismatch for {dest.name}: expected {sha256}, got {actual}.")
+    os.replace(part, dest)
+    return actual
+
+
+def _resolve_drive_url(file_id: str, base_url: str = DRIVE_DOWNLOAD_URL) -> str:
+    """Return the direct download URL, following Drive's confirm-token page for large files."""
     url = f"{base_url}&id={urllib.parse.quote(file_id)}"
-    req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urllib.request.urlopen(req) as resp:
-        content_type = resp.headers.get("Content-Type", "")
-        data = resp.read()
+    with _open(url) as resp:
+        if "text/html" not in resp.headers.get("Content-Type", ""):
+            return url
+        text = resp.read(MAX_CONFIRM_PAGE_BYTES).decode("utf-8", errors="ignore")
+    match = re.search(r"confirm=([0-9A-Za-z_]+)", text)
+    if match:
+        return f"{base_url}&confirm={match.group(1)}&id={urllib.parse.quote(file_id)}"
+    return url
+
 
-    if "text/html" in content_type:
-        text = data.decode("utf-8", errors="ignore")
-        match = re.search(r"confirm=([0-9A-Za-z_]+)", text)
-        if match:
-            token = match.group(1)
-            url = f"{base_url}&confirm={token}&id={urllib.parse.quote(file_id)}"
-            req = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
-            with urllib.request.urlopen(req) as resp:
-                data = resp.read()
+def _download_from_drive(file_id: str, dest: Path, sha256: str | None = None, base_url: str = DRIVE_DOWNLOAD_URL) -> str:
+    return download_file(_resolve_drive_url(file_id, base_url), dest, sha256)
 
-    dest.write_bytes(data)
 
+def _download_entry(name: str, entry: Dict[str, str | None], base_url: str) -> str:
+    dest = DATA_DIR / name
+    digest = _download_from_drive(entry["drive_id"], dest, entry.get("sha256"), base_url)
+    if entry.get("sha256") is None:
+        logger.info("Downloaded %s (sha256 %s; add it to DATASETS to verify future downloads).", name, digest)
+    else:
+        logger.info("Downloaded and verified %s.", name)
+    return digest
 
-def download_datasets_if_missing() -> None:
+
+def download_datasets_if_missing(
+    force: bool = False,
+    workers: int = DEFAULT_WORKERS,
+    base_url: str = DRIVE_DOWNLOAD_URL,
+) -> Dict[str, str]:
+    """Fetch missing datasets concurrently; returns ``{name: sha256}`` for the files downloaded.
+
+    Raises ``RuntimeError`` listing every dataset that failed; the others are
+    still downloaded.
+    """
     DATA_DIR.mkdir(parents=True, exist_ok=True)
-    for name, file_id in DATASETS.items():
-        dest = DATA_DIR / name
-        if dest.exists():
-            continue
-        _download_from_drive(file_id, dest)
+    pending = {name: entry for name, entry in DATASETS.items() if force or not (DATA_DIR / name).exists()}
+    if not pending:
+        return {}
+
+    results: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pending)))) as executor:
+        futures = {executor.submit(_download_entry, name, entry, base_url): name for name, entry in pending.items()}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except (RuntimeError, OSError) as exc:
+                errors[name] = str(exc)
+    if errors:
+        raise RuntimeError("; ".join(f"{name}: {message}" for name, message in sorted(errors.items())))
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Download the trainer datasets into trainer-service/data.")
+    parser.add_argument("--force", action="store_true", help="re-download files that already exist")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="concurrent downloads")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    download_datasets_if_missing(force=args.force, workers=args.workers)
 
 
 if __name__ == "__main__":
-    download_datasets_if_missing()
+    main()
@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+from cross_validation import PoolRun, PoolTask, fit_and_score, pool_parallelism, share_training_data
+from shared_arrays import SharedArrays
+from training import (
+    INTERACTION_GRID_POINTS,
+    TrainingData,
+    TrainingParams,
+    additive_intercept,
+    build_interaction_shapes,
+    evaluate_contribs,
+)
+
+
+# ── Multi-seed ensembles ─────────────────────────────────────────────────────
+# With ensemble_seeds=N, /train fits the requested model for the seeds
+# seed, seed+1, ..., seed+N-1 on the same training rows. The first fit runs in
+# the request's process as usual; the others run in parallel on the
+# cross-validation worker pool, which maps the training rows from a shared-
+# memory bundle. Every member's shape functions are evaluated on the common
+# grid (num_points knots spanning all members' ranges, as in
+# normalize_numeric_shape_points, or the categories), the mean becomes the
+# ensemble's shape, and the spread across seeds is returned as band arrays
+# next to each shape's values.
+
+MIN_ENSEMBLE_SEEDS = 2
+MAX_ENSEMBLE_SEEDS = 16
+# Quantiles reported as the band's lower and upper edge.
+BAND_QUANTILES = (0.05, 0.95)
+
+
+def clamp_ensemble_seeds(n_seeds: int) -> int:
+    return max(MIN_ENSEMBLE_SEEDS, min(MAX_ENSEMBLE_SEEDS, n_seeds))
+
+
+# ── Worker side ──
+
+def _train_rows(arrays: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    # Members are only fitted; there are no held-out rows to score.
+    return arrays["train"], np.zeros(0, dtype=np.int64)
+
+
+def _fit_seed(task: PoolTask) -> Dict:
+    fit = fit_and_score(task, _train_rows)
+    return {
+        "seed": task.params.seed,
+        "shapeFunctions": fit.shape_functions,
+        # Kept by the model cache so a reshape can re-aggregate at another resolution.
+        "nativeShapeFunctions": fit.native_shapes,
+        "intercept": fit.intercept,
+    }
+
+
+# ── Parent side ──
+
+def _band(curves: np.ndarray) -> Dict:
+    """Spread across members (axis 0) of stacked curves or grids."""
+    lower, median, upper = np.quantile(curves, [BAND_QUANTILES[0], 0.5, BAND_QUANTILES[1]], axis=0)
+    return {
+        "lower": lower.tolist(),
+        "median": median.tolist(),
+        "upper": upper.tolist(),
+        "std": (curves.std(axis=0, ddof=1) if len(curves) > 1 else np.zeros(curves.shape[1:])).tolist(),
+        "min": curves.min(axis=0).tolist(),
+        "max": curves.max(axis=0).tolist(),
+    }
+
+
+@dataclass
+class EnsembleShapes:
+    """The members' shape functions on the common grid and their mean."""
+
+    seeds: List[int]
+    mean: Dict
+    # Per model key: members x grid points (or categories).
+    curves: Dict[str, np.ndarray]
+    member_functions: List[Dict]
+    member_intercepts: List[float]
+
+    def summary(self) -> Dict:
+        return {"seeds": self.seeds, "bandQuantiles": list(BAND_QUANTILES)}
+
+    def intercept(self, task_type: str, model, y_train: np.ndarray, total_train: np.ndarray) -> float:
+        """Regression refits the offset to the mean shapes; classification averages the members' intercepts."""
+        intercept = additive_intercept(task_type, model, y_train, total_train)
+        if task_type != "classification":
+            return intercept
+        return float(np.mean([intercept] + self.member_intercepts))
+
+    def add_bands(
+        self,
+        shapes: List[Dict],
+        interaction_specs: List[Dict],
+        x_train,
+        cat_info: Dict,
+        label_map: Dict,
+        n_grid: int = INTERACTION_GRID_POINTS,
+    ) -> None:
+        """Attach a ``band`` to every response shape; interaction grids are rebuilt per member."""
+        grids: Dict[str, List] = {}
+        for functions in self.member_functions:
+            for shape in build_interaction_shapes(functions, interaction_specs, x_train, cat_info, label_map, n_grid):
+                grids.setdefault(shape["key"], []).append(shape["editableZ"])
+        for shape in shapes:
+            if shape["key"] in grids and len(grids[shape["key"]]) == len(self.seeds):
+                shape["band"] = _band(np.asarray(grids[shape["key"]], dtype=float))
+            elif shape["key"] in self.curves and "editableZ" not in shape:
+                shape["band"] = _band(self.curves[shape["key"]])
+
+
+def aggregate_seed_shapes(
+    main_seed: int,
+    main_functions: Dict,
+    members: List[Dict],
+    model_keys: List[str],
+    cat_info: Dict,
+    num_points: int,
+) -> EnsembleShapes:
+    """Put the main fit's and the members' shape functions on a common grid and average them."""
+    member_functions = [main_functions] + [member["shapeFunctions"] for member in members]
+    common: List[Dict] = [{} for _ in member_functions]
+    mean: Dict = {}
+    curves: Dict[str, np.ndarray] = {}
+    for key in model_keys:
+        functions = [functions.get(key, {}) for functions in member_functions]
+        present = [shape_fn for shape_fn in functions if shape_fn]
+        if not present:
+            mean[key] = {}
+            continue
+        if key in cat_info or present[0].get("datatype") == "categorical":
+            grid = list(cat_info.get(key) or dict.fromkeys(str(x) for shape_fn in present for x in shape_fn.get("x", [])))
+            values = np.array([evaluate_contribs(shape_fn, np.asarray(grid, dtype=object)) for shape_fn in functions])
+        else:
+            xs = [np.asarray(shape_fn.get("x", []), dtype=float) for shape_fn in present]
+            xs = [x for x in xs if len(x)]
+            low = min((float(x.min()) for x in xs), default=0.0)
+            high = max((float(x.max()) for x in xs), default=0.0)
+            grid = np.linspace(low, high, num_points).tolist() if num_points > 1 else [low]
+            values = np.array([evaluate_contribs(shape_fn, np.asarray(grid)) for shape_fn in functions])
+        curves[key] = values
+        for member, row in zip(common, values):
+            member[key] = {**present[0], "x": grid, "y": row.tolist()}
+        mean[key] = {**present[0], "x": grid, "y": values.mean(axis=0).tolist()}
+    return EnsembleShapes(
+        seeds=[main_seed] + [member["seed"] for member in members],
+        mean=mean,
+        curves=curves,
+        member_functions=common,
+        member_intercepts=[member["intercept"] for member in members],
+    )
+
+
+class EnsembleRun(PoolRun):
+    """Member fits submitted to the pool; ``result()`` waits for them, leaving the context stops them and releases the bundle."""
+
+    def __init__(self, tasks: List[PoolTask], shared: SharedArrays, parallelism: int) -> None:
+        super().__init__(shared)
+        self._submit(_fit_seed, tasks, parallelism)
+
+    def result(self, check_abort: Callable[[], None] | None = None) -> List[Dict]:
+        return self._collect(check_abort)
+
+
+def start_ensemble(
+    data: TrainingData,
+    params: TrainingParams,
+    n_seeds: int,
+    train_idx: np.ndarray,
+    parallelism: int | None = None,
+) -> EnsembleRun:
+    """Share the training rows and submit one fit per extra seed; use the result as a context manager.
+
+    ``parallelism`` is the number of extra seeds fitted at once next to the
+    main fit (default: ``pool_parallelism``); 0 fits them here afterwards.
+    """
+    n_seeds = clamp_ensemble_seeds(n_seeds)
+    if parallelism is None:
+        parallelism = pool_parallelism(n_seeds - 1, 1)
+    shared, layout = share_training_data(data, {"train": train_idx})
+    tasks = [
+        PoolTask(
+            **layout,
+            params=dataclasses.replace(params, seed=params.seed + offset),
+            columns=tuple(data.x_processed.columns),
+            feature_keys=tuple(data.feature_keys),
+            interaction_specs=tuple(data.interaction_specs),
+        )
+        for offset in range(1, n_seeds)
+    ]
+    try:
+        return EnsembleRun(tasks, shared, parallelism)
+    except BaseException:
+        shared.release()
+        raise
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import json
+import math
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from cross_validation import PoolRun, PoolTask, fit_and_score, get_cv_max_workers, pool_parallelism, share_training_data
+from dataset_registry import get_dataset
+from dataset_stats import stats_fingerprint
+from json_utils import to_jsonable
+from metrics import LOWER_IS_BETTER, calc_metrics
+from schemas import FeatureSelectionRequest
+from split_cache import get_train_test_split
+from training import prepare_training_data, resolve_training_params
+from training_progress import TrainingAborted
+from training_scheduler import training_slot
+
+
+# ── Greedy feature selection ─────────────────────────────────────────────────
+# POST /train/feature-selection runs forward (add one feature per step) or
+# backward (remove one per step) greedy selection. The preprocessed dataset
+# and the cached train/test split are packed once into a shared-memory bundle;
+# every candidate subset of a step is fitted in parallel on the cross-
+# validation worker pool and scored on the held-out rows. The search stops
+# when the best step improves the metric by less than ``min_improvement``, or
+# on the step, size or time budget, and streams each accepted step as one
+# NDJSON line. Interactions are kept while both of their sources are selected.
+# When the client goes away the step in progress stops its candidate fits
+# (see stop_pool_fits) before the request gives up its training slots.
+
+DIRECTIONS = {"forward", "backward"}
+
+
+def default_metric(task_type: str) -> str:
+    return "acc" if task_type == "classification" else "rmse"
+
+
+@dataclass(frozen=True)
+class _CandidateTask(PoolTask):
+    # The feature added or removed by this candidate subset.
+    move: str
+
+
+# ── Worker side ──
+
+def _split_rows(arrays: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    return arrays["train"], arrays["test"]
+
+
+def _fit_candidate(task: _CandidateTask) -> Dict:
+    return {"move": task.move, **fit_and_score(task, _split_rows).metrics()}
+
+
+# ── Parent side ──
+
+class FeatureSelectionSearch(PoolRun):
+    """A prepared search; ``events()`` runs it step by step, leaving the context stops its fits and releases the bundle.
+
+    ``cancelled`` is polled while a step's candidates fit; once it returns
+    True the step raises ``TrainingAborted``.
+    """
+
+    def __init__(self, request: FeatureSelectionRequest, cancelled: Callable[[], bool] | None = None) -> None:
+        try:
+            cfg = get_dataset(request.dataset)
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Unknown dataset: {request.dataset}")
+
+        self.direction = request.direction
+        if self.direction not in DIRECTIONS:
+            raise HTTPException(status_code=400, detail=f"direction must be one of: {', '.join(sorted(DIRECTIONS))}.")
+        self.task_type = cfg.task_type
+        self.params = resolve_training_params(request, cfg.task_type)
+        self.metric = request.metric or default_metric(cfg.task_type)
+        probe = np.array([0.0, 1.0])
+        metric_names = [name for name in calc_metrics(cfg.task_type, probe, probe) if name != "count"]
+        if self.metric not in metric_names:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown metric for {cfg.task_type}: {self.metric} (expected one of: {', '.join(metric_names)}).",
+            )
+        self.min_improvement = request.min_improvement
+        self.max_features = request.max_features
+        self.max_steps = request.max_steps
+        self.time_budget = request.time_budget_seconds
+        self._cancelled = cancelled
+
+        data = prepare_training_data(request)
+        self.dataset = request.dataset
+        self.pool = list(data.feature_keys)
+        if not self.pool:
+            raise HTTPException(status_code=400, detail="No candidate features to select from.")
+        self._labels = dict(data.labels)
+        self._columns = list(data.x_processed.columns)
+        self._interaction_specs = list(data.interaction_specs)
+
+        fingerprint = stats_fingerprint(cfg, request.seed, request.sample_size)
+        split = get_train_test_split(
+            fingerprint, data.y_full, request.seed, request.sample_size, stratify=cfg.task_type == "classification"
+        )
+        shared, self._layout = share_training_data(data, {"train": split.train, "test": split.test})
+        super().__init__(shared)
+        self.fits = 0
+
+    def _task(self, move: str, subset: List[str]) -> _CandidateTask:
+        selected = set(subset)
+        specs = [spec for spec in self._interaction_specs if all(source in selected for source in spec["sources"])]
+        model_columns = selected | {col for spec in specs for col in spec["dummy_cols"]}
+        return _CandidateTask(
+            **self._layout,
+            params=self.params,
+            columns=tuple(col for col in self._columns if col in model_columns),
+            feature_keys=tuple(subset),
+            interaction_specs=tuple(specs),
+            move=move,
+        )
+
+    def _check_cancelled(self) -> None:
+        if self._cancelled is not None and self._cancelled():
+            raise TrainingAborted()
+
+    def _evaluate(self, candidates: Dict[str, List[str]]) -> List[Dict]:
+        tasks = [self._task(move, subset) for move, subset in candidates.items()]
+        self._submit(_fit_candidate, tasks, pool_parallelism(len(tasks)))
+        results = self._collect(self._check_cancelled)
+        self.fits += len(tasks)
+        for result in results:
+            result["score"] = result["testMetrics"].get(self.metric)
+        return results
+
+    def _gain(self, old: float | None, new: float | None) -> float:
+        """How much better ``new`` is than ``old`` (positive is better)."""
+        if new is None:
+            return -math.inf
+        if old is None:
+            return math.inf
+        return old - new if self.metric in LOWER_IS_BETTER else new - old
+
+    def _subset(self, features) -> List[str]:
+        selected = set(features)
+        return [key for key in self.pool if key in selected]
+
+    def _stop_reason(self, current: List[str], steps: int, started: float) -> str | None:
+        if self.max_steps is not None and steps >= self.max_steps:
+            return "max_steps"
+        if self.time_budget is not None and time.monotonic() - started >= self.time_budget:
+            return "time_budget"
+        if self.direction == "forward":
+            if self.max_features is not None and len(current) >= self.max_features:
+                return "max_features"
+            if len(current) == len(self.pool):
+                return "exhausted"
+        elif len(current) <= 1:
+            return "exhausted"
+        return None
+
+    def _step_event(self, step: int, action: str, feature: str | None, current: List[str], best: Dict, started: float, **extra) -> Dict:
+        return {
+            "event": "step",
+            "step": step,
+            "action": action,
+            "feature": feature,
+            "label": self._labels.get(feature, feature) if feature is not None else None,
+            "features": current,
+            "metric": self.metric,
+            "score": best["score"],
+            **extra,
+            "trainMetrics": best["trainMetrics"],
+            "testMetrics": best["testMetrics"],
+            "fits": self.fits,
+            "elapsedSeconds": time.monotonic() - started,
+        }
+
+    def events(self) -> Iterator[Dict]:
+        started = time.monotonic()
+        yield {
+            "event": "start",
+            "dataset": self.dataset,
+            "task": self.task_type,
+            "direction": self.direction,
+            "metric": self.metric,
+            "lowerIsBetter": self.metric in LOWER_IS_BETTER,
+            "candidates": self.pool,
+        }
+
+        current: List[str] = [] if self.direction == "forward" else list(self.pool)
+        score = None
+        if self.direction == "backward":
+            [full] = self._evaluate({"": current})
+            score = full["score"]
+            yield self._step_event(0, "start", None, current, full, started)
+
+        steps = 0
+        while True:
+            reason = self._stop_reason(current, steps, started)
+            if reason is not None:
+                break
+            if self.direction == "forward":
+                candidates = {key: self._subset(current + [key]) for key in self.pool if key not in current}
+            else:
+                candidates = {key: [other for other in current if other != key] for key in current}
+            results = self._evaluate(candidates)
+            best = max(results, key=lambda result: self._gain(score, result["score"]))
+            gain = self._gain(score, best["score"])
+            # Backward search removes features down to max_features whatever it costs.
+            forced = self.direction == "backward" and self.max_features is not None and len(current) > self.max_features
+            if gain < self.min_improvement and not forced:
+                reason = "min_improvement"
+                break
+            current = candidates[best["move"]]
+            score = best["score"]
+            steps += 1
+            ranked = sorted(results, key=lambda result: self._gain(0.0, result["score"]), reverse=True)
+            yield self._step_event(
+                steps,
+                "add" if self.direction == "forward" else "remove",
+                best["move"],
+                current,
+                best,
+                started,
+                improvement=gain if math.isfinite(gain) else None,
+                candidates=[{"feature": result["move"], "score": result["score"]} for result in ranked],
+            )
+
+        yield {
+            "event": "done",
+            "stopReason": reason,
+            "features": current,
+            "metric": self.metric,
+            "score": score,
+            "steps": steps,
+            "fits": self.fits,
+            "elapsedSeconds": time.monotonic() - started,
+        }
+
+
+def _ndjson_lines(search: FeatureSelectionSearch, stack: ExitStack) -> Iterator[bytes]:
+    with stack:
+        try:
+            for event in search.events():
+                yield json.dumps(to_jsonable(event), separators=(",", ":")).encode("utf-8") + b"\n"
+        except TrainingAborted:
+            # The client is gone; nobody reads an error line.
+            return
+        except (RuntimeError, HTTPException) as exc:
+            # The status line is already sent; report the failure in-band.
+            detail = exc.detail if isinstance(exc, HTTPException) else str(exc)
+            yield json.dumps({"event": "error", "detail": detail}).encode("utf-8") + b"\n"
+
+
+def stream_feature_selection(
+    request: FeatureSelectionRequest,
+    cancelled: Callable[[], bool] | None = None,
+) -> Iterator[bytes]:
+    """Admit and prepare the search now (raising HTTPException), then return its NDJSON event lines.
+
+    The training slot and the shared dataset are held until the stream ends
+    or the client goes away (``cancelled`` returns True), and until the
+    candidate fits in progress have stopped.
+    """
+    stack = ExitStack()
+    try:
+        # One slot per candidate fitted at once; _evaluate never runs more.
+        stack.enter_context(training_slot(fits=max(1, pool_parallelism(get_cv_max_workers()))))
+        search = stack.enter_context(FeatureSelectionSearch(request, cancelled))
+    except BaseException:
+        stack.close()
+        raise
+    return _ndjson_lines(search, stack)
@@ -26,6 +26,7 @@ def main() -> None:
     for dataset in datasets:
         request = TrainRequest(dataset=dataset, **training_preset)
         payload = to_jsonable(build_train_response(request))
+        payload.pop("memory", None)
         out_path = MODELS_DIR / f"{dataset}.json"
         with out_path.open("w", encoding="utf-8") as file:
             json.dump(payload, file, indent=2)
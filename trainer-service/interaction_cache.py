@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from preprocessing.common import INTERACTION_OPERATORS, make_interaction_spec
+
+
+# ── Interaction column cache ─────────────────────────────────────────────────
+# Interaction columns requested at train time are computed once per
+# (dataset fingerprint, seed, sample_size, k1, k2, operator) and kept in a
+# process-wide LRU bounded by bytes. The fingerprint is the caller's
+# dataset_stats.stats_fingerprint, built from source and spec file stamps, so
+# keying a lookup costs nothing per row and a spec edit starts a new key.
+# Exploring interaction sets across repeated trainings then only computes the
+# pairs that have not been seen before.
+
+CacheKey = Tuple[str, int, int | None, str, str, str]
+
+_cache: "OrderedDict[CacheKey, Tuple[Dict, List[str], np.ndarray]]" = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+
+def get_cache_max_bytes() -> int:
+    """Upper bound for the memory held by cached interaction columns."""
+    try:
+        return max(0, int(os.getenv("INTERACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024))))
+    except ValueError:
+        return 256 * 1024 * 1024
+
+
+def _cache_get(key: CacheKey):
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+        return entry
+
+
+def _cache_put(key: CacheKey, entry: Tuple[Dict, List[str], np.ndarray]) -> None:
+    global _cache_bytes
+    size = entry[2].nbytes
+    max_bytes = get_cache_max_bytes()
+    if size > max_bytes:
+        return
+    with _cache_lock:
+        if key in _cache:
+            return
+        _cache[key] = entry
+        _cache_bytes += size
+        while _cache_bytes > max_bytes and _cache:
+            _, (_, _, evicted) = _cache.popitem(last=False)
+            _cache_bytes -= evicted.nbytes
+
+
+def clear_interaction_cache() -> None:
+    global _cache_bytes
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def validate_interaction(x_processed: pd.DataFrame, cat_info: Dict, k1: str, k2: str, operator: str) -> None:
+    missing = [key for key in (k1, k2) if key not in x_processed.columns]
+    if missing:
+        raise ValueError(f"Unknown interaction feature(s): {', '.join(missing)}")
+    if k1 == k2:
+        raise ValueError(f"Interaction needs two different features, got {k1} twice.")
+    if operator not in INTERACTION_OPERATORS:
+        raise ValueError(f"Unsupported interaction operator: {operator}")
+    if operator != "product" and (k1 in cat_info or k2 in cat_info):
+        raise ValueError(f"Operator '{operator}' currently supports numerical-numerical feature pairs only.")
+
+
+def build_requested_interactions(
+    x_processed: pd.DataFrame,
+    cat_info: Dict,
+    labels: Dict,
+    interactions: List[Tuple[str, str, str]],
+    fingerprint: str,
+    seed: int,
+    sample_size: int | None,
+) -> Tuple[List[Dict], pd.DataFrame]:
+    """Return (interaction_specs, columns) for the requested (k1, k2, operator) triples.
+
+    Columns come from the cache when the same pair was computed for this
+    dataset fingerprint and sampling before; duplicates are built only once.
+    Raises ``ValueError`` for unknown features or unsupported operators.
+    """
+    specs: List[Dict] = []
+    names: List[str] = []
+    blocks: List[np.ndarray] = []
+    seen = set()
+    for k1, k2, operator in interactions:
+        validate_interaction(x_processed, cat_info, k1, k2, operator)
+        if (k1, k2, operator) in seen:
+            continue
+        seen.add((k1, k2, operator))
+
+        key: CacheKey = (fingerprint, seed, sample_size, k1, k2, operator)
+        entry = _cache_get(key)
+        if entry is None:
+            spec, columns = make_interaction_spec(
+                x_processed, k1, k2, operator, cat_info,
+                label_k1=labels.get(k1, k1), label_k2=labels.get(k2, k2),
+            )
+            block = columns.to_numpy(dtype=float)
+            block.flags.writeable = False
+            entry = (spec, list(columns.columns), block)
+            _cache_put(key, entry)
+        spec, entry_names, block = entry
+        specs.append({**spec, "sources": list(spec["sources"]), "dummy_cols": list(spec["dummy_cols"])})
+        names.extend(entry_names)
+        blocks.append(block)
+
+    if not blocks:
+        return specs, pd.DataFrame(index=x_processed.index)
+    return specs, pd.DataFrame(np.hstack(blocks), index=x_processed.index, columns=names)
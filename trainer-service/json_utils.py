@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from collections.abc import Mapping, Sequence
 from typing import Any
 
@@ -24,3 +25,29 @@ def to_jsonable(obj: Any) -> Any:
     if isinstance(obj, Sequence) and not isinstance(obj, (str, bytes, bytearray)):
         return [to_jsonable(v) for v in obj]
     return obj
+
+
+def _encode_default(obj: Any) -> Any:
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, pd.Series):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Serialize like FastAPI's JSONResponse without building a converted copy of ``obj`` first.
+
+    numpy arrays are turned into lists one at a time while encoding, so at
+    most one array's worth of Python objects exists at once.
+    """
+    return json.dumps(
+        obj,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_encode_default,
+    ).encode("utf-8")
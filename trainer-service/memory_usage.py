@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Dict
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - non-POSIX platforms report no peak
+    resource = None
+
+
+# ── Peak memory tracking ─────────────────────────────────────────────────────
+# Trainings report the process RSS when they start and the highest RSS seen
+# while they run. On Linux a background thread samples /proc/self/statm every
+# PEAK_RSS_POLL_SECONDS; elsewhere only the process-lifetime peak
+# (ru_maxrss) is available. RSS is per process, so concurrent trainings in the
+# same worker count towards each other's peaks.
+
+PEAK_RSS_POLL_SECONDS = 0.005
+_STATM = "/proc/self/statm"
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> int | None:
+    """Resident set size of this process in bytes, if the platform exposes it."""
+    try:
+        with open(_STATM, "rb") as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _lifetime_peak_rss() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class PeakMemoryTracker:
+    """Context manager recording the start and peak RSS of the enclosed block."""
+
+    def __init__(self, poll_seconds: float = PEAK_RSS_POLL_SECONDS) -> None:
+        self.poll_seconds = poll_seconds
+        self.start_rss: int | None = None
+        self.peak_rss: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_at = 0.0
+        self._elapsed = 0.0
+
+    def _sample(self) -> None:
+        rss = current_rss()
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+
+    def _poll(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            self._sample()
+
+    def __enter__(self) -> "PeakMemoryTracker":
+        self._started_at = time.perf_counter()
+        self.start_rss = current_rss()
+        self.peak_rss = self.start_rss
+        if self.start_rss is not None:
+            self._thread = threading.Thread(target=self._poll, name="peak-rss", daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._sample()
+        if self.start_rss is None:
+            self.peak_rss = _lifetime_peak_rss()
+        self._elapsed = time.perf_counter() - self._started_at
+
+    def report(self) -> Dict:
+        increase = self.peak_rss - self.start_rss if self.peak_rss is not None and self.start_rss is not None else None
+        return {
+            "rssStartBytes": self.start_rss,
+            "rssPeakBytes": self.peak_rss,
+            "peakIncreaseBytes": increase,
+            "seconds": self._elapsed,
+        }
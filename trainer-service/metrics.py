@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+import numpy as np
+from sklearn.metrics import accuracy_score, mean_absolute_error, mean_squared_error, r2_score, roc_auc_score
+
+
+# ── Metrics ──────────────────────────────────────────────────────────────────
+# Point estimates for train/test predictions (classification predictions are
+# probabilities of the positive class), calibration bins, and bootstrap
+# confidence intervals. A bootstrap resample only changes how often each row
+# is counted, so a chunk of resamples is drawn as one (resamples x rows) index
+# matrix, turned into a count matrix, and every metric becomes a weighted sum
+# over rows: a matrix-vector product for the means, and for ROC-AUC a grouped
+# cumulative sum over the rows sorted once by score. Chunks bound the memory
+# to roughly BOOTSTRAP_CHUNK_ELEMENTS counts at a time, and the number of
+# resamples shrinks so that no call draws more than MAX_BOOTSTRAP_DRAWS rows.
+
+# Metrics where a lower value is better; all others are maximized.
+LOWER_IS_BETTER = {"rmse", "mae", "logloss", "brier"}
+
+PROBABILITY_EPS = 1e-15
+CALIBRATION_BINS = 10
+MAX_BOOTSTRAP_RESAMPLES = 10_000
+MAX_BOOTSTRAP_DRAWS = 1 << 26
+BOOTSTRAP_CHUNK_ELEMENTS = 1 << 21
+
+
+def _log_loss(labels: np.ndarray, y_pred: np.ndarray) -> np.ndarray:
+    """Per-row log-loss."""
+    probs = np.clip(y_pred, PROBABILITY_EPS, 1 - PROBABILITY_EPS)
+    return -np.where(labels, np.log(probs), np.log1p(-probs))
+
+
+def calc_metrics(task_type: str, y_true: np.ndarray, y_pred: np.ndarray) -> Dict:
+    if len(y_true) == 0:
+        return {"rmse": None, "mae": None, "r2": None, "acc": None, "auc": None, "logloss": None, "brier": None, "count": 0}
+    if task_type == "classification":
+        labels = np.asarray(y_true) >= 0.5
+        y_pred = np.asarray(y_pred, dtype=float)
+        return {
+            "acc": float(accuracy_score(labels, y_pred >= 0.5)),
+            "auc": float(roc_auc_score(labels, y_pred)) if 0 < labels.sum() < len(labels) else None,
+            "logloss": float(np.mean(_log_loss(labels, y_pred))),
+            "brier": float(np.mean((y_pred - labels) ** 2)),
+            "count": int(len(y_true)),
+        }
+    return {
+        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        "mae": float(mean_absolute_error(y_true, y_pred)),
+        "r2": float(r2_score(y_true, y_pred)),
+        "count": int(len(y_true)),
+    }
+
+
+def calibration_bins(y_true: np.ndarray, y_pred: np.ndarray, n_bins: int = CALIBRATION_BINS) -> List[Dict]:
+    """Equal-width probability bins with their mean prediction and observed positive rate."""
+    y_pred = np.asarray(y_pred, dtype=float)
+    labels = (np.asarray(y_true) >= 0.5).astype(float)
+    bins = np.clip((y_pred * n_bins).astype(np.int64), 0, n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    predicted = np.bincount(bins, weights=y_pred, minlength=n_bins)
+    observed = np.bincount(bins, weights=labels, minlength=n_bins)
+    return [
+        {
+            "binStart": i / n_bins,
+            "binEnd": (i + 1) / n_bins,
+            "count": int(counts[i]),
+            "meanPredicted": float(predicted[i] / counts[i]) if counts[i] else None,
+            "observedRate": float(observed[i] / counts[i]) if counts[i] else None,
+        }
+        for i in range(n_bins)
+    ]
+
+
+# ── Bootstrap ──
+
+class _Resampler:
+    """Turns batched row draws into per-resample counts over the rows' distinct values.
+
+    Every metric depends on a row only through its (label, prediction) pair,
+    so rows are counted per cell. For classification the cells are the
+    prediction tie groups in ascending order, negatives first and then
+    positives, which lets ROC-AUC be read off cumulative sums of the counts.
+    """
+
+    def __init__(self, task_type: str, y_true: np.ndarray, y_pred: np.ndarray) -> None:
+        self.task_type = task_type
+        self.n_rows = len(y_true)
+        if task_type != "classification":
+            self.cell_of_row = None
+            self.n_cells = self.n_rows
+            self.y_true, self.y_pred = y_true, y_pred
+            return
+        labels = y_true >= 0.5
+        scores, group_of_row = np.unique(y_pred, return_inverse=True)
+        self.n_groups = len(scores)
+        self.n_cells = 2 * self.n_groups
+        self.cell_of_row = group_of_row.ravel() + np.where(labels, self.n_groups, 0)
+        self.y_true = np.repeat([0.0, 1.0], self.n_groups)
+        self.y_pred = np.tile(scores, 2)
+
+    def counts(self, rng: np.random.Generator, n_resamples: int) -> np.ndarray:
+        """Draw ``n_resamples`` resamples as one index matrix and count each cell's rows per resample."""
+        draws = rng.integers(0, self.n_rows, size=(n_resamples, self.n_rows))
+        if self.cell_of_row is not None:
+            draws = self.cell_of_row[draws]
+        draws += (np.arange(n_resamples) * self.n_cells)[:, None]
+        counts = np.bincount(draws.ravel(), minlength=n_resamples * self.n_cells)
+        return counts.reshape(n_resamples, self.n_cells).astype(float)
+
+    def metrics(self, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        if self.task_type == "classification":
+            return self._classification(counts)
+        return self._regression(counts)
+
+    def _classification(self, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        labels, y_pred, n_rows = self.y_true >= 0.5, self.y_pred, self.n_rows
+        negatives, positives = counts[:, :self.n_groups], counts[:, self.n_groups:]
+        # Mann-Whitney: each positive beats every negative with a lower
+        # prediction, ties count half.
+        below = np.cumsum(negatives, axis=1)
+        below -= 0.5 * negatives
+        wins = np.einsum("ij,ij->i", positives, below)
+        pairs = positives.sum(axis=1) * negatives.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            auc = np.where(pairs > 0, wins / pairs, np.nan)
+        return {
+            "acc": counts @ (labels == (y_pred >= 0.5)).astype(float) / n_rows,
+            "auc": auc,
+            "logloss": counts @ _log_loss(labels, y_pred) / n_rows,
+            "brier": counts @ (y_pred - labels) ** 2 / n_rows,
+        }
+
+    def _regression(self, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        y_true, y_pred, n_rows = self.y_true, self.y_pred, self.n_rows
+        errors = y_true - y_pred
+        squared = counts @ errors ** 2
+        # Centering first keeps the total sum of squares from cancelling catastrophically.
+        centered = y_true - y_true.mean()
+        total_sq = counts @ centered ** 2 - (counts @ centered) ** 2 / n_rows
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r2 = np.where(total_sq > 0, 1.0 - squared / total_sq, np.nan)
+        return {
+            "rmse": np.sqrt(squared / n_rows),
+            "mae": counts @ np.abs(errors) / n_rows,
+            "r2": r2,
+        }
+
+
+def bootstrap_intervals(
+    task_type: str,
+    y_true: np.ndarray,
+    y_pred: np.ndarray,
+    n_resamples: int,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> Dict:
+    """Percentile bootstrap intervals for every metric of ``calc_metrics`` (except ``count``)."""
+    y_true = np.asarray(y_true, dtype=float).ravel()
+    y_pred = np.asarray(y_pred, dtype=float).ravel()
+    n_rows = len(y_true)
+    n_resamples = max(0, min(MAX_BOOTSTRAP_RESAMPLES, n_resamples, MAX_BOOTSTRAP_DRAWS // max(n_rows, 1)))
+    if n_rows == 0 or n_resamples == 0:
+        return {"resamples": 0, "confidence": confidence, "metrics": {}}
+
+    resampler = _Resampler(task_type, y_true, y_pred)
+    rng = np.random.default_rng(seed)
+    chunk = max(1, BOOTSTRAP_CHUNK_ELEMENTS // max(n_rows, resampler.n_cells))
+    parts: Dict[str, List[np.ndarray]] = {}
+    for start in range(0, n_resamples, chunk):
+        counts = resampler.counts(rng, min(chunk, n_resamples - start))
+        for name, values in resampler.metrics(counts).items():
+            parts.setdefault(name, []).append(values)
+
+    tail = 50.0 * (1.0 - confidence)
+    intervals = {}
+    for name, chunks in parts.items():
+        values = np.concatenate(chunks)
+        values = values[np.isfinite(values)]
+        if not len(values):
+            intervals[name] = None
+            continue
+        low, high = np.percentile(values, [tail, 100.0 - tail])
+        intervals[name] = {"low": float(low), "high": float(high), "std": float(np.std(values, ddof=1)) if len(values) > 1 else 0.0}
+    return {"resamples": n_resamples, "confidence": confidence, "metrics": intervals}
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+from model_store import is_legacy_model_payload, migrate_model_file, normalize_stored_model_payload
+from paths import MODELS_DIR
+from storage import (
+    BULK_BATCH_SIZE,
+    get_saved_models_storage,
+    import_saved_model_payloads,
+    iter_saved_model_payloads,
+    save_saved_model_payload,
+    saved_model_storage_errors,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def migrate_saved_model_on_read(name: str, payload: Dict) -> Dict:
+    """Normalize a legacy saved model and write it back so later reads skip the rebuild.
+
+    The migrated payload becomes a snapshot version on the model's chain, so
+    version history still rebuilds to exactly what is stored. The write-back is
+    best effort: a failure is logged and the normalized payload is still
+    returned to the caller.
+    """
+    if not is_legacy_model_payload(payload):
+        return payload
+    migrated = normalize_stored_model_payload(payload)
+    try:
+        save_saved_model_payload(name, migrated, snapshot=True)
+    except saved_model_storage_errors():
+        logger.warning("Could not write back migrated saved model %s", name, exc_info=True)
+    return migrated
+
+
+def _batches(items: Iterable[tuple[str, Dict]], size: int) -> Iterator[list[tuple[str, Dict]]]:
+    batch: list[tuple[str, Dict]] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _migrate_batch(batch: list[tuple[str, Dict]], storage: str, dry_run: bool) -> tuple[int, int]:
+    # Imports append each payload to its chain as a snapshot version.
+    legacy = [(name, normalize_stored_model_payload(payload)) for name, payload in batch if is_legacy_model_payload(payload)]
+    if legacy and not dry_run:
+        import_saved_model_payloads(legacy, storage=storage)
+    return len(batch), len(legacy)
+
+
+def migrate_saved_models(
+    storage: str,
+    workers: int = 4,
+    batch_size: int = BULK_BATCH_SIZE,
+    dry_run: bool = False,
+    progress: Callable[[Dict[str, Any]], None] | None = None,
+) -> Dict[str, Any]:
+    """Rewrite every legacy record of one backend; batches are normalized and written in parallel."""
+    stats: Dict[str, Any] = {"storage": storage, "scanned": 0, "migrated": 0}
+    in_flight: list[Future] = []
+
+    def collect(future: Future) -> None:
+        scanned, migrated = future.result()
+        stats["scanned"] += scanned
+        stats["migrated"] += migrated
+        if progress is not None:
+            progress(dict(stats))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for batch in _batches(iter_saved_model_payloads(storage=storage), batch_size):
+            in_flight.append(pool.submit(_migrate_batch, batch, storage, dry_run))
+            # Bound the number of batches held in memory while the reader runs ahead.
+            while len(in_flight) >= 2 * max(1, workers):
+                collect(in_flight.pop(0))
+        for future in in_flight:
+            collect(future)
+    return stats
+
+
+def migrate_preset_models(
+    workers: int = 4,
+    dry_run: bool = False,
+    progress: Callable[[Dict[str, Any]], None] | None = None,
+) -> Dict[str, Any]:
+    """Rewrite legacy preset models under ``MODELS_DIR`` in place."""
+    stats: Dict[str, Any] = {"storage": "presets", "scanned": 0, "migrated": 0}
+    if not MODELS_DIR.exists():
+        return stats
+    paths = sorted(path for path in MODELS_DIR.glob("*.json") if path.is_file())
+
+    def migrate(path) -> bool:
+        if dry_run:
+            with path.open("r", encoding="utf-8") as file:
+                return is_legacy_model_payload(json.load(file))
+        return migrate_model_file(path)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for changed in pool.map(migrate, paths):
+            stats["scanned"] += 1
+            stats["migrated"] += int(changed)
+            if progress is not None and stats["scanned"] % BULK_BATCH_SIZE == 0:
+                progress(dict(stats))
+    return stats
+
+
+def _print_progress(stats: Dict[str, Any]) -> None:
+    print(f"  [{stats['storage']}] scanned {stats['scanned']}, migrated {stats['migrated']}", file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Rewrite legacy 'partials' model payloads in the current format.")
+    parser.add_argument(
+        "--storage",
+        action="append",
+        choices=["file", "postgres", "sqlite"],
+        help="Backend to migrate; repeat for several. Defaults to SAVED_MODELS_STORAGE.",
+    )
+    parser.add_argument("--presets", action="store_true", help="Also migrate preset models in models/.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--dry-run", action="store_true", help="Only count legacy records.")
+    args = parser.parse_args(argv)
+
+    for storage in args.storage or [get_saved_models_storage()]:
+        stats = migrate_saved_models(storage, workers=args.workers, dry_run=args.dry_run, progress=_print_progress)
+        print(f"{storage}: migrated {stats['migrated']} of {stats['scanned']} saved models")
+    if args.presets:
+        stats = migrate_preset_models(workers=args.workers, dry_run=args.dry_run, progress=_print_progress)
+        print(f"presets: migrated {stats['migrated']} of {stats['scanned']} models")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List
+
+import pandas as pd
+
+from training import TrainingParams
+
+
+# ── Trained model cache ──────────────────────────────────────────────────────
+# For models fitted by /train (and training jobs) a process-wide LRU keyed
+# by the response's versionId keeps what is needed to rebuild the shapes at
+# another resolution: the model's own shape functions before they are
+# resampled to ``points`` knots, the feature/interaction layout and the
+# numeric ranges spanned by the interaction grids. The fitted model itself is
+# not kept; its shape functions are all a reshape reads. For an ensemble the
+# other seeds' native shape functions are kept too, so a reshape averages the
+# members at the new resolution and rebuilds the bands, as /train does.
+# Reshaping a cached version therefore needs neither the dataset nor a refit. Entries are
+# per-process; a version evicted here (or trained in another worker) falls
+# back to interpolating its stored shapes.
+
+
+@dataclass
+class TrainedModel:
+    params: TrainingParams
+    # The model's shape functions at its native resolution (before normalization).
+    shape_functions: Dict
+    feature_keys: List[str]
+    dummy_keys: List[str]
+    cat_info: Dict
+    label_map: Dict
+    interaction_specs: List[Dict]
+    # min/max rows of the numeric interaction sources over the training rows.
+    interaction_bounds: pd.DataFrame
+    # Ensemble members besides the main fit: {"seed", "shapeFunctions" (native), "intercept"}.
+    ensemble_members: List[Dict] | None = None
+
+
+_models: "OrderedDict[str, TrainedModel]" = OrderedDict()
+_models_lock = threading.Lock()
+
+
+def get_model_cache_size() -> int:
+    """Trained models kept per process; 0 disables the cache."""
+    try:
+        return max(0, int(os.getenv("MODEL_CACHE_SIZE", "16")))
+    except ValueError:
+        return 16
+
+
+def cache_trained_model(version_id: str, entry: TrainedModel) -> None:
+    max_models = get_model_cache_size()
+    with _models_lock:
+        _models[version_id] = entry
+        _models.move_to_end(version_id)
+        while len(_models) > max_models:
+            _models.popitem(last=False)
+
+
+def get_cached_model(version_id: str) -> TrainedModel | None:
+    with _models_lock:
+        entry = _models.get(version_id)
+        if entry is not None:
+            _models.move_to_end(version_id)
+        return entry
+
+
+def clear_model_cache() -> None:
+    with _models_lock:
+        _models.clear()
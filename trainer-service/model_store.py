@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import json
+import logging
 import time
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List
 
 from fastapi import HTTPException
 
 from paths import MODELS_DIR
+from projection import FieldPath, covers_sections, project_json_file, project_payload
+
+
+logger = logging.getLogger(__name__)
 
 
 def list_model_names() -> list[str]:
@@ -16,8 +21,13 @@ def list_model_names() -> list[str]:
     return sorted([path.stem for path in MODELS_DIR.glob("*.json") if path.is_file()])
 
 
+def is_legacy_model_payload(payload: Dict) -> bool:
+    """True for payloads still in the pre-``model``/``data``/``version`` ``partials`` format."""
+    return not all(key in payload for key in ("model", "data", "version"))
+
+
 def normalize_stored_model_payload(payload: Dict) -> Dict:
-    if all(key in payload for key in ("model", "data", "version")):
+    if not is_legacy_model_payload(payload):
         return payload
 
     partials = payload.get("partials") or []
@@ -53,7 +63,10 @@ def normalize_stored_model_payload(payload: Dict) -> Dict:
     points = int(payload.get("points") or 250)
     train_metrics = payload.get("trainMetrics") or {"count": len(payload.get("y") or [])}
     test_metrics = payload.get("testMetrics") or {"count": len(payload.get("testY") or [])}
-    timestamp = int(time.time() * 1000)
+    # Reuse a stored timestamp when the legacy payload has one so repeated
+    # normalization of the same record yields the same versionId.
+    stored_timestamp = payload.get("timestamp")
+    timestamp = int(stored_timestamp) if isinstance(stored_timestamp, (int, float)) else int(time.time() * 1000)
 
     return {
         "model": {
@@ -102,12 +115,44 @@ def normalize_stored_model_payload(payload: Dict) -> Dict:
     }
 
 
-def load_model_payload(name: str) -> Dict:
+def migrate_model_file(path: Path) -> bool:
+    """Rewrite a legacy model JSON file in the current format; returns whether it changed."""
+    with path.open("r", encoding="utf-8") as file:
+        payload = json.load(file)
+    if not is_legacy_model_payload(payload):
+        return False
+    _write_model_file(path, normalize_stored_model_payload(payload))
+    return True
+
+
+def _write_model_file(path: Path, payload: Dict) -> None:
+    # Write to a sibling temp file first so a concurrent reader never sees a partial document.
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as file:
+        json.dump(payload, file, indent=2)
+    tmp_path.replace(path)
+
+
+def load_model_payload(name: str, fields: List[FieldPath] | None = None) -> Dict:
     safe_name = Path(name).name
     if not safe_name.endswith(".json"):
         safe_name = f"{safe_name}.json"
     path = MODELS_DIR / safe_name
     if not path.exists():
         raise HTTPException(status_code=404, detail="Model not found.")
+    if fields:
+        projected = project_json_file(path, fields)
+        if covers_sections(projected, fields):
+            return projected
+        # A requested section is missing, e.g. a legacy payload: fall back to a full read.
+        return project_payload(load_model_payload(name), fields)
     with path.open("r", encoding="utf-8") as file:
-        return normalize_stored_model_payload(json.load(file))
+        payload = json.load(file)
+    if is_legacy_model_payload(payload):
+        # Migrate on first read so later reads are a plain load.
+        payload = normalize_stored_model_payload(payload)
+        try:
+            _write_model_file(path, payload)
+        except OSError:
+            logger.warning("Could not write back migrated model %s", path, exc_info=True)
+    return payload
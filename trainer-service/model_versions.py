@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+from typing import Any, Dict, List
+
+
+# A saved model's history is a chain of version records. Each record is either a
+# full "snapshot" of the payload or a "delta" holding only what changed relative
+# to its parent. Reconstruction starts at the nearest snapshot and replays the
+# deltas forward, so chain depth bounds the cost of reading any version.
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+
+def get_snapshot_interval() -> int:
+    """Maximum number of deltas written before a save falls back to a full snapshot."""
+    try:
+        return max(1, int(os.getenv("SAVED_MODELS_SNAPSHOT_INTERVAL", "25")))
+    except ValueError:
+        return 25
+
+
+def get_compaction_ratio() -> float:
+    """Delta bytes (relative to the base snapshot) after which compaction snapshots the head."""
+    try:
+        return max(0.0, float(os.getenv("SAVED_MODELS_COMPACTION_RATIO", "1.0")))
+    except ValueError:
+        return 1.0
+
+
+def encoded_size(body: Any) -> int:
+    return len(json.dumps(body, separators=(",", ":")).encode("utf-8"))
+
+
+def _shape_key(shape: Dict, index: int) -> str:
+    key = shape.get("key") if isinstance(shape, dict) else None
+    return str(key) if key else f"#{index}"
+
+
+def _shapes_by_key(shapes: List[Dict]) -> Dict[str, Dict]:
+    return {_shape_key(shape, index): shape for index, shape in enumerate(shapes or [])}
+
+
+def diff_payloads(base: Dict, target: Dict) -> Dict:
+    """Describe ``target`` relative to ``base``.
+
+    Top-level sections other than ``version`` (``model``, ``data``, ...) are
+    replaced wholesale when they differ. Within ``version`` only changed fields
+    are recorded, and shapes are diffed per term ``key`` so editing one
+    ``editableY`` array stores that single shape.
+    """
+    changes: Dict[str, Any] = {}
+
+    sections = {key: value for key, value in target.items() if key != "version" and base.get(key) != value}
+    removed_sections = [key for key in base if key != "version" and key not in target]
+    if sections:
+        changes["sections"] = sections
+    if removed_sections:
+        changes["removedSections"] = removed_sections
+
+    base_version = base.get("version") or {}
+    target_version = target.get("version") or {}
+    fields = {
+        key: value
+        for key, value in target_version.items()
+        if key != "shapes" and base_version.get(key) != value
+    }
+    removed_fields = [key for key in base_version if key != "shapes" and key not in target_version]
+    if fields:
+        changes["versionFields"] = fields
+    if removed_fields:
+        changes["removedVersionFields"] = removed_fields
+
+    base_shapes = _shapes_by_key(base_version.get("shapes") or [])
+    target_shapes = _shapes_by_key(target_version.get("shapes") or [])
+    changed_shapes = {key: shape for key, shape in target_shapes.items() if base_shapes.get(key) != shape}
+    removed_shapes = [key for key in base_shapes if key not in target_shapes]
+    if changed_shapes:
+        changes["shapes"] = changed_shapes
+    if removed_shapes:
+        changes["removedShapes"] = removed_shapes
+    if list(target_shapes) != [key for key in base_shapes if key in target_shapes] + [
+        key for key in target_shapes if key not in base_shapes
+    ]:
+        changes["shapeOrder"] = list(target_shapes)
+    return changes
+
+
+def apply_delta(base: Dict, changes: Dict) -> Dict:
+    """Inverse of :func:`diff_payloads`; ``base`` is left untouched."""
+    removed_sections = set(changes.get("removedSections") or [])
+    result = {key: value for key, value in base.items() if key not in removed_sections}
+    result.update(copy.deepcopy(changes.get("sections") or {}))
+
+    version = dict(base.get("version") or {})
+    for key in changes.get("removedVersionFields") or []:
+        version.pop(key, None)
+    version.update(copy.deepcopy(changes.get("versionFields") or {}))
+
+    shapes = _shapes_by_key(version.get("shapes") or [])
+    for key in changes.get("removedShapes") or []:
+        shapes.pop(key, None)
+    shapes.update(copy.deepcopy(changes.get("shapes") or {}))
+    order = changes.get("shapeOrder") or list(shapes)
+    version["shapes"] = [shapes[key] for key in order if key in shapes]
+
+    result["version"] = version
+    return result
+
+
+def payload_version_id(payload: Dict) -> str | None:
+    version = payload.get("version")
+    if isinstance(version, dict) and version.get("versionId") is not None:
+        return str(version["versionId"])
+    return None
+
+
+def build_version_record(
+    payload: Dict,
+    version_id: str,
+    parent: Dict | None,
+    parent_payload: Dict | None,
+    timestamp: int,
+) -> Dict:
+    """Create the record stored for a new save.
+
+    ``parent`` is the metadata of the current head record (or ``None`` for the
+    first save) and ``parent_payload`` its materialized payload.
+    """
+    if parent is None or parent_payload is None or int(parent.get("depth", 0)) + 1 >= get_snapshot_interval():
+        return snapshot_record(payload, version_id, parent.get("versionId") if parent else None, timestamp)
+
+    changes = diff_payloads(parent_payload, payload)
+    size = encoded_size(changes)
+    return {
+        "versionId": version_id,
+        "parentVersionId": parent["versionId"],
+        "kind": DELTA,
+        "depth": int(parent.get("depth", 0)) + 1,
+        "chainBytes": int(parent.get("chainBytes", 0)) + size,
+        "snapshotBytes": int(parent.get("snapshotBytes", 0)),
+        "size": size,
+        "timestamp": timestamp,
+        "body": changes,
+    }
+
+
+def snapshot_record(payload: Dict, version_id: str, parent_version_id: str | None, timestamp: int) -> Dict:
+    size = encoded_size(payload)
+    return {
+        "versionId": version_id,
+        "parentVersionId": parent_version_id,
+        "kind": SNAPSHOT,
+        "depth": 0,
+        "chainBytes": 0,
+        "snapshotBytes": size,
+        "size": size,
+        "timestamp": timestamp,
+        "body": payload,
+    }
+
+
+def needs_compaction(record: Dict) -> bool:
+    """True when replaying the chain up to ``record`` costs more than the configured ratio."""
+    if record.get("kind") != DELTA:
+        return False
+    snapshot_bytes = int(record.get("snapshotBytes") or 0)
+    return int(record.get("chainBytes") or 0) > get_compaction_ratio() * snapshot_bytes
+
+
+def record_metadata(record: Dict) -> Dict:
+    return {key: value for key, value in record.items() if key != "body"}
+
+
+def resolve_chain(metadata_by_id: Dict[str, Dict], version_id: str) -> List[str]:
+    """Return the version ids from the nearest snapshot up to ``version_id``."""
+    chain: List[str] = []
+    current: str | None = version_id
+    while current is not None:
+        meta = metadata_by_id.get(current)
+        if meta is None:
+            raise RuntimeError(f"Version chain is broken at {current}.")
+        chain.append(current)
+        if meta.get("kind") == SNAPSHOT:
+            break
+        current = meta.get("parentVersionId")
+        if current in chain:
+            raise RuntimeError(f"Version chain has a cycle at {current}.")
+    else:
+        raise RuntimeError(f"Version {version_id} has no base snapshot.")
+    chain.reverse()
+    return chain
+
+
+def reconstruct_payload(records: List[Dict]) -> Dict:
+    """Replay ``records`` (snapshot first, as returned by :func:`resolve_chain`)."""
+    if not records or records[0].get("kind") != SNAPSHOT:
+        raise RuntimeError("Version chain must start with a snapshot.")
+    payload = copy.deepcopy(records[0]["body"])
+    for record in records[1:]:
+        payload = apply_delta(payload, record["body"])
+    return payload
@@ -5,5 +5,11 @@ from pathlib import Path
 
 SERVICE_ROOT = Path(__file__).resolve().parent
 DATA_DIR = SERVICE_ROOT / "data"
+DATASET_SPECS_DIR = SERVICE_ROOT / "dataset_specs"
+COLUMN_STORE_DIR = DATA_DIR / ".column_store"
+DATASET_STATS_DIR = DATA_DIR / ".dataset_stats"
+DATASET_ARENA_DIR = DATA_DIR / ".arena"
+TRAINING_SLOTS_DIR = DATA_DIR / ".training_slots"
 MODELS_DIR = SERVICE_ROOT / "models"
 SAVED_MODELS_DIR = SERVICE_ROOT / "saved_models"
+SAVED_MODELS_SQLITE_PATH = SERVICE_ROOT / "saved_models.sqlite3"
@@ -1,7 +1,15 @@
-from .bike import preprocess_bike_hourly
-from .mimic4 import preprocess_mimic4_mean_100_full
+# Datasets are declared in dataset_specs/ and run by preprocessing.engine; the
+# engine is imported lazily so that importing this package stays cheap.
 
 __all__ = [
-    "preprocess_bike_hourly",
-    "preprocess_mimic4_mean_100_full",
+    "compile_dataset_spec",
+    "run_dataset_spec",
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import engine
+
+        return getattr(engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from paths import COLUMN_STORE_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms delete stale stores unguarded
+    fcntl = None
+
+
+# ── Columnar dataset store ───────────────────────────────────────────────────
+# The first load of a raw CSV parses it once and writes every column as a typed
+# .npy file: numeric columns in their parsed dtype, text columns as int32 codes plus a
+# category table. Later loads memory-map only the requested columns instead of
+# re-parsing the CSV. Stores are keyed by the SHA-256 of the source file (and
+# the NA markers used while parsing) and rebuilt automatically when it changes.
+# A size/mtime stamp in the manifest avoids rehashing an unchanged file.
+#
+# Readers hold a shared flock on the store's "lock" file while they map its
+# columns; a superseded store is only deleted under an exclusive flock, so a
+# store another process is still reading is skipped and removed later.
+
+STORE_FORMAT_VERSION = 1
+# Attempts at reading a store that is deleted between lookup and locking.
+LOAD_ATTEMPTS = 3
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _options_key(na_values: Iterable[str]) -> str:
+    options = json.dumps({"format": STORE_FORMAT_VERSION, "na_values": sorted(na_values)})
+    return hashlib.sha256(options.encode("utf-8")).hexdigest()[:12]
+
+
+def _read_manifest(store_dir: Path) -> dict | None:
+    try:
+        with (store_dir / "manifest.json").open("r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(store_dir: Path, manifest: dict) -> None:
+    tmp_path = store_dir / "manifest.json.tmp"
+    with tmp_path.open("w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    tmp_path.replace(store_dir / "manifest.json")
+
+
+def _numeric_values(series: pd.Series) -> np.ndarray | None:
+    """Return the column as a numeric array, or ``None`` if it holds text.
+
+    Integer and boolean columns keep their dtype so downstream category labels
+    (e.g. bike "hr") stay "0", "1", ... rather than "0.0", "1.0".
+    """
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_integer_dtype(series.dtype):
+        return series.to_numpy()
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy(dtype=float, na_value=np.nan)
+    try:
+        return pd.to_numeric(series, errors="raise").to_numpy(dtype=float, na_value=np.nan)
+    except (ValueError, TypeError):
+        return None
+
+
+def _build_store(csv_path: Path, store_dir: Path, na_values: list[str], sha256: str, stat: os.stat_result) -> dict:
+    frame = pd.read_csv(csv_path, na_values=na_values, low_memory=False)
+    store_dir.parent.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(prefix=f".{store_dir.name}-", dir=store_dir.parent))
+    columns: dict[str, dict] = {}
+    try:
+        for index, name in enumerate(frame.columns):
+            series = frame[name]
+            values = _numeric_values(series)
+            file_name = f"c{index}.npy"
+            if values is not None:
+                np.save(build_dir / file_name, values)
+                columns[str(name)] = {"kind": "numeric", "file": file_name}
+                continue
+            codes, uniques = pd.factorize(series)
+            np.save(build_dir / file_name, codes.astype(np.int32))
+            columns[str(name)] = {
+                "kind": "categorical",
+                "file": file_name,
+                "categories": [str(value) for value in uniques],
+            }
+        manifest = {
+            "format": STORE_FORMAT_VERSION,
+            "source": csv_path.name,
+            "source_sha256": sha256,
+            "source_size": stat.st_size,
+            "source_mtime_ns": stat.st_mtime_ns,
+            "na_values": na_values,
+            "rows": int(len(frame)),
+            "column_order": [str(name) for name in frame.columns],
+            "columns": columns,
+        }
+        _write_manifest(build_dir, manifest)
+        try:
+            build_dir.rename(store_dir)
+        except OSError:
+            # Another process finished the same store first; theirs is identical.
+            shutil.rmtree(build_dir, ignore_errors=True)
+            return _read_manifest(store_dir) or manifest
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+    return manifest
+
+
+def _remove_stale_stores(prefix: str, keep: Path) -> None:
+    for candidate in COLUMN_STORE_DIR.glob(f"{prefix}-*"):
+        if candidate == keep or not candidate.is_dir() or candidate.name.startswith("."):
+            continue
+        if fcntl is None:
+            shutil.rmtree(candidate, ignore_errors=True)
+            continue
+        try:
+            lock_file = (candidate / "lock").open("a+b")
+        except OSError:
+            continue
+        with lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                continue  # still being read by some process
+            shutil.rmtree(candidate, ignore_errors=True)
+
+
+def ensure_column_store(csv_path: Path, na_values: Iterable[str] = ()) -> tuple[Path, dict]:
+    """Return ``(store_dir, manifest)`` for ``csv_path``, building the store if needed."""
+    na_list = sorted(set(na_values))
+    stat = csv_path.stat()
+    prefix = f"{csv_path.stem}-{_options_key(na_list)}"
+
+    # Fast path: a store whose stamp matches the current file needs no hashing.
+    for candidate in COLUMN_STORE_DIR.glob(f"{prefix}-*"):
+        manifest = _read_manifest(candidate)
+        if (
+            manifest is not None
+            and manifest.get("source_size") == stat.st_size
+            and manifest.get("source_mtime_ns") == stat.st_mtime_ns
+        ):
+            return candidate, manifest
+
+    sha256 = _file_sha256(csv_path)
+    store_dir = COLUMN_STORE_DIR / f"{prefix}-{sha256[:16]}"
+    manifest = _read_manifest(store_dir)
+    if manifest is not None and manifest.get("source_sha256") == sha256:
+        # Same content with a new mtime (e.g. the file was copied); refresh the stamp.
+        manifest["source_size"] = stat.st_size
+        manifest["source_mtime_ns"] = stat.st_mtime_ns
+        _write_manifest(store_dir, manifest)
+    else:
+        manifest = _build_store(csv_path, store_dir, na_list, sha256, stat)
+    _remove_stale_stores(prefix, store_dir)
+    return store_dir, manifest
+
+
+def load_csv_columns(
+    csv_path: Path,
+    columns: Iterable[str] | None = None,
+    na_values: Iterable[str] = (),
+) -> pd.DataFrame:
+    """Load ``columns`` (default: all) of ``csv_path`` through the columnar store.
+
+    Values listed in ``na_values`` are read as missing. Numeric columns keep
+    their parsed dtype and are read-only views of the store's memory-mapped
+    files; text columns come back as ``pd.Categorical`` over their stored
+    codes, with ``NaN`` for missing values. Columns follow the requested order.
+    Callers copy before modifying values in place.
+    """
+    for _ in range(LOAD_ATTEMPTS):
+        store_dir, manifest = ensure_column_store(csv_path, na_values)
+        if fcntl is None:
+            return _read_store_columns(csv_path, store_dir, manifest, columns)
+        try:
+            lock_file = (store_dir / "lock").open("a+b")
+        except OSError:
+            continue  # removed as stale after the lookup; look it up again
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            if _read_manifest(store_dir) is None:
+                continue
+            return _read_store_columns(csv_path, store_dir, manifest, columns)
+    raise RuntimeError(f"Column store for {csv_path.name} kept disappearing while loading.")
+
+
+def _read_store_columns(
+    csv_path: Path,
+    store_dir: Path,
+    manifest: dict,
+    columns: Iterable[str] | None,
+) -> pd.DataFrame:
+    wanted = manifest["column_order"] if columns is None else [str(name) for name in columns]
+    missing = [name for name in wanted if name not in manifest["columns"]]
+    if missing:
+        raise KeyError(f"Columns not found in {csv_path.name}: {missing}")
+
+    data: dict[str, np.ndarray | pd.Categorical] = {}
+    for name in wanted:
+        info = manifest["columns"][name]
+        # The mapping outlives the shared lock and even a later delete of the store.
+        values = np.load(store_dir / info["file"], mmap_mode="r")
+        if info["kind"] == "categorical":
+            # Code -1 marks a missing value, as it does for pd.Categorical.
+            values = pd.Categorical.from_codes(values, categories=info["categories"])
+        data[name] = values
+    # copy=False keeps numeric columns read-only views of their memory-mapped files.
+    return pd.DataFrame(data, columns=wanted, copy=False)
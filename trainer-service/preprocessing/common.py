@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import numpy as np
+import pandas as pd
 
 
 def sort_category_values(values):
@@ -14,45 +15,84 @@ def sort_category_values(values):
     return sorted([str(value) for value in values], key=sort_key)
 
 
+def category_codes(key: str, df, cat_info: dict, dtype=np.int64) -> np.ndarray:
+    """Map a categorical column to its index in ``cat_info[key]``; unknown values get -1.
+
+    Columns already coded against that table (see ``to_categorical``) return
+    their codes directly, in their own narrow dtype when ``dtype`` is None.
+    Otherwise the column is factorized once, so only its distinct values are
+    converted to strings and looked up, not every row.
+    """
+    column = df[key]
+    categories = [str(c) for c in cat_info[key]]
+    if isinstance(column.dtype, pd.CategoricalDtype) and list(column.cat.categories) == categories:
+        return column.cat.codes.to_numpy(dtype=dtype)
+    level_index = {c: i for i, c in enumerate(categories)}
+    codes, uniques = pd.factorize(column, use_na_sentinel=False)
+    lookup = np.array([level_index.get(str(value), -1) for value in uniques], dtype=np.int64)
+    return lookup[codes] if len(lookup) else np.empty(0, dtype=np.int64)
+
+
+def to_categorical(key: str, df, cat_info: dict) -> pd.Categorical:
+    """The column as a ``pd.Categorical`` whose categories are exactly ``cat_info[key]``."""
+    return categorical_from_codes(category_codes(key, df, cat_info), cat_info[key])
+
+
+def categorical_from_codes(codes: np.ndarray, categories) -> pd.Categorical:
+    """Rebuild a column from codes into ``categories`` (e.g. after sharing them across processes)."""
+    return pd.Categorical.from_codes(codes, categories=[str(c) for c in categories])
+
+
+def decode_categories(codes: np.ndarray, categories) -> list:
+    """Category labels for integer codes (e.g. for JSON); -1 decodes to ``None``."""
+    table = np.asarray([str(c) for c in categories] + [None], dtype=object)
+    return table[np.asarray(codes)].tolist()
+
+
 def _get_numeric_col(key: str, df, cat_info: dict) -> np.ndarray:
     if key in cat_info:
-        categories = cat_info[key]
-        cat_to_idx = {str(c): float(i) for i, c in enumerate(categories)}
-        return np.array([cat_to_idx.get(str(v), 0.0) for v in df[key]], dtype=float)
-    return df[key].values.astype(float)
+        codes = category_codes(key, df, cat_info)
+        return np.where(codes >= 0, codes, 0).astype(float)
+    return df[key].to_numpy(dtype=float)
 
 
-def build_interaction_cols(df, k1: str, k2: str, operator: str, cat_info: dict) -> list:
+def _dummy_product_block(codes: np.ndarray, num_vals: np.ndarray, n_levels: int) -> np.ndarray:
+    """One column per category level holding ``num_vals`` where the row has that level, else 0.
+
+    Built as a single column-major block by scattering each row into its level's
+    column, so the cost is O(rows) rather than O(levels × rows).
+    """
+    block = np.zeros((len(codes), n_levels), dtype=float, order="F")
+    known = codes >= 0
+    block[np.flatnonzero(known), codes[known]] = num_vals[known]
+    return block
+
+
+def build_interaction_cols(df, k1: str, k2: str, operator: str, cat_info: dict) -> tuple[list, np.ndarray]:
     """Compute interaction feature columns for a given operator.
 
-    Returns a list of (col_name, values) tuples. Product interactions involving
-    categorical features produce one dummy column per category level.
+    Returns (col_names, block) where block is a column-major float array of
+    shape (rows, len(col_names)). Product interactions involving categorical
+    features produce one dummy column per category level.
     """
     display_key = f"{k1}__{k2}" if operator == "product" else f"{k1}__{operator}__{k2}"
     is_cat1 = k1 in cat_info
     is_cat2 = k2 in cat_info
 
     if operator == "product":
-        if not is_cat1 and not is_cat2:
-            return [(display_key, df[k1].values.astype(float) * df[k2].values.astype(float))]
-        if is_cat1 and not is_cat2:
-            num_vals = df[k2].values.astype(float)
-            return [
-                (f"{display_key}___c{i}", (df[k1].astype(str) == str(level)).values.astype(float) * num_vals)
-                for i, level in enumerate(cat_info[k1])
-            ]
-        if not is_cat1 and is_cat2:
-            num_vals = df[k1].values.astype(float)
-            return [
-                (f"{display_key}___r{j}", (df[k2].astype(str) == str(level)).values.astype(float) * num_vals)
-                for j, level in enumerate(cat_info[k2])
-            ]
+        if is_cat1 != is_cat2:
+            cat_key, num_key, suffix = (k1, k2, "c") if is_cat1 else (k2, k1, "r")
+            n_levels = len(cat_info[cat_key])
+            block = _dummy_product_block(
+                category_codes(cat_key, df, cat_info), df[num_key].to_numpy(dtype=float), n_levels
+            )
+            return [f"{display_key}___{suffix}{i}" for i in range(n_levels)], block
         v1 = _get_numeric_col(k1, df, cat_info)
         v2 = _get_numeric_col(k2, df, cat_info)
-        return [(display_key, v1 * v2)]
+        return [display_key], (v1 * v2)[:, None]
 
-    left_vals = df[k1].values.astype(float)
-    right_vals = df[k2].values.astype(float)
+    left_vals = df[k1].to_numpy(dtype=float)
+    right_vals = df[k2].to_numpy(dtype=float)
     if operator == "sum":
         vals = left_vals + right_vals
     elif operator == "difference":
@@ -63,7 +103,7 @@ def build_interaction_cols(df, k1: str, k2: str, operator: str, cat_info: dict)
         vals = np.abs(left_vals - right_vals)
     else:
         raise ValueError(f"Unsupported interaction operator: {operator}")
-    return [(display_key, vals)]
+    return [display_key], vals[:, None]
 
 
 _OPERATOR_SYMBOLS = {
@@ -74,14 +114,16 @@ _OPERATOR_SYMBOLS = {
     "absolute_difference": "|Δ|",
 }
 
+INTERACTION_OPERATORS = tuple(_OPERATOR_SYMBOLS)
+
 
 def make_interaction_spec(df, k1: str, k2: str, operator: str, cat_info: dict,
                           label_k1: str = None, label_k2: str = None) -> tuple:
     """Build interaction columns and a spec dict for a feature pair.
 
-    Returns (spec, columns) where columns is a dict {col_name: np.ndarray}.
-    Add the columns to x_processed and include spec in interaction_specs before
-    returning from the preprocessor.
+    Returns (spec, columns) where columns is a DataFrame indexed like df and
+    backed by a single block. Concatenate it onto x_processed and include spec
+    in interaction_specs before returning from the preprocessor.
 
     spec keys: key, label, sources, operator, dummy_cols
     """
@@ -90,13 +132,13 @@ def make_interaction_spec(df, k1: str, k2: str, operator: str, cat_info: dict,
     sym = _OPERATOR_SYMBOLS.get(operator, operator)
     key = f"{k1}__{k2}" if operator == "product" else f"{k1}__{operator}__{k2}"
 
-    cols = build_interaction_cols(df, k1, k2, operator, cat_info)
+    names, block = build_interaction_cols(df, k1, k2, operator, cat_info)
     spec = {
         "key": key,
         "label": f"{label_k1} {sym} {label_k2}",
         "sources": [k1, k2],
         "operator": operator,
-        "dummy_cols": [name for name, _ in cols],
+        "dummy_cols": names,
     }
-    columns = {name: vals for name, vals in cols}
+    columns = pd.DataFrame(block, index=df.index, columns=names, copy=False)
     return spec, columns
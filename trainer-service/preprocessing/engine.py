@@ -0,0 +1,439 @@
+from __future__ import annotations
+
+import os
+from collections import Counter
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+
+from paths import DATA_DIR
+from .column_store import load_csv_columns
+from .common import INTERACTION_OPERATORS, make_interaction_spec, sort_category_values, to_categorical
+from .sampling import SAMPLING_POLICIES, StratumIndex, cached_stratum_index, sample_frame
+from .streaming import BalancedReservoirSampler, RunningMoments, StreamingMedian, most_frequent
+
+
+# ── Winsorizer ───────────────────────────────────────────────────────────────
+# Clips each numeric column to [mean − n_sigma·σ, mean + n_sigma·σ] fitted on
+# training data.  Mirrors the feature_engine Winsorizer used in the notebook
+# (capping_method="gaussian", fold=4, tail="both") without adding a dependency.
+
+class GaussianWinsorizer(BaseEstimator, TransformerMixin):
+    def __init__(self, n_sigma: float = 4.0):
+        self.n_sigma = n_sigma
+
+    def fit(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        arr = np.asarray(X, dtype=float)
+        self.lower_ = arr.mean(axis=0) - self.n_sigma * arr.std(axis=0)
+        self.upper_ = arr.mean(axis=0) + self.n_sigma * arr.std(axis=0)
+        return self
+
+    def fit_from_moments(self, mean, std):
+        """Set the clipping bounds from precomputed (e.g. streaming) column moments."""
+        mean = np.asarray(mean, dtype=float)
+        std = np.asarray(std, dtype=float)
+        self.lower_ = mean - self.n_sigma * std
+        self.upper_ = mean + self.n_sigma * std
+        return self
+
+    def transform(self, X):
+        clipped = np.clip(np.asarray(X, dtype=float), self.lower_, self.upper_)
+        if isinstance(X, pd.DataFrame):
+            return pd.DataFrame(clipped, index=X.index, columns=X.columns)
+        return clipped
+
+    def get_feature_names_out(self, input_features=None):
+        # Clipping keeps columns one-to-one; newer scikit-learn ColumnTransformers
+        # need this to name pandas output instead of falling back to tmp names.
+        if input_features is not None:
+            return np.asarray(input_features, dtype=object)
+        return getattr(self, "feature_names_in_", None)
+
+    def set_output(self, *, transform=None):
+        return self
+
+
+# ── Spec vocabulary ──────────────────────────────────────────────────────────
+# A dataset spec's [preprocessing] table is normalized by normalize_spec below;
+# see dataset_specs/*.toml for complete examples.
+
+DERIVE_OPS = {"copy", "rescale", "map", "case"}
+NUMERIC_IMPUTATION = {"mean", "median"}
+CATEGORICAL_IMPUTATION = {"most_frequent"}
+PREPROCESSING_MODES = {"auto", "memory", "chunked"}
+
+# Derivations that need statistics over the whole column cannot run chunk by chunk.
+_GLOBAL_DERIVE_OPS = {"rescale"}
+
+
+def normalize_spec(dataset_id: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a [preprocessing] table and fill in defaults; raises ``ValueError``."""
+
+    def fail(message: str):
+        raise ValueError(f"Dataset spec '{dataset_id}': {message}")
+
+    if not raw.get("source"):
+        fail("preprocessing.source is required.")
+    if not raw.get("target"):
+        fail("preprocessing.target is required.")
+
+    derive = [dict(step) for step in raw.get("derive", [])]
+    for step in derive:
+        if not step.get("name") or step.get("op") not in DERIVE_OPS:
+            fail(f"each derive step needs a name and an op in {sorted(DERIVE_OPS)}.")
+        if step["op"] != "case" and not step.get("from"):
+            fail(f"derive step '{step['name']}' needs a 'from' column.")
+        if step["op"] == "rescale" and len(step.get("range", [])) != 2:
+            fail(f"derive step '{step['name']}' needs range = [min, max].")
+        if step["op"] == "map" and not isinstance(step.get("values"), dict):
+            fail(f"derive step '{step['name']}' needs a values table.")
+        if step["op"] == "case" and not step.get("cases"):
+            fail(f"derive step '{step['name']}' needs at least one case.")
+
+    imputation = {"numeric": "median", "categorical": "most_frequent", **raw.get("imputation", {})}
+    if imputation["numeric"] not in NUMERIC_IMPUTATION:
+        fail(f"imputation.numeric must be one of {sorted(NUMERIC_IMPUTATION)}.")
+    if imputation["categorical"] not in CATEGORICAL_IMPUTATION:
+        fail(f"imputation.categorical must be one of {sorted(CATEGORICAL_IMPUTATION)}.")
+
+    winsorize = raw.get("winsorize")
+    if winsorize is not None:
+        if winsorize.get("method", "gaussian") != "gaussian":
+            fail("winsorize.method must be 'gaussian'.")
+        winsorize = {"method": "gaussian", "n_sigma": float(winsorize.get("n_sigma", 4.0))}
+
+    sampling = {"policy": "uniform", "default_size": None, "stratify_by": None, "bins": None, **raw.get("sampling", {})}
+    if sampling["policy"] not in SAMPLING_POLICIES:
+        fail(f"sampling.policy must be one of {sorted(SAMPLING_POLICIES)}.")
+    # Strata default to the target's classes (or its quantile bins when bins is set).
+    sampling["stratify_by"] = str(sampling["stratify_by"] or raw["target"])
+    if sampling["bins"] is not None:
+        sampling["bins"] = int(sampling["bins"])
+        if sampling["bins"] < 1:
+            fail("sampling.bins must be a positive integer.")
+
+    interactions = []
+    for item in raw.get("interactions", []):
+        operator = item.get("operator", "product")
+        if not item.get("k1") or not item.get("k2") or operator not in INTERACTION_OPERATORS:
+            fail("each interaction needs k1, k2 and a supported operator.")
+        interactions.append({"k1": item["k1"], "k2": item["k2"], "operator": operator})
+
+    out_of_core = raw.get("out_of_core")
+    if out_of_core is not None:
+        out_of_core = {
+            "min_bytes": int(out_of_core.get("min_bytes", 512 * 1024 * 1024)),
+            "chunk_rows": int(out_of_core.get("chunk_rows", 100_000)),
+            "mode_env": out_of_core.get("mode_env"),
+        }
+        if any(step["op"] in _GLOBAL_DERIVE_OPS for step in derive):
+            fail("out_of_core cannot be combined with rescale derivations.")
+        if sampling["policy"] == "balanced" and sampling["stratify_by"] != raw["target"]:
+            fail("out_of_core balanced sampling stratifies by the target only.")
+
+    return {
+        "id": dataset_id,
+        "source": str(raw["source"]),
+        "na_values": [str(value) for value in raw.get("na_values", [])],
+        "columns": list(raw["columns"]) if raw.get("columns") else None,
+        "target": str(raw["target"]),
+        "derive": derive,
+        "drop_missing_rows": bool(raw.get("drop_missing_rows", False)),
+        "features": list(raw["features"]) if raw.get("features") else None,
+        "categorical": list(raw.get("categorical", [])),
+        "clean_categorical": bool(raw.get("clean_categorical", False)),
+        "imputation": imputation,
+        "winsorize": winsorize,
+        "sampling": sampling,
+        "labels": dict(raw.get("labels", {})),
+        "interactions": interactions,
+        "out_of_core": out_of_core,
+    }
+
+
+# ── Helpers ──────────────────────────────────────────────────────────────────
+
+def _clean_categorical(values: pd.Series) -> pd.Series:
+    return values.astype(str).str.strip().replace({"nan": np.nan, "None": np.nan})
+
+
+def _map_lookup(mapping: Dict[str, Any], value: Any) -> Any:
+    # Spec keys are strings; integral numbers also match their integer spelling ("1" for 1.0).
+    if str(value) in mapping:
+        return mapping[str(value)]
+    if isinstance(value, (int, float, np.number)) and not isinstance(value, bool) and float(value).is_integer():
+        return mapping.get(str(int(value)), value)
+    return value
+
+
+def _derive_column(df: pd.DataFrame, step: Dict[str, Any]):
+    op = step["op"]
+    if op == "copy":
+        return df[step["from"]]
+    if op == "rescale":
+        arr = np.array(df[step["from"]])
+        new_min, new_max = step["range"]
+        old_min, old_max = float(np.min(arr)), float(np.max(arr))
+        denom = old_max - old_min if old_max != old_min else 1e-9
+        return (arr - old_min) / denom * (new_max - new_min) + new_min
+    if op == "map":
+        # Resolve the spec's string keys against the column's distinct values once.
+        source = df[step["from"]]
+        replacements = {}
+        for value in pd.unique(source.dropna()):
+            mapped = _map_lookup(step["values"], value)
+            if mapped is not value:
+                replacements[value] = mapped
+        if not replacements:
+            return source
+        if isinstance(source.dtype, pd.CategoricalDtype):
+            # Map the categories rather than every row; replace() on categoricals is deprecated.
+            return source.map(lambda value: replacements.get(value, value), na_action="ignore")
+        return source.replace(replacements)
+    conditions = [
+        np.logical_and.reduce([df[column].to_numpy() == expected for column, expected in case["when"].items()])
+        for case in step["cases"]
+    ]
+    return np.select(conditions, [case["value"] for case in step["cases"]], default=step.get("default"))
+
+
+def _apply_derivations(df: pd.DataFrame, spec: Dict[str, Any]) -> pd.DataFrame:
+    for step in spec["derive"]:
+        df[step["name"]] = _derive_column(df, step)
+    return df
+
+
+def _clean_target(df: pd.DataFrame, target: str) -> pd.DataFrame:
+    y = pd.to_numeric(df[target], errors="coerce")
+    keep_mask = y.notna()
+    df = df.loc[keep_mask].copy()
+    df[target] = y.loc[keep_mask].astype(float)
+    return df
+
+
+def _split_features(columns, spec: Dict[str, Any]) -> tuple[list[str], list[str]]:
+    feature_columns = spec["features"] or [col for col in columns if col != spec["target"]]
+    cat_features = [f for f in spec["categorical"] if f in feature_columns]
+    num_features = [f for f in feature_columns if f not in cat_features]
+    return num_features, cat_features
+
+
+def _use_chunked_mode(spec: Dict[str, Any], data_path: Path) -> bool:
+    out_of_core = spec["out_of_core"]
+    if out_of_core is None:
+        return False
+    mode = "auto"
+    if out_of_core["mode_env"]:
+        mode = os.getenv(out_of_core["mode_env"], "auto").strip().lower()
+    if mode in {"chunked", "memory"}:
+        return mode == "chunked"
+    return data_path.stat().st_size >= out_of_core["min_bytes"]
+
+
+def _finish(spec: Dict[str, Any], x_processed: pd.DataFrame, y: pd.Series, cat_features: List[str]):
+    cat_info = {
+        col: sort_category_values(x_processed[col].dropna().unique().tolist())
+        for col in cat_features
+        if col in x_processed.columns
+    }
+    # Categorical columns are stored as codes into their (string) cat_info table.
+    x_processed = x_processed.assign(**{col: to_categorical(col, x_processed, cat_info) for col in cat_info})
+    labels = {col: spec["labels"].get(col, col) for col in x_processed.columns}
+
+    interaction_specs = []
+    for item in spec["interactions"]:
+        interaction_spec, columns = make_interaction_spec(
+            x_processed, item["k1"], item["k2"], item["operator"], cat_info,
+            label_k1=labels.get(item["k1"]), label_k2=labels.get(item["k2"]),
+        )
+        interaction_specs.append(interaction_spec)
+        x_processed = pd.concat([x_processed, columns], axis=1)
+    return x_processed, y.to_numpy(), cat_info, labels, interaction_specs
+
+
+# ── In-memory path ───────────────────────────────────────────────────────────
+
+def _run_in_memory(spec: Dict[str, Any], data_path: Path, seed: int, sample_size: int):
+    # ── 1. Load ───────────────────────────────────────────────────────────────
+    # The column store parses the CSV once (placeholders already read as NaN,
+    # numeric columns already typed) and memory-maps it on later calls.
+    df = load_csv_columns(data_path, spec["columns"], na_values=spec["na_values"])
+    df = _apply_derivations(df, spec)
+    if spec["drop_missing_rows"]:
+        df.dropna(inplace=True)
+
+    # ── 2. Clean target ───────────────────────────────────────────────────────
+    df = _clean_target(df, spec["target"])
+
+    # ── 3. Sample ─────────────────────────────────────────────────────────────
+    # Stratum row indexes are built once per source file and reused by every draw.
+    sampling = spec["sampling"]
+    if len(df) > sample_size:
+        index = None
+        if sampling["policy"] != "uniform":
+            stat = data_path.stat()
+            index_key = (spec["id"], stat.st_size, stat.st_mtime_ns, len(df), sampling["stratify_by"], sampling["bins"])
+            index = cached_stratum_index(
+                index_key, lambda: StratumIndex.from_values(df[sampling["stratify_by"]], sampling["bins"])
+            )
+        df, _ = sample_frame(df, sampling["policy"], sample_size, seed, index)
+    y = df[spec["target"]].astype(float)
+
+    # ── 4. Split features ─────────────────────────────────────────────────────
+    num_features, cat_features = _split_features(df.columns, spec)
+    x_frame = df[num_features + cat_features].copy()
+
+    # Coerce dtypes so the imputers receive the right input types.
+    for feature in num_features:
+        x_frame[feature] = pd.to_numeric(x_frame[feature], errors="coerce")
+    if spec["clean_categorical"]:
+        for feature in cat_features:
+            x_frame[feature] = _clean_categorical(x_frame[feature])
+
+    # ── 5. Impute → Winsorize ─────────────────────────────────────────────────
+    num_steps = [("num_imputer", SimpleImputer(strategy=spec["imputation"]["numeric"]))]
+    if spec["winsorize"] is not None:
+        num_steps.append(("winsorizer", GaussianWinsorizer(n_sigma=spec["winsorize"]["n_sigma"])))
+    cat_transformer = Pipeline([("cat_imputer", SimpleImputer(strategy=spec["imputation"]["categorical"]))])
+
+    column_transformer = ColumnTransformer(
+        transformers=[
+            ("num", Pipeline(num_steps), num_features),
+            ("cat", cat_transformer, cat_features),
+        ],
+        verbose_feature_names_out=False,
+    ).set_output(transform="pandas")
+
+    x_processed = column_transformer.fit_transform(x_frame)
+
+    return _finish(spec, x_processed, y, cat_features)
+
+
+# ── Out-of-core path ─────────────────────────────────────────────────────────
+
+def _run_chunked(spec: Dict[str, Any], data_path: Path, seed: int, sample_size: int):
+    """Out-of-core variant of ``_run_in_memory`` for sources that do not fit in memory.
+
+    The CSV is read in chunks. Each chunk is cleaned, feeds streaming column
+    statistics (median, mean/std and category counts over every valid row) and
+    then a (class-balanced) reservoir. Only the sampled rows are materialized and
+    transformed with the streamed statistics, so imputation and winsorization
+    bounds describe the whole source rather than the sample.
+    """
+    target = spec["target"]
+    # Balanced policies keep one reservoir per class; uniform and proportional
+    # draws share a single reservoir, i.e. a uniform sample of the whole source.
+    strata_column = target if spec["sampling"]["policy"] == "balanced" else None
+    sampler = BalancedReservoirSampler(strata_column, sample_size, seed)
+    medians: dict[str, StreamingMedian] = {}
+    moments: dict[str, RunningMoments] = {}
+    missing_counts: Counter = Counter()
+    category_counts: dict[str, Counter] = {}
+    num_features: list[str] = []
+    cat_features: list[str] = []
+    started = False
+
+    chunks = pd.read_csv(
+        data_path,
+        usecols=spec["columns"],
+        chunksize=spec["out_of_core"]["chunk_rows"],
+        na_values=spec["na_values"],
+        low_memory=False,
+    )
+    for chunk in chunks:
+        chunk = _apply_derivations(chunk, spec)
+        if spec["drop_missing_rows"]:
+            chunk = chunk.dropna()
+        chunk = _clean_target(chunk, target)
+        if not started:
+            num_features, cat_features = _split_features(chunk.columns, spec)
+            medians = {f: StreamingMedian(exact_limit=250_000) for f in num_features}
+            moments = {f: RunningMoments() for f in num_features}
+            category_counts = {f: Counter() for f in cat_features}
+            started = True
+        chunk = chunk[num_features + cat_features + [target]]
+
+        for feature in num_features:
+            chunk[feature] = pd.to_numeric(chunk[feature], errors="coerce")
+            values = chunk[feature].to_numpy(dtype=float)
+            medians[feature].update(values)
+            moments[feature].update(values)
+            missing_counts[feature] += int(np.isnan(values).sum())
+        for feature in cat_features:
+            if spec["clean_categorical"]:
+                chunk[feature] = _clean_categorical(chunk[feature])
+            category_counts[feature].update(chunk[feature].value_counts(dropna=True).to_dict())
+        sampler.update(chunk)
+
+    df = sampler.finish()
+    if df.empty:
+        raise ValueError(f"No rows with a valid {target} target in {data_path.name}.")
+    y = df[target].astype(float)
+    x_frame = df.drop(columns=[target], errors="ignore")
+
+    # Like SimpleImputer, drop features that never had an observed value.
+    num_features = [f for f in num_features if moments[f].count > 0]
+    cat_features = [f for f in cat_features if category_counts[f]]
+
+    if spec["imputation"]["numeric"] == "median":
+        fill_values = {f: medians[f].median() for f in num_features}
+    else:
+        fill_values = {f: moments[f].mean for f in num_features}
+    x_num = x_frame[num_features].fillna(fill_values).astype(float)
+    if spec["winsorize"] is not None:
+        means, stds = [], []
+        for feature in num_features:
+            # Moments of the imputed column: observed values plus one fill value per missing value.
+            imputed = RunningMoments()
+            imputed.merge(moments[feature].count, moments[feature].mean, moments[feature].m2)
+            imputed.merge(missing_counts[feature], fill_values[feature], 0.0)
+            means.append(imputed.mean)
+            stds.append(imputed.std())
+        winsorizer = GaussianWinsorizer(n_sigma=spec["winsorize"]["n_sigma"]).fit_from_moments(means, stds)
+        x_num = winsorizer.transform(x_num)
+
+    x_cat = pd.DataFrame(
+        {f: x_frame[f].fillna(most_frequent(category_counts[f])) for f in cat_features},
+        index=x_frame.index,
+    )
+    x_processed = pd.concat([x_num, x_cat], axis=1)
+    return _finish(spec, x_processed, y, cat_features)
+
+
+# ── Public entry points ──────────────────────────────────────────────────────
+
+def run_dataset_spec(spec: Dict[str, Any], seed: int, sample_size: int | None = None):
+    """Preprocess the dataset described by a normalized spec.
+
+    Returns (X, y, cat_info, labels, interaction_specs) where X is a DataFrame
+    of features (numeric columns first, then categorical ones as
+    ``pd.Categorical`` coded against cat_info, then any default interaction
+    columns), y is the target as a numpy array,
+    cat_info maps categorical column names to their sorted category lists and
+    labels maps each column name to its display name.
+    """
+    data_path = DATA_DIR / spec["source"]
+    if not data_path.exists():
+        raise FileNotFoundError(f"Missing {spec['source']} in trainer-service/data.")
+
+    default_size = spec["sampling"]["default_size"]
+    effective_sample_size = sample_size if sample_size is not None else default_size
+    if effective_sample_size is None:
+        effective_sample_size = np.iinfo(np.int64).max
+    if _use_chunked_mode(spec, data_path):
+        return _run_chunked(spec, data_path, seed, effective_sample_size)
+    return _run_in_memory(spec, data_path, seed, effective_sample_size)
+
+
+def compile_dataset_spec(dataset_id: str, preprocessing: Dict[str, Any]) -> Callable[..., Any]:
+    """Validate a spec's [preprocessing] table and return its ``(seed, sample_size=None)`` preprocessor."""
+    return partial(run_dataset_spec, normalize_spec(dataset_id, preprocessing))
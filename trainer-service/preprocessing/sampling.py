@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+from typing import Callable, Dict, Hashable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ── Index-based sampling ─────────────────────────────────────────────────────
+# Row indices are grouped per stratum (target class, category or quantile bin)
+# once per dataset and memoized. Every draw then only touches the rows it
+# returns: per stratum a seeded Generator.choice without replacement, which is
+# O(k) for k << n, followed by a shuffle of the k drawn indices.
+
+SAMPLING_POLICIES = {"uniform", "balanced", "proportional"}
+
+# Stratum indexes are small (one int64 per row); keep a few datasets' worth.
+MAX_CACHED_INDEXES = 16
+
+
+class StratumIndex:
+    """Row positions grouped by stratum code, in ascending code order."""
+
+    def __init__(self, codes: np.ndarray) -> None:
+        codes = np.asarray(codes, dtype=np.int64)
+        self.n_rows = len(codes)
+        counts = np.bincount(codes) if self.n_rows else np.zeros(0, dtype=np.int64)
+        order = np.argsort(codes, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        self.strata: List[np.ndarray] = [
+            order[offsets[i]:offsets[i + 1]] for i in range(len(counts)) if counts[i]
+        ]
+
+    @property
+    def sizes(self) -> np.ndarray:
+        return np.array([len(stratum) for stratum in self.strata], dtype=np.int64)
+
+    @classmethod
+    def from_values(cls, values: pd.Series, bins: int | None = None) -> "StratumIndex":
+        return cls(stratum_codes(values, bins))
+
+
+def stratum_codes(values: pd.Series, bins: int | None = None) -> np.ndarray:
+    """Integer stratum per row: sorted distinct values, or quantile bins when ``bins`` is set.
+
+    Missing values form their own (last) stratum.
+    """
+    if bins is not None and pd.api.types.is_numeric_dtype(values.dtype):
+        numeric = values.to_numpy(dtype=float)
+        observed = numeric[~np.isnan(numeric)]
+        if len(observed) == 0:
+            return np.zeros(len(numeric), dtype=np.int64)
+        edges = np.unique(np.quantile(observed, np.linspace(0, 1, bins + 1)))
+        codes = np.searchsorted(edges[1:-1], numeric, side="right")
+        return np.where(np.isnan(numeric), len(edges), codes).astype(np.int64)
+    codes, _ = pd.factorize(values, sort=True, use_na_sentinel=False)
+    return codes.astype(np.int64)
+
+
+_index_cache: "Dict[Hashable, StratumIndex]" = {}
+_index_lock = threading.Lock()
+
+
+def cached_stratum_index(key: Hashable, build: Callable[[], StratumIndex]) -> StratumIndex:
+    """Memoize a stratum index; ``key`` must change whenever the underlying rows do."""
+    with _index_lock:
+        index = _index_cache.get(key)
+    if index is not None:
+        return index
+    index = build()
+    with _index_lock:
+        if len(_index_cache) >= MAX_CACHED_INDEXES:
+            _index_cache.pop(next(iter(_index_cache)))
+        _index_cache[key] = index
+    return index
+
+
+def _draw(stratum: np.ndarray, k: int, rng: np.random.Generator) -> np.ndarray:
+    if k >= len(stratum):
+        return stratum
+    return stratum[rng.choice(len(stratum), size=k, replace=False)]
+
+
+def balanced_quotas(sizes: np.ndarray, sample_size: int) -> np.ndarray:
+    """Equal share per stratum (remainder to the first ones), capped by stratum size."""
+    per_group, remainder = divmod(sample_size, len(sizes))
+    quotas = np.full(len(sizes), per_group, dtype=np.int64)
+    quotas[:remainder] += 1
+    return np.minimum(quotas, sizes)
+
+
+def proportional_quotas(sizes: np.ndarray, sample_size: int) -> np.ndarray:
+    """Quotas proportional to stratum size (largest remainder), summing to ``sample_size``."""
+    exact = sizes * (sample_size / sizes.sum())
+    quotas = np.floor(exact).astype(np.int64)
+    shortfall = sample_size - int(quotas.sum())
+    if shortfall > 0:
+        quotas[np.argsort(-(exact - quotas), kind="stable")[:shortfall]] += 1
+    return np.minimum(quotas, sizes)
+
+
+def sample_indices(
+    policy: str,
+    n_rows: int,
+    sample_size: int,
+    seed: int,
+    index: StratumIndex | None = None,
+) -> np.ndarray | None:
+    """Row positions for a seeded sample, or ``None`` when every row is kept.
+
+    ``uniform`` draws plain random rows; ``balanced`` gives each stratum of
+    ``index`` an equal share and ``proportional`` a share matching its size.
+    Stratified draws are shuffled so strata are interleaved.
+    """
+    if policy not in SAMPLING_POLICIES:
+        raise ValueError(f"Unknown sampling policy: {policy}")
+    if n_rows <= sample_size:
+        return None
+    rng = np.random.default_rng(seed)
+    if policy == "uniform" or index is None:
+        return rng.choice(n_rows, size=sample_size, replace=False)
+    if policy == "balanced" and len(index.strata) < 2:
+        return None
+
+    sizes = index.sizes
+    quotas = balanced_quotas(sizes, sample_size) if policy == "balanced" else proportional_quotas(sizes, sample_size)
+    drawn = np.concatenate([_draw(stratum, int(k), rng) for stratum, k in zip(index.strata, quotas)])
+    return drawn[rng.permutation(len(drawn))]
+
+
+def sample_frame(
+    df: pd.DataFrame,
+    policy: str,
+    sample_size: int,
+    seed: int,
+    index: StratumIndex | None = None,
+) -> Tuple[pd.DataFrame, bool]:
+    """Apply ``sample_indices`` to ``df``; returns (frame, sampled)."""
+    positions = sample_indices(policy, len(df), sample_size, seed, index)
+    if positions is None:
+        return df, False
+    return df.take(positions).reset_index(drop=True), True
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+
+# ── Streaming building blocks ────────────────────────────────────────────────
+# Used by the chunked preprocessing mode: every structure consumes one chunk at
+# a time and keeps state that is independent of the number of rows seen.
+
+
+class RunningMoments:
+    """Count/mean/M2 of observed values, merged chunk by chunk (Chan et al.)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.merge(len(values), float(values.mean()), float(((values - values.mean()) ** 2).sum()))
+
+    def merge(self, count: int, mean: float, m2: float) -> None:
+        if count == 0:
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+
+    def std(self) -> float:
+        """Population standard deviation, matching ``numpy.std``'s default."""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded relative error (DDSketch-style).
+
+    Values are counted in logarithmic buckets, so a quantile estimate ``q'``
+    satisfies ``|q' - q| <= relative_accuracy * |q|``. Memory grows with the
+    logarithm of the value range, not with the number of values.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.005, min_magnitude: float = 1e-9) -> None:
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.min_magnitude = min_magnitude
+        self.positive: Counter = Counter()
+        self.negative: Counter = Counter()
+        self.zero_count = 0
+        self.count = 0
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        magnitude = np.abs(values)
+        small = magnitude < self.min_magnitude
+        self.zero_count += int(small.sum())
+        for counter, mask in ((self.positive, (values > 0) & ~small), (self.negative, (values < 0) & ~small)):
+            if not mask.any():
+                continue
+            indices = np.ceil(np.log(magnitude[mask]) / self.log_gamma).astype(np.int64)
+            unique, counts = np.unique(indices, return_counts=True)
+            counter.update(dict(zip(unique.tolist(), counts.tolist())))
+
+    def merge(self, other: "QuantileSketch") -> None:
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "min_magnitude": self.min_magnitude,
+            "positive": {str(index): count for index, count in self.positive.items()},
+            "negative": {str(index): count for index, count in self.negative.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data["min_magnitude"])
+        sketch.positive = Counter({int(index): count for index, count in data["positive"].items()})
+        sketch.negative = Counter({int(index): count for index, count in data["negative"].items()})
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        return sketch
+
+    def rank(self, value: float) -> float:
+        """Approximate number of values ``<= value``."""
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            if -self._bucket_value(index) > value:
+                return seen
+            seen += self.negative[index]
+        if value < 0:
+            return seen
+        seen += self.zero_count
+        for index in sorted(self.positive):
+            if self._bucket_value(index) > value:
+                return seen
+            seen += self.positive[index]
+        return seen
+
+    def _bucket_value(self, index: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i].
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.negative, reverse=True):
+            seen += self.negative[index]
+            if seen > rank:
+                return -self._bucket_value(index)
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.positive):
+            seen += self.positive[index]
+            if seen > rank:
+                return self._bucket_value(index)
+        return self._bucket_value(max(self.positive)) if self.positive else 0.0
+
+
+class StreamingMedian:
+    """Exact median while the observed values fit in ``exact_limit``, then a quantile sketch."""
+
+    def __init__(self, exact_limit: int = 1_000_000, relative_accuracy: float = 0.005) -> None:
+        self.exact_limit = exact_limit
+        self._values: list[np.ndarray] | None = []
+        self._exact_count = 0
+        self._sketch = QuantileSketch(relative_accuracy)
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        self._sketch.update(values)
+        if self._values is None:
+            return
+        self._exact_count += len(values)
+        if self._exact_count > self.exact_limit:
+            self._values = None
+        else:
+            self._values.append(values.copy())
+
+    @property
+    def exact(self) -> bool:
+        return self._values is not None
+
+    def median(self) -> float:
+        if self._values is not None:
+            values = np.concatenate(self._values) if self._values else np.array([])
+            return float(np.median(values)) if len(values) else float("nan")
+        return self._sketch.quantile(0.5)
+
+
+class BalancedReservoirSampler:
+    """Class-balanced sampling without replacement over a stream of chunks.
+
+    Every row gets a uniform random key; per class only the ``sample_size`` rows
+    with the smallest keys are retained (bottom-k sampling), which is a uniform
+    sample of that class. ``finish`` then splits ``sample_size`` evenly across
+    classes like ``sampling.balanced_quotas`` does for in-memory frames. With
+    ``target=None`` all rows share one reservoir (a plain uniform sample).
+    """
+
+    def __init__(self, target: str | None, sample_size: int, seed: int) -> None:
+        self.target = target
+        self.sample_size = sample_size
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.rows_seen = 0
+        self._reservoirs: dict[object, pd.DataFrame] = {}
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.rows_seen += len(chunk)
+        chunk = chunk.assign(_sample_key=self.rng.random(len(chunk)))
+        groups = [(None, chunk)] if self.target is None else chunk.groupby(self.target, dropna=False, sort=False)
+        for label, group in groups:
+            current = self._reservoirs.get(label)
+            merged = group if current is None else pd.concat([current, group], ignore_index=True)
+            if len(merged) > self.sample_size:
+                merged = merged.nsmallest(self.sample_size, "_sample_key")
+            self._reservoirs[label] = merged
+
+    def finish(self) -> pd.DataFrame:
+        labels = sorted(self._reservoirs, key=lambda label: (pd.isna(label), label))
+        if not labels:
+            return pd.DataFrame()
+        if len(labels) < 2 or self.rows_seen <= self.sample_size:
+            # Mirrors the in-memory helper: nothing to balance, keep every row.
+            frame = pd.concat([self._reservoirs[label] for label in labels], ignore_index=True)
+            return frame.drop(columns="_sample_key")
+
+        per_group = self.sample_size // len(labels)
+        remainder = self.sample_size % len(labels)
+        parts = []
+        for index, label in enumerate(labels):
+            target_size = per_group + (1 if index < remainder else 0)
+            parts.append(self._reservoirs[label].nsmallest(target_size, "_sample_key"))
+        frame = pd.concat(parts, ignore_index=True).drop(columns="_sample_key")
+        return frame.sample(frac=1, random_state=self.seed).reset_index(drop=True)
+
+
+def most_frequent(counts: Counter) -> object:
+    """Most frequent value, ties broken by the smallest value like ``SimpleImputer``."""
+    if not counts:
+        return np.nan
+    best = max(counts.values())
+    return min(value for value, count in counts.items() if count == best)
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+# A projection is a list of dotted paths into a model payload, e.g.
+# "model,version.shapes,version.testMetrics". Storage backends resolve them as
+# close to the data as they can; the result keeps the payload's nesting but
+# contains only the requested subtrees.
+
+FieldPath = Tuple[str, ...]
+
+_SEGMENT_PATTERN = re.compile(r"^[A-Za-z0-9_\-]+$")
+
+
+def parse_fields(fields: str | None) -> List[FieldPath] | None:
+    """Parse a ``fields=`` query value; ``None``/empty means the full payload."""
+    if fields is None or not fields.strip():
+        return None
+    paths: List[FieldPath] = []
+    for raw in fields.split(","):
+        raw = raw.strip()
+        if not raw:
+            continue
+        segments = tuple(raw.split("."))
+        if not all(_SEGMENT_PATTERN.match(segment) for segment in segments):
+            raise ValueError(f"Invalid field path: {raw}")
+        paths.append(segments)
+    if not paths:
+        return None
+    # Drop paths already covered by a requested ancestor ("version" covers "version.shapes").
+    unique = sorted(set(paths), key=len)
+    return [path for index, path in enumerate(unique) if not any(path[: len(other)] == other for other in unique[:index])]
+
+
+def assign_path(result: Dict, path: FieldPath, value: Any) -> None:
+    node = result
+    for segment in path[:-1]:
+        node = node.setdefault(segment, {})
+    node[path[-1]] = value
+
+
+def project_payload(payload: Dict, paths: List[FieldPath]) -> Dict:
+    """Project an already loaded payload; missing paths are left out."""
+    result: Dict = {}
+    for path in paths:
+        node: Any = payload
+        for segment in path:
+            if not isinstance(node, dict) or segment not in node:
+                break
+            node = node[segment]
+        else:
+            assign_path(result, path, node)
+    return result
+
+
+def covers_sections(projected: Dict, paths: List[FieldPath]) -> bool:
+    """True when every requested top-level section was present in the stored document."""
+    return all(path[0] in projected for path in paths)
+
+
+def _load_ijson():
+    try:
+        import ijson
+    except ImportError:
+        return None
+    return ijson
+
+
+def project_json_file(path: Path, paths: List[FieldPath]) -> Dict:
+    """Read only the requested subtrees of a JSON file.
+
+    With ``ijson`` installed the file is parsed as an event stream and only the
+    requested subtrees are materialized; everything else is skipped without
+    building Python objects. Without it the whole document is loaded.
+    """
+    ijson = _load_ijson()
+    if ijson is None:
+        with path.open("r", encoding="utf-8") as file:
+            return project_payload(json.load(file), paths)
+
+    # ijson prefixes are dot-joined map keys, which matches our field syntax.
+    targets = {".".join(field_path): field_path for field_path in paths}
+    remaining = len(targets)
+    result: Dict = {}
+    builder = None
+    builder_prefix = ""
+    depth = 0
+    with path.open("rb") as file:
+        for prefix, event, value in ijson.parse(file, use_float=True):
+            if builder is None:
+                if prefix not in targets or event in ("map_key", "end_map", "end_array"):
+                    continue
+                builder = ijson.ObjectBuilder()
+                builder_prefix = prefix
+                depth = 0
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+            if depth == 0:
+                assign_path(result, targets[builder_prefix], builder.value)
+                builder = None
+                remaining -= 1
+                if remaining == 0:
+                    # Every requested subtree is complete; skip the rest of the file.
+                    break
+    return result
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+
+from ensemble import aggregate_seed_shapes
+from model_cache import TrainedModel, get_cached_model
+from model_store import normalize_stored_model_payload
+from schemas import ReshapeRequest
+from storage import get_saved_model_version_payload
+from training import (
+    INTERACTION_GRID_POINTS,
+    build_interaction_shapes,
+    feature_shapes,
+    normalize_numeric_shape_points,
+)
+
+
+# ── Shape re-export at another resolution ────────────────────────────────────
+# POST /models/{versionId}/reshape changes ``points`` (knots per numeric
+# shape) and ``grid_points`` (per numeric axis of interaction grids) after
+# training. A version still in the model cache is resampled from the model's
+# own shape functions, exactly as /train would have produced them at that
+# resolution; an ensemble re-averages its members' shape functions and
+# rebuilds the seed-to-seed bands. Otherwise the stored shapes (sent in the request, or read from
+# a saved model's version history) are linearly interpolated; edits made to
+# them are kept.
+
+MAX_GRID_POINTS = 100
+
+
+def _clamp_points(points: int | None) -> int | None:
+    return max(2, min(250, points)) if points is not None else None
+
+
+def _clamp_grid_points(grid_points: int | None) -> int | None:
+    return max(2, min(MAX_GRID_POINTS, grid_points)) if grid_points is not None else None
+
+
+def reshape_trained_model(entry: TrainedModel, points: int | None, grid_points: int | None) -> Dict:
+    points = points if points is not None else entry.params.num_points
+    grid_points = grid_points if grid_points is not None else INTERACTION_GRID_POINTS
+    model_keys = entry.feature_keys + entry.dummy_keys
+    shape_functions = normalize_numeric_shape_points(entry.shape_functions, model_keys, entry.cat_info, points)
+    ensemble_shapes = None
+    if entry.ensemble_members is not None:
+        members = [
+            {**member, "shapeFunctions": normalize_numeric_shape_points(member["shapeFunctions"], model_keys, entry.cat_info, points)}
+            for member in entry.ensemble_members
+        ]
+        ensemble_shapes = aggregate_seed_shapes(
+            entry.params.seed, shape_functions, members, model_keys, entry.cat_info, points
+        )
+        shape_functions = ensemble_shapes.mean
+    shapes = feature_shapes(shape_functions, entry.feature_keys, entry.cat_info, entry.label_map)
+    shapes += build_interaction_shapes(
+        shape_functions, entry.interaction_specs, entry.interaction_bounds, entry.cat_info, entry.label_map, grid_points
+    )
+    if ensemble_shapes is not None:
+        ensemble_shapes.add_bands(
+            shapes, entry.interaction_specs, entry.interaction_bounds, entry.cat_info, entry.label_map, grid_points
+        )
+    return {"points": points, "gridPoints": grid_points, "source": "model", "shapes": shapes}
+
+
+# ── Interpolating stored shapes ──
+
+def _resample_curve(xs, ys, points: int) -> Tuple[List[float], List[float]]:
+    curve = normalize_numeric_shape_points({"curve": {"x": xs, "y": ys}}, ["curve"], {}, points)["curve"]
+    return curve["x"], curve["y"]
+
+
+def _is_numeric_curve(xs, ys) -> bool:
+    if not isinstance(xs, list) or not isinstance(ys, list) or len(xs) < 2 or len(xs) != len(ys):
+        return False
+    return all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in xs + ys)
+
+
+def _resample_grid_axis(z: np.ndarray, grid: List[float], grid_points: int, axis: int) -> Tuple[np.ndarray, List[float]]:
+    old_grid = np.asarray(grid, dtype=float)
+    new_grid = np.linspace(old_grid[0], old_grid[-1], grid_points)
+    resampled = np.apply_along_axis(lambda values: np.interp(new_grid, old_grid, values), axis, z)
+    return resampled, new_grid.tolist()
+
+
+def _band_arrays(shape: Dict) -> Dict[str, List]:
+    """The per-point arrays of an ensemble shape's ``band``, resampled alongside its values."""
+    band = shape.get("band")
+    return {name: values for name, values in band.items() if isinstance(values, list)} if isinstance(band, dict) else {}
+
+
+def _interpolate_shape(shape: Dict, points: int | None, grid_points: int | None) -> Dict:
+    shape = dict(shape)
+    if shape.get("categories"):
+        return shape
+    band = _band_arrays(shape)
+    if points is not None and _is_numeric_curve(shape.get("editableX"), shape.get("editableY")):
+        xs = shape["editableX"]
+        shape["editableX"], shape["editableY"] = _resample_curve(xs, shape["editableY"], points)
+        if not shape.get("editableZ"):
+            # An interaction's band follows its grid, not the 1D term curve.
+            band = {name: _resample_curve(xs, values, points)[1] for name, values in band.items() if len(values) == len(xs)}
+    if grid_points is not None and shape.get("editableZ"):
+        # editableZ rows follow the second feature (gridX2), columns the first (gridX).
+        z = np.asarray(shape["editableZ"], dtype=float)
+        grids = {name: np.asarray(values, dtype=float) for name, values in {"editableZ": shape["editableZ"], **band}.items()}
+        grids = {name: values for name, values in grids.items() if values.shape == z.shape}
+        if len(shape.get("gridX") or []) > 1 and z.ndim == 2 and z.shape[1] == len(shape["gridX"]):
+            grid = shape["gridX"]
+            for name, values in grids.items():
+                grids[name], shape["gridX"] = _resample_grid_axis(values, grid, grid_points, axis=1)
+        if len(shape.get("gridX2") or []) > 1 and z.ndim == 2 and z.shape[0] == len(shape["gridX2"]):
+            grid = shape["gridX2"]
+            for name, values in grids.items():
+                grids[name], shape["gridX2"] = _resample_grid_axis(values, grid, grid_points, axis=0)
+        shape["editableZ"] = grids.pop("editableZ").tolist()
+        band = {name: values.tolist() for name, values in grids.items()}
+    if "band" in shape:
+        shape["band"] = {**shape["band"], **band}
+    return shape
+
+
+def interpolate_shapes(shapes: List[Dict], points: int | None, grid_points: int | None) -> List[Dict]:
+    """Resample stored numeric shapes and interaction grids; categorical axes are left as they are."""
+    return [_interpolate_shape(shape, points, grid_points) for shape in shapes]
+
+
+def _stored_shapes(version_id: str, request: ReshapeRequest) -> List[Dict]:
+    if request.shapes is not None:
+        return request.shapes
+    if request.saved_model is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Model version is no longer cached; send its shapes or saved_model to interpolate them.",
+        )
+    try:
+        payload = get_saved_model_version_payload(request.saved_model, version_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except RuntimeError as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Version not found.")
+    version = normalize_stored_model_payload(payload).get("version") or {}
+    return list(version.get("shapes") or [])
+
+
+def build_reshape_response(version_id: str, request: ReshapeRequest) -> Dict:
+    points = _clamp_points(request.points)
+    grid_points = _clamp_grid_points(request.grid_points)
+    if points is None and grid_points is None:
+        raise HTTPException(status_code=400, detail="Provide points and/or grid_points.")
+
+    entry = get_cached_model(version_id)
+    if entry is not None:
+        return {"versionId": version_id, **reshape_trained_model(entry, points, grid_points)}
+
+    shapes = _stored_shapes(version_id, request)
+    return {
+        "versionId": version_id,
+        "points": points,
+        "gridPoints": grid_points,
+        "source": "interpolated",
+        "shapes": interpolate_shapes(shapes, points, grid_points),
+    }
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import sys
+import tarfile
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator
+
+from storage import import_saved_model_payloads, iter_saved_model_payloads
+
+
+# Saved models travel as either NDJSON ({"name": ..., "payload": ...} per line)
+# or a tar archive with one <name>.json member per model. Both are produced and
+# consumed one model at a time, so memory use does not grow with the export.
+
+EXPORT_FORMATS = {"ndjson", "tar"}
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "tar": "application/x-tar"}
+
+
+def resolve_format(requested: str | None, content_type: str | None = None) -> str:
+    if requested:
+        fmt = requested.strip().lower()
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported format: {requested}. Use one of {sorted(EXPORT_FORMATS)}.")
+        return fmt
+    if content_type and "tar" in content_type.lower():
+        return "tar"
+    return "ndjson"
+
+
+def ndjson_chunks(items: Iterable[tuple[str, dict[str, Any]]]) -> Iterator[bytes]:
+    for name, payload in items:
+        yield json.dumps({"name": name, "payload": payload}, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that hands buffered tar output back to a generator."""
+
+    def __init__(self) -> None:
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def tar_chunks(items: Iterable[tuple[str, dict[str, Any]]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    # "w|" is tarfile's stream mode: no seeking, members are written sequentially.
+    with tarfile.open(fileobj=sink, mode="w|") as archive:
+        for name, payload in items:
+            data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            info = tarfile.TarInfo(name=f"{Path(name).name}.json")
+            info.size = len(data)
+            info.mtime = int(time.time())
+            archive.addfile(info, io.BytesIO(data))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def export_chunks(items: Iterable[tuple[str, dict[str, Any]]], fmt: str) -> Iterator[bytes]:
+    return tar_chunks(items) if fmt == "tar" else ndjson_chunks(items)
+
+
+def read_ndjson(stream: BinaryIO) -> Iterator[tuple[str, dict[str, Any]]]:
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f"Invalid JSON on line {line_number}: {exc.msg}") from exc
+        if not isinstance(record, dict) or "name" not in record or "payload" not in record:
+            raise ValueError(f"Line {line_number} must be an object with 'name' and 'payload'.")
+        yield str(record["name"]), record["payload"]
+
+
+def read_tar(stream: BinaryIO) -> Iterator[tuple[str, dict[str, Any]]]:
+    try:
+        with tarfile.open(fileobj=stream, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile() or not member.name.endswith(".json"):
+                    continue
+                file = archive.extractfile(member)
+                if file is None:
+                    continue
+                try:
+                    payload = json.load(file)
+                except json.JSONDecodeError as exc:
+                    raise ValueError(f"Invalid JSON in {member.name}: {exc.msg}") from exc
+                yield Path(member.name).stem, payload
+    except tarfile.TarError as exc:
+        raise ValueError(f"Invalid tar archive: {exc}") from exc
+
+
+def read_saved_models(stream: BinaryIO, fmt: str) -> Iterator[tuple[str, dict[str, Any]]]:
+    return read_tar(stream) if fmt == "tar" else read_ndjson(stream)
+
+
+def _report_progress(items: Iterable[tuple[str, dict[str, Any]]]) -> Iterator[tuple[str, dict[str, Any]]]:
+    for count, item in enumerate(items, start=1):
+        if count % 100 == 0:
+            print(f"  {count} models...", file=sys.stderr)
+        yield item
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Export, import or copy saved models between storage backends.")
+    backends = ["file", "postgres", "sqlite"]
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write saved models to a file (or stdout).")
+    export_parser.add_argument("--from", dest="source", choices=backends, help="Defaults to SAVED_MODELS_STORAGE.")
+    export_parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    export_parser.add_argument("--prefix")
+    export_parser.add_argument("--output", help="Output path; defaults to stdout.")
+
+    import_parser = subparsers.add_parser("import", help="Load saved models from an NDJSON or tar export.")
+    import_parser.add_argument("--to", dest="target", choices=backends, help="Defaults to SAVED_MODELS_STORAGE.")
+    import_parser.add_argument("--format", choices=sorted(EXPORT_FORMATS))
+    import_parser.add_argument("input", help="Export file; the format is inferred from a .tar suffix.")
+
+    copy_parser = subparsers.add_parser("copy", help="Stream saved models directly from one backend to another.")
+    copy_parser.add_argument("--from", dest="source", choices=backends, required=True)
+    copy_parser.add_argument("--to", dest="target", choices=backends, required=True)
+    copy_parser.add_argument("--prefix")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        items = _report_progress(iter_saved_model_payloads(prefix=args.prefix, storage=args.source))
+        if args.output:
+            with open(args.output, "wb") as output:
+                for chunk in export_chunks(items, args.format):
+                    output.write(chunk)
+            print(f"Wrote {args.output}", file=sys.stderr)
+        else:
+            for chunk in export_chunks(items, args.format):
+                sys.stdout.buffer.write(chunk)
+        return
+
+    if args.command == "import":
+        fmt = resolve_format(args.format or ("tar" if args.input.endswith(".tar") else None))
+        with open(args.input, "rb") as stream:
+            count = import_saved_model_payloads(_report_progress(read_saved_models(stream, fmt)), storage=args.target)
+        print(f"Imported {count} saved models", file=sys.stderr)
+        return
+
+    if args.source == args.target:
+        parser.error("--from and --to must differ.")
+    items = _report_progress(iter_saved_model_payloads(prefix=args.prefix, storage=args.source))
+    count = import_saved_model_payloads(items, storage=args.target)
+    print(f"Copied {count} saved models from {args.source} to {args.target}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
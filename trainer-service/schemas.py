@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import Dict, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class SaveModelRequest(BaseModel):
@@ -10,11 +10,19 @@ class SaveModelRequest(BaseModel):
     payload: Dict
 
 
+class InteractionRequest(BaseModel):
+    k1: str
+    k2: str
+    operator: str = "product"
+
+
 class TrainRequest(BaseModel):
     dataset: str
     model_type: str = "igann_interactive"
     center_shapes: bool = False
     selected_features: List[str] = []
+    # Pairwise terms built at request time from the preprocessed features.
+    interactions: List[InteractionRequest] = []
     seed: int = 3
     points: int | None = 250
     n_estimators: int = 100
@@ -25,3 +33,55 @@ class TrainRequest(BaseModel):
     n_hid: int = 10
     scale_y: bool = True
     sample_size: int | None = None
+    # Also report k-fold cross-validated metrics and shape bands (2-10 folds).
+    cv_folds: int | None = None
+    # Fit on float32 views and keep per-row data in arrays until serialization
+    # (default: TRAINING_LOW_MEMORY).
+    low_memory: bool | None = None
+    # Train this many seeds (seed, seed+1, ...) in parallel and return their
+    # mean shapes with seed-to-seed bands (2-16).
+    ensemble_seeds: int | None = None
+    # Percentile-bootstrap intervals for the test metrics (opt-in; at most 10000).
+    bootstrap_resamples: int = 0
+    confidence_level: float = Field(0.95, gt=0, lt=1)
+
+
+class FeatureSelectionRequest(TrainRequest):
+    # "forward" adds one feature per step, "backward" removes one.
+    direction: str = "forward"
+    # Held-out metric to optimize; defaults to rmse (regression) or acc (classification).
+    metric: str | None = None
+    # Stop once the best step improves the metric by less than this (may be negative).
+    min_improvement: float = 0.0
+    max_features: int | None = None
+    max_steps: int | None = None
+    time_budget_seconds: float | None = None
+
+
+class ReshapeRequest(BaseModel):
+    # Knots per numeric shape and points per numeric interaction-grid axis.
+    points: int | None = None
+    grid_points: int | None = None
+    # Used when the version is no longer cached: its current shapes, or the saved model holding it.
+    shapes: List[Dict] | None = None
+    saved_model: str | None = None
+
+
+class CompareModelRef(BaseModel):
+    name: str
+    # "saved" for saved models, "model" for the generated models listed under /models.
+    source: str = "saved"
+    # A saved model's version; defaults to its current one.
+    version_id: str | None = None
+
+
+class CompareModelsRequest(BaseModel):
+    models: List[CompareModelRef]
+    # Common grid: points per numeric shape and per numeric interaction-grid axis.
+    points: int = 100
+    grid_points: int = 15
+    # Test split the predictions are compared on (default: the first model's seed and sample size).
+    seed: int | None = None
+    sample_size: int | None = None
+    # Also return every model's shapes on the common grid, not only the differences.
+    include_shapes: bool = False
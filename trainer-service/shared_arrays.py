@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+
+# ── Shared-memory array bundles ──────────────────────────────────────────────
+# A bundle packs named numpy arrays into one multiprocessing.shared_memory
+# segment. Worker processes receive only the small picklable handle and map
+# the same pages read-only, so large datasets are never pickled or copied
+# between processes. The creating process owns the segment and unlinks it;
+# it may also overwrite an array in place (e.g. a flag workers poll).
+
+# Arrays start on cache-line boundaries inside the segment.
+ALIGNMENT = 64
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    name: str
+    dtype: str
+    shape: Tuple[int, ...]
+    offset: int
+
+
+@dataclass(frozen=True)
+class SharedArraysHandle:
+    segment: str
+    arrays: Tuple[SharedArraySpec, ...]
+
+
+def _views(buffer, specs: Tuple[SharedArraySpec, ...]) -> Dict[str, np.ndarray]:
+    views = {}
+    for spec in specs:
+        view = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=buffer, offset=spec.offset)
+        view.setflags(write=False)
+        views[spec.name] = view
+    return views
+
+
+class SharedArrays:
+    """Owner side of a bundle; use as a context manager or call ``release()``."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        specs = []
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            specs.append(SharedArraySpec(name, array.dtype.str, tuple(array.shape), offset))
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        self._shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        try:
+            for spec, array in zip(specs, arrays.values()):
+                target = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=self._shm.buf, offset=spec.offset)
+                target[...] = array
+                del target
+        except BaseException:
+            self.release()
+            raise
+        self.handle = SharedArraysHandle(self._shm.name, tuple(specs))
+
+    def fill(self, name: str, value) -> None:
+        """Overwrite array ``name`` in place; processes attached to the bundle see the new values."""
+        if self._shm is None:
+            return
+        spec = next(spec for spec in self.handle.arrays if spec.name == name)
+        target = np.ndarray(spec.shape, dtype=np.dtype(spec.dtype), buffer=self._shm.buf, offset=spec.offset)
+        target[...] = value
+        del target
+
+    def release(self) -> None:
+        if self._shm is None:
+            return
+        shm, self._shm = self._shm, None
+        shm.close()
+        shm.unlink()
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+@contextmanager
+def attach_shared_arrays(handle: SharedArraysHandle) -> Iterator[Dict[str, np.ndarray]]:
+    """Read-only views of a bundle created in another process.
+
+    The views are only valid inside the ``with`` block; copy anything (e.g. by
+    fancy indexing) that must outlive it.
+    """
+    shm = shared_memory.SharedMemory(name=handle.segment)
+    views = _views(shm.buf, handle.arrays)
+    try:
+        yield views
+    finally:
+        views.clear()
+        try:
+            shm.close()
+        except BufferError:
+            # A caller still holds a view; the mapping is released once it is collected.
+            pass
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+from sklearn.model_selection import KFold, StratifiedKFold, train_test_split
+
+
+# ── Train/test split cache ───────────────────────────────────────────────────
+# Train/test membership is computed once per (dataset fingerprint, seed,
+# sample_size, row count, stratify) as two read-only row-position arrays and
+# shared by every endpoint that trains on or scores the dataset. Callers index
+# the preprocessed arrays with them instead of splitting (and copying) the
+# feature frame on each request. The positions are exactly those
+# train_test_split would pick for the same seed, so results are unchanged.
+# K-fold assignments for cross-validation are cached the same way.
+
+TEST_SIZE = 0.2
+
+# One entry is two int64 arrays covering the dataset's rows.
+MAX_CACHED_SPLITS = 64
+
+SplitKey = Tuple[str, int, int | None, int, bool]
+
+
+@dataclass(frozen=True)
+class TrainTestSplit:
+    train: np.ndarray
+    test: np.ndarray
+    # Whether the split was stratified by target class (see split_indices).
+    stratified: bool
+
+
+_splits: "OrderedDict[SplitKey, TrainTestSplit]" = OrderedDict()
+_folds: "OrderedDict[Tuple[SplitKey, int], np.ndarray]" = OrderedDict()
+_splits_lock = threading.Lock()
+
+
+def _cached(store: OrderedDict, key, build):
+    with _splits_lock:
+        value = store.get(key)
+        if value is not None:
+            store.move_to_end(key)
+            return value
+    value = build()
+    with _splits_lock:
+        store[key] = value
+        while len(store) > MAX_CACHED_SPLITS:
+            store.popitem(last=False)
+    return value
+
+
+def split_indices(y: np.ndarray, seed: int, stratify: bool = False, test_size: float = TEST_SIZE) -> TrainTestSplit:
+    """Seeded train/test row positions for targets ``y``.
+
+    Stratification by class is only applied when every class has at least two
+    rows and there is more than one class; otherwise the split is plain random.
+    """
+    stratify_by = None
+    if stratify:
+        unique_targets, target_counts = np.unique(y, return_counts=True)
+        if len(unique_targets) > 1 and int(np.min(target_counts)) >= 2:
+            stratify_by = y
+    train, test = train_test_split(
+        np.arange(len(y)),
+        test_size=test_size,
+        random_state=seed,
+        stratify=stratify_by,
+    )
+    train.setflags(write=False)
+    test.setflags(write=False)
+    return TrainTestSplit(train=train, test=test, stratified=stratify_by is not None)
+
+
+def get_train_test_split(
+    fingerprint: str,
+    y: np.ndarray,
+    seed: int,
+    sample_size: int | None = None,
+    stratify: bool = False,
+) -> TrainTestSplit:
+    """Cached ``split_indices``; ``fingerprint`` must change whenever the dataset rows do."""
+    key: SplitKey = (fingerprint, seed, sample_size, len(y), bool(stratify))
+    return _cached(_splits, key, lambda: split_indices(y, seed, stratify))
+
+
+def fold_assignment(y: np.ndarray, n_folds: int, seed: int, stratify: bool = False) -> np.ndarray:
+    """Seeded k-fold membership: the fold (0..n_folds-1) each row is held out in.
+
+    Folds are stratified by class when every class has at least ``n_folds`` rows.
+    """
+    splitter = KFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    if stratify:
+        _, target_counts = np.unique(y, return_counts=True)
+        if len(target_counts) > 1 and int(np.min(target_counts)) >= n_folds:
+            splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=seed)
+    folds = np.empty(len(y), dtype=np.int8)
+    for fold, (_, held_out) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        folds[held_out] = fold
+    folds.setflags(write=False)
+    return folds
+
+
+def get_fold_assignment(
+    fingerprint: str,
+    y: np.ndarray,
+    seed: int,
+    n_folds: int,
+    sample_size: int | None = None,
+    stratify: bool = False,
+) -> np.ndarray:
+    """Cached ``fold_assignment``; keyed like ``get_train_test_split`` plus the fold count."""
+    key = ((fingerprint, seed, sample_size, len(y), bool(stratify)), n_folds)
+    return _cached(_folds, key, lambda: fold_assignment(y, n_folds, seed, stratify))
+
+
+def clear_split_cache() -> None:
+    with _splits_lock:
+        _splits.clear()
+        _folds.clear()
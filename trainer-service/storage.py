@@ -2,18 +2,39 @@ from __future__ import annotations
 
 import json
 import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
 
-from paths import SAVED_MODELS_DIR
+from model_versions import (
+    build_version_record,
+    needs_compaction,
+    payload_version_id,
+    reconstruct_payload,
+    record_metadata,
+    resolve_chain,
+    snapshot_record,
+)
+from paths import SAVED_MODELS_DIR, SAVED_MODELS_SQLITE_PATH
+from projection import FieldPath, assign_path, project_json_file
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms only get the in-process lock
+    fcntl = None
 
 
 SAVED_MODELS_TABLE = "saved_models"
+SAVED_MODEL_VERSIONS_TABLE = "saved_model_versions"
+BULK_BATCH_SIZE = 100
 
 
 def _get_saved_models_storage() -> str:
     configured = os.getenv("SAVED_MODELS_STORAGE", "").strip().lower()
-    if configured in {"file", "postgres"}:
+    if configured in {"file", "postgres", "sqlite"}:
         return configured
     return "postgres" if _get_database_url() else "file"
 
@@ -22,6 +43,11 @@ def _get_database_url() -> str | None:
     return os.getenv("SAVED_MODELS_DATABASE_URL") or os.getenv("DATABASE_URL")
 
 
+def _get_sqlite_path() -> Path:
+    configured = os.getenv("SAVED_MODELS_SQLITE_PATH", "").strip()
+    return Path(configured) if configured else SAVED_MODELS_SQLITE_PATH
+
+
 def _get_database_ssl_mode() -> str | None:
     ssl_mode = os.getenv("SAVED_MODELS_DATABASE_SSL", "").strip().lower()
     if ssl_mode:
@@ -87,6 +113,27 @@ def _ensure_postgres_schema() -> None:
                 ON {SAVED_MODELS_TABLE} (updated_at DESC)
                 """
             )
+            cursor.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS {SAVED_MODEL_VERSIONS_TABLE} (
+                    model_name TEXT NOT NULL,
+                    version_id TEXT NOT NULL,
+                    seq BIGSERIAL,
+                    parent_version_id TEXT,
+                    kind TEXT NOT NULL,
+                    metadata JSONB NOT NULL,
+                    body JSONB NOT NULL,
+                    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (model_name, version_id)
+                )
+                """
+            )
+            cursor.execute(
+                f"""
+                CREATE INDEX IF NOT EXISTS {SAVED_MODEL_VERSIONS_TABLE}_model_seq_idx
+                ON {SAVED_MODEL_VERSIONS_TABLE} (model_name, seq)
+                """
+            )
         connection.commit()
 
 
@@ -105,15 +152,95 @@ def _get_saved_model_from_files(name: str) -> dict[str, Any] | None:
         return json.load(file)
 
 
-def _save_saved_model_to_files(name: str, payload: dict[str, Any]) -> str:
+def _get_saved_model_fields_from_files(name: str, fields: list[FieldPath]) -> dict[str, Any] | None:
+    path = SAVED_MODELS_DIR / _normalize_saved_model_name(name)
+    if not path.exists():
+        return None
+    return project_json_file(path, fields)
+
+
+def _save_saved_model_to_files(name: str, payload: dict[str, Any], snapshot: bool = False) -> str:
     safe_name = _normalize_saved_model_name(name)
     SAVED_MODELS_DIR.mkdir(parents=True, exist_ok=True)
-    path = SAVED_MODELS_DIR / safe_name
-    with path.open("w", encoding="utf-8") as file:
-        json.dump(payload, file, indent=2)
+    with _files_model_lock(safe_name):
+        index = _read_version_index_from_files(safe_name)
+        record = _next_version_record(
+            payload, index, lambda ids: _get_version_records_from_files(safe_name, ids), snapshot
+        )
+        if record is not None:
+            _write_version_record_to_files(safe_name, record)
+            _write_version_index_to_files(safe_name, index + [record_metadata(record)])
+        path = SAVED_MODELS_DIR / safe_name
+        with path.open("w", encoding="utf-8") as file:
+            json.dump(payload, file)
     return safe_name
 
 
+_files_fallback_lock = threading.Lock()
+
+
+@contextmanager
+def _files_model_lock(safe_name: str) -> Iterator[None]:
+    """Serialize writers of one model's head and version index across threads and processes.
+
+    The flock is taken on a lock file next to the index; each call opens its own
+    descriptor, so threads of one process exclude each other as well.
+    """
+    if fcntl is None:
+        with _files_fallback_lock:
+            yield
+        return
+    directory = _versions_dir(safe_name)
+    directory.mkdir(parents=True, exist_ok=True)
+    with (directory / "index.lock").open("a+b") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _versions_dir(safe_name: str) -> Path:
+    return SAVED_MODELS_DIR / f"{_strip_json_extension(safe_name)}.versions"
+
+
+def _version_record_path(safe_name: str, version_id: str) -> Path:
+    return _versions_dir(safe_name) / f"{Path(version_id).name}.json"
+
+
+def _read_version_index_from_files(safe_name: str) -> list[dict[str, Any]]:
+    path = _versions_dir(safe_name) / "index.json"
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _write_version_index_to_files(safe_name: str, index: list[dict[str, Any]]) -> None:
+    directory = _versions_dir(safe_name)
+    directory.mkdir(parents=True, exist_ok=True)
+    # Readers do not take the lock, so swap the index in atomically.
+    tmp_path = directory / f"index.json.{os.getpid()}.{threading.get_ident()}.tmp"
+    with tmp_path.open("w", encoding="utf-8") as file:
+        json.dump(index, file)
+    os.replace(tmp_path, directory / "index.json")
+
+
+def _write_version_record_to_files(safe_name: str, record: dict[str, Any]) -> None:
+    path = _version_record_path(safe_name, record["versionId"])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as file:
+        json.dump(record, file)
+
+
+def _get_version_records_from_files(safe_name: str, version_ids: list[str]) -> list[dict[str, Any]]:
+    records = []
+    for version_id in version_ids:
+        path = _version_record_path(safe_name, version_id)
+        if not path.exists():
+            continue
+        with path.open("r", encoding="utf-8") as file:
+            records.append(json.load(file))
+    return records
+
+
 def _list_saved_models_from_postgres() -> list[str]:
     _ensure_postgres_schema()
     with _connect() as connection:
@@ -134,44 +261,785 @@ def _get_saved_model_from_postgres(name: str) -> dict[str, Any] | None:
             row = cursor.fetchone()
             if row is None:
                 return None
-            payload = row[0]
-            if isinstance(payload, str):
-                return json.loads(payload)
-            return payload
+            return _decode_jsonb(row[0])
+
+
+def _get_saved_model_fields_from_postgres(name: str, fields: list[FieldPath]) -> dict[str, Any] | None:
+    safe_name = _normalize_saved_model_name(name)
+    _ensure_postgres_schema()
+    # "payload #> path" per field so only those subtrees leave the database. It is
+    # SQL NULL for a missing path, which the IS NOT NULL column tells apart from JSON null.
+    columns = ", ".join(["payload #> %s IS NOT NULL, payload #> %s"] * len(fields))
+    params: list[Any] = []
+    for path in fields:
+        params.extend([list(path), list(path)])
+    with _connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {columns} FROM {SAVED_MODELS_TABLE} WHERE model_name = %s",
+                params + [safe_name],
+            )
+            row = cursor.fetchone()
+    if row is None:
+        return None
+    result: dict[str, Any] = {}
+    for index, path in enumerate(fields):
+        if row[2 * index]:
+            assign_path(result, path, _decode_jsonb(row[2 * index + 1]))
+    return result
 
 
-def _save_saved_model_to_postgres(name: str, payload: dict[str, Any]) -> str:
+def _save_saved_model_to_postgres(name: str, payload: dict[str, Any], snapshot: bool = False) -> str:
     safe_name = _normalize_saved_model_name(name)
     _ensure_postgres_schema()
+    with _connect() as connection:
+        with connection.cursor() as cursor:
+            _write_saved_model_to_postgres(cursor, safe_name, payload, snapshot)
+        connection.commit()
+    return safe_name
+
+
+def _write_saved_model_to_postgres(cursor, safe_name: str, payload: dict[str, Any], snapshot: bool) -> None:
+    _, jsonb = _load_psycopg()
+    # Serialize saves of the same name so concurrent writers cannot fork the chain.
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (safe_name,))
+    index = _read_version_index_from_postgres(cursor, safe_name)
+    record = _next_version_record(
+        payload, index, lambda ids: _get_version_records_from_postgres(cursor, safe_name, ids), snapshot
+    )
+    if record is not None:
+        _write_version_record_to_postgres(cursor, safe_name, record)
+    cursor.execute(
+        f"""
+        INSERT INTO {SAVED_MODELS_TABLE} (model_name, payload)
+        VALUES (%s, %s)
+        ON CONFLICT (model_name)
+        DO UPDATE SET payload = EXCLUDED.payload, updated_at = NOW()
+        """,
+        (safe_name, jsonb(payload)),
+    )
+
+
+def _decode_jsonb(value: Any) -> Any:
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def _read_version_index_from_postgres(cursor, safe_name: str) -> list[dict[str, Any]]:
+    cursor.execute(
+        f"SELECT metadata FROM {SAVED_MODEL_VERSIONS_TABLE} WHERE model_name = %s ORDER BY seq ASC",
+        (safe_name,),
+    )
+    return [_decode_jsonb(row[0]) for row in cursor.fetchall()]
+
+
+def _write_version_record_to_postgres(cursor, safe_name: str, record: dict[str, Any]) -> None:
     _, jsonb = _load_psycopg()
+    cursor.execute(
+        f"""
+        INSERT INTO {SAVED_MODEL_VERSIONS_TABLE} (model_name, version_id, parent_version_id, kind, metadata, body)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (model_name, version_id)
+        DO UPDATE SET kind = EXCLUDED.kind, metadata = EXCLUDED.metadata, body = EXCLUDED.body
+        """,
+        _version_record_row(safe_name, record, jsonb),
+    )
+
+
+def _version_record_row(safe_name: str, record: dict[str, Any], encode: Callable[[Any], Any]) -> tuple:
+    return (
+        safe_name,
+        record["versionId"],
+        record.get("parentVersionId"),
+        record["kind"],
+        encode(record_metadata(record)),
+        encode(record["body"]),
+    )
+
+
+def _get_version_records_from_postgres(cursor, safe_name: str, version_ids: list[str]) -> list[dict[str, Any]]:
+    cursor.execute(
+        f"""
+        SELECT version_id, metadata, body FROM {SAVED_MODEL_VERSIONS_TABLE}
+        WHERE model_name = %s AND version_id = ANY(%s)
+        """,
+        (safe_name, version_ids),
+    )
+    by_id = {str(row[0]): {**_decode_jsonb(row[1]), "body": _decode_jsonb(row[2])} for row in cursor.fetchall()}
+    return [by_id[version_id] for version_id in version_ids if version_id in by_id]
+
+
+# ── SQLite backend ───────────────────────────────────────────────────────────
+# One connection per process, shared across request threads behind a lock.
+# WAL lets readers in other uvicorn workers proceed while one worker writes,
+# and BEGIN IMMEDIATE serializes writers across processes. Statements use
+# fixed SQL text so sqlite3's statement cache keeps them prepared.
+
+_sqlite_connection: sqlite3.Connection | None = None
+_sqlite_connection_pid: int | None = None
+_sqlite_lock = threading.RLock()
+
+
+def _sqlite_connect() -> sqlite3.Connection:
+    global _sqlite_connection, _sqlite_connection_pid
+    if _sqlite_connection is not None and _sqlite_connection_pid == os.getpid():
+        return _sqlite_connection
+
+    path = _get_sqlite_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(
+        path,
+        timeout=30.0,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=64,
+    )
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.execute("PRAGMA busy_timeout=30000")
+    connection.executescript(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SAVED_MODELS_TABLE} (
+            model_name TEXT PRIMARY KEY,
+            payload TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            updated_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now'))
+        );
+        CREATE INDEX IF NOT EXISTS {SAVED_MODELS_TABLE}_updated_at_idx
+        ON {SAVED_MODELS_TABLE} (updated_at DESC);
+        CREATE TABLE IF NOT EXISTS {SAVED_MODEL_VERSIONS_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            model_name TEXT NOT NULL,
+            version_id TEXT NOT NULL,
+            parent_version_id TEXT,
+            kind TEXT NOT NULL,
+            metadata TEXT NOT NULL,
+            body TEXT NOT NULL,
+            created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+            UNIQUE (model_name, version_id)
+        );
+        CREATE INDEX IF NOT EXISTS {SAVED_MODEL_VERSIONS_TABLE}_model_seq_idx
+        ON {SAVED_MODEL_VERSIONS_TABLE} (model_name, seq);
+        """
+    )
+    _sqlite_connection = connection
+    _sqlite_connection_pid = os.getpid()
+    return connection
+
+
+@contextmanager
+def _sqlite_transaction(write: bool = False) -> Iterator[sqlite3.Connection]:
+    with _sqlite_lock:
+        connection = _sqlite_connect()
+        connection.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+
+def _list_saved_models_from_sqlite() -> list[str]:
+    with _sqlite_transaction() as connection:
+        rows = connection.execute(
+            f"SELECT model_name FROM {SAVED_MODELS_TABLE} ORDER BY model_name ASC"
+        ).fetchall()
+    return [_strip_json_extension(str(row[0])) for row in rows]
+
+
+def _get_saved_model_from_sqlite(name: str) -> dict[str, Any] | None:
+    safe_name = _normalize_saved_model_name(name)
+    with _sqlite_transaction() as connection:
+        row = connection.execute(
+            f"SELECT payload FROM {SAVED_MODELS_TABLE} WHERE model_name = ?",
+            (safe_name,),
+        ).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def _sqlite_json_path(path: FieldPath) -> str:
+    return "$" + "".join(f'."{segment}"' for segment in path)
+
+
+def _get_saved_model_fields_from_sqlite(name: str, fields: list[FieldPath]) -> dict[str, Any] | None:
+    safe_name = _normalize_saved_model_name(name)
+    # json_type is NULL for a missing path; json_quote(json_extract(...)) returns the subtree as JSON text.
+    columns = ", ".join(["json_type(payload, ?), json_quote(json_extract(payload, ?))"] * len(fields))
+    params: list[Any] = []
+    for path in fields:
+        json_path = _sqlite_json_path(path)
+        params.extend([json_path, json_path])
+    with _sqlite_transaction() as connection:
+        row = connection.execute(
+            f"SELECT {columns} FROM {SAVED_MODELS_TABLE} WHERE model_name = ?",
+            (*params, safe_name),
+        ).fetchone()
+    if row is None:
+        return None
+    result: dict[str, Any] = {}
+    for index, path in enumerate(fields):
+        if row[2 * index] is not None:
+            assign_path(result, path, json.loads(row[2 * index + 1]))
+    return result
+
+
+def _save_saved_model_to_sqlite(name: str, payload: dict[str, Any], snapshot: bool = False) -> str:
+    safe_name = _normalize_saved_model_name(name)
+    with _sqlite_transaction(write=True) as connection:
+        _write_saved_model_to_sqlite(connection, safe_name, payload, snapshot)
+    return safe_name
+
+
+def _write_saved_model_to_sqlite(
+    connection: sqlite3.Connection,
+    safe_name: str,
+    payload: dict[str, Any],
+    snapshot: bool,
+) -> None:
+    index = _read_version_index_from_sqlite(connection, safe_name)
+    record = _next_version_record(
+        payload, index, lambda ids: _get_version_records_from_sqlite(connection, safe_name, ids), snapshot
+    )
+    if record is not None:
+        _write_version_record_to_sqlite(connection, safe_name, record)
+    connection.execute(
+        f"""
+        INSERT INTO {SAVED_MODELS_TABLE} (model_name, payload)
+        VALUES (?, ?)
+        ON CONFLICT (model_name)
+        DO UPDATE SET payload = excluded.payload,
+                      updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+        """,
+        (safe_name, json.dumps(payload)),
+    )
+
+
+def _read_version_index_from_sqlite(connection: sqlite3.Connection, safe_name: str) -> list[dict[str, Any]]:
+    rows = connection.execute(
+        f"SELECT metadata FROM {SAVED_MODEL_VERSIONS_TABLE} WHERE model_name = ? ORDER BY seq ASC",
+        (safe_name,),
+    ).fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def _write_version_record_to_sqlite(connection: sqlite3.Connection, safe_name: str, record: dict[str, Any]) -> None:
+    connection.execute(
+        f"""
+        INSERT INTO {SAVED_MODEL_VERSIONS_TABLE} (model_name, version_id, parent_version_id, kind, metadata, body)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT (model_name, version_id)
+        DO UPDATE SET kind = excluded.kind, metadata = excluded.metadata, body = excluded.body
+        """,
+        _version_record_row(safe_name, record, json.dumps),
+    )
+
+
+def _get_version_records_from_sqlite(
+    connection: sqlite3.Connection,
+    safe_name: str,
+    version_ids: list[str],
+) -> list[dict[str, Any]]:
+    records = []
+    for version_id in version_ids:
+        row = connection.execute(
+            f"SELECT metadata, body FROM {SAVED_MODEL_VERSIONS_TABLE} WHERE model_name = ? AND version_id = ?",
+            (safe_name, version_id),
+        ).fetchone()
+        if row is not None:
+            records.append({**json.loads(row[0]), "body": json.loads(row[1])})
+    return records
+
+
+# ── Version chains ───────────────────────────────────────────────────────────
+# A save writes its version record (a delta, or a snapshot every
+# SAVED_MODELS_SNAPSHOT_INTERVAL saves) and also rewrites the materialized head
+# payload. GET, fields= projection and export read that head directly and never
+# replay a chain, so every save still costs one full payload write, as it did
+# before versioning. The chain is what keeps history cheap: a session of N edits
+# stores one snapshot plus N small deltas instead of N full payloads.
+
+def _next_version_record(
+    payload: dict[str, Any],
+    index: list[dict[str, Any]],
+    load_records: Callable[[list[str]], list[dict[str, Any]]],
+    snapshot: bool = False,
+) -> dict[str, Any] | None:
+    """Build the version record for a save, or ``None`` when the head version already matches ``payload``.
+
+    Deltas are taken against the head version as rebuilt from the chain, not the
+    stored head payload, so a head that drifted from its chain cannot leak into
+    later versions. A chain that cannot be rebuilt is restarted with a snapshot.
+    Saves with ``snapshot`` set skip the rebuild and always append a snapshot.
+    """
+    timestamp = int(time.time() * 1000)
+    if snapshot:
+        return _snapshot_version_record(payload, index, timestamp)
+    head = index[-1] if index else None
+    head_payload = None
+    if head is not None:
+        try:
+            head_payload = _reconstruct_version(index, str(head["versionId"]), load_records)
+        except RuntimeError:
+            head_payload = None
+    if head_payload is not None and head_payload == payload:
+        return None
+    return build_version_record(payload, _new_version_id(payload, index, timestamp), head, head_payload, timestamp)
+
+
+def _snapshot_version_record(payload: dict[str, Any], index: list[dict[str, Any]], timestamp: int) -> dict[str, Any]:
+    parent_id = index[-1]["versionId"] if index else None
+    return snapshot_record(payload, _new_version_id(payload, index, timestamp), parent_id, timestamp)
+
+
+def _new_version_id(payload: dict[str, Any], index: list[dict[str, Any]], timestamp: int) -> str:
+    """The payload's own versionId, suffixed when the chain already holds it."""
+    known_ids = {str(meta["versionId"]) for meta in index}
+    base_id = payload_version_id(payload) or str(timestamp)
+    version_id = base_id
+    suffix = 1
+    while version_id in known_ids:
+        suffix += 1
+        version_id = f"{base_id}-{suffix}"
+    return version_id
+
+
+def _reconstruct_version(
+    index: list[dict[str, Any]],
+    version_id: str,
+    load_records: Callable[[list[str]], list[dict[str, Any]]],
+) -> dict[str, Any] | None:
+    by_id = {str(meta["versionId"]): meta for meta in index}
+    if version_id not in by_id:
+        return None
+    chain = resolve_chain(by_id, version_id)
+    records = load_records(chain)
+    if len(records) != len(chain):
+        raise RuntimeError(f"Version chain of {version_id} is missing records.")
+    return reconstruct_payload(records)
+
+
+def _compacted_head_record(
+    index: list[dict[str, Any]],
+    load_records: Callable[[list[str]], list[dict[str, Any]]],
+) -> dict[str, Any] | None:
+    """Return a snapshot replacing the head record, or ``None`` when no compaction is due."""
+    if not index or not needs_compaction(index[-1]):
+        return None
+    head = index[-1]
+    payload = _reconstruct_version(index, str(head["versionId"]), load_records)
+    return snapshot_record(payload, head["versionId"], head.get("parentVersionId"), head["timestamp"])
+
+
+def _list_saved_model_versions_from_files(safe_name: str) -> list[dict[str, Any]] | None:
+    index = _read_version_index_from_files(safe_name)
+    if not index and not (SAVED_MODELS_DIR / safe_name).exists():
+        return None
+    return index
+
+
+def _list_saved_model_versions_from_postgres(safe_name: str) -> list[dict[str, Any]] | None:
+    _ensure_postgres_schema()
     with _connect() as connection:
         with connection.cursor() as cursor:
+            index = _read_version_index_from_postgres(cursor, safe_name)
+            if index:
+                return index
+            cursor.execute(f"SELECT 1 FROM {SAVED_MODELS_TABLE} WHERE model_name = %s", (safe_name,))
+            return [] if cursor.fetchone() is not None else None
+
+
+def _list_saved_model_versions_from_sqlite(safe_name: str) -> list[dict[str, Any]] | None:
+    with _sqlite_transaction() as connection:
+        index = _read_version_index_from_sqlite(connection, safe_name)
+        if index:
+            return index
+        row = connection.execute(f"SELECT 1 FROM {SAVED_MODELS_TABLE} WHERE model_name = ?", (safe_name,)).fetchone()
+        return [] if row is not None else None
+
+
+def _get_saved_model_version_from_files(safe_name: str, version_id: str) -> dict[str, Any] | None:
+    index = _read_version_index_from_files(safe_name)
+    return _reconstruct_version(index, version_id, lambda ids: _get_version_records_from_files(safe_name, ids))
+
+
+def _get_saved_model_version_from_postgres(safe_name: str, version_id: str) -> dict[str, Any] | None:
+    _ensure_postgres_schema()
+    with _connect() as connection:
+        with connection.cursor() as cursor:
+            index = _read_version_index_from_postgres(cursor, safe_name)
+            return _reconstruct_version(
+                index, version_id, lambda ids: _get_version_records_from_postgres(cursor, safe_name, ids)
+            )
+
+
+def _get_saved_model_version_from_sqlite(safe_name: str, version_id: str) -> dict[str, Any] | None:
+    with _sqlite_transaction() as connection:
+        index = _read_version_index_from_sqlite(connection, safe_name)
+        return _reconstruct_version(
+            index, version_id, lambda ids: _get_version_records_from_sqlite(connection, safe_name, ids)
+        )
+
+
+def _compact_saved_model_versions_in_files(safe_name: str) -> bool:
+    if not _versions_dir(safe_name).is_dir():
+        return False
+    # Held across read and rewrite so a concurrent save cannot land in between and lose its record.
+    with _files_model_lock(safe_name):
+        index = _read_version_index_from_files(safe_name)
+        record = _compacted_head_record(index, lambda ids: _get_version_records_from_files(safe_name, ids))
+        if record is None:
+            return False
+        _write_version_record_to_files(safe_name, record)
+        _write_version_index_to_files(safe_name, index[:-1] + [record_metadata(record)])
+    return True
+
+
+def _compact_saved_model_versions_in_postgres(safe_name: str) -> bool:
+    _ensure_postgres_schema()
+    with _connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", (safe_name,))
+            index = _read_version_index_from_postgres(cursor, safe_name)
+            record = _compacted_head_record(
+                index, lambda ids: _get_version_records_from_postgres(cursor, safe_name, ids)
+            )
+            if record is None:
+                return False
+            _write_version_record_to_postgres(cursor, safe_name, record)
+        connection.commit()
+    return True
+
+
+def _compact_saved_model_versions_in_sqlite(safe_name: str) -> bool:
+    with _sqlite_transaction(write=True) as connection:
+        index = _read_version_index_from_sqlite(connection, safe_name)
+        record = _compacted_head_record(
+            index, lambda ids: _get_version_records_from_sqlite(connection, safe_name, ids)
+        )
+        if record is None:
+            return False
+        _write_version_record_to_sqlite(connection, safe_name, record)
+    return True
+
+
+# ── Bulk export / import ─────────────────────────────────────────────────────
+# Export yields (name, payload) pairs one model at a time so callers can stream
+# them; import writes models in batches, with one index query and one multi-row
+# INSERT per table for each batch on the database backends. Version history is
+# not transferred: every imported model is appended to its chain as a full
+# snapshot (parented on the previous head, if any) without rebuilding the
+# chain, so the chain keeps rebuilding to the stored head and later saves diff
+# against the imported payload.
+
+def _matches_export_filter(safe_name: str, names: set[str] | None, prefix: str | None) -> bool:
+    if names is not None and safe_name not in names:
+        return False
+    return prefix is None or safe_name.startswith(prefix)
+
+
+def _iter_saved_models_from_files(names: set[str] | None, prefix: str | None) -> Iterator[tuple[str, dict[str, Any]]]:
+    if not SAVED_MODELS_DIR.exists():
+        return
+    for path in sorted(SAVED_MODELS_DIR.glob("*.json")):
+        if not path.is_file() or not _matches_export_filter(path.name, names, prefix):
+            continue
+        with path.open("r", encoding="utf-8") as file:
+            yield path.stem, json.load(file)
+
+
+def _iter_saved_models_from_postgres(names: set[str] | None, prefix: str | None) -> Iterator[tuple[str, dict[str, Any]]]:
+    _ensure_postgres_schema()
+    conditions = []
+    params: list[Any] = []
+    if names is not None:
+        conditions.append("model_name = ANY(%s)")
+        params.append(sorted(names))
+    if prefix:
+        conditions.append("model_name LIKE %s")
+        params.append(prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    with _connect() as connection:
+        # A named cursor is server-side: rows arrive in itersize batches instead of all at once.
+        with connection.cursor(name="saved_models_export") as cursor:
+            cursor.itersize = BULK_BATCH_SIZE
+            cursor.execute(
+                f"SELECT model_name, payload FROM {SAVED_MODELS_TABLE} {where} ORDER BY model_name ASC",
+                params,
+            )
+            for model_name, payload in cursor:
+                yield _strip_json_extension(str(model_name)), _decode_jsonb(payload)
+
+
+def _iter_saved_models_from_sqlite(names: set[str] | None, prefix: str | None) -> Iterator[tuple[str, dict[str, Any]]]:
+    # Keyset pagination keeps the shared connection's lock short between batches;
+    # the filters are part of the query so skipped models' payloads are never read.
+    conditions = ["model_name > ?"]
+    params: list[Any] = []
+    if names is not None:
+        conditions.append("model_name IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(sorted(names)))
+    if prefix:
+        # LIKE is case-insensitive for ASCII in SQLite, so match the prefix as a
+        # key range instead: exactly the names starting with it, and index-seekable.
+        conditions.append("model_name >= ?")
+        params.append(prefix)
+        upper = _prefix_upper_bound(prefix)
+        if upper is not None:
+            conditions.append("model_name < ?")
+            params.append(upper)
+    query = f"""
+        SELECT model_name, payload FROM {SAVED_MODELS_TABLE}
+        WHERE {' AND '.join(conditions)} ORDER BY model_name ASC LIMIT ?
+        """
+    last_name = ""
+    while True:
+        with _sqlite_transaction() as connection:
+            rows = connection.execute(query, (last_name, *params, BULK_BATCH_SIZE)).fetchall()
+        if not rows:
+            return
+        for model_name, payload in rows:
+            yield _strip_json_extension(model_name), json.loads(payload)
+        last_name = rows[-1][0]
+
+
+def _prefix_upper_bound(prefix: str) -> str | None:
+    """Smallest string greater than every string starting with ``prefix``, if there is one."""
+    last = ord(prefix[-1])
+    if last >= 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(last + 1)
+
+
+def _import_saved_models_to_files(batch: list[tuple[str, dict[str, Any]]]) -> None:
+    for safe_name, payload in batch:
+        _save_saved_model_to_files(safe_name, payload, snapshot=True)
+
+
+def _import_saved_models_to_postgres(batch: list[tuple[str, dict[str, Any]]]) -> None:
+    _, jsonb = _load_psycopg()
+    batch = sorted(batch, key=lambda item: item[0])
+    names = [safe_name for safe_name, _ in batch]
+    timestamp = int(time.time() * 1000)
+    # One transaction per batch: lock every name (in sorted order, so concurrent
+    # imports cannot deadlock), read all indexes at once, then write versions and
+    # heads with one multi-row INSERT per table.
+    with _connect() as connection:
+        with connection.cursor() as cursor:
+            cursor.executemany("SELECT pg_advisory_xact_lock(hashtext(%s))", [(name,) for name in names])
+            cursor.execute(
+                f"""
+                SELECT model_name, metadata FROM {SAVED_MODEL_VERSIONS_TABLE}
+                WHERE model_name = ANY(%s) ORDER BY model_name ASC, seq ASC
+                """,
+                (names,),
+            )
+            indexes: dict[str, list[dict[str, Any]]] = {}
+            for model_name, metadata in cursor.fetchall():
+                indexes.setdefault(str(model_name), []).append(_decode_jsonb(metadata))
+            records = [
+                _snapshot_version_record(payload, indexes.get(safe_name, []), timestamp) for safe_name, payload in batch
+            ]
+            cursor.execute(
+                f"""
+                INSERT INTO {SAVED_MODEL_VERSIONS_TABLE} (model_name, version_id, parent_version_id, kind, metadata, body)
+                VALUES {", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(batch))}
+                ON CONFLICT (model_name, version_id)
+                DO UPDATE SET kind = EXCLUDED.kind, metadata = EXCLUDED.metadata, body = EXCLUDED.body
+                """,
+                [value for name, record in zip(names, records) for value in _version_record_row(name, record, jsonb)],
+            )
             cursor.execute(
                 f"""
                 INSERT INTO {SAVED_MODELS_TABLE} (model_name, payload)
-                VALUES (%s, %s)
+                VALUES {", ".join(["(%s, %s)"] * len(batch))}
                 ON CONFLICT (model_name)
                 DO UPDATE SET payload = EXCLUDED.payload, updated_at = NOW()
                 """,
-                (safe_name, jsonb(payload)),
+                [value for safe_name, payload in batch for value in (safe_name, jsonb(payload))],
             )
         connection.commit()
-    return safe_name
+
+
+def _import_saved_models_to_sqlite(batch: list[tuple[str, dict[str, Any]]]) -> None:
+    timestamp = int(time.time() * 1000)
+    with _sqlite_transaction(write=True) as connection:
+        rows = connection.execute(
+            f"""
+            SELECT model_name, metadata FROM {SAVED_MODEL_VERSIONS_TABLE}
+            WHERE model_name IN (SELECT value FROM json_each(?)) ORDER BY model_name ASC, seq ASC
+            """,
+            (json.dumps([safe_name for safe_name, _ in batch]),),
+        ).fetchall()
+        indexes: dict[str, list[dict[str, Any]]] = {}
+        for model_name, metadata in rows:
+            indexes.setdefault(model_name, []).append(json.loads(metadata))
+        connection.executemany(
+            f"""
+            INSERT INTO {SAVED_MODEL_VERSIONS_TABLE} (model_name, version_id, parent_version_id, kind, metadata, body)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (model_name, version_id)
+            DO UPDATE SET kind = excluded.kind, metadata = excluded.metadata, body = excluded.body
+            """,
+            [
+                _version_record_row(
+                    safe_name, _snapshot_version_record(payload, indexes.get(safe_name, []), timestamp), json.dumps
+                )
+                for safe_name, payload in batch
+            ],
+        )
+        connection.executemany(
+            f"""
+            INSERT INTO {SAVED_MODELS_TABLE} (model_name, payload)
+            VALUES (?, ?)
+            ON CONFLICT (model_name)
+            DO UPDATE SET payload = excluded.payload,
+                          updated_at = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+            """,
+            [(safe_name, json.dumps(payload)) for safe_name, payload in batch],
+        )
+
+
+# ── Public interface ─────────────────────────────────────────────────────────
+
+def get_saved_models_storage() -> str:
+    """Name of the configured backend: ``file``, ``postgres`` or ``sqlite``."""
+    return _get_saved_models_storage()
+
+
+def saved_model_storage_errors() -> tuple[type[BaseException], ...]:
+    """Exception types a backend raises when storage itself fails (I/O, locks, lost connections)."""
+    errors: tuple[type[BaseException], ...] = (OSError, RuntimeError, sqlite3.Error)
+    try:
+        import psycopg
+    except ImportError:
+        return errors
+    return errors + (psycopg.Error,)
 
 
 def list_saved_model_names() -> list[str]:
-    if _get_saved_models_storage() == "postgres":
+    storage = _get_saved_models_storage()
+    if storage == "postgres":
         return _list_saved_models_from_postgres()
+    if storage == "sqlite":
+        return _list_saved_models_from_sqlite()
     return _list_saved_models_from_files()
 
 
-def get_saved_model_payload(name: str) -> dict[str, Any] | None:
-    if _get_saved_models_storage() == "postgres":
+def get_saved_model_payload(name: str, fields: list[FieldPath] | None = None) -> dict[str, Any] | None:
+    """Load a saved model, or only the ``fields`` subtrees of it when given."""
+    storage = _get_saved_models_storage()
+    if fields:
+        if storage == "postgres":
+            return _get_saved_model_fields_from_postgres(name, fields)
+        if storage == "sqlite":
+            return _get_saved_model_fields_from_sqlite(name, fields)
+        return _get_saved_model_fields_from_files(name, fields)
+    if storage == "postgres":
         return _get_saved_model_from_postgres(name)
+    if storage == "sqlite":
+        return _get_saved_model_from_sqlite(name)
     return _get_saved_model_from_files(name)
 
 
-def save_saved_model_payload(name: str, payload: dict[str, Any]) -> str:
-    if _get_saved_models_storage() == "postgres":
-        return _save_saved_model_to_postgres(name, payload)
-    return _save_saved_model_to_files(name, payload)
+def save_saved_model_payload(name: str, payload: dict[str, Any], snapshot: bool = False) -> str:
+    """Store ``payload`` as the model's new head version.
+
+    Appends a version record and rewrites the stored head in full (see the
+    version chains section above). ``snapshot`` records it as a full snapshot instead of a delta, for rewrites
+    (such as migrations) that change most of the payload.
+    """
+    storage = _get_saved_models_storage()
+    if storage == "postgres":
+        return _save_saved_model_to_postgres(name, payload, snapshot)
+    if storage == "sqlite":
+        return _save_saved_model_to_sqlite(name, payload, snapshot)
+    return _save_saved_model_to_files(name, payload, snapshot)
+
+
+def list_saved_model_versions(name: str) -> list[dict[str, Any]] | None:
+    """Return version metadata oldest first, or ``None`` when the model does not exist."""
+    safe_name = _normalize_saved_model_name(name)
+    storage = _get_saved_models_storage()
+    if storage == "postgres":
+        return _list_saved_model_versions_from_postgres(safe_name)
+    if storage == "sqlite":
+        return _list_saved_model_versions_from_sqlite(safe_name)
+    return _list_saved_model_versions_from_files(safe_name)
+
+
+def get_saved_model_version_payload(name: str, version_id: str) -> dict[str, Any] | None:
+    """Reconstruct the payload of ``version_id`` from its nearest snapshot."""
+    safe_name = _normalize_saved_model_name(name)
+    storage = _get_saved_models_storage()
+    if storage == "postgres":
+        return _get_saved_model_version_from_postgres(safe_name, version_id)
+    if storage == "sqlite":
+        return _get_saved_model_version_from_sqlite(safe_name, version_id)
+    return _get_saved_model_version_from_files(safe_name, version_id)
+
+
+def compact_saved_model_versions(name: str) -> bool:
+    """Rewrite the head version as a snapshot once its delta chain grows too expensive to replay.
+
+    Meant to run in the background after a save; returns whether a snapshot was written.
+    """
+    safe_name = _normalize_saved_model_name(name)
+    storage = _get_saved_models_storage()
+    if storage == "postgres":
+        return _compact_saved_model_versions_in_postgres(safe_name)
+    if storage == "sqlite":
+        return _compact_saved_model_versions_in_sqlite(safe_name)
+    return _compact_saved_model_versions_in_files(safe_name)
+
+
+def iter_saved_model_payloads(
+    names: Iterable[str] | None = None,
+    prefix: str | None = None,
+    storage: str | None = None,
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield ``(name, payload)`` for every stored model, optionally filtered by name or prefix.
+
+    ``storage`` overrides ``SAVED_MODELS_STORAGE`` (used by the transfer CLI).
+    """
+    name_set = {_normalize_saved_model_name(name) for name in names} if names is not None else None
+    prefix = prefix.strip() if prefix else None
+    storage = storage or _get_saved_models_storage()
+    if storage == "postgres":
+        return _iter_saved_models_from_postgres(name_set, prefix)
+    if storage == "sqlite":
+        return _iter_saved_models_from_sqlite(name_set, prefix)
+    return _iter_saved_models_from_files(name_set, prefix)
+
+
+def import_saved_model_payloads(
+    items: Iterable[tuple[str, dict[str, Any]]],
+    storage: str | None = None,
+    batch_size: int = BULK_BATCH_SIZE,
+) -> int:
+    """Write ``(name, payload)`` pairs in batches as new snapshot versions; returns the number of models written."""
+    storage = storage or _get_saved_models_storage()
+    if storage == "postgres":
+        _ensure_postgres_schema()
+        write_batch = _import_saved_models_to_postgres
+    elif storage == "sqlite":
+        write_batch = _import_saved_models_to_sqlite
+    else:
+        write_batch = _import_saved_models_to_files
+
+    count = 0
+    batch: dict[str, dict[str, Any]] = {}
+    for name, payload in items:
+        if not isinstance(payload, dict):
+            raise ValueError(f"Payload for {name!r} must be a JSON object.")
+        # Keyed by name so a repeated model within one batch keeps only its last payload.
+        batch[_normalize_saved_model_name(name)] = payload
+        if len(batch) >= batch_size:
+            write_batch(list(batch.items()))
+            count += len(batch)
+            batch = {}
+    if batch:
+        write_batch(list(batch.items()))
+        count += len(batch)
+    return count
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+
+# The service is a flat set of modules run from its own directory.
+SERVICE_ROOT = Path(__file__).resolve().parent.parent
+if str(SERVICE_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVICE_ROOT))
+
+import storage  # noqa: E402
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def saved_models_backend(request, tmp_path, monkeypatch) -> str:
+    """Point saved-model storage at an empty file directory or SQLite database under ``tmp_path``."""
+    monkeypatch.setenv("SAVED_MODELS_STORAGE", request.param)
+    monkeypatch.delenv("SAVED_MODELS_DATABASE_URL", raising=False)
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    monkeypatch.setenv("SAVED_MODELS_SQLITE_PATH", str(tmp_path / "saved_models.sqlite3"))
+    monkeypatch.setattr(storage, "SAVED_MODELS_DIR", tmp_path / "saved_models")
+    monkeypatch.setattr(storage, "_sqlite_connection", None)
+    yield request.param
+    if storage._sqlite_connection is not None:
+        storage._sqlite_connection.close()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing import column_store
+from preprocessing.column_store import ensure_column_store, load_csv_columns
+
+fcntl = pytest.importorskip("fcntl")
+
+
+NA = ["-"]
+CSV = "num,text,count\n1.5,a,1\n-,b,2\n3.0,,3\n4.5,a,4\n"
+
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "column_store"
+    monkeypatch.setattr(column_store, "COLUMN_STORE_DIR", directory)
+    return directory
+
+
+def write_csv(path, text: str, mtime_ns: int | None = None) -> None:
+    path.write_text(text)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_columns_are_memory_mapped_and_categoricals_keep_their_codes(store_dir, tmp_path):
+    csv_path = tmp_path / "data.csv"
+    write_csv(csv_path, CSV)
+    frame = load_csv_columns(csv_path, ["text", "num", "count"], na_values=NA)
+    assert list(frame.columns) == ["text", "num", "count"]
+
+    num = frame["num"].to_numpy()
+    np.testing.assert_array_equal(num, [1.5, np.nan, 3.0, 4.5])
+    # A read-only view of the mapped file, not a copy.
+    assert not num.flags.writeable
+    assert frame["count"].dtype == np.int64
+
+    text = frame["text"]
+    assert isinstance(text.dtype, pd.CategoricalDtype)
+    assert list(text.cat.categories) == ["a", "b"]
+    assert text.cat.codes.tolist() == [0, 1, -1, 0]
+    assert text.tolist()[:2] == ["a", "b"] and pd.isna(text.iloc[2])
+
+
+def test_unknown_columns_are_rejected(store_dir, tmp_path):
+    csv_path = tmp_path / "data.csv"
+    write_csv(csv_path, CSV)
+    with pytest.raises(KeyError, match="missing"):
+        load_csv_columns(csv_path, ["num", "missing"])
+
+
+def test_changed_source_rebuilds_and_removes_the_old_store(store_dir, tmp_path):
+    csv_path = tmp_path / "data.csv"
+    write_csv(csv_path, CSV, mtime_ns=1_000_000_000)
+    first, _ = ensure_column_store(csv_path, NA)
+
+    # Same content, new mtime: the stamp is refreshed, nothing is rebuilt.
+    write_csv(csv_path, CSV, mtime_ns=2_000_000_000)
+    assert ensure_column_store(csv_path, NA)[0] == first
+
+    write_csv(csv_path, CSV.replace("4.5", "9.5"), mtime_ns=3_000_000_000)
+    second, manifest = ensure_column_store(csv_path, NA)
+    assert second != first and not first.exists()
+    assert manifest["source_mtime_ns"] == 3_000_000_000
+    assert load_csv_columns(csv_path, ["num"], na_values=NA)["num"].iloc[-1] == 9.5
+
+
+def test_store_being_read_is_kept_until_its_reader_is_done(store_dir, tmp_path):
+    csv_path = tmp_path / "data.csv"
+    write_csv(csv_path, CSV, mtime_ns=1_000_000_000)
+    old_store, _ = ensure_column_store(csv_path, NA)
+    frame = load_csv_columns(csv_path, ["num", "text"], na_values=NA)
+
+    with (old_store / "lock").open("a+b") as reader:
+        fcntl.flock(reader, fcntl.LOCK_SH)
+        write_csv(csv_path, CSV.replace("1.5", "7.5"), mtime_ns=2_000_000_000)
+        new_store, _ = ensure_column_store(csv_path, NA)
+        assert old_store.exists()
+
+    # The next rebuild removes it once nobody holds the lock.
+    write_csv(csv_path, CSV.replace("1.5", "8.5"), mtime_ns=3_000_000_000)
+    newest, _ = ensure_column_store(csv_path, NA)
+    assert not old_store.exists() and not new_store.exists() and newest.exists()
+    # Columns mapped before the delete stay readable.
+    assert frame["num"].iloc[0] == 1.5
+    assert frame["text"].tolist()[0] == "a"
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+# compare imports the training module, which needs the model library.
+pytest.importorskip("igann")
+
+from compare import _knots, interp_curves  # noqa: E402
+
+
+def test_interp_curves_matches_np_interp_per_curve():
+    rng = np.random.default_rng(0)
+    curves, queries = [], []
+    for size in (2, 3, 17, 250):
+        xs = np.sort(rng.normal(0.0, 10.0, size))
+        curves.append((xs, rng.normal(0.0, 1.0, size)))
+        # Queries inside, beyond both ends and exactly on the knots.
+        queries.append(np.concatenate([rng.uniform(xs[0] - 5, xs[-1] + 5, 40), xs]))
+
+    results = interp_curves(curves, queries)
+    assert len(results) == len(curves)
+    for (xs, ys), query, values in zip(curves, queries, results):
+        np.testing.assert_allclose(values, np.interp(query, xs, ys), rtol=1e-9, atol=1e-9)
+
+
+def test_interp_curves_edge_cases():
+    curves = [
+        (np.array([]), np.array([])),
+        (np.array([3.0]), np.array([7.0])),
+        (np.array([1.0, 1.0 + 1e-12]), np.array([0.0, 1.0])),
+        (np.array([0.0, 1.0]), np.array([5.0, 6.0])),
+    ]
+    queries = [np.array([1.0, 2.0]), np.array([-1.0, 3.0, 10.0]), np.array([0.0, 2.0]), np.array([])]
+    empty, single, steep, no_queries = interp_curves(curves, queries)
+    np.testing.assert_array_equal(empty, [0.0, 0.0])
+    np.testing.assert_array_equal(single, [7.0, 7.0, 7.0])
+    np.testing.assert_array_equal(steep, [0.0, 1.0])
+    assert no_queries.shape == (0,)
+    assert interp_curves([], []) == []
+
+
+def test_knots_drop_non_finite_pairs_and_sort():
+    xs, ys = _knots([3, None, 1, 2, float("nan")], [30, 5, 10, float("inf"), 0])
+    np.testing.assert_array_equal(xs, [1.0, 3.0])
+    np.testing.assert_array_equal(ys, [10.0, 30.0])
+    xs, ys = _knots(["a", "b"], [1, 2])
+    assert len(xs) == 0 and len(ys) == 0
+    xs, ys = _knots(None, None)
+    assert len(xs) == 0
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset_arena
+import dataset_registry
+from dataset_arena import arena_fingerprint, load_preprocessed, release_dataset_arena
+from dataset_registry import DatasetConfig
+from preprocessing.common import to_categorical
+
+fcntl = pytest.importorskip("fcntl")
+
+
+CAT_INFO = {"weather": ["clear", "cloudy", "rain"]}
+
+
+class CountingPreprocessor:
+    def __init__(self) -> None:
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, seed: int, sample_size: int | None = None):
+        with self._lock:
+            self.calls += 1
+        rng = np.random.default_rng(seed)
+        n_rows = sample_size or 50
+        df = pd.DataFrame(
+            {
+                "temp": rng.normal(15.0, 8.0, n_rows),
+                "hour": rng.integers(0, 24, n_rows),
+                "weather": rng.choice(CAT_INFO["weather"], n_rows),
+            },
+            index=np.arange(10, 10 + n_rows),
+        )
+        df = df.assign(weather=to_categorical("weather", df, CAT_INFO))
+        return df, rng.normal(size=n_rows), CAT_INFO, {"temp": "Temperature"}, [{"key": "temp__hour"}]
+
+
+@pytest.fixture
+def arena(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATASET_ARENA", "on")
+    monkeypatch.delenv("DATASET_ARENA_MAX_ATTACHED", raising=False)
+    monkeypatch.delenv("DATASET_ARENA_MAX_BYTES", raising=False)
+    monkeypatch.setattr(dataset_arena, "DATASET_ARENA_DIR", tmp_path / ".arena")
+    monkeypatch.setattr(dataset_registry, "DATA_DIR", tmp_path)
+    (tmp_path / "source.csv").write_text("raw")
+    preprocessor = CountingPreprocessor()
+    cfg = DatasetConfig(
+        id="demo",
+        label="Demo",
+        summary="",
+        task_type="regression",
+        preprocessor=preprocessor,
+        source_files=["source.csv"],
+    )
+    yield cfg, preprocessor
+    release_dataset_arena()
+
+
+def entries() -> list[str]:
+    return sorted(path.name for path in dataset_arena._entries())
+
+
+def hold_reference(entry_dir):
+    """Stand-in for another worker attached to ``entry_dir``."""
+    refs = (entry_dir / "refs").open("rb")
+    fcntl.flock(refs, fcntl.LOCK_SH)
+    return refs
+
+
+def touch_source(cfg) -> None:
+    source = dataset_registry.DATA_DIR / cfg.source_files[0]
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_attached_result_matches_the_preprocessor(arena):
+    cfg, preprocessor = arena
+    X, y, cat_info, labels, interactions = load_preprocessed(cfg, 0)
+    expected = CountingPreprocessor()(0)
+    pd.testing.assert_frame_equal(X.copy(), expected[0])
+    np.testing.assert_array_equal(y, expected[1])
+    assert (cat_info, labels, interactions) == expected[2:]
+
+    # Columns and targets are read-only views of the mapped files.
+    assert not X["temp"].to_numpy().flags.writeable and not y.flags.writeable
+    assert not X["weather"].cat.codes.to_numpy().flags.writeable
+
+    assert load_preprocessed(cfg, 0)[0] is X
+    assert preprocessor.calls == 1
+
+
+def test_concurrent_loads_build_once(arena):
+    cfg, preprocessor = arena
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: load_preprocessed(cfg, 0)[0], range(16)))
+    assert preprocessor.calls == 1
+    for X in results[1:]:
+        pd.testing.assert_frame_equal(X, results[0])
+    assert len(entries()) == 1
+
+
+def test_another_process_reuses_the_entry(arena):
+    cfg, preprocessor = arena
+    load_preprocessed(cfg, 0)
+    # A fresh process has nothing attached but finds the entry on disk.
+    dataset_arena._attached.clear()
+    load_preprocessed(cfg, 0)
+    assert preprocessor.calls == 1
+
+
+def test_superseded_entries_wait_for_their_last_reference(arena):
+    cfg, preprocessor = arena
+    X, _, _, _, _ = load_preprocessed(cfg, 0)
+    old_entry = dataset_arena._attached[("demo", 0, None)].entry_dir
+    other_worker = hold_reference(old_entry)
+    try:
+        touch_source(cfg)
+        load_preprocessed(cfg, 0)
+        assert preprocessor.calls == 2
+        # This process moved on, but the other worker still holds the old entry.
+        assert old_entry.exists() and len(entries()) == 2
+    finally:
+        other_worker.close()
+
+    touch_source(cfg)
+    load_preprocessed(cfg, 0)
+    assert not old_entry.exists() and len(entries()) == 1
+    # Frames handed out before the delete stay readable.
+    assert X["temp"].iloc[0] == CountingPreprocessor()(0)[0]["temp"].iloc[0]
+
+
+def test_attachments_per_process_are_bounded(arena, monkeypatch):
+    cfg, _ = arena
+    monkeypatch.setenv("DATASET_ARENA_MAX_ATTACHED", "2")
+    for seed in range(3):
+        load_preprocessed(cfg, seed)
+    assert list(dataset_arena._attached) == [("demo", 1, None), ("demo", 2, None)]
+    # The detached entry had no other reference, so it was deleted.
+    assert [name.rsplit("-", 1)[0] for name in entries()] == ["demo-1-default", "demo-2-default"]
+
+
+def test_disk_budget_evicts_least_recently_used_unreferenced_entries(arena, monkeypatch):
+    cfg, _ = arena
+    load_preprocessed(cfg, 0)
+    entry_bytes = dataset_arena._entry_bytes(dataset_arena._attached[("demo", 0, None)].entry_dir)
+    monkeypatch.setenv("DATASET_ARENA_MAX_BYTES", str(2 * entry_bytes))
+    load_preprocessed(cfg, 1)
+    release_dataset_arena()
+    assert entries() == []
+
+    for seed in range(3):
+        load_preprocessed(cfg, seed)
+        dataset_arena._attached.pop(("demo", seed, None)).release()
+    # Only the two most recent entries fit the budget.
+    assert [name.rsplit("-", 1)[0] for name in entries()] == ["demo-1-default", "demo-2-default"]
+
+
+def test_fingerprint_follows_sources(arena):
+    cfg, _ = arena
+    before = arena_fingerprint(cfg, 0, None)
+    assert arena_fingerprint(cfg, 1, None) != before
+    assert arena_fingerprint(cfg, 0, 10) != before
+    touch_source(cfg)
+    assert arena_fingerprint(cfg, 0, None) != before
+
+
+def test_unshareable_columns_and_disabled_arena_fall_back(arena, monkeypatch):
+    cfg, preprocessor = arena
+    text = pd.DataFrame({"note": ["a", "b"]})
+    cfg.preprocessor = lambda seed, sample_size=None: (text, np.zeros(2), {}, {}, [])
+    assert load_preprocessed(cfg, 0)[0] is text
+    assert entries() == []
+
+    monkeypatch.setenv("DATASET_ARENA", "off")
+    cfg.preprocessor = preprocessor
+    load_preprocessed(cfg, 0)
+    load_preprocessed(cfg, 0)
+    assert preprocessor.calls == 2 and not dataset_arena._attached
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset_registry
+from dataset_arena import arena_fingerprint
+from dataset_registry import config_from_spec, discover_datasets, load_spec_file
+from dataset_stats import stats_fingerprint
+from preprocessing import column_store, engine
+from preprocessing.engine import normalize_spec, run_dataset_spec
+
+
+SPEC = """
+id = "rentals"
+label = "Rentals"
+task_type = "regression"
+
+[preprocessing]
+source = "rentals.csv"
+na_values = ["-"]
+target = "count"
+features = ["Temperature", "Weather", "Day"]
+categorical = ["Weather", "Day"]
+
+[[preprocessing.derive]]
+name = "Temperature"
+op = "rescale"
+from = "temp"
+range = [0, 10]
+
+[[preprocessing.derive]]
+name = "Weather"
+op = "map"
+from = "weather"
+values = { "1" = "Clear", "2" = "Rain" }
+
+[[preprocessing.derive]]
+name = "Day"
+op = "case"
+cases = [{ when = { weekend = 1 }, value = "Weekend" }]
+default = "Working Day"
+
+[preprocessing.sampling]
+policy = "balanced"
+stratify_by = "Day"
+
+[[preprocessing.interactions]]
+k1 = "Temperature"
+k2 = "Day"
+"""
+
+CSV = """temp,weather,weekend,count
+0.0,1,0,10
+0.5,2,1,-
+1.0,1,1,30
+0.5,2,0,40
+0.25,1,0,50
+0.75,2,1,60
+"""
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(dataset_registry, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(column_store, "COLUMN_STORE_DIR", tmp_path / "column_store")
+    (tmp_path / "rentals.csv").write_text(CSV)
+    return tmp_path
+
+
+def write_spec(directory, name: str = "rentals.toml", text: str = SPEC):
+    path = directory / name
+    path.write_text(text)
+    return path
+
+
+def test_spec_runs_through_the_engine(data_dir):
+    cfg = config_from_spec(load_spec_file(write_spec(data_dir)), data_dir / "rentals.toml")
+    assert cfg.source_files == ["rentals.csv"]
+    X, y, cat_info, labels, interactions = cfg.preprocessor(0)
+
+    # The row with a missing target is dropped.
+    np.testing.assert_array_equal(y, [10.0, 30.0, 40.0, 50.0, 60.0])
+    assert list(X.columns[:3]) == ["Temperature", "Weather", "Day"]
+    np.testing.assert_allclose(X["Temperature"], [0.0, 10.0, 5.0, 2.5, 7.5])
+    assert cat_info == {"Weather": ["Clear", "Rain"], "Day": ["Weekend", "Working Day"]}
+    assert isinstance(X["Day"].dtype, pd.CategoricalDtype)
+    assert X["Weather"].tolist() == ["Clear", "Clear", "Rain", "Clear", "Rain"]
+    assert X["Day"].tolist() == ["Working Day", "Weekend", "Working Day", "Working Day", "Weekend"]
+    assert [spec["key"] for spec in interactions] == ["Temperature__Day"]
+    assert interactions[0]["dummy_cols"] == ["Temperature__Day___r0", "Temperature__Day___r1"]
+    np.testing.assert_allclose(X["Temperature__Day___r0"], [0.0, 10.0, 0.0, 0.0, 7.5])
+    assert labels["Temperature"] == "Temperature"
+
+
+def test_balanced_sampling_from_a_spec(data_dir):
+    cfg = config_from_spec(load_spec_file(write_spec(data_dir)), data_dir / "rentals.toml")
+    X, y, _, _, _ = cfg.preprocessor(3, sample_size=4)
+    assert len(X) == len(y) == 4
+    assert sorted(X["Day"].tolist()) == ["Weekend", "Weekend", "Working Day", "Working Day"]
+
+
+@pytest.mark.parametrize(
+    "change, message",
+    [
+        ({"source": ""}, "source is required"),
+        ({"target": ""}, "target is required"),
+        ({"derive": [{"name": "x", "op": "explode", "from": "a"}]}, "each derive step"),
+        ({"derive": [{"name": "x", "op": "rescale", "from": "a"}]}, "range"),
+        ({"derive": [{"name": "x", "op": "map", "from": "a"}]}, "values table"),
+        ({"imputation": {"numeric": "mode"}}, "imputation.numeric"),
+        ({"winsorize": {"method": "iqr"}}, "winsorize.method"),
+        ({"sampling": {"policy": "systematic"}}, "sampling.policy"),
+        ({"sampling": {"bins": 0}}, "sampling.bins"),
+        ({"interactions": [{"k1": "a", "k2": "b", "operator": "power"}]}, "interaction"),
+        (
+            {"out_of_core": {}, "derive": [{"name": "x", "op": "rescale", "from": "a", "range": [0, 1]}]},
+            "out_of_core cannot be combined",
+        ),
+    ],
+)
+def test_invalid_specs_are_rejected(change, message):
+    raw = {"source": "data.csv", "target": "y", **change}
+    with pytest.raises(ValueError, match=message):
+        normalize_spec("demo", raw)
+
+
+def test_spec_defaults():
+    spec = normalize_spec("demo", {"source": "data.csv", "target": "y", "winsorize": {}})
+    assert spec["imputation"] == {"numeric": "median", "categorical": "most_frequent"}
+    assert spec["winsorize"] == {"method": "gaussian", "n_sigma": 4.0}
+    assert spec["sampling"]["policy"] == "uniform" and spec["sampling"]["stratify_by"] == "y"
+    assert spec["out_of_core"] is None
+
+
+def test_discovery_skips_invalid_and_duplicate_specs(tmp_path, caplog):
+    write_spec(tmp_path)
+    write_spec(tmp_path, "zz_duplicate.toml")
+    write_spec(tmp_path, "broken.toml", "id = [")
+    write_spec(tmp_path, "no_task.toml", 'id = "x"\n[preprocessing]\nsource = "x.csv"\n')
+    write_spec(tmp_path, "notes.txt", "ignored")
+    configs = discover_datasets(tmp_path)
+    assert list(configs) == ["rentals"]
+    assert configs["rentals"].spec_path == tmp_path / "rentals.toml"
+    assert "duplicate dataset id" in caplog.text
+    assert "task_type" in caplog.text
+
+
+def test_missing_source_file(data_dir):
+    spec = normalize_spec("demo", {"source": "absent.csv", "target": "y"})
+    with pytest.raises(FileNotFoundError, match="absent.csv"):
+        run_dataset_spec(spec, 0)
+
+
+def test_spec_edits_change_every_cache_fingerprint(data_dir):
+    path = write_spec(data_dir)
+    cfg = config_from_spec(load_spec_file(path), path)
+    before = (stats_fingerprint(cfg, 0, None), arena_fingerprint(cfg, 0, None))
+
+    stat = path.stat()
+    path.write_text(SPEC.replace("range = [0, 10]", "range = [0, 20]"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    after = (stats_fingerprint(cfg, 0, None), arena_fingerprint(cfg, 0, None))
+    assert before[0] != after[0] and before[1] != after[1]
+
+    # Source edits change them too; configs without a spec file still fingerprint their sources.
+    source = data_dir / "rentals.csv"
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert stats_fingerprint(cfg, 0, None) != after[0]
+    unfiled = config_from_spec(load_spec_file(path))
+    assert stats_fingerprint(unfiled, 0, None) != stats_fingerprint(cfg, 0, None)
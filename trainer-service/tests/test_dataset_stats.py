@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset_registry
+import dataset_stats
+from dataset_registry import DatasetConfig
+from dataset_stats import (
+    clear_dataset_stats,
+    compute_dataset_stats,
+    get_dataset_stats,
+    get_feature_summary,
+    histogram,
+    summarize_features,
+)
+from preprocessing.common import to_categorical
+
+
+CAT_INFO = {"weather": ["clear", "cloudy", "rain"]}
+
+
+class CountingPreprocessor:
+    def __init__(self, n_rows: int = 500) -> None:
+        self.n_rows = n_rows
+        self.calls = 0
+
+    def __call__(self, seed: int, sample_size: int | None = None):
+        self.calls += 1
+        rng = np.random.default_rng(seed)
+        n_rows = sample_size or self.n_rows
+        temp = rng.normal(15.0, 8.0, n_rows)
+        temp[::50] = np.nan
+        df = pd.DataFrame({
+            "temp": temp,
+            "hour": rng.integers(0, 24, n_rows).astype(float),
+            "weather": rng.choice(["clear", "clear", "cloudy", "rain"], n_rows),
+        })
+        df = df.assign(weather=to_categorical("weather", df, CAT_INFO))
+        labels = {"temp": "Temperature", "hour": "Hour", "weather": "Weather"}
+        return df, rng.normal(size=n_rows), CAT_INFO, labels, []
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATASET_ARENA", "off")
+    monkeypatch.setattr(dataset_stats, "DATASET_STATS_DIR", tmp_path / "stats")
+    monkeypatch.setattr(dataset_registry, "DATA_DIR", tmp_path)
+    (tmp_path / "source.csv").write_text("raw")
+    preprocessor = CountingPreprocessor()
+    cfg = DatasetConfig(
+        id="demo",
+        label="Demo",
+        summary="",
+        task_type="regression",
+        preprocessor=preprocessor,
+        descriptions={"temp": "Air temperature."},
+        source_files=["source.csv"],
+    )
+    clear_dataset_stats()
+    yield cfg, preprocessor
+    clear_dataset_stats()
+
+
+def raw_columns(seed: int = 0) -> pd.DataFrame:
+    return CountingPreprocessor()(seed)[0]
+
+
+def test_exact_histograms_match_the_raw_column(dataset):
+    cfg, _ = dataset
+    stats = get_dataset_stats(cfg, 0)
+    raw = raw_columns()
+    for key in ("temp", "hour"):
+        entry = next(feature for feature in stats["features"] if feature["key"] == key)
+        values = raw[key].dropna().to_numpy()
+        assert entry["count"] == len(values)
+        assert entry["missing"] == int(raw[key].isna().sum())
+        for bins in (1, 7, 24, 100):
+            counts, low, high = histogram(entry, bins)
+            expected, edges = np.histogram(values, bins=bins)
+            assert counts == expected.tolist()
+            assert (low, high) == (edges[0], edges[-1])
+
+
+def test_sketch_histograms_approximate_the_raw_column(dataset, monkeypatch):
+    cfg, _ = dataset
+    monkeypatch.setattr(dataset_stats, "EXACT_VALUES_LIMIT", 10)
+    entry = next(feature for feature in compute_dataset_stats(cfg, 0)["features"] if feature["key"] == "temp")
+    assert "sketch" in entry and "values" not in entry
+
+    values = raw_columns()["temp"].dropna().to_numpy()
+    counts, low, high = histogram(entry, 12)
+    expected, _ = np.histogram(values, bins=12, range=(low, high))
+    assert sum(counts) == len(values)
+    assert np.abs(np.asarray(counts) - expected).max() <= 0.05 * len(values)
+
+
+def test_histogram_bins_are_clamped_and_empty_features_have_none():
+    entry = {"count": 3, "values": [1.0, 2.0, 3.0], "counts": [1, 1, 1]}
+    assert len(histogram(entry, 0)[0]) == 1
+    assert len(histogram(entry, 10_000)[0]) == dataset_stats.MAX_BINS
+    assert len(histogram(entry)[0]) == dataset_stats.default_bin_count(3)
+    assert histogram({"count": 0}) == ([], None, None)
+
+
+def test_stats_are_persisted_and_recomputed_when_the_source_changes(dataset):
+    cfg, preprocessor = dataset
+    first = get_dataset_stats(cfg, 0)
+    assert get_dataset_stats(cfg, 0) is first
+    assert preprocessor.calls == 1
+
+    # A new process (empty memory) reads the stored file instead of preprocessing.
+    dataset_stats._memory.clear()
+    assert get_dataset_stats(cfg, 0) == first
+    assert preprocessor.calls == 1
+    stored = list(dataset_stats.DATASET_STATS_DIR.glob("demo-0-default-*.json"))
+    assert len(stored) == 1
+
+    source = dataset_registry.DATA_DIR / "source.csv"
+    stat = source.stat()
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    get_dataset_stats(cfg, 0)
+    assert preprocessor.calls == 2
+    replaced = list(dataset_stats.DATASET_STATS_DIR.glob("demo-0-default-*.json"))
+    assert len(replaced) == 1 and replaced != stored
+
+    # Other seeds and sample sizes are separate entries.
+    get_dataset_stats(cfg, 1)
+    get_dataset_stats(cfg, 0, 100)
+    assert preprocessor.calls == 4
+
+
+def test_feature_summary(dataset):
+    cfg, preprocessor = dataset
+    summary = get_feature_summary(cfg, 0, bins=5)
+    assert [entry["key"] for entry in summary] == ["temp", "hour", "weather"]
+    temp, _, weather = summary
+    assert temp["kind"] == "continuous" and len(temp["bins"]) == 5
+    assert temp["description"] == "Air temperature." and temp["label"] == "Temperature"
+    raw = raw_columns()["weather"]
+    assert weather["categories"] == [
+        {"label": label, "count": int((raw == label).sum())} for label in CAT_INFO["weather"]
+    ]
+    assert get_feature_summary(cfg, 0, bins=5) is summary
+    assert preprocessor.calls == 1
+
+    only = get_feature_summary(cfg, 0, features=["weather"])
+    assert [entry["key"] for entry in only] == ["weather"]
+    with pytest.raises(KeyError, match="missing"):
+        summarize_features(get_dataset_stats(cfg, 0), {}, features=["weather", "missing"])
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import hashlib
+import http.server
+import os
+import threading
+
+import pytest
+
+import datasets
+from datasets import _resolve_drive_url, download_datasets_if_missing, download_file
+
+
+PAYLOAD = os.urandom(3 * datasets.CHUNK_BYTES + 4321)
+PAYLOAD_SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class RangeServer(http.server.ThreadingHTTPServer):
+    """Serves PAYLOAD with Range support and scripted failures."""
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), RangeHandler)
+        self.requests: list[tuple[str, str | None]] = []
+        # Bytes to send before dropping the connection, one entry per upcoming response.
+        self.cut_after: list[int] = []
+        self.honour_range = True
+        self.confirm_page = False
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    server: RangeServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        requested = self.headers.get("Range")
+        self.server.requests.append((self.path, requested))
+        if self.server.confirm_page and "confirm=" not in self.path:
+            page = b'<html><a href="/uc?export=download&confirm=t0k3n&id=x">Download anyway</a></html>'
+            self._start(200, len(page), "text/html; charset=utf-8")
+            self.wfile.write(page)
+            return
+
+        start = int(requested.split("=")[1].rstrip("-")) if requested and self.server.honour_range else 0
+        if start >= len(PAYLOAD):
+            self.send_response(416)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = PAYLOAD[start:]
+        self._start(206 if start else 200, len(body), "text/csv")
+        if self.server.cut_after:
+            self.wfile.write(body[:self.server.cut_after.pop(0)])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def _start(self, status: int, length: int, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+
+@pytest.fixture
+def server():
+    srv = RangeServer()
+    thread = threading.Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(datasets.time, "sleep", lambda seconds: None)
+
+
+def test_download_verifies_and_renames_into_place(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    assert download_file(f"{server.url}/data.csv", dest, PAYLOAD_SHA256.upper()) == PAYLOAD_SHA256
+    assert dest.read_bytes() == PAYLOAD
+    assert not (tmp_path / "data.csv.part").exists()
+    assert server.requests == [("/data.csv", None)]
+
+
+def test_dropped_connection_resumes_with_a_range_request(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    server.cut_after = [datasets.CHUNK_BYTES + 17]
+    assert download_file(f"{server.url}/data.csv", dest, PAYLOAD_SHA256) == PAYLOAD_SHA256
+    assert dest.read_bytes() == PAYLOAD
+    assert server.requests == [("/data.csv", None), ("/data.csv", f"bytes={datasets.CHUNK_BYTES + 17}-")]
+
+
+def test_partial_file_from_an_earlier_run_is_resumed(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    (tmp_path / "data.csv.part").write_bytes(PAYLOAD[:1000])
+    assert download_file(f"{server.url}/data.csv", dest, PAYLOAD_SHA256) == PAYLOAD_SHA256
+    assert dest.read_bytes() == PAYLOAD
+    assert server.requests == [("/data.csv", "bytes=1000-")]
+
+
+def test_partial_file_is_not_resumed_without_a_checksum(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    (tmp_path / "data.csv.part").write_bytes(b"bytes of an older version of the file")
+    assert download_file(f"{server.url}/data.csv", dest) == PAYLOAD_SHA256
+    assert dest.read_bytes() == PAYLOAD
+    assert server.requests == [("/data.csv", None)]
+
+
+def test_complete_partial_file_is_finished_without_refetching(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    (tmp_path / "data.csv.part").write_bytes(PAYLOAD)
+    assert download_file(f"{server.url}/data.csv", dest, PAYLOAD_SHA256) == PAYLOAD_SHA256
+    assert dest.read_bytes() == PAYLOAD
+    assert server.requests == [("/data.csv", f"bytes={len(PAYLOAD)}-")]
+
+
+def test_server_ignoring_range_restarts_from_the_first_byte(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    server.honour_range = False
+    (tmp_path / "data.csv.part").write_bytes(b"stale bytes from another file")
+    assert download_file(f"{server.url}/data.csv", dest, PAYLOAD_SHA256) == PAYLOAD_SHA256
+    assert dest.read_bytes() == PAYLOAD
+
+
+def test_checksum_mismatch_discards_the_partial_file(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    with pytest.raises(RuntimeError, match="Checksum mismatch"):
+        download_file(f"{server.url}/data.csv", dest, "0" * 64)
+    assert not dest.exists()
+    assert not (tmp_path / "data.csv.part").exists()
+
+
+def test_gives_up_after_every_attempt_fails(server, tmp_path):
+    dest = tmp_path / "data.csv"
+    server.cut_after = [10, 10, 10]
+    with pytest.raises(RuntimeError, match="Could not download data.csv"):
+        download_file(f"{server.url}/data.csv", dest, PAYLOAD_SHA256, attempts=3)
+    assert len(server.requests) == 3
+    assert not dest.exists()
+    # The bytes received so far are kept for the next (verified) run.
+    assert (tmp_path / "data.csv.part").read_bytes() == PAYLOAD[:30]
+
+
+def test_drive_confirm_page_is_followed(server):
+    base_url = f"{server.url}/uc?export=download"
+    assert _resolve_drive_url("x", base_url) == base_url + "&id=x"
+    server.confirm_page = True
+    assert _resolve_drive_url("x", base_url) == base_url + "&confirm=t0k3n&id=x"
+
+
+def test_every_manifest_entry_pins_a_checksum():
+    for name, entry in datasets.DATASETS.items():
+        assert entry["sha256"] and len(entry["sha256"]) == 64, name
+
+
+def test_pinned_checksum_matches_the_checked_in_file():
+    path = datasets.DATA_DIR / "bike.csv"
+    if not path.exists():
+        pytest.skip("bike.csv is not downloaded")
+    assert hashlib.sha256(path.read_bytes()).hexdigest() == datasets.DATASETS["bike.csv"]["sha256"]
+
+
+def test_download_datasets_if_missing(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(datasets, "DATASETS", {
+        "good.csv": {"drive_id": "good", "sha256": PAYLOAD_SHA256},
+        "unverified.csv": {"drive_id": "unverified", "sha256": None},
+        "present.csv": {"drive_id": "present", "sha256": None},
+        "bad.csv": {"drive_id": "bad", "sha256": "0" * 64},
+    })
+    (tmp_path / "present.csv").write_bytes(b"already here")
+
+    with pytest.raises(RuntimeError, match="bad.csv: Checksum mismatch"):
+        download_datasets_if_missing(base_url=f"{server.url}/uc?export=download")
+    assert (tmp_path / "good.csv").read_bytes() == PAYLOAD
+    assert (tmp_path / "unverified.csv").read_bytes() == PAYLOAD
+    assert (tmp_path / "present.csv").read_bytes() == b"already here"
+    assert not (tmp_path / "bad.csv").exists()
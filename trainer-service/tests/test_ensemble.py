@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+# ensemble imports the training module, which needs the model library.
+pytest.importorskip("igann")
+
+from ensemble import BAND_QUANTILES, aggregate_seed_shapes, clamp_ensemble_seeds  # noqa: E402
+
+
+CAT_INFO = {"season": ["spring", "summer", "winter"]}
+
+
+def numeric(xs, ys) -> dict:
+    return {"datatype": "numerical", "x": list(xs), "y": list(ys)}
+
+
+def categorical(xs, ys) -> dict:
+    return {"datatype": "categorical", "x": list(xs), "y": list(ys)}
+
+
+def member(seed: int, functions: dict, intercept: float = 0.0) -> dict:
+    return {"seed": seed, "shapeFunctions": functions, "intercept": intercept}
+
+
+def test_numeric_shapes_are_averaged_on_a_grid_spanning_all_members():
+    main = {"temp": numeric([0.0, 10.0], [0.0, 10.0])}
+    members = [member(1, {"temp": numeric([-10.0, 5.0], [5.0, 5.0])}, 0.5), member(2, {"temp": numeric([0.0, 20.0], [2.0, 2.0])}, 1.5)]
+    shapes = aggregate_seed_shapes(7, main, members, ["temp"], {}, 7)
+
+    assert shapes.seeds == [7, 1, 2] and shapes.member_intercepts == [0.5, 1.5]
+    grid = np.linspace(-10.0, 20.0, 7)
+    # Outside its own range each member is held at its end value.
+    expected = np.array([np.clip(grid, 0.0, 10.0), np.full(7, 5.0), np.full(7, 2.0)])
+    np.testing.assert_allclose(shapes.curves["temp"], expected)
+    assert shapes.mean["temp"]["x"] == grid.tolist() and shapes.mean["temp"]["datatype"] == "numerical"
+    np.testing.assert_allclose(shapes.mean["temp"]["y"], expected.mean(axis=0))
+    assert [functions["temp"]["y"] for functions in shapes.member_functions] == expected.tolist()
+
+
+def test_categorical_shapes_use_the_dataset_categories():
+    main = {"season": categorical(["spring", "summer", "winter"], [1.0, 0.0, -1.0])}
+    # A member that never saw "winter" contributes 0 there.
+    members = [member(1, {"season": categorical(["summer", "spring"], [2.0, 3.0])})]
+    shapes = aggregate_seed_shapes(0, main, members, ["season"], CAT_INFO, 5)
+
+    assert shapes.mean["season"]["x"] == CAT_INFO["season"]
+    np.testing.assert_allclose(shapes.curves["season"], [[1.0, 0.0, -1.0], [3.0, 2.0, 0.0]])
+    np.testing.assert_allclose(shapes.mean["season"]["y"], [2.0, 1.0, -0.5])
+
+
+def test_missing_shapes_count_as_zero_and_absent_features_stay_empty():
+    main = {"temp": numeric([0.0, 4.0], [4.0, 4.0])}
+    members = [member(1, {}), member(2, {"temp": numeric([0.0, 4.0], [2.0, 2.0])})]
+    shapes = aggregate_seed_shapes(0, main, members, ["temp", "hum"], {}, 3)
+
+    np.testing.assert_allclose(shapes.curves["temp"], [[4.0] * 3, [0.0] * 3, [2.0] * 3])
+    np.testing.assert_allclose(shapes.mean["temp"]["y"], [2.0] * 3)
+    assert shapes.mean["hum"] == {} and "hum" not in shapes.curves
+    assert shapes.member_functions[1]["temp"]["y"] == [0.0, 0.0, 0.0]
+
+
+def test_bands_follow_the_spread_across_seeds():
+    main = {"temp": numeric([0.0, 1.0], [0.0, 0.0])}
+    members = [member(seed, {"temp": numeric([0.0, 1.0], [float(seed), float(seed)])}) for seed in range(1, 5)]
+    shapes = aggregate_seed_shapes(0, main, members, ["temp"], {}, 2)
+    response = [{"key": "temp", "editableX": [0.0, 1.0], "editableY": shapes.mean["temp"]["y"]}]
+    shapes.add_bands(response, [], None, {}, {})
+
+    band = response[0]["band"]
+    values = np.arange(5.0)
+    np.testing.assert_allclose(band["lower"], [np.quantile(values, BAND_QUANTILES[0])] * 2)
+    np.testing.assert_allclose(band["upper"], [np.quantile(values, BAND_QUANTILES[1])] * 2)
+    np.testing.assert_allclose(band["median"], [2.0, 2.0])
+    np.testing.assert_allclose(band["std"], [np.std(values, ddof=1)] * 2)
+    assert band["min"] == [0.0, 0.0] and band["max"] == [4.0, 4.0]
+    assert shapes.summary() == {"seeds": [0, 1, 2, 3, 4], "bandQuantiles": list(BAND_QUANTILES)}
+
+
+def test_seed_counts_are_clamped():
+    assert [clamp_ensemble_seeds(n) for n in (0, 2, 5, 100)] == [2, 2, 5, 16]
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+# Feature selection fits models, which needs the model library.
+pytest.importorskip("igann")
+
+import dataset_registry  # noqa: E402
+from cross_validation import _reset_executor  # noqa: E402
+from dataset_registry import DatasetConfig  # noqa: E402
+from feature_selection import FeatureSelectionSearch, stream_feature_selection  # noqa: E402
+from preprocessing.common import to_categorical  # noqa: E402
+from schemas import FeatureSelectionRequest  # noqa: E402
+from split_cache import clear_split_cache  # noqa: E402
+from training_scheduler import get_training_scheduler  # noqa: E402
+
+
+CAT_INFO = {"noise_cat": ["a", "b", "c"]}
+
+
+def preprocessor(seed: int, sample_size: int | None = None):
+    rng = np.random.default_rng(seed)
+    n_rows = sample_size or 600
+    x = pd.DataFrame({
+        "signal": rng.uniform(-3.0, 3.0, n_rows),
+        "noise": rng.normal(0.0, 1.0, n_rows),
+        "noise_cat": rng.choice(CAT_INFO["noise_cat"], n_rows),
+    })
+    x = x.assign(noise_cat=to_categorical("noise_cat", x, CAT_INFO))
+    y = 4.0 * x["signal"].to_numpy() + rng.normal(0.0, 0.1, n_rows)
+    return x, y, CAT_INFO, {"signal": "Signal"}, []
+
+
+@pytest.fixture
+def dataset(monkeypatch):
+    monkeypatch.setenv("DATASET_ARENA", "off")
+    monkeypatch.setenv("CV_MAX_WORKERS", "0")
+    cfg = DatasetConfig(id="demo", label="Demo", summary="", task_type="regression", preprocessor=preprocessor)
+    monkeypatch.setattr(dataset_registry.REGISTRY, "_configs", {"demo": cfg})
+    clear_split_cache()
+    yield cfg
+    clear_split_cache()
+    _reset_executor()
+
+
+def request(**changes) -> FeatureSelectionRequest:
+    fields = {"dataset": "demo", "model_type": "igann", "n_estimators": 10, "early_stopping": 5}
+    return FeatureSelectionRequest(**{**fields, **changes})
+
+
+def events(req: FeatureSelectionRequest, cancelled=None) -> list:
+    return [json.loads(line) for line in stream_feature_selection(req, cancelled)]
+
+
+@pytest.mark.parametrize("workers", ["0", "2"])
+def test_forward_selection_adds_the_informative_feature_first(dataset, monkeypatch, workers):
+    monkeypatch.setenv("CV_MAX_WORKERS", workers)
+    start, step, done = events(request(max_steps=1))
+
+    assert start["event"] == "start" and start["candidates"] == ["signal", "noise", "noise_cat"]
+    assert start["metric"] == "rmse" and start["lowerIsBetter"]
+    assert step["event"] == "step" and step["action"] == "add"
+    assert step["feature"] == "signal" and step["features"] == ["signal"] and step["label"] == "Signal"
+    assert [candidate["feature"] for candidate in step["candidates"]][0] == "signal"
+    assert step["score"] == step["testMetrics"]["rmse"]
+    assert done == {**done, "event": "done", "stopReason": "max_steps", "features": ["signal"], "steps": 1, "fits": 3}
+    assert get_training_scheduler().stats()["running"] == 0
+
+
+def test_backward_selection_removes_down_to_max_features(dataset):
+    start, full, step, done = events(request(direction="backward", max_features=2, min_improvement=1e9))
+    assert full["action"] == "start" and full["features"] == ["signal", "noise", "noise_cat"]
+    # Removals down to max_features are forced whatever they cost, then the gain threshold stops the search.
+    assert step["action"] == "remove" and step["feature"] != "signal"
+    assert done["features"] == step["features"] and "signal" in done["features"] and len(done["features"]) == 2
+    assert done["stopReason"] == "min_improvement" and done["fits"] == 1 + 3 + 2
+
+
+def test_cancelled_searches_stop_quietly(dataset):
+    lines = events(request(), cancelled=lambda: True)
+    assert [line["event"] for line in lines] == ["start"]
+    assert get_training_scheduler().stats()["running"] == 0
+
+
+@pytest.mark.parametrize(
+    "changes, message",
+    [
+        ({"dataset": "missing"}, "Unknown dataset"),
+        ({"direction": "sideways"}, "direction must be one of"),
+        ({"metric": "acc"}, "Unknown metric"),
+        ({"selected_features": []}, None),
+    ],
+)
+def test_invalid_searches_are_rejected(dataset, changes, message):
+    if message is None:
+        # An empty selection means every feature.
+        with FeatureSelectionSearch(request(**changes)) as search:
+            assert search.pool == ["signal", "noise", "noise_cat"]
+        return
+    with pytest.raises(HTTPException, match=message):
+        stream_feature_selection(request(**changes))
+    assert get_training_scheduler().stats()["running"] == 0
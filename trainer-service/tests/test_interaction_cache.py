@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import interaction_cache
+from interaction_cache import build_requested_interactions, clear_interaction_cache
+from preprocessing.common import make_interaction_spec, to_categorical
+
+
+CAT_INFO = {"season": ["spring", "summer", "winter"]}
+LABELS = {"temp": "Temperature", "hum": "Humidity", "season": "Season"}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.delenv("INTERACTION_CACHE_MAX_BYTES", raising=False)
+    clear_interaction_cache()
+    yield
+    clear_interaction_cache()
+
+
+def frame(n_rows: int = 40, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "temp": rng.normal(20.0, 5.0, n_rows),
+            "hum": rng.uniform(0.0, 100.0, n_rows),
+            "season": rng.choice(CAT_INFO["season"], n_rows),
+        },
+        index=np.arange(100, 100 + n_rows),
+    )
+    return df.assign(season=to_categorical("season", df, CAT_INFO))
+
+
+def build(df, interactions, fingerprint="fp", seed=0, sample_size=None):
+    return build_requested_interactions(df, CAT_INFO, LABELS, interactions, fingerprint, seed, sample_size)
+
+
+def test_columns_match_make_interaction_spec():
+    df = frame()
+    requested = [("temp", "hum", "product"), ("season", "temp", "product"), ("temp", "hum", "ratio")]
+    specs, columns = build(df, requested)
+
+    expected_specs, expected_blocks = [], []
+    for k1, k2, operator in requested:
+        spec, block = make_interaction_spec(df, k1, k2, operator, CAT_INFO, LABELS.get(k1), LABELS.get(k2))
+        expected_specs.append(spec)
+        expected_blocks.append(block)
+    assert specs == expected_specs
+    pd.testing.assert_frame_equal(columns, pd.concat(expected_blocks, axis=1))
+    assert list(columns.index) == list(df.index)
+
+
+def test_repeated_requests_reuse_cached_blocks():
+    df = frame()
+    build(df, [("temp", "hum", "product"), ("season", "hum", "product")])
+    cached = dict(interaction_cache._cache)
+    assert len(cached) == 2
+    assert all(not block.flags.writeable for _, _, block in cached.values())
+
+    specs, columns = build(df, [("season", "hum", "product"), ("season", "hum", "product")])
+    assert dict(interaction_cache._cache).keys() == cached.keys()
+    # Duplicates are returned once, and specs are copies callers may modify.
+    assert len(specs) == 1
+    specs[0]["dummy_cols"].append("mutated")
+    assert "mutated" not in cached[("fp", 0, None, "season", "hum", "product")][0]["dummy_cols"]
+    assert columns.shape == (len(df), len(CAT_INFO["season"]))
+
+
+def test_fingerprint_and_sampling_are_part_of_the_key():
+    df = frame()
+    build(df, [("temp", "hum", "product")])
+    build(df, [("temp", "hum", "product")], fingerprint="edited")
+    build(df, [("temp", "hum", "product")], seed=1)
+    build(df, [("temp", "hum", "product")], sample_size=20)
+    assert len(interaction_cache._cache) == 4
+
+
+def test_cache_is_bounded_by_bytes(monkeypatch):
+    df = frame(n_rows=100)
+    block_bytes = len(df) * 8
+    monkeypatch.setenv("INTERACTION_CACHE_MAX_BYTES", str(2 * block_bytes))
+    pairs = [("temp", "hum", operator) for operator in ("product", "sum", "difference")]
+    for pair in pairs:
+        build(df, [pair])
+    assert [key[3:] for key in interaction_cache._cache] == pairs[1:]
+    assert interaction_cache._cache_bytes == 2 * block_bytes
+
+    # A hit moves the entry to the back, so the other one is evicted next.
+    build(df, [pairs[1]])
+    build(df, [pairs[0]])
+    assert [key[3:] for key in interaction_cache._cache] == [pairs[1], pairs[0]]
+
+    # Blocks larger than the whole budget are computed but never cached.
+    monkeypatch.setenv("INTERACTION_CACHE_MAX_BYTES", str(block_bytes - 1))
+    clear_interaction_cache()
+    _, columns = build(df, [pairs[2]])
+    assert columns.shape == (len(df), 1)
+    assert not interaction_cache._cache and interaction_cache._cache_bytes == 0
+
+
+def test_concurrent_builds_agree_and_account_bytes_once():
+    df = frame(n_rows=200)
+    requested = [("temp", "hum", "product"), ("season", "temp", "product"), ("temp", "hum", "sum")]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: build(df, requested)[1], range(32)))
+    for columns in results[1:]:
+        pd.testing.assert_frame_equal(columns, results[0])
+    assert len(interaction_cache._cache) == 3
+    assert interaction_cache._cache_bytes == sum(block.nbytes for _, _, block in interaction_cache._cache.values())
+
+
+@pytest.mark.parametrize(
+    "interaction, message",
+    [
+        (("temp", "missing", "product"), "Unknown interaction feature"),
+        (("temp", "temp", "product"), "two different features"),
+        (("temp", "hum", "power"), "Unsupported interaction operator"),
+        (("season", "temp", "sum"), "numerical-numerical"),
+    ],
+)
+def test_invalid_interactions_are_rejected(interaction, message):
+    with pytest.raises(ValueError, match=message):
+        build(frame(), [interaction])
+
+
+def test_no_interactions_returns_an_empty_frame():
+    df = frame()
+    specs, columns = build(df, [])
+    assert specs == [] and columns.shape == (len(df), 0)
+    assert list(columns.index) == list(df.index)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+import metrics
+from metrics import MAX_BOOTSTRAP_RESAMPLES, bootstrap_intervals, calc_metrics, calibration_bins
+
+
+def classification_data(n_rows: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    y_true = (rng.random(n_rows) < 0.4).astype(float)
+    # Rounded scores create prediction ties, which ROC-AUC counts as half.
+    y_pred = np.round(np.clip(0.3 * y_true + rng.random(n_rows) * 0.7, 0.0, 1.0), 1)
+    return y_true, y_pred
+
+
+def regression_data(n_rows: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    y_true = rng.normal(100.0, 20.0, n_rows)
+    return y_true, y_true + rng.normal(0.0, 10.0, n_rows)
+
+
+def reference_intervals(task_type, y_true, y_pred, n_resamples, confidence, seed) -> dict:
+    """The same resamples evaluated one at a time with ``calc_metrics``."""
+    draws = np.random.default_rng(seed).integers(0, len(y_true), size=(n_resamples, len(y_true)))
+    values: dict[str, list[float]] = {}
+    for rows in draws:
+        for name, value in calc_metrics(task_type, y_true[rows], y_pred[rows]).items():
+            if name != "count":
+                values.setdefault(name, []).append(np.nan if value is None else value)
+    tail = 50.0 * (1.0 - confidence)
+    result = {}
+    for name, samples in values.items():
+        samples = np.asarray(samples)
+        samples = samples[np.isfinite(samples)]
+        low, high = np.percentile(samples, [tail, 100.0 - tail])
+        result[name] = {"low": low, "high": high, "std": np.std(samples, ddof=1)}
+    return result
+
+
+@pytest.mark.parametrize(
+    "task_type, data",
+    [("classification", classification_data(80)), ("regression", regression_data(80))],
+)
+@pytest.mark.parametrize("confidence", [0.9, 0.95])
+def test_bootstrap_matches_resampling_one_at_a_time(task_type, data, confidence):
+    y_true, y_pred = data
+    result = bootstrap_intervals(task_type, y_true, y_pred, 200, confidence, seed=5)
+    assert result["resamples"] == 200
+    assert result["confidence"] == confidence
+    expected = reference_intervals(task_type, y_true, y_pred, 200, confidence, seed=5)
+    assert set(result["metrics"]) == set(expected)
+    for name, interval in expected.items():
+        for key, value in interval.items():
+            assert result["metrics"][name][key] == pytest.approx(value, rel=1e-9, abs=1e-12), (name, key)
+
+
+def test_bootstrap_does_not_depend_on_the_chunk_size(monkeypatch):
+    y_true, y_pred = classification_data(200, seed=1)
+    whole = bootstrap_intervals("classification", y_true, y_pred, 250, seed=9)
+    monkeypatch.setattr(metrics, "BOOTSTRAP_CHUNK_ELEMENTS", 200 * 7)
+    chunked = bootstrap_intervals("classification", y_true, y_pred, 250, seed=9)
+    assert chunked["resamples"] == whole["resamples"]
+    for name, interval in whole["metrics"].items():
+        assert chunked["metrics"][name] == pytest.approx(interval, rel=1e-12), name
+
+
+def test_bootstrap_intervals_bracket_the_point_estimate():
+    y_true, y_pred = regression_data(500, seed=2)
+    point = calc_metrics("regression", y_true, y_pred)
+    intervals = bootstrap_intervals("regression", y_true, y_pred, 1000)["metrics"]
+    for name in ("rmse", "mae", "r2"):
+        assert intervals[name]["low"] < point[name] < intervals[name]["high"]
+        assert intervals[name]["std"] > 0
+
+
+def test_bootstrap_caps_resamples_and_total_draws(monkeypatch):
+    y_true, y_pred = regression_data(50)
+    assert bootstrap_intervals("regression", y_true, y_pred, MAX_BOOTSTRAP_RESAMPLES + 5)["resamples"] == MAX_BOOTSTRAP_RESAMPLES
+    monkeypatch.setattr(metrics, "MAX_BOOTSTRAP_DRAWS", 50 * 40)
+    assert bootstrap_intervals("regression", y_true, y_pred, 1000)["resamples"] == 40
+
+
+def test_bootstrap_without_rows_or_resamples():
+    empty = {"resamples": 0, "confidence": 0.95, "metrics": {}}
+    assert bootstrap_intervals("regression", np.array([]), np.array([]), 100) == empty
+    assert bootstrap_intervals("regression", np.ones(5), np.ones(5), 0) == empty
+
+
+def test_bootstrap_auc_is_none_when_no_resample_has_both_classes():
+    result = bootstrap_intervals("classification", np.ones(10), np.linspace(0.1, 0.9, 10), 50)
+    assert result["metrics"]["auc"] is None
+    assert result["metrics"]["acc"]["low"] <= result["metrics"]["acc"]["high"]
+
+
+def test_calibration_bins():
+    bins = calibration_bins(np.array([0, 1, 1, 0]), np.array([0.05, 0.95, 1.0, 0.15]), n_bins=2)
+    assert [entry["count"] for entry in bins] == [2, 2]
+    assert bins[0]["observedRate"] == 0.0 and bins[1]["observedRate"] == 1.0
+    assert bins[1]["meanPredicted"] == pytest.approx(0.975)
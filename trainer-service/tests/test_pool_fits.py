@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from concurrent.futures import wait
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The pool runs training fits, which need the model library.
+pytest.importorskip("igann")
+
+import cross_validation  # noqa: E402
+from cross_validation import _fit_fold, _reset_executor, start_cross_validation  # noqa: E402
+from ensemble import start_ensemble  # noqa: E402
+from preprocessing.common import to_categorical  # noqa: E402
+from training import TrainingData, TrainingParams  # noqa: E402
+from training_progress import TrainingAborted  # noqa: E402
+
+
+CAT_INFO = {"season": ["spring", "summer", "winter"]}
+
+
+def training_data(n_rows: int = 3000) -> TrainingData:
+    rng = np.random.default_rng(0)
+    x = pd.DataFrame({
+        "temp": rng.normal(20.0, 5.0, n_rows),
+        "hum": rng.uniform(0.0, 100.0, n_rows),
+        "season": rng.choice(CAT_INFO["season"], n_rows),
+    })
+    x = x.assign(season=to_categorical("season", x, CAT_INFO))
+    y = 2.0 * x["temp"].to_numpy() - 0.1 * x["hum"].to_numpy() + rng.normal(0.0, 1.0, n_rows)
+    return TrainingData(x, y, CAT_INFO, {"temp": "Temperature"}, [], ["temp", "hum", "season"])
+
+
+def training_params(n_estimators: int = 500) -> TrainingParams:
+    return TrainingParams(
+        task_type="regression",
+        model_type="igann",
+        center_shapes=False,
+        num_points=20,
+        n_estimators=n_estimators,
+        boost_rate=0.1,
+        init_reg=1.0,
+        elm_alpha=1.0,
+        early_stopping=200,
+        n_hid=10,
+        scale_y=True,
+        seed=0,
+    )
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setenv("CV_MAX_WORKERS", "2")
+    monkeypatch.setattr(cross_validation, "ABORT_POLL_SECONDS", 0.01)
+    _reset_executor()
+    yield
+    _reset_executor()
+
+
+def segment_exists(run) -> bool:
+    try:
+        shared_memory.SharedMemory(name=run._shared.handle.segment).close()
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def start_run(kind: str):
+    data, params = training_data(), training_params()
+    if kind == "cross_validation":
+        return start_cross_validation(data, params, 4, "fp", parallelism=1)
+    return start_ensemble(data, params, 4, np.arange(2400), parallelism=1)
+
+
+@pytest.mark.parametrize("kind", ["cross_validation", "ensemble"])
+def test_closing_a_run_waits_for_its_running_fits(pool, kind):
+    run = start_run(kind)
+    futures = run._futures
+    wait(futures[:1], timeout=0.5)
+    run.close()
+
+    # Nothing of the run is left on the pool once close() returns, so the
+    # request's training slots are not given back while its fits still run.
+    assert all(future.done() for future in futures)
+    assert all(future.cancelled() for future in futures[1:])
+    first = futures[0]
+    assert first.cancelled() or first.exception() is None or isinstance(first.exception(), TrainingAborted)
+    assert not segment_exists(run)
+
+
+@pytest.mark.parametrize("kind", ["cross_validation", "ensemble"])
+def test_aborting_while_waiting_for_results(pool, kind):
+    calls = []
+
+    def check_abort():
+        calls.append(None)
+        if len(calls) > 1:
+            raise TrainingAborted()
+
+    with pytest.raises(TrainingAborted):
+        with start_run(kind) as run:
+            run.result(check_abort)
+    assert all(future.done() for future in run._futures)
+
+
+def test_pool_fits_stop_once_the_abort_flag_is_raised():
+    run = start_cross_validation(training_data(300), training_params(20), 2, "fp", parallelism=0)
+    with run:
+        task = run._tasks[0]
+        run._shared.fill("abort", 1)
+        with pytest.raises(TrainingAborted):
+            _fit_fold(task)
+        run._shared.fill("abort", 0)
+        assert _fit_fold(task)["fold"] == 0
+
+
+def test_finished_runs_close_without_waiting(pool):
+    with start_cross_validation(training_data(300), training_params(20), 2, "fp", parallelism=2) as run:
+        result = run.result()
+    assert result["folds"] == 2 and len(result["foldMetrics"]) == 2
+    assert not segment_exists(run)
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import projection
+from projection import covers_sections, parse_fields, project_json_file, project_payload
+from storage import get_saved_model_payload, save_saved_model_payload
+
+
+PAYLOAD = {
+    "model": {"dataset": "bike_hourly", "task": "regression", "points": 3},
+    "data": {"trainX": {"Temperature": [0.1, 0.2]}, "trainY": [1.0, 2.0]},
+    "version": {
+        "versionId": "v1",
+        "intercept": 0.0,
+        "testMetrics": {"rmse": 1.5, "count": 2},
+        "shapes": [{"key": "Temperature", "editableX": [0, 1, 2], "editableY": [0.0, None, 2.5]}],
+        "empty": {},
+    },
+}
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields(" , ") is None
+    assert parse_fields("model, version.testMetrics") == [("model",), ("version", "testMetrics")]
+    # A requested ancestor covers its descendants.
+    assert parse_fields("version.shapes,version,model.task") == [("version",), ("model", "task")]
+    with pytest.raises(ValueError):
+        parse_fields("version..shapes")
+    with pytest.raises(ValueError):
+        parse_fields("version.shapes[0]")
+
+
+def test_project_payload_keeps_nesting_and_skips_missing_paths():
+    paths = parse_fields("model.task,version.testMetrics.rmse,version.missing,data.trainY.0")
+    assert project_payload(PAYLOAD, paths) == {"model": {"task": "regression"}, "version": {"testMetrics": {"rmse": 1.5}}}
+
+
+def test_covers_sections():
+    paths = parse_fields("model,version.shapes")
+    assert covers_sections({"model": {}, "version": {"shapes": []}}, paths)
+    assert not covers_sections({"model": {}}, paths)
+
+
+@pytest.fixture(params=["ijson", "json"])
+def json_parser(request, monkeypatch):
+    if request.param == "ijson":
+        pytest.importorskip("ijson")
+    else:
+        monkeypatch.setattr(projection, "_load_ijson", lambda: None)
+    return request.param
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        "model",
+        "version.shapes",
+        "version.testMetrics.rmse,model.points",
+        "version.empty,data.trainX.Temperature",
+        "version.missing,model.nope.deeper",
+        "data,version",
+    ],
+)
+def test_project_json_file_matches_project_payload(tmp_path, json_parser, fields):
+    path = tmp_path / "model.json"
+    path.write_text(json.dumps(PAYLOAD, indent=2), encoding="utf-8")
+    paths = parse_fields(fields)
+    assert project_json_file(path, paths) == project_payload(PAYLOAD, paths)
+
+
+@pytest.mark.parametrize(
+    "fields",
+    ["model", "version.shapes,version.testMetrics", "model.task,data.trainX.Temperature", "version.empty", "nope"],
+)
+def test_saved_model_fields_match_a_full_read(saved_models_backend, fields):
+    save_saved_model_payload("model", PAYLOAD)
+    paths = parse_fields(fields)
+    assert get_saved_model_payload("model", paths) == project_payload(get_saved_model_payload("model"), paths)
+
+
+def test_saved_model_fields_of_a_missing_model(saved_models_backend):
+    assert get_saved_model_payload("missing", parse_fields("model")) is None
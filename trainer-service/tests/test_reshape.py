@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+# reshape imports the training module, which needs the model library.
+pytest.importorskip("igann")
+
+from model_cache import TrainedModel, cache_trained_model, clear_model_cache, get_cached_model  # noqa: E402
+from reshape import build_reshape_response, interpolate_shapes, reshape_trained_model  # noqa: E402
+from schemas import ReshapeRequest  # noqa: E402
+from storage import save_saved_model_payload  # noqa: E402
+from training import TrainingParams, normalize_numeric_shape_points  # noqa: E402
+
+
+CAT_INFO = {"season": ["spring", "summer", "winter"]}
+LABELS = {"temp": "Temperature", "season": "Season"}
+
+
+def params(num_points: int = 5, seed: int = 0) -> TrainingParams:
+    return TrainingParams(
+        task_type="regression",
+        model_type="igann",
+        center_shapes=False,
+        num_points=num_points,
+        n_estimators=100,
+        boost_rate=0.1,
+        init_reg=1.0,
+        elm_alpha=1.0,
+        early_stopping=50,
+        n_hid=10,
+        scale_y=True,
+        seed=seed,
+    )
+
+
+def native(slope: float) -> dict:
+    xs = np.linspace(-5.0, 35.0, 41)
+    return {
+        "temp": {"datatype": "numerical", "x": xs.tolist(), "y": (slope * np.sin(xs / 5.0)).tolist()},
+        "season": {"datatype": "categorical", "x": ["spring", "summer", "winter"], "y": [slope, 0.0, -slope]},
+    }
+
+
+def trained(ensemble_members=None) -> TrainedModel:
+    return TrainedModel(
+        params=params(),
+        shape_functions=native(1.0),
+        feature_keys=["temp", "season"],
+        dummy_keys=[],
+        cat_info=CAT_INFO,
+        label_map=LABELS,
+        interaction_specs=[],
+        interaction_bounds=pd.DataFrame(),
+        ensemble_members=ensemble_members,
+    )
+
+
+@pytest.fixture(autouse=True)
+def empty_model_cache(monkeypatch):
+    monkeypatch.delenv("MODEL_CACHE_SIZE", raising=False)
+    clear_model_cache()
+    yield
+    clear_model_cache()
+
+
+def test_cached_models_are_resampled_from_their_native_shapes():
+    result = reshape_trained_model(trained(), 9, None)
+    assert result["points"] == 9 and result["source"] == "model"
+    temp, season = result["shapes"]
+    expected = normalize_numeric_shape_points(native(1.0), ["temp"], CAT_INFO, 9)["temp"]
+    assert temp["editableX"] == expected["x"] and temp["editableY"] == expected["y"]
+    assert season["categories"] == CAT_INFO["season"] and season["editableY"] == [1.0, 0.0, -1.0]
+
+    # Without points the training resolution is kept.
+    assert len(reshape_trained_model(trained(), None, 10)["shapes"][0]["editableX"]) == 5
+
+
+def test_ensembles_are_reaveraged_with_bands():
+    members = [{"seed": seed, "shapeFunctions": native(float(seed + 1)), "intercept": 0.0} for seed in (1, 2)]
+    result = reshape_trained_model(trained(members), 7, None)
+    temp, season = result["shapes"]
+    curves = [normalize_numeric_shape_points(native(slope), ["temp"], CAT_INFO, 7)["temp"]["y"] for slope in (1.0, 2.0, 3.0)]
+    np.testing.assert_allclose(temp["editableY"], np.mean(curves, axis=0))
+    assert len(temp["band"]["lower"]) == 7
+    np.testing.assert_allclose(temp["band"]["min"], np.min(curves, axis=0))
+    np.testing.assert_allclose(season["editableY"], [2.0, 0.0, -2.0])
+    assert season["band"]["max"] == [3.0, 0.0, -1.0]
+
+
+def test_stored_shapes_are_interpolated():
+    curve = {"key": "temp", "editableX": [0.0, 10.0], "editableY": [0.0, 5.0], "band": {"lower": [-1.0, 4.0], "note": "x"}}
+    categorical = {"key": "season", "categories": ["a", "b"], "editableX": [0, 1], "editableY": [1.0, 2.0]}
+    grid = {
+        "key": "temp__hum",
+        "editableX": [0.0, 1.0],
+        "editableY": [0.0, 0.0],
+        "gridX": [0.0, 10.0],
+        "gridX2": [0.0, 1.0],
+        "editableZ": [[0.0, 10.0], [10.0, 20.0]],
+        "band": {"upper": [[1.0, 11.0], [11.0, 21.0]]},
+    }
+    resampled, same, interaction = interpolate_shapes([curve, categorical, grid], 3, 3)
+
+    assert resampled["editableX"] == [0.0, 5.0, 10.0] and resampled["editableY"] == [0.0, 2.5, 5.0]
+    assert resampled["band"] == {"lower": [-1.0, 1.5, 4.0], "note": "x"}
+    assert same == categorical
+    assert interaction["gridX"] == [0.0, 5.0, 10.0] and interaction["gridX2"] == [0.0, 0.5, 1.0]
+    np.testing.assert_allclose(interaction["editableZ"], [[0, 5, 10], [5, 10, 15], [10, 15, 20]])
+    np.testing.assert_allclose(interaction["band"]["upper"], np.asarray(interaction["editableZ"]) + 1.0)
+    # The input shapes are left untouched.
+    assert curve["editableX"] == [0.0, 10.0] and grid["gridX"] == [0.0, 10.0]
+
+
+def test_reshape_response_sources(saved_models_backend):
+    cache_trained_model("cached", trained())
+    response = build_reshape_response("cached", ReshapeRequest(points=1000))
+    assert response["versionId"] == "cached" and response["source"] == "model" and response["points"] == 250
+
+    shapes = [{"key": "temp", "editableX": [0.0, 4.0], "editableY": [0.0, 4.0]}]
+    sent = build_reshape_response("evicted", ReshapeRequest(points=3, shapes=shapes))
+    assert sent["source"] == "interpolated" and sent["shapes"][0]["editableY"] == [0.0, 2.0, 4.0]
+
+    save_saved_model_payload("saved", {"model": {}, "data": {}, "version": {"versionId": "v1", "shapes": shapes}})
+    stored = build_reshape_response("v1", ReshapeRequest(points=5, saved_model="saved"))
+    assert stored["shapes"][0]["editableX"] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    for version_id, request, status in [
+        ("cached", ReshapeRequest(), 400),
+        ("evicted", ReshapeRequest(points=3), 404),
+        ("missing", ReshapeRequest(points=3, saved_model="saved"), 404),
+    ]:
+        with pytest.raises(HTTPException) as error:
+            build_reshape_response(version_id, request)
+        assert error.value.status_code == status
+
+
+def test_model_cache_is_a_bounded_lru(monkeypatch):
+    monkeypatch.setenv("MODEL_CACHE_SIZE", "2")
+    for version_id in ("a", "b"):
+        cache_trained_model(version_id, trained())
+    assert get_cached_model("a") is not None
+    cache_trained_model("c", trained())
+    assert get_cached_model("b") is None and get_cached_model("a") is not None
+
+    monkeypatch.setenv("MODEL_CACHE_SIZE", "0")
+    cache_trained_model("d", trained())
+    assert get_cached_model("d") is None
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing.sampling import StratumIndex, balanced_quotas, proportional_quotas, sample_frame, sample_indices
+
+
+def test_quotas():
+    sizes = np.array([5, 100, 40])
+    assert balanced_quotas(sizes, 61).tolist() == [5, 20, 20]
+    quotas = proportional_quotas(sizes, 29)
+    assert quotas.sum() == 29
+    assert quotas.tolist() == [1, 20, 8]
+
+
+@pytest.mark.parametrize("policy", ["uniform", "balanced", "proportional"])
+def test_sample_indices(policy):
+    labels = pd.Series(np.repeat(["a", "b", "c"], [100, 300, 600]))
+    index = StratumIndex.from_values(labels)
+    positions = sample_indices(policy, len(labels), 90, seed=11, index=index)
+    assert len(positions) == 90 and len(np.unique(positions)) == 90
+    np.testing.assert_array_equal(positions, sample_indices(policy, len(labels), 90, seed=11, index=index))
+    counts = labels.iloc[positions].value_counts().to_dict()
+    if policy == "balanced":
+        assert counts == {"a": 30, "b": 30, "c": 30}
+    elif policy == "proportional":
+        assert counts == {"a": 9, "b": 27, "c": 54}
+
+
+def test_sample_indices_keeps_small_frames_and_rejects_unknown_policies():
+    assert sample_indices("uniform", 10, 10, seed=0) is None
+    with pytest.raises(ValueError):
+        sample_indices("stratified", 100, 10, seed=0)
+    df = pd.DataFrame({"x": range(20)})
+    sampled, changed = sample_frame(df, "uniform", 5, seed=0)
+    assert changed and len(sampled) == 5 and list(sampled.index) == list(range(5))
+
+
+def test_stratum_codes_bin_numeric_values_and_keep_missing_separate():
+    values = pd.Series([1.0, 2.0, 3.0, 4.0, np.nan, 5.0, 6.0, 7.0, 8.0])
+    index = StratumIndex.from_values(values, bins=4)
+    assert index.sizes.sum() == len(values)
+    assert [len(stratum) for stratum in index.strata][-1] == 1
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import io
+import json
+import tarfile
+
+import pytest
+
+import storage
+
+from saved_model_transfer import export_chunks, read_saved_models, resolve_format
+from storage import (
+    get_saved_model_payload,
+    get_saved_model_version_payload,
+    import_saved_model_payloads,
+    iter_saved_model_payloads,
+    list_saved_model_names,
+    list_saved_model_versions,
+    save_saved_model_payload,
+)
+
+
+def payload(name: str, value: float) -> dict:
+    return {
+        "model": {"dataset": "bike_hourly", "name": name},
+        "data": {"trainY": [value]},
+        "version": {"versionId": f"{name}-v1", "shapes": [{"key": "Temperature", "editableY": [value, "ü"]}]},
+    }
+
+
+MODELS = {f"model-{index:02d}": payload(f"model-{index:02d}", float(index)) for index in range(7)}
+
+
+def export_bytes(fmt: str, **filters) -> bytes:
+    return b"".join(export_chunks(iter_saved_model_payloads(**filters), fmt))
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "tar"])
+def test_export_import_round_trip(saved_models_backend, fmt):
+    for name, body in MODELS.items():
+        save_saved_model_payload(name, body)
+    exported = export_bytes(fmt)
+
+    items = list(read_saved_models(io.BytesIO(exported), fmt))
+    assert dict(items) == MODELS
+
+    # Importing into the same store appends a snapshot to every chain, changed or not.
+    changed = {**MODELS, "model-03": payload("model-03", 99.0)}
+    reexport = b"".join(export_chunks(changed.items(), fmt))
+    assert import_saved_model_payloads(read_saved_models(io.BytesIO(reexport), fmt), batch_size=3) == len(MODELS)
+    assert dict(iter_saved_model_payloads()) == changed
+    for name, body in changed.items():
+        versions = list_saved_model_versions(name)
+        assert [meta["versionId"] for meta in versions] == [f"{name}-v1", f"{name}-v1-2"]
+        assert [meta["kind"] for meta in versions] == ["snapshot", "snapshot"]
+        assert versions[1]["parentVersionId"] == f"{name}-v1"
+        assert get_saved_model_version_payload(name, f"{name}-v1") == MODELS[name]
+        assert get_saved_model_version_payload(name, f"{name}-v1-2") == body
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "tar"])
+def test_export_filters(saved_models_backend, fmt, monkeypatch):
+    # Small pages so filtered exports span several keyset queries.
+    monkeypatch.setattr(storage, "BULK_BATCH_SIZE", 2)
+    for name, body in MODELS.items():
+        save_saved_model_payload(name, body)
+    for name in ("other", "MODEL-09", "model_0x", "model-"):
+        save_saved_model_payload(name, payload(name, 1.0))
+
+    by_name = dict(read_saved_models(io.BytesIO(export_bytes(fmt, names=["model-01", "other.json", "model-06"])), fmt))
+    assert sorted(by_name) == ["model-01", "model-06", "other"]
+    by_prefix = dict(read_saved_models(io.BytesIO(export_bytes(fmt, prefix="model-0")), fmt))
+    assert sorted(by_prefix) == sorted(MODELS)
+    both = dict(read_saved_models(io.BytesIO(export_bytes(fmt, names=["model-02", "other"], prefix="model")), fmt))
+    assert sorted(both) == ["model-02"]
+    assert list(read_saved_models(io.BytesIO(export_bytes(fmt, names=["missing"])), fmt)) == []
+
+
+@pytest.mark.parametrize("saved_models_backend", ["file"], indirect=True)
+@pytest.mark.parametrize("fmt", ["ndjson", "tar"])
+def test_transfer_between_backends(saved_models_backend, fmt):
+    for name, body in MODELS.items():
+        save_saved_model_payload(name, body)
+
+    exported = export_bytes(fmt)
+    assert import_saved_model_payloads(read_saved_models(io.BytesIO(exported), fmt), storage="sqlite") == len(MODELS)
+    assert dict(iter_saved_model_payloads(storage="sqlite")) == MODELS
+    assert dict(iter_saved_model_payloads()) == MODELS
+
+
+def test_resolve_format():
+    assert resolve_format(None) == "ndjson"
+    assert resolve_format(None, "application/x-tar") == "tar"
+    assert resolve_format(" TAR ") == "tar"
+    with pytest.raises(ValueError):
+        resolve_format("zip")
+
+
+def test_invalid_ndjson_is_rejected():
+    with pytest.raises(ValueError, match="line 2"):
+        list(read_saved_models(io.BytesIO(b'{"name": "a", "payload": {}}\n{not json}\n'), "ndjson"))
+    with pytest.raises(ValueError, match="'name' and 'payload'"):
+        list(read_saved_models(io.BytesIO(b'{"name": "a"}\n'), "ndjson"))
+
+
+def test_invalid_tar_is_rejected():
+    with pytest.raises(ValueError, match="Invalid tar archive"):
+        list(read_saved_models(io.BytesIO(b"not a tar archive" * 64), "tar"))
+
+    archive = io.BytesIO()
+    with tarfile.open(fileobj=archive, mode="w") as tar:
+        data = b"{broken"
+        info = tarfile.TarInfo("broken.json")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+    with pytest.raises(ValueError, match="broken.json"):
+        list(read_saved_models(io.BytesIO(archive.getvalue()), "tar"))
+
+
+def test_import_rejects_non_object_payloads(saved_models_backend):
+    with pytest.raises(ValueError):
+        import_saved_model_payloads([("model", ["not", "an", "object"])])
+    assert list_saved_model_names() == []
+
+
+def test_ndjson_export_is_one_object_per_line(saved_models_backend):
+    for name, body in MODELS.items():
+        save_saved_model_payload(name, body)
+    lines = export_bytes("ndjson").splitlines()
+    assert [json.loads(line)["name"] for line in lines] == sorted(MODELS)
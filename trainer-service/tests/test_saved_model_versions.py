@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import copy
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import migrate_models
+import storage
+
+from migrate_models import migrate_saved_model_on_read
+from storage import (
+    compact_saved_model_versions,
+    get_saved_model_payload,
+    get_saved_model_version_payload,
+    import_saved_model_payloads,
+    list_saved_model_names,
+    list_saved_model_versions,
+    save_saved_model_payload,
+)
+
+
+def make_payload(version_id: str, y: list[float], dataset: str = "bike_hourly") -> dict:
+    return {
+        "model": {"dataset": dataset, "model_type": "igann", "task": "regression", "points": len(y)},
+        "data": {"trainX": {"Temperature": [0.0, 1.0]}, "trainY": [1.0, 2.0], "testY": [1.5]},
+        "version": {
+            "versionId": version_id,
+            "timestamp": 1,
+            "source": "edit",
+            "intercept": 0.5,
+            "shapes": [
+                {"key": "Temperature", "label": "Temperature", "editableX": list(range(len(y))), "editableY": y},
+                {"key": "Humidity", "label": "Humidity", "editableX": [0, 1], "editableY": [0.0, 0.1]},
+            ],
+        },
+    }
+
+
+def edited(payload: dict, version_id: str, index: int, value: float) -> dict:
+    payload = copy.deepcopy(payload)
+    payload["version"]["versionId"] = version_id
+    payload["version"]["shapes"][0]["editableY"][index] = value
+    return payload
+
+
+def legacy_payload() -> dict:
+    return {
+        "dataset": "bike_hourly",
+        "timestamp": 1700000000000,
+        "partials": [{"key": "Temperature", "label": "Temperature", "editableX": [0, 1, 2], "editableY": [0.0, 0.3, 0.6]}],
+        "y": [1.0, 2.0],
+    }
+
+
+def assert_chain_rebuilds(name: str) -> list[dict]:
+    """Every version rebuilds, and the newest one equals the stored head."""
+    versions = list_saved_model_versions(name)
+    assert versions
+    for meta in versions:
+        assert get_saved_model_version_payload(name, meta["versionId"]) is not None
+    assert get_saved_model_version_payload(name, versions[-1]["versionId"]) == get_saved_model_payload(name)
+    return versions
+
+
+def test_saves_append_deltas_that_rebuild_every_version(saved_models_backend):
+    first = make_payload("v1", [0.0, 1.0, 2.0])
+    second = edited(first, "v2", 1, 5.0)
+    third = edited(second, "v3", 2, 7.0)
+    for payload in (first, second, third):
+        save_saved_model_payload("model", payload)
+
+    versions = assert_chain_rebuilds("model")
+    assert [meta["versionId"] for meta in versions] == ["v1", "v2", "v3"]
+    assert [meta["kind"] for meta in versions] == ["snapshot", "delta", "delta"]
+    assert get_saved_model_version_payload("model", "v1") == first
+    assert get_saved_model_version_payload("model", "v2") == second
+    assert list_saved_model_names() == ["model"]
+
+
+def test_saving_an_unchanged_payload_adds_no_version(saved_models_backend):
+    payload = make_payload("v1", [0.0, 1.0])
+    save_saved_model_payload("model", payload)
+    save_saved_model_payload("model", copy.deepcopy(payload))
+    assert len(list_saved_model_versions("model")) == 1
+
+
+def test_repeated_version_ids_are_suffixed(saved_models_backend):
+    payload = make_payload("v1", [0.0, 1.0])
+    save_saved_model_payload("model", payload)
+    save_saved_model_payload("model", edited(payload, "v1", 0, 3.0))
+    assert [meta["versionId"] for meta in list_saved_model_versions("model")] == ["v1", "v1-2"]
+
+
+def test_migrate_on_read_records_a_snapshot_that_later_saves_diff_against(saved_models_backend):
+    save_saved_model_payload("legacy", legacy_payload())
+    migrated = migrate_saved_model_on_read("legacy", get_saved_model_payload("legacy"))
+    assert get_saved_model_payload("legacy") == migrated
+
+    versions = assert_chain_rebuilds("legacy")
+    assert versions[-1]["kind"] == "snapshot"
+    assert versions[-1]["parentVersionId"] == versions[0]["versionId"]
+
+    # Reading the migrated model again writes nothing.
+    migrate_saved_model_on_read("legacy", get_saved_model_payload("legacy"))
+    assert len(list_saved_model_versions("legacy")) == len(versions)
+
+    updated = edited(migrated, "after-migration", 0, 9.0)
+    save_saved_model_payload("legacy", updated)
+    versions = assert_chain_rebuilds("legacy")
+    assert versions[-1]["kind"] == "delta"
+    assert get_saved_model_version_payload("legacy", "after-migration") == updated
+
+
+@pytest.mark.parametrize("error", [sqlite3.OperationalError("database is locked"), OSError("disk full")])
+def test_migrate_on_read_returns_the_payload_when_the_write_back_fails(saved_models_backend, monkeypatch, error):
+    save_saved_model_payload("legacy", legacy_payload())
+
+    def fail(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(migrate_models, "save_saved_model_payload", fail)
+    migrated = migrate_saved_model_on_read("legacy", get_saved_model_payload("legacy"))
+    assert "version" in migrated
+    assert get_saved_model_payload("legacy") == legacy_payload()
+
+
+def test_import_over_an_existing_chain_appends_a_snapshot(saved_models_backend):
+    first = make_payload("v1", [0.0, 1.0, 2.0])
+    save_saved_model_payload("model", first)
+    save_saved_model_payload("model", edited(first, "v2", 0, 4.0))
+
+    imported = make_payload("imported", [9.0, 9.0, 9.0], dataset="mimic4_mean_100_full")
+    assert import_saved_model_payloads([("model", imported), ("other", first)], batch_size=1) == 2
+
+    versions = assert_chain_rebuilds("model")
+    assert versions[-1]["versionId"] == "imported"
+    assert versions[-1]["kind"] == "snapshot"
+    assert versions[-1]["parentVersionId"] == "v2"
+    assert get_saved_model_payload("model") == imported
+    assert get_saved_model_version_payload("model", "v2") == edited(first, "v2", 0, 4.0)
+    assert_chain_rebuilds("other")
+
+    # The next save is a delta against the imported payload, not the old chain.
+    after = edited(imported, "v3", 1, 1.0)
+    save_saved_model_payload("model", after)
+    assert list_saved_model_versions("model")[-1]["kind"] == "delta"
+    assert get_saved_model_version_payload("model", "v3") == after
+
+
+def test_compaction_snapshots_the_head_without_changing_any_version(saved_models_backend, monkeypatch):
+    monkeypatch.setenv("SAVED_MODELS_COMPACTION_RATIO", "0")
+    payloads = [make_payload("v1", [0.0] * 50)]
+    for step in range(1, 4):
+        payloads.append(edited(payloads[-1], f"v{step + 1}", step, float(step)))
+    for payload in payloads:
+        save_saved_model_payload("model", payload)
+    assert list_saved_model_versions("model")[-1]["kind"] == "delta"
+
+    assert compact_saved_model_versions("model") is True
+    versions = assert_chain_rebuilds("model")
+    assert versions[-1]["kind"] == "snapshot"
+    assert versions[-1]["versionId"] == "v4"
+    for payload in payloads:
+        assert get_saved_model_version_payload("model", payload["version"]["versionId"]) == payload
+    # Nothing left to compact.
+    assert compact_saved_model_versions("model") is False
+
+
+def test_migrate_import_and_compaction_interleaved(saved_models_backend, monkeypatch):
+    monkeypatch.setenv("SAVED_MODELS_COMPACTION_RATIO", "0")
+    expected: dict[str, dict] = {}
+
+    save_saved_model_payload("model", legacy_payload())
+    migrated = migrate_saved_model_on_read("model", get_saved_model_payload("model"))
+    expected[migrated["version"]["versionId"]] = migrated
+
+    current = migrated
+    for step in range(3):
+        current = edited(current, f"edit-{step}", step, 10.0 + step)
+        save_saved_model_payload("model", current)
+        expected[f"edit-{step}"] = current
+    compact_saved_model_versions("model")
+
+    imported = make_payload("imported", [1.0, 2.0, 3.0])
+    import_saved_model_payloads([("model", imported)])
+    expected["imported"] = imported
+
+    current = imported
+    for step in range(2):
+        current = edited(current, f"late-{step}", step, -1.0 - step)
+        save_saved_model_payload("model", current)
+        expected[f"late-{step}"] = current
+        compact_saved_model_versions("model")
+
+    versions = assert_chain_rebuilds("model")
+    ids = [meta["versionId"] for meta in versions]
+    assert ids[1:] == list(expected)
+    for version_id, payload in expected.items():
+        assert get_saved_model_version_payload("model", version_id) == payload
+    assert get_saved_model_payload("model") == current
+
+
+def test_concurrent_saves_and_compactions_keep_the_chain_intact(saved_models_backend, monkeypatch):
+    monkeypatch.setenv("SAVED_MODELS_COMPACTION_RATIO", "0")
+    base = make_payload("base", [0.0] * 20)
+    save_saved_model_payload("model", base)
+    expected = {"base": base}
+    for writer in range(4):
+        for step in range(10):
+            expected[f"w{writer}-{step}"] = edited(base, f"w{writer}-{step}", step, float(writer * 100 + step))
+
+    def write(writer: int) -> None:
+        for step in range(10):
+            save_saved_model_payload("model", expected[f"w{writer}-{step}"])
+            compact_saved_model_versions("model")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(write, range(4)))
+
+    versions = assert_chain_rebuilds("model")
+    assert sorted(meta["versionId"] for meta in versions) == sorted(expected)
+    for version_id, payload in expected.items():
+        assert get_saved_model_version_payload("model", version_id) == payload
+
+
+@pytest.mark.parametrize("saved_models_backend", ["sqlite"], indirect=True)
+def test_sqlite_store_is_shared_by_separate_connections(saved_models_backend, monkeypatch, tmp_path):
+    first = make_payload("v1", [0.0, 1.0])
+    save_saved_model_payload("model", first)
+    assert storage._sqlite_connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # A fresh connection, as another uvicorn worker would open, sees and extends the same chain.
+    storage._sqlite_connection.close()
+    monkeypatch.setattr(storage, "_sqlite_connection", None)
+    second = edited(first, "v2", 1, 3.0)
+    save_saved_model_payload("model", second)
+    assert get_saved_model_version_payload("model", "v1") == first
+    assert [meta["kind"] for meta in list_saved_model_versions("model")] == ["snapshot", "delta"]
+
+    with sqlite3.connect(tmp_path / "saved_models.sqlite3") as connection:
+        rows = connection.execute("SELECT version_id FROM saved_model_versions ORDER BY seq").fetchall()
+    assert [row[0] for row in rows] == ["v1", "v2"]
+
+
+def test_unknown_models_and_versions(saved_models_backend):
+    assert list_saved_model_versions("missing") is None
+    assert get_saved_model_payload("missing") is None
+    save_saved_model_payload("model", make_payload("v1", [0.0, 1.0]))
+    assert get_saved_model_version_payload("model", "nope") is None
+
+
+@pytest.mark.parametrize("name", ["", "   "])
+def test_missing_names_are_rejected(saved_models_backend, name):
+    with pytest.raises(ValueError):
+        save_saved_model_payload(name, make_payload("v1", [0.0, 1.0]))
+
+
+def test_names_are_reduced_to_their_final_component(saved_models_backend):
+    assert save_saved_model_payload("../escape", make_payload("v1", [0.0, 1.0])) == "escape.json"
+    assert list_saved_model_names() == ["escape"]
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+from sklearn.model_selection import KFold, StratifiedKFold, train_test_split
+
+import split_cache
+from split_cache import (
+    clear_split_cache,
+    fold_assignment,
+    get_fold_assignment,
+    get_train_test_split,
+    split_indices,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_split_cache()
+    yield
+    clear_split_cache()
+
+
+def targets(n_rows: int = 100) -> np.ndarray:
+    return np.arange(n_rows) % 3
+
+
+def test_positions_match_train_test_split():
+    y = targets()
+    for stratify in (False, True):
+        split = split_indices(y, seed=7, stratify=stratify)
+        train, test = train_test_split(
+            np.arange(len(y)), test_size=split_cache.TEST_SIZE, random_state=7, stratify=y if stratify else None
+        )
+        np.testing.assert_array_equal(split.train, train)
+        np.testing.assert_array_equal(split.test, test)
+        assert split.stratified is stratify
+        assert not split.train.flags.writeable and not split.test.flags.writeable
+
+
+def test_stratification_needs_two_rows_per_class():
+    y = np.array([0] * 20 + [1])
+    assert not split_indices(y, seed=0, stratify=True).stratified
+    assert not split_indices(np.zeros(20), seed=0, stratify=True).stratified
+
+
+def test_split_cache_is_keyed_and_bounded(monkeypatch):
+    monkeypatch.setattr(split_cache, "MAX_CACHED_SPLITS", 3)
+    y = targets()
+    first = get_train_test_split("fp", y, seed=0)
+    assert get_train_test_split("fp", y, seed=0) is first
+    assert get_train_test_split("edited", y, seed=0) is not first
+    assert get_train_test_split("fp", y, seed=0, sample_size=50) is not first
+    assert get_train_test_split("fp", y, seed=0, stratify=True).stratified
+
+    # The oldest entry has been evicted and is rebuilt with the same positions.
+    assert len(split_cache._splits) == 3
+    rebuilt = get_train_test_split("fp", y, seed=0)
+    assert rebuilt is not first
+    np.testing.assert_array_equal(rebuilt.train, first.train)
+
+
+def test_fold_assignment_matches_kfold():
+    y = targets(90)
+    folds = fold_assignment(y, n_folds=5, seed=3)
+    for fold, (_, held_out) in enumerate(KFold(n_splits=5, shuffle=True, random_state=3).split(y)):
+        np.testing.assert_array_equal(np.flatnonzero(folds == fold), np.sort(held_out))
+    assert not folds.flags.writeable
+
+    stratified = fold_assignment(y, n_folds=5, seed=3, stratify=True)
+    splitter = StratifiedKFold(n_splits=5, shuffle=True, random_state=3)
+    for fold, (_, held_out) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        np.testing.assert_array_equal(np.flatnonzero(stratified == fold), np.sort(held_out))
+
+
+def test_fold_cache_is_separate_per_fold_count():
+    y = targets()
+    five = get_fold_assignment("fp", y, seed=0, n_folds=5)
+    assert get_fold_assignment("fp", y, seed=0, n_folds=5) is five
+    three = get_fold_assignment("fp", y, seed=0, n_folds=3)
+    assert set(np.unique(five)) == set(range(5)) and set(np.unique(three)) == set(range(3))
+    assert len(split_cache._folds) == 2 and not split_cache._splits
+
+
+def test_concurrent_lookups_agree():
+    y = targets(1000)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        splits = list(pool.map(lambda seed: get_train_test_split("fp", y, seed % 4), range(64)))
+    for seed in range(4):
+        expected = split_indices(y, seed)
+        for index in range(seed, 64, 4):
+            np.testing.assert_array_equal(splits[index].train, expected.train)
+    assert len(split_cache._splits) == 4
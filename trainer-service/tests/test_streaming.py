@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from preprocessing.streaming import BalancedReservoirSampler, QuantileSketch, RunningMoments, StreamingMedian
+
+
+QUANTILES = [0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0]
+
+
+def sketch_of(values: np.ndarray, chunks: int = 1, relative_accuracy: float = 0.005) -> QuantileSketch:
+    sketch = QuantileSketch(relative_accuracy)
+    for chunk in np.array_split(values, chunks):
+        sketch.update(chunk)
+    return sketch
+
+
+def assert_within_relative_accuracy(sketch: QuantileSketch, values: np.ndarray) -> None:
+    ordered = np.sort(values)
+    for q in QUANTILES:
+        # The sketch answers with the value at rank floor(q * (n - 1)).
+        exact = ordered[int(np.floor(q * (len(ordered) - 1)))]
+        assert abs(sketch.quantile(q) - exact) <= sketch.relative_accuracy * abs(exact) + 1e-12, q
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        np.random.default_rng(0).lognormal(3.0, 2.0, 20_000),
+        np.random.default_rng(1).normal(0.0, 50.0, 20_000),
+        np.concatenate([np.zeros(500), -np.random.default_rng(2).exponential(1.0, 1_000)]),
+        np.array([42.0]),
+    ],
+    ids=["lognormal", "normal", "zeros-and-negatives", "single"],
+)
+def test_quantile_sketch_relative_error(values):
+    assert_within_relative_accuracy(sketch_of(values, chunks=7), values)
+
+
+def test_quantile_sketch_ignores_nan_and_handles_empty():
+    sketch = QuantileSketch()
+    assert np.isnan(sketch.quantile(0.5))
+    sketch.update(np.array([np.nan, 1.0, np.nan, 3.0]))
+    assert sketch.count == 2
+    assert sketch.quantile(1.0) == pytest.approx(3.0, rel=sketch.relative_accuracy)
+
+
+def test_quantile_sketch_merge_and_serialization_round_trip():
+    values = np.random.default_rng(3).normal(10.0, 5.0, 5_000)
+    left, right = sketch_of(values[:2_000]), sketch_of(values[2_000:])
+    left.merge(right)
+    whole = sketch_of(values)
+    assert left.to_dict() == whole.to_dict()
+
+    restored = QuantileSketch.from_dict(whole.to_dict())
+    assert [restored.quantile(q) for q in QUANTILES] == [whole.quantile(q) for q in QUANTILES]
+    assert restored.rank(10.0) == whole.rank(10.0)
+
+
+def test_quantile_sketch_rank():
+    values = np.random.default_rng(4).normal(0.0, 1.0, 10_000)
+    sketch = sketch_of(values)
+    for threshold in (-1.0, 0.0, 0.5, 2.0):
+        assert sketch.rank(threshold) == pytest.approx((values <= threshold).sum(), rel=0.02, abs=20)
+    assert sketch.rank(-100.0) == 0
+    assert sketch.rank(100.0) == len(values)
+
+
+def test_running_moments_match_numpy():
+    values = np.random.default_rng(5).normal(3.0, 2.0, 1_001)
+    values[::10] = np.nan
+    moments = RunningMoments()
+    for chunk in np.array_split(values, 9):
+        moments.update(chunk)
+    observed = values[~np.isnan(values)]
+    assert moments.count == len(observed)
+    assert moments.mean == pytest.approx(observed.mean())
+    assert moments.std() == pytest.approx(observed.std())
+
+
+def test_streaming_median_switches_to_the_sketch():
+    values = np.random.default_rng(6).lognormal(1.0, 1.0, 4_001)
+    exact = StreamingMedian(exact_limit=10_000)
+    approximate = StreamingMedian(exact_limit=1_000)
+    for chunk in np.array_split(values, 5):
+        exact.update(chunk)
+        approximate.update(chunk)
+    assert exact.exact and exact.median() == np.median(values)
+    assert not approximate.exact
+    assert approximate.median() == pytest.approx(np.median(values), rel=0.01)
+
+
+def frame(n_rows: int, positives: int, seed: int = 0) -> pd.DataFrame:
+    labels = np.zeros(n_rows, dtype=int)
+    labels[:positives] = 1
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"row": np.arange(n_rows), "label": rng.permutation(labels)})
+
+
+def sample_stream(df: pd.DataFrame, target: str | None, sample_size: int, seed: int, chunks: int) -> pd.DataFrame:
+    sampler = BalancedReservoirSampler(target, sample_size, seed)
+    for start in range(0, len(df), max(1, len(df) // chunks)):
+        sampler.update(df.iloc[start:start + max(1, len(df) // chunks)])
+    return sampler.finish()
+
+
+def test_balanced_reservoir_sampler_balances_classes():
+    df = frame(5_000, 400)
+    sample = sample_stream(df, "label", 300, seed=7, chunks=13)
+    assert len(sample) == 300
+    assert sample["label"].value_counts().to_dict() == {0: 150, 1: 150}
+    assert sample["row"].is_unique
+    assert list(sample.columns) == ["row", "label"]
+    # Deterministic for a seed, independent of how the stream is chunked.
+    pd.testing.assert_frame_equal(sample, sample_stream(df, "label", 300, seed=7, chunks=13))
+    assert set(sample["row"]) == set(sample_stream(df, "label", 300, seed=7, chunks=2)["row"])
+
+
+def test_balanced_reservoir_sampler_is_uniform_within_a_class():
+    df = frame(2_000, 1_000)
+    counts = np.zeros(len(df))
+    for seed in range(100):
+        counts[sample_stream(df, "label", 100, seed=seed, chunks=4)["row"].to_numpy()] += 1
+    # Each row is kept with probability 50 / 1000 per draw: about 5 times in 100 draws.
+    assert counts.mean() == pytest.approx(100 * 100 / len(df))
+    assert counts.max() < 20
+
+
+def test_balanced_reservoir_sampler_keeps_everything_when_small_or_unlabelled():
+    df = frame(50, 5)
+    assert len(sample_stream(df, "label", 100, seed=0, chunks=3)) == 50
+    uniform = sample_stream(frame(1_000, 500), None, 100, seed=0, chunks=5)
+    assert len(uniform) == 100 and uniform["row"].is_unique
+    assert BalancedReservoirSampler("label", 10, 0).finish().empty
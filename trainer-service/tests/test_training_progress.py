@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import sys
+import threading
+
+import pytest
+
+from training_progress import TrainingAborted, TrainingProgress, capture_thread_output
+
+
+def recorder(abort_requested=lambda: False, patience: int = 3):
+    reports = []
+    return TrainingProgress(100, patience, reports.append, abort_requested), reports
+
+
+@pytest.mark.parametrize(
+    "line, iteration, train_loss, val_loss",
+    [
+        ("Iteration 7: train loss 0.512, val loss 0.634", 7, 0.512, 0.634),
+        ("7. Iteration: Train Loss: 1.5e-2, Val Loss: 2E-2", 7, 0.015, 0.02),
+        ("round 12 train_loss=0.3 val_loss=nan", 12, 0.3, None),
+        ("iterations completed 3 - validation loss: 0.25", 3, None, 0.25),
+    ],
+)
+def test_verbose_lines_become_iterations(line, iteration, train_loss, val_loss):
+    progress, reports = recorder()
+    progress.on_output(line + "\n")
+    [report] = reports
+    assert report["iteration"] == iteration
+    assert report["trainLoss"] == (pytest.approx(train_loss) if train_loss is not None else None)
+    assert report["valLoss"] == (pytest.approx(val_loss) if val_loss is not None else None)
+    assert report["nEstimators"] == 100 and report["earlyStoppingPatience"] == 3
+
+
+def test_partial_lines_are_buffered_and_other_output_ignored():
+    progress, reports = recorder()
+    progress.on_output("Fitting model...\nIteration 1: train loss 0.9, ")
+    assert reports == []
+    progress.on_output("val loss 1.0\nIteration 2: train loss 0.8")
+    assert [report["iteration"] for report in reports] == [1]
+    progress.on_output(", val loss 0.9\n")
+    assert [report["iteration"] for report in reports] == [1, 2]
+
+
+def test_lines_without_an_iteration_number_are_counted():
+    progress, reports = recorder()
+    progress.on_output("train loss 0.5 val loss 0.6\ntrain loss 0.4 val loss 0.5\n")
+    assert [report["iteration"] for report in reports] == [1, 2]
+
+
+def test_early_stopping_counter_tracks_the_best_validation_loss():
+    progress, reports = recorder()
+    for val_loss in (1.0, 0.8, 0.9, 0.85, 0.7, None, "inf"):
+        progress.on_iteration(None, 0.5, val_loss)
+    assert [report["earlyStoppingCounter"] for report in reports] == [0, 0, 1, 2, 0, 0, 0]
+    assert [report["bestValLoss"] for report in reports] == [1.0, 0.8, 0.8, 0.8, 0.7, 0.7, 0.7]
+    assert reports[-1]["valLoss"] is None
+
+
+def test_abort_stops_at_the_next_report():
+    abort = threading.Event()
+    progress, reports = recorder(abort.is_set)
+    progress.on_iteration(1, 0.5, 0.6)
+    progress.check_abort()
+    abort.set()
+    with pytest.raises(TrainingAborted):
+        progress.on_iteration(2, 0.4, 0.5)
+    with pytest.raises(TrainingAborted):
+        progress.on_output("Iteration 3: train loss 0.3, val loss 0.4\n")
+    with pytest.raises(TrainingAborted):
+        progress.check_abort()
+    assert len(reports) == 1
+
+
+def test_captured_output_is_routed_per_thread(capsys):
+    progress, reports = recorder()
+    other_thread_done = threading.Event()
+
+    def other_thread():
+        print("not a fit")
+        other_thread_done.set()
+
+    with capture_thread_output(progress.on_output):
+        print("Iteration 1: train loss 0.5, val loss 0.6")
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join(5.0)
+    print("after")
+
+    assert other_thread_done.is_set()
+    assert [report["iteration"] for report in reports] == [1]
+    out = capsys.readouterr().out
+    assert "not a fit" in out and "after" in out and "Iteration 1" not in out
+    assert threading.get_ident() not in getattr(sys.stdout, "sinks", {})
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from fastapi import HTTPException
+
+import training_scheduler
+from training_scheduler import TrainingScheduler
+
+
+def wait_until(predicate, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+class Holder(threading.Thread):
+    """Holds ``fits`` slots of ``scheduler`` until ``done`` is set; records the order it started in."""
+
+    def __init__(self, scheduler, started: list, name: str, fits: int = 1, cancelled=None) -> None:
+        super().__init__(daemon=True)
+        self.scheduler = scheduler
+        self.started = started
+        self.label = name
+        self.fits = fits
+        self.cancelled = cancelled
+        self.done = threading.Event()
+        self.running = threading.Event()
+        self.error: BaseException | None = None
+
+    def run(self) -> None:
+        try:
+            with self.scheduler.slot(self.cancelled, fits=self.fits):
+                self.started.append(self.label)
+                self.running.set()
+                self.done.wait(5.0)
+        except BaseException as exc:
+            self.error = exc
+
+
+@pytest.fixture
+def slots_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(training_scheduler, "TRAINING_SLOTS_DIR", tmp_path / "slots")
+    monkeypatch.setattr(training_scheduler, "HOST_SLOT_POLL_SECONDS", 0.01)
+    return tmp_path / "slots"
+
+
+def test_queued_requests_start_in_fifo_order():
+    scheduler = TrainingScheduler(max_concurrent=1, max_queue=4)
+    started: list = []
+    first = Holder(scheduler, started, "first")
+    first.start()
+    first.running.wait(5.0)
+    queued = [Holder(scheduler, started, f"queued-{index}") for index in range(3)]
+    for holder in queued:
+        holder.start()
+        wait_until(lambda: scheduler.stats()["queued"] == queued.index(holder) + 1)
+
+    for holder in [first, *queued]:
+        holder.done.set()
+        holder.join(5.0)
+    assert started == ["first", "queued-0", "queued-1", "queued-2"]
+    stats = scheduler.stats()
+    assert stats["running"] == 0 and stats["queued"] == 0 and stats["admitted"] == 4
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    scheduler = TrainingScheduler(max_concurrent=1, max_queue=1)
+    started: list = []
+    running, queued = Holder(scheduler, started, "running"), Holder(scheduler, started, "queued")
+    running.start()
+    running.running.wait(5.0)
+    queued.start()
+    wait_until(lambda: scheduler.stats()["queued"] == 1)
+
+    with pytest.raises(HTTPException) as rejected:
+        with scheduler.slot():
+            pass
+    assert rejected.value.status_code == 429
+    assert int(rejected.value.headers["Retry-After"]) >= 1
+    with pytest.raises(HTTPException):
+        scheduler.check_capacity()
+    assert scheduler.stats()["rejected"] == 2
+
+    for holder in (running, queued):
+        holder.done.set()
+        holder.join(5.0)
+    scheduler.check_capacity()
+
+
+def test_queue_timeout_and_cancellation_give_up_the_place():
+    scheduler = TrainingScheduler(max_concurrent=1, max_queue=4, queue_timeout=0.1)
+    started: list = []
+    running = Holder(scheduler, started, "running")
+    running.start()
+    running.running.wait(5.0)
+
+    with pytest.raises(HTTPException, match="Timed out"):
+        with scheduler.slot():
+            pass
+    assert scheduler.stats()["queued"] == 0
+
+    scheduler.queue_timeout = 5.0
+    cancel = threading.Event()
+    cancelled = Holder(scheduler, started, "cancelled", cancelled=cancel.is_set)
+    cancelled.start()
+    wait_until(lambda: scheduler.stats()["queued"] == 1)
+    cancel.set()
+    cancelled.join(5.0)
+    assert isinstance(cancelled.error, InterruptedError)
+    assert scheduler.stats()["queued"] == 0
+
+    running.done.set()
+    running.join(5.0)
+    assert started == ["running"] and scheduler.stats()["running"] == 0
+
+
+def test_multi_slot_requests_wait_for_all_their_slots():
+    scheduler = TrainingScheduler(max_concurrent=3, max_queue=4)
+    started: list = []
+    single = Holder(scheduler, started, "single")
+    single.start()
+    single.running.wait(5.0)
+
+    # Needs all three slots, so it queues; a later single-slot request queues behind it.
+    wide = Holder(scheduler, started, "wide", fits=3)
+    wide.start()
+    wait_until(lambda: scheduler.stats()["queued"] == 1)
+    behind = Holder(scheduler, started, "behind")
+    behind.start()
+    wait_until(lambda: scheduler.stats()["queued"] == 2)
+    assert scheduler.stats()["running"] == 1
+
+    single.done.set()
+    wide.running.wait(5.0)
+    assert scheduler.stats()["running"] == 3 and not behind.running.is_set()
+    wide.done.set()
+    behind.running.wait(5.0)
+    behind.done.set()
+    for holder in (single, wide, behind):
+        holder.join(5.0)
+    assert started == ["single", "wide", "behind"]
+
+
+def test_fits_are_clamped_to_max_fits(slots_dir):
+    scheduler = TrainingScheduler(max_concurrent=4, max_queue=0, host_slots=2)
+    assert scheduler.max_fits == 2
+    with scheduler.slot(fits=10):
+        assert scheduler.stats()["running"] == 2
+    assert TrainingScheduler(max_concurrent=3, max_queue=0).max_fits == 3
+
+
+def test_host_slots_are_shared_across_schedulers(slots_dir):
+    # Two schedulers stand in for two worker processes sharing the host's slot files.
+    first = TrainingScheduler(max_concurrent=2, max_queue=1, host_slots=2, queue_timeout=0.2)
+    second = TrainingScheduler(max_concurrent=2, max_queue=1, host_slots=2, queue_timeout=0.2)
+    started: list = []
+    holder = Holder(first, started, "first")
+    holder.start()
+    holder.running.wait(5.0)
+
+    # Only one host slot is free, so a two-fit request times out rather than holding half.
+    with pytest.raises(HTTPException, match="host are busy"):
+        with second.slot(fits=2):
+            pass
+    with second.slot(fits=1):
+        assert len(list(slots_dir.glob("slot-*.lock"))) == 2
+
+    holder.done.set()
+    holder.join(5.0)
+    with second.slot(fits=2):
+        pass
+    assert second.stats()["running"] == 0
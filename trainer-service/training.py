@@ -1,18 +1,31 @@
 from __future__ import annotations
 
+import inspect
+import os
 import time
-from typing import Dict, List
+import uuid
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple
 
 from fastapi import HTTPException
 from igann import IGANN, IGANN_interactive
 import numpy as np
 import pandas as pd
-from sklearn.metrics import accuracy_score, mean_absolute_error, mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split
 
+from dataset_arena import load_preprocessed
 from dataset_registry import get_dataset
+from dataset_stats import get_feature_summary, stats_fingerprint
+from interaction_cache import build_requested_interactions
+from memory_usage import PeakMemoryTracker
+from metrics import bootstrap_intervals, calc_metrics, calibration_bins
+from preprocessing.common import category_codes, decode_categories
 from schemas import TrainRequest
+from split_cache import get_train_test_split
+from training_progress import TrainingProgress, capture_thread_output
 
+# Grid resolution (per numeric axis) of interaction shapes.
+INTERACTION_GRID_POINTS = 15
 
 
 def _coerce_numeric_points(values) -> List[float]:
@@ -24,30 +37,36 @@ def _coerce_numeric_points(values) -> List[float]:
 
 def evaluate_contribs(
     shape_fn: Dict,
-    feat_values: List[float],
+    feat_values,
     categories: List[str] | None = None,
-) -> List[float]:
-    """Compute per-row contributions using shape function info."""
+) -> np.ndarray:
+    """Compute per-row contributions using shape function info.
+
+    Categorical values may be category labels or integer codes into
+    ``categories``; unknown labels and out-of-range codes contribute 0.
+    """
+    values = np.asarray(feat_values)
     if not shape_fn:
-        return [0.0 for _ in feat_values]
+        return np.zeros(len(values))
     if shape_fn.get("datatype") == "categorical":
         cats = shape_fn.get("x", [])
         vals = shape_fn.get("y", [])
         mapping = {category: vals[i] if i < len(vals) else 0.0 for i, category in enumerate(cats)}
-        contribs: List[float] = []
-        for value in feat_values:
-            if isinstance(value, str):
-                category_name = value
-            else:
-                index = int(round(value))
-                category_name = categories[index] if categories and index < len(categories) else None
-            contribs.append(mapping.get(category_name, 0.0))
-        return contribs
+        if values.dtype.kind in "OUS":
+            codes, uniques = pd.factorize(values, use_na_sentinel=False)
+            lookup = np.array([mapping.get(value, 0.0) for value in uniques] + [0.0], dtype=float)
+            return lookup[codes]
+        # One trailing 0.0 slot absorbs unknown (-1) and out-of-range codes.
+        table = list(categories or [])
+        lookup = np.array([mapping.get(category, 0.0) for category in table] + [0.0], dtype=float)
+        codes = np.rint(values.astype(float)).astype(np.int64)
+        codes[(codes < 0) | (codes >= len(table))] = len(table)
+        return lookup[codes]
     xs = shape_fn.get("x", [])
     ys = shape_fn.get("y", [])
     if not xs or not ys:
-        return [0.0 for _ in feat_values]
-    return np.interp(feat_values, xs, ys).tolist()
+        return np.zeros(len(values))
+    return np.interp(values.astype(float), xs, ys)
 
 
 def _sigmoid(values: np.ndarray) -> np.ndarray:
@@ -135,7 +154,7 @@ def _build_2d_grid_from_dummies(
     x_train,
     cat_info: Dict,
     label_map: Dict,
-    n_grid: int = 15,
+    n_grid: int = INTERACTION_GRID_POINTS,
 ) -> Dict:
     """
     Build a 2D grid shape dict for an interaction pair from per-dummy shape functions.
@@ -185,7 +204,7 @@ def _build_2d_grid_from_dummies(
     }
 
 
-def _build_2d_grid(k1: str, k2: str, shape_1d: Dict, x_train, cat_info: Dict, label_map: Dict, n_grid: int = 15) -> Dict:
+def _build_2d_grid(k1: str, k2: str, shape_1d: Dict, x_train, cat_info: Dict, label_map: Dict, n_grid: int = INTERACTION_GRID_POINTS) -> Dict:
     """Convert a 1D interaction shape function into a 2D grid shape dict."""
     sx = _coerce_numeric_points(shape_1d.get("x"))
     sy = _coerce_numeric_points(shape_1d.get("y"))
@@ -236,7 +255,7 @@ def _build_2d_grid(k1: str, k2: str, shape_1d: Dict, x_train, cat_info: Dict, la
     return result
 
 
-def _build_2d_grid_for_operation(operation_spec: Dict, shape_1d: Dict, x_train, cat_info: Dict, n_grid: int = 15) -> Dict:
+def _build_2d_grid_for_operation(operation_spec: Dict, shape_1d: Dict, x_train, cat_info: Dict, n_grid: int = INTERACTION_GRID_POINTS) -> Dict:
     left, right = operation_spec["sources"]
     operator = operation_spec["operator"]
     if operator == "product":
@@ -282,101 +301,193 @@ def _build_2d_grid_for_operation(operation_spec: Dict, shape_1d: Dict, x_train,
     }
 
 
+# ── Low-memory training ──
+# With low_memory, column selection and appended interaction columns reuse the
+# preprocessed arrays instead of copying the frame, the model is fitted on a
+# float32 frame gathered column by column, and per-row response data stays in
+# numpy arrays until it is serialized.
+
+def get_low_memory_default() -> bool:
+    return os.getenv("TRAINING_LOW_MEMORY", "off").strip().lower() in {"on", "1", "true"}
+
+
+def resolve_low_memory(request: TrainRequest) -> bool:
+    return request.low_memory if request.low_memory is not None else get_low_memory_default()
+
+
+def _frame_view(parts: List[Tuple[pd.DataFrame, List[str]]]) -> pd.DataFrame:
+    """Frame of the given columns that shares their arrays (one block per column, no consolidation)."""
+    return pd.DataFrame({col: frame[col] for frame, cols in parts for col in cols}, copy=False)
+
+
+def float32_rows(x_processed: pd.DataFrame, rows: np.ndarray) -> pd.DataFrame:
+    """``x_processed.take(rows)`` with numeric columns narrowed to float32, one column at a time."""
+    columns = {}
+    for col in x_processed.columns:
+        series = x_processed[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            columns[col] = pd.Categorical.from_codes(series.cat.codes.to_numpy()[rows], dtype=series.dtype)
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            columns[col] = series.to_numpy()[rows].astype(np.float32, copy=False)
+        else:
+            columns[col] = series.to_numpy()[rows]
+    return pd.DataFrame(columns, index=x_processed.index[rows], copy=False)
+
+
+def _row_values(values: np.ndarray, low_memory: bool):
+    """Per-row response data: kept as an array in low-memory mode (see json_utils.dumps_json)."""
+    return values if low_memory else values.tolist()
+
+
+@dataclass(frozen=True)
+class PoolPlan:
+    """Fits of one /train request running on the worker pool at once, next to its main fit."""
+
+    cross_validation: int = 0
+    ensemble: int = 0
+
+    @property
+    def slots(self) -> int:
+        return 1 + self.cross_validation + self.ensemble
+
+
+def plan_pool_fits(request: TrainRequest) -> PoolPlan:
+    """Split the training slots a request may hold between its folds and its extra ensemble seeds."""
+    from cross_validation import clamp_folds, pool_parallelism  # imports this module
+    from ensemble import clamp_ensemble_seeds  # imports this module
+
+    folds = pool_parallelism(clamp_folds(request.cv_folds), 1) if request.cv_folds else 0
+    seeds = 0
+    if (request.ensemble_seeds or 0) > 1:
+        seeds = pool_parallelism(clamp_ensemble_seeds(request.ensemble_seeds) - 1, 1 + folds)
+    return PoolPlan(folds, seeds)
+
+
+def train_slots(request: TrainRequest) -> int:
+    """Training slots to reserve for ``request`` (see ``training_scheduler.training_slot``)."""
+    return plan_pool_fits(request).slots
+
+
 def _load_dataset(request: TrainRequest):
     cfg = get_dataset(request.dataset)
-    return cfg.preprocessor(request.seed, request.sample_size)
+    return load_preprocessed(cfg, request.seed, request.sample_size)
 
 
-def build_dataset_feature_summary(dataset: str, seed: int = 3) -> Dict:
+def _add_requested_interactions(
+    request: TrainRequest,
+    x_processed,
+    cat_info: Dict,
+    labels: Dict,
+    interaction_specs: List[Dict],
+    low_memory: bool = False,
+):
+    """Append the request's interaction columns (cached per dataset and pair) to the frame."""
+    existing = {spec["key"] for spec in interaction_specs}
+    dummy_keys = {col for spec in interaction_specs for col in spec["dummy_cols"]}
+    base_features = [col for col in x_processed.columns if col not in dummy_keys]
+    wanted = [(item.k1, item.k2, item.operator) for item in request.interactions]
+    # Keyed like the statistics and split caches (source stamps, seed, sample
+    # size), so a lookup never touches the rows.
+    fingerprint = stats_fingerprint(get_dataset(request.dataset), request.seed, request.sample_size)
+    try:
+        specs, columns = build_requested_interactions(
+            x_processed[base_features], cat_info, labels, wanted, fingerprint, request.seed, request.sample_size
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    new_specs = [spec for spec in specs if spec["key"] not in existing]
+    new_cols = [col for spec in new_specs for col in spec["dummy_cols"]]
+    if new_cols and low_memory:
+        x_processed = _frame_view([(x_processed, list(x_processed.columns)), (columns, new_cols)])
+    elif new_cols:
+        x_processed = pd.concat([x_processed, columns[new_cols]], axis=1)
+    return x_processed, interaction_specs + new_specs
+
+
+def build_dataset_feature_summary(
+    dataset: str,
+    seed: int = 3,
+    bins: int | None = None,
+    features: List[str] | None = None,
+) -> Dict:
     try:
         cfg = get_dataset(dataset)
     except KeyError:
         raise HTTPException(status_code=400, detail=f"Unknown dataset: {dataset}")
 
-    request = TrainRequest(dataset=dataset, seed=seed)
-    x_processed, _y_full, cat_info, labels, interaction_specs = _load_dataset(request)
-    descriptions = cfg.descriptions
-    dummy_keys = {col for spec in interaction_specs for col in spec["dummy_cols"]}
-    features = []
+    # Served from the persisted statistics store; the preprocessor only runs
+    # when the dataset's source files or the sampling parameters change.
+    try:
+        summary = get_feature_summary(cfg, seed, bins, features)
+    except KeyError as exc:
+        raise HTTPException(status_code=400, detail=f"Unknown feature(s): {exc.args[0]}")
+    return {"dataset": dataset, "features": summary, "default_features": cfg.default_features}
+
+
+@dataclass(frozen=True)
+class TrainingParams:
+    """Clamped model hyperparameters for one training run (picklable for worker processes)."""
+
+    task_type: str
+    model_type: str
+    center_shapes: bool
+    num_points: int
+    n_estimators: int
+    boost_rate: float
+    init_reg: float
+    elm_alpha: float
+    early_stopping: int
+    n_hid: int
+    scale_y: bool
+    seed: int
+
+
+def resolve_training_params(request: TrainRequest, task_type: str) -> TrainingParams:
+    return TrainingParams(
+        task_type=task_type,
+        model_type=request.model_type if request.model_type in {"igann", "igann_interactive"} else "igann_interactive",
+        center_shapes=bool(getattr(request, "center_shapes", False)),
+        num_points=max(2, min(250, request.points or 250)),
+        n_estimators=max(10, min(500, request.n_estimators)),
+        boost_rate=max(0.01, min(1.0, request.boost_rate)),
+        init_reg=max(0.01, min(10.0, request.init_reg)),
+        elm_alpha=max(0.0, min(10.0, request.elm_alpha)),
+        early_stopping=max(5, min(200, request.early_stopping)),
+        n_hid=max(1, min(100, request.n_hid)),
+        scale_y=bool(request.scale_y) if task_type == "regression" else False,
+        seed=request.seed,
+    )
 
-    for key in (col for col in x_processed.columns if col not in dummy_keys):
-        label = labels.get(key, key)
-        description = descriptions.get(key, "")
-        if key in cat_info:
-            counts = x_processed[key].astype(str).value_counts(dropna=False).to_dict()
-            categories = [
-                {"label": category, "count": int(counts.get(str(category), 0))}
-                for category in cat_info[key]
-            ]
-            features.append({
-                "key": key,
-                "label": label,
-                "description": description,
-                "kind": "categorical",
-                "categories": categories,
-            })
-            continue
 
-        values = pd.to_numeric(x_processed[key], errors="coerce").dropna().to_numpy(dtype=float)
-        if len(values) == 0:
-            bins = []
-            min_value = None
-            max_value = None
-        else:
-            counts, edges = np.histogram(values, bins=min(24, max(8, int(np.sqrt(len(values))))))
-            bins = [int(count) for count in counts.tolist()]
-            min_value = float(edges[0])
-            max_value = float(edges[-1])
-        features.append({
-            "key": key,
-            "label": label,
-            "description": description,
-            "kind": "continuous",
-            "bins": bins,
-            "min": min_value,
-            "max": max_value,
-        })
-
-    return {"dataset": dataset, "features": features, "default_features": cfg.default_features}
-
-
-def _calc_metrics(task_type: str, y_true: np.ndarray, y_pred: np.ndarray) -> Dict:
-    if len(y_true) == 0:
-        return {"rmse": None, "mae": None, "r2": None, "acc": None, "count": 0}
-    if task_type == "classification":
-        return {
-            "acc": float(accuracy_score(y_true >= 0.5, y_pred >= 0.5)),
-            "count": int(len(y_true)),
-        }
-    return {
-        "rmse": float(np.sqrt(mean_squared_error(y_true, y_pred))),
-        "mae": float(mean_absolute_error(y_true, y_pred)),
-        "r2": float(r2_score(y_true, y_pred)),
-        "count": int(len(y_true)),
-    }
+# Builds the progress reporter for a fit from its resolved parameters.
+ProgressListener = Callable[[TrainingParams], TrainingProgress]
 
 
-def build_train_response(request: TrainRequest):
-    try:
-        cfg = get_dataset(request.dataset)
-    except KeyError:
-        raise HTTPException(status_code=400, detail=f"Unknown dataset: {request.dataset}")
-    model_type = request.model_type if request.model_type in {"igann", "igann_interactive"} else "igann_interactive"
-    center_shapes = bool(getattr(request, "center_shapes", False))
+@dataclass
+class TrainingData:
+    """Preprocessed frame restricted to the request's features and interactions."""
 
-    num_points = max(2, min(250, request.points or 250))
-    n_estimators = max(10, min(500, request.n_estimators))
-    boost_rate = max(0.01, min(1.0, request.boost_rate))
-    init_reg = max(0.01, min(10.0, request.init_reg))
-    elm_alpha = max(0.0, min(10.0, request.elm_alpha))
-    early_stopping = max(5, min(200, request.early_stopping))
-    n_hid = max(1, min(100, request.n_hid))
+    x_processed: pd.DataFrame
+    y_full: np.ndarray
+    cat_info: Dict
+    labels: Dict
+    interaction_specs: List[Dict]
+    feature_keys: List[str]
 
-    task_type = cfg.task_type
-    igann_task = task_type
+    @property
+    def dummy_keys(self) -> List[str]:
+        return [col for spec in self.interaction_specs for col in spec["dummy_cols"]]
 
+
+def prepare_training_data(request: TrainRequest, low_memory: bool = False) -> TrainingData:
+    """The request's columns; with ``low_memory`` they are views of the preprocessed data, not copies."""
     x_processed, y_full, cat_info, labels, interaction_specs = _load_dataset(request)
-    descriptions = cfg.descriptions
+
+    if request.interactions:
+        x_processed, interaction_specs = _add_requested_interactions(
+            request, x_processed, cat_info, labels, interaction_specs, low_memory
+        )
 
     all_dummy_keys_set = {col for spec in interaction_specs for col in spec["dummy_cols"]}
 
@@ -385,118 +496,145 @@ def build_train_response(request: TrainRequest):
         requested_set = set(requested_features)
         interaction_specs = [spec for spec in interaction_specs if all(s in requested_set for s in spec["sources"])]
         all_dummy_keys_set = {col for spec in interaction_specs for col in spec["dummy_cols"]}
-        x_processed = x_processed.loc[:, requested_features + sorted(all_dummy_keys_set)].copy()
+        selected_columns = requested_features + sorted(all_dummy_keys_set)
+        if low_memory:
+            x_processed = _frame_view([(x_processed, selected_columns)])
+        else:
+            x_processed = x_processed.loc[:, selected_columns].copy()
         cat_info = {k: v for k, v in cat_info.items() if k in requested_set}
         labels = {k: labels.get(k, k) for k in requested_features}
 
     feature_keys = [col for col in x_processed.columns if col not in all_dummy_keys_set]
-    interaction_dummy_cols = {spec["key"]: spec["dummy_cols"] for spec in interaction_specs}
-    all_dummy_keys = [col for spec in interaction_specs for col in spec["dummy_cols"]]
-
-    stratify = None
-    if task_type == "classification":
-        unique_targets, target_counts = np.unique(y_full, return_counts=True)
-        if len(unique_targets) > 1 and int(np.min(target_counts)) >= 2:
-            stratify = y_full
-    x_train_df, x_test_df, y_train_arr, y_test_arr = train_test_split(
-        x_processed,
-        y_full,
-        test_size=0.2,
-        random_state=request.seed,
-        stratify=stratify,
-    )
+    return TrainingData(x_processed, y_full, cat_info, labels, interaction_specs, feature_keys)
 
-    y_train = np.array(y_train_arr).astype(float).flatten()
-    y_test = np.array(y_test_arr).astype(float).flatten()
-    use_scale_y = bool(request.scale_y) if task_type == "regression" else False
 
-    model_cls = IGANN_interactive if model_type == "igann_interactive" else IGANN
+def _accepts_callback(model_cls) -> bool:
+    try:
+        return "callback" in inspect.signature(model_cls.__init__).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def fit_model(
+    params: TrainingParams,
+    x_train_df: pd.DataFrame,
+    y_train: np.ndarray,
+    progress: TrainingProgress | None = None,
+):
+    """Fit the model; with ``progress`` it reports each boosting iteration and can be aborted."""
+    model_cls = IGANN_interactive if params.model_type == "igann_interactive" else IGANN
     model_kwargs = dict(
-        task=igann_task,
-        n_estimators=n_estimators,
-        boost_rate=boost_rate,
-        init_reg=init_reg,
-        elm_alpha=elm_alpha,
-        early_stopping=early_stopping,
-        n_hid=n_hid,
+        task=params.task_type,
+        n_estimators=params.n_estimators,
+        boost_rate=params.boost_rate,
+        init_reg=params.init_reg,
+        elm_alpha=params.elm_alpha,
+        early_stopping=params.early_stopping,
+        n_hid=params.n_hid,
         device="cpu",
-        random_state=request.seed,
+        random_state=params.seed,
         verbose=0,
-        scale_y=use_scale_y,
+        scale_y=params.scale_y,
     )
-    if model_type == "igann_interactive":
-        model_kwargs["GAM_detail"] = num_points
+    if params.model_type == "igann_interactive":
+        model_kwargs["GAM_detail"] = params.num_points
+    capture_output = False
+    if progress is not None:
+        progress.check_abort()
+        if _accepts_callback(model_cls):
+            model_kwargs["callback"] = progress.on_iteration
+        else:
+            # No callback hook: parse the per-iteration losses from verbose output instead.
+            model_kwargs["verbose"] = 1
+            capture_output = True
     igann = model_cls(**model_kwargs)
 
-    igann.fit(x_train_df, y_train)
+    if capture_output:
+        with capture_thread_output(progress.on_output):
+            igann.fit(x_train_df, y_train)
+    else:
+        igann.fit(x_train_df, y_train)
 
-    if center_shapes and model_type == "igann_interactive" and hasattr(igann, "center_shape_functions"):
+    if params.center_shapes and params.model_type == "igann_interactive" and hasattr(igann, "center_shape_functions"):
         igann.center_shape_functions(x_train_df, update_intercept=True)
+    return igann
 
-    label_map = dict(labels)
-    for spec in interaction_specs:
-        label_map[spec["key"]] = spec["label"]
-
-    features_train = {key: x_train_df[key].tolist() for key in feature_keys}
-    features_test = {key: x_test_df[key].tolist() for key in feature_keys} if len(x_test_df) else {}
-    for cat_key in cat_info.keys():
-        if cat_key in features_train:
-            features_train[cat_key] = [str(value) for value in features_train[cat_key]]
-        if cat_key in features_test:
-            features_test[cat_key] = [str(value) for value in features_test[cat_key]]
-    test_len = len(x_test_df)
 
-    shape_functions = igann.get_gam_feature_dict() if getattr(igann, "GAM", None) is not None else igann.get_shape_functions_as_dict()
+def native_shape_functions(model) -> Dict:
+    """The fitted model's shape functions at the resolution it reports them."""
+    shape_functions = model.get_gam_feature_dict() if getattr(model, "GAM", None) is not None else model.get_shape_functions_as_dict()
     if not shape_functions:
         raise HTTPException(status_code=500, detail="Model did not produce shape functions.")
-    all_model_keys = feature_keys + all_dummy_keys
-    shape_functions = normalize_numeric_shape_points(shape_functions, all_model_keys, cat_info, num_points)
-    def get_shape(key: str) -> Dict:
-        return shape_functions.get(key, {})
+    return shape_functions
+
+
+def feature_columns(
+    x_processed: pd.DataFrame,
+    keys: List[str],
+    cat_info: Dict,
+    compact_codes: bool = False,
+) -> Dict[str, np.ndarray]:
+    """Full-length model inputs: category codes for categorical keys, floats otherwise.
+
+    With ``compact_codes`` already-coded columns keep their narrow code dtype instead of int64.
+    """
+    code_dtype = None if compact_codes else np.int64
+    return {
+        key: category_codes(key, x_processed, cat_info, code_dtype) if key in cat_info else x_processed[key].to_numpy(dtype=float)
+        for key in keys
+    }
 
-    contribs_train: List[np.ndarray] = []
-    contribs_test: List[np.ndarray] = []
-    for key in feature_keys:
-        shape_fn = get_shape(key)
-        contribs = np.array(evaluate_contribs(shape_fn, features_train[key], cat_info.get(key)))
-        contribs_train.append(contribs)
-        if test_len:
-            contribs_test.append(np.array(evaluate_contribs(shape_fn, features_test[key], cat_info.get(key))))
 
+def term_contributions(
+    shape_functions: Dict,
+    columns: Dict[str, np.ndarray],
+    feature_keys: List[str],
+    cat_info: Dict,
+    interaction_specs: List[Dict],
+    rows: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Per-term contributions for ``rows``: one entry per feature, then one per interaction."""
+    contribs = {
+        key: evaluate_contribs(shape_functions.get(key, {}), columns[key][rows], cat_info.get(key))
+        for key in feature_keys
+    }
     for spec in interaction_specs:
-        display_key = spec["key"]
-        dummy_cols_for_pair = interaction_dummy_cols[display_key]
-        pair_train = np.zeros(len(y_train))
-        pair_test = np.zeros(test_len) if test_len else np.array([])
-        for col_name in dummy_cols_for_pair:
-            shape_fn = shape_functions.get(col_name, {})
-            pair_train += np.array(evaluate_contribs(shape_fn, x_train_df[col_name].tolist(), None))
-            if test_len:
-                pair_test += np.array(evaluate_contribs(shape_fn, x_test_df[col_name].tolist(), None))
-        contribs_train.append(pair_train)
-        if test_len:
-            contribs_test.append(pair_test)
-        features_train[display_key] = pair_train.tolist()
-        if test_len:
-            features_test[display_key] = pair_test.tolist()
-
-    total_train = np.sum(np.stack(contribs_train, axis=0), axis=0) if contribs_train else np.zeros_like(y_train)
-    total_test = np.sum(np.stack(contribs_test, axis=0), axis=0) if contribs_test else np.zeros_like(y_test)
+        total = np.zeros(len(rows))
+        for col_name in spec["dummy_cols"]:
+            total += evaluate_contribs(shape_functions.get(col_name, {}), columns[col_name][rows])
+        contribs[spec["key"]] = total
+    return contribs
+
+
+def additive_intercept(task_type: str, model, y_train: np.ndarray, total_train: np.ndarray) -> float:
     if task_type == "classification":
-        intercept_val = _model_intercept(igann)
-        preds_train = _sigmoid(total_train + intercept_val)
-        preds_test = _sigmoid(total_test + intercept_val) if len(total_test) else np.array([])
-    else:
-        intercept_val = float(np.mean(y_train - total_train)) if len(y_train) else 0.0
-        preds_train = total_train + intercept_val
-        preds_test = total_test + intercept_val if len(total_test) else np.array([])
+        return _model_intercept(model)
+    return float(np.mean(y_train - total_train)) if len(y_train) else 0.0
+
+
+def additive_predictions(task_type: str, total: np.ndarray, intercept: float) -> np.ndarray:
+    if not len(total):
+        return np.array([])
+    return _sigmoid(total + intercept) if task_type == "classification" else total + intercept
+
 
-    train_metrics = _calc_metrics(task_type, y_train, preds_train)
-    test_metrics = _calc_metrics(task_type, y_test, preds_test)
+def _sum_terms(contribs: Dict[str, np.ndarray], n_rows: int) -> np.ndarray:
+    # Accumulate in place rather than stacking every term into one (terms x rows) array.
+    terms = iter(contribs.values())
+    total = next(terms, None)
+    if total is None:
+        return np.zeros(n_rows)
+    total = np.array(total, dtype=float)
+    for values in terms:
+        total += values
+    return total
 
+
+def feature_shapes(shape_functions: Dict, feature_keys: List[str], cat_info: Dict, label_map: Dict) -> List[Dict]:
+    """Editable 1D shapes for the main effects."""
     shapes = []
     for key in feature_keys:
-        shape_fn = get_shape(key)
+        shape_fn = shape_functions.get(key, {})
         shape: Dict = {"key": key, "label": label_map.get(key, key)}
         if key in cat_info:
             categories = cat_info[key]
@@ -513,60 +651,235 @@ def build_train_response(request: TrainRequest):
             shape["editableX"] = list(shape_fn.get("x", []))
             shape["editableY"] = list(shape_fn.get("y", []))
         shapes.append(shape)
+    return shapes
 
+
+def build_interaction_shapes(
+    shape_functions: Dict,
+    interaction_specs: List[Dict],
+    x_train,
+    cat_info: Dict,
+    label_map: Dict,
+    n_grid: int = INTERACTION_GRID_POINTS,
+) -> List[Dict]:
+    """2D grids for the interaction terms; ``x_train`` only needs the numeric sources' ranges."""
     interaction_shapes = []
     for spec in interaction_specs:
         display_key = spec["key"]
-        dummy_cols_for_pair = interaction_dummy_cols[display_key]
-        dummy_shapes_for_pair = {col: shape_functions.get(col, {}) for col in dummy_cols_for_pair}
-        if any(dummy_shapes_for_pair.values()):
-            if spec["operator"] == "product" and (spec["sources"][0] in cat_info or spec["sources"][1] in cat_info):
-                interaction_shapes.append(_build_2d_grid_from_dummies(
-                    spec["sources"][0], spec["sources"][1],
-                    dummy_cols_for_pair, dummy_shapes_for_pair,
-                    x_train_df, cat_info, label_map, n_grid=15,
-                ))
-            else:
-                interaction_shapes.append(_build_2d_grid_for_operation(
-                    spec, dummy_shapes_for_pair.get(display_key, {}),
-                    x_train_df, cat_info, n_grid=15,
-                ))
+        dummy_shapes_for_pair = {col: shape_functions.get(col, {}) for col in spec["dummy_cols"]}
+        if not any(dummy_shapes_for_pair.values()):
+            continue
+        if spec["operator"] == "product" and (spec["sources"][0] in cat_info or spec["sources"][1] in cat_info):
+            interaction_shapes.append(_build_2d_grid_from_dummies(
+                spec["sources"][0], spec["sources"][1],
+                spec["dummy_cols"], dummy_shapes_for_pair,
+                x_train, cat_info, label_map, n_grid=n_grid,
+            ))
+        else:
+            interaction_shapes.append(_build_2d_grid_for_operation(
+                spec, dummy_shapes_for_pair.get(display_key, {}),
+                x_train, cat_info, n_grid=n_grid,
+            ))
+    return interaction_shapes
+
+
+def interaction_bounds(x_train: pd.DataFrame, interaction_specs: List[Dict], cat_info: Dict) -> pd.DataFrame:
+    """Two-row (min, max) frame of the numeric interaction sources; enough to rebuild their grids."""
+    sources = sorted({source for spec in interaction_specs for source in spec["sources"] if source not in cat_info})
+    return pd.DataFrame({
+        source: [float(x_train[source].min()), float(x_train[source].max())] for source in sources
+    })
+
+
+def build_train_response(request: TrainRequest, progress_listener: ProgressListener | None = None):
+    """Train and assemble the /train response, including the run's peak memory under ``memory``."""
+    low_memory = resolve_low_memory(request)
+    with PeakMemoryTracker() as memory:
+        response = _train_response(request, progress_listener, low_memory)
+    response["memory"] = {**memory.report(), "lowMemory": low_memory}
+    return response
+
+
+def _train_response(request: TrainRequest, progress_listener: ProgressListener | None, low_memory: bool):
+    try:
+        cfg = get_dataset(request.dataset)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown dataset: {request.dataset}")
+
+    task_type = cfg.task_type
+    params = resolve_training_params(request, task_type)
+    num_points = params.num_points
+    descriptions = cfg.descriptions
+
+    data = prepare_training_data(request, low_memory)
+    x_processed, cat_info, interaction_specs, feature_keys = (
+        data.x_processed, data.cat_info, data.interaction_specs, data.feature_keys
+    )
+    all_dummy_keys = data.dummy_keys
+
+    # Train/test membership comes from cached row positions; only the training
+    # rows are materialized as a frame (for fitting), everything else indexes
+    # the preprocessed column arrays directly.
+    fingerprint = stats_fingerprint(cfg, request.seed, request.sample_size)
+    split = get_train_test_split(
+        fingerprint,
+        data.y_full,
+        request.seed,
+        request.sample_size,
+        stratify=task_type == "classification",
+    )
+    train_idx, test_idx = split.train, split.test
+    x_train_df = float32_rows(x_processed, train_idx) if low_memory else x_processed.take(train_idx)
+
+    y_values = np.asarray(data.y_full, dtype=float).ravel()
+    y_train = y_values[train_idx]
+    y_test = y_values[test_idx]
+
+    plan = plan_pool_fits(request)
+    with ExitStack() as stack:
+        # Cross-validation folds run in worker processes while the main model fits here.
+        cross_validation = None
+        if request.cv_folds:
+            from cross_validation import start_cross_validation  # imports this module
+
+            cross_validation = stack.enter_context(
+                start_cross_validation(
+                    data, params, request.cv_folds, fingerprint, request.sample_size, plan.cross_validation
+                )
+            )
+        # So do the extra seeds of an ensemble.
+        ensemble_run = None
+        if (request.ensemble_seeds or 0) > 1:
+            from ensemble import start_ensemble  # imports this module
+
+            ensemble_run = stack.enter_context(
+                start_ensemble(data, params, request.ensemble_seeds, train_idx, plan.ensemble)
+            )
+        progress = progress_listener(params) if progress_listener is not None else None
+        igann = fit_model(params, x_train_df, y_train, progress)
+        try:
+            # An aborted job stops waiting here; leaving the stack stops the pool fits.
+            check_abort = progress.check_abort if progress is not None else None
+            cv_result = cross_validation.result(check_abort) if cross_validation is not None else None
+            ensemble_members = ensemble_run.result(check_abort) if ensemble_run is not None else None
+        except RuntimeError as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+    label_map = dict(data.labels)
+    for spec in interaction_specs:
+        label_map[spec["key"]] = spec["label"]
+
+    # Categorical columns are integer-coded against cat_info; contributions are
+    # looked up by code and the codes are decoded to labels only for the response.
+    columns = feature_columns(x_processed, feature_keys + all_dummy_keys, cat_info, compact_codes=low_memory)
+    features_train = {
+        key: decode_categories(columns[key][train_idx], cat_info[key]) if key in cat_info else _row_values(columns[key][train_idx], low_memory)
+        for key in feature_keys
+    }
+
+    native_shapes = native_shape_functions(igann)
+    shape_functions = normalize_numeric_shape_points(native_shapes, feature_keys + all_dummy_keys, cat_info, num_points)
+    ensemble_shapes = None
+    if ensemble_members is not None:
+        from ensemble import aggregate_seed_shapes  # imports this module
+
+        ensemble_shapes = aggregate_seed_shapes(
+            params.seed, shape_functions, ensemble_members, feature_keys + all_dummy_keys, cat_info, num_points
+        )
+        shape_functions = ensemble_shapes.mean
+
+    contribs_train = term_contributions(shape_functions, columns, feature_keys, cat_info, interaction_specs, train_idx)
+    contribs_test = term_contributions(shape_functions, columns, feature_keys, cat_info, interaction_specs, test_idx)
+    for spec in interaction_specs:
+        features_train[spec["key"]] = _row_values(contribs_train[spec["key"]], low_memory)
+
+    total_train = _sum_terms(contribs_train, len(y_train))
+    total_test = _sum_terms(contribs_test, len(y_test))
+    if ensemble_shapes is not None:
+        intercept_val = ensemble_shapes.intercept(task_type, igann, y_train, total_train)
+    else:
+        intercept_val = additive_intercept(task_type, igann, y_train, total_train)
+    preds_train = additive_predictions(task_type, total_train, intercept_val)
+    preds_test = additive_predictions(task_type, total_test, intercept_val)
+
+    train_metrics = calc_metrics(task_type, y_train, preds_train)
+    test_metrics = calc_metrics(task_type, y_test, preds_test)
+    metric_intervals = None
+    if request.bootstrap_resamples > 0:
+        # Only the held-out split: train-split intervals say little and cost the most rows.
+        metric_intervals = {
+            "test": bootstrap_intervals(
+                task_type, y_test, preds_test, request.bootstrap_resamples, request.confidence_level, request.seed
+            ),
+        }
+    calibration = None
+    if task_type == "classification":
+        calibration = {"train": calibration_bins(y_train, preds_train), "test": calibration_bins(y_test, preds_test)}
+
+    shapes = feature_shapes(shape_functions, feature_keys, cat_info, label_map)
+    interaction_shapes = build_interaction_shapes(shape_functions, interaction_specs, x_train_df, cat_info, label_map)
+    if ensemble_shapes is not None:
+        ensemble_shapes.add_bands(shapes + interaction_shapes, interaction_specs, x_train_df, cat_info, label_map)
 
+    # Fits finishing in the same millisecond must not share a cache key, so the
+    # versionId is random and the timestamp travels as its own field.
     timestamp = int(time.time() * 1000)
+    version_id = uuid.uuid4().hex
+    from model_cache import TrainedModel, cache_trained_model  # imports this module
+
+    cache_trained_model(version_id, TrainedModel(
+        params=params,
+        shape_functions=native_shapes,
+        feature_keys=feature_keys,
+        dummy_keys=all_dummy_keys,
+        cat_info=cat_info,
+        label_map=label_map,
+        interaction_specs=interaction_specs,
+        interaction_bounds=interaction_bounds(x_train_df, interaction_specs, cat_info),
+        ensemble_members=[
+            {"seed": member["seed"], "shapeFunctions": member["nativeShapeFunctions"], "intercept": member["intercept"]}
+            for member in ensemble_members
+        ] if ensemble_members is not None else None,
+    ))
     return {
         "model": {
             "dataset": request.dataset,
-            "model_type": model_type,
+            "model_type": params.model_type,
             "task": task_type,
             "selected_features": feature_keys,
             "selected_interactions": [spec["key"] for spec in interaction_specs if spec["operator"] == "product"],
             "selected_operations": interaction_specs,
             "seed": request.seed,
-            "n_estimators": n_estimators,
-            "boost_rate": boost_rate,
-            "init_reg": init_reg,
-            "elm_alpha": elm_alpha,
-            "early_stopping": early_stopping,
-            "n_hid": n_hid,
-            "scale_y": use_scale_y,
+            "sample_size": request.sample_size,
+            "n_estimators": params.n_estimators,
+            "boost_rate": params.boost_rate,
+            "init_reg": params.init_reg,
+            "elm_alpha": params.elm_alpha,
+            "early_stopping": params.early_stopping,
+            "n_hid": params.n_hid,
+            "scale_y": params.scale_y,
             "points": num_points,
         },
         "data": {
             "trainX": features_train,
-            "trainY": y_train.tolist(),
-            "testY": y_test.tolist(),
+            "trainY": _row_values(y_train, low_memory),
+            "testY": _row_values(y_test, low_memory),
             "categories": cat_info,
             "featureLabels": {key: label_map[key] for key in feature_keys},
             "featureDescriptions": {key: descriptions.get(key, "") for key in feature_keys},
         },
         "version": {
-            "versionId": str(timestamp),
+            "versionId": version_id,
             "timestamp": timestamp,
             "source": "train",
-            "center_shapes": center_shapes,
+            "center_shapes": params.center_shapes,
             "intercept": intercept_val,
             "trainMetrics": train_metrics,
             "testMetrics": test_metrics,
+            **({"metricIntervals": metric_intervals} if metric_intervals is not None else {}),
+            **({"calibration": calibration} if calibration is not None else {}),
+            **({"ensemble": ensemble_shapes.summary()} if ensemble_shapes is not None else {}),
             "shapes": shapes + interaction_shapes,
+            **({"crossValidation": cv_result} if cv_result is not None else {}),
         },
     }
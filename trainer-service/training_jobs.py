@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Dict, List, Tuple
+
+from fastapi import HTTPException
+
+from json_utils import dumps_json, to_jsonable
+from schemas import TrainRequest
+from training import TrainingParams, build_train_response, train_slots
+from training_progress import TrainingAborted, TrainingProgress
+from training_scheduler import get_training_scheduler, training_slot
+
+
+logger = logging.getLogger(__name__)
+
+
+# ── Background training jobs ─────────────────────────────────────────────────
+# POST /train/jobs runs the same training as /train on a background thread
+# (admitted through the training scheduler) and returns a job id at once.
+# Every state change and boosting iteration is appended to the job's event
+# log, which GET /train/jobs/{id}/events streams as Server-Sent Events;
+# clients reconnecting with Last-Event-ID resume where they left off. A
+# DELETE aborts the job: queued jobs never start and running fits stop at
+# their next iteration. Jobs live in the process that accepted them, so with
+# several uvicorn workers the event stream needs sticky routing.
+
+FINISHED_STATUSES = {"succeeded", "failed", "aborted"}
+
+# Finished jobs (and their results) are kept this long for late readers.
+JOB_TTL_SECONDS = 600
+MAX_JOBS = 256
+# Seconds between SSE keep-alive comments while a job is quiet.
+KEEPALIVE_SECONDS = 15.0
+EVENT_POLL_SECONDS = 0.2
+
+
+class TrainingJob:
+    def __init__(self, request: TrainRequest) -> None:
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status = "queued"
+        self.created_at = time.time()
+        self.finished_at: float | None = None
+        # Serialized response; kept as JSON bytes rather than nested Python objects.
+        self.result: bytes | None = None
+        self.error: str | None = None
+        self.error_status: int | None = None
+        self.progress: Dict | None = None
+        self._events: List[Tuple[int, str, Dict]] = []
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._emit("status", {"status": self.status})
+
+    def _emit(self, event: str, data: Dict) -> None:
+        with self._lock:
+            self._events.append((len(self._events), event, {"job": self.id, **data}))
+
+    def events_after(self, event_id: int) -> List[Tuple[int, str, Dict]]:
+        with self._lock:
+            return self._events[event_id + 1:]
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def abort_requested(self) -> bool:
+        return self._abort.is_set()
+
+    def request_abort(self) -> None:
+        if not self.finished:
+            self._abort.set()
+            self._emit("status", {"status": "aborting"})
+
+    def progress_listener(self, params: TrainingParams) -> TrainingProgress:
+        return TrainingProgress(params.n_estimators, params.early_stopping, self._on_progress, self.abort_requested)
+
+    def _on_progress(self, progress: Dict) -> None:
+        self.progress = progress
+        self._emit("progress", progress)
+
+    def _set_status(self, status: str, **data) -> None:
+        if status in FINISHED_STATUSES:
+            self.finished_at = time.time()
+        # Emit before publishing the status: streams stop once they see a finished job.
+        self._emit("status", {"status": status, **data})
+        self.status = status
+
+    def run(self) -> None:
+        try:
+            with training_slot(self.abort_requested, train_slots(self.request)):
+                if self.abort_requested():
+                    raise TrainingAborted()
+                self._set_status("running")
+                result = build_train_response(self.request, self.progress_listener)
+            self.result = dumps_json(result)
+            self._set_status("succeeded")
+        except (TrainingAborted, InterruptedError):
+            self._set_status("aborted")
+        except HTTPException as exc:
+            self.error, self.error_status = str(exc.detail), exc.status_code
+            self._set_status("failed", error=self.error)
+        except Exception as exc:
+            logger.exception("Training job %s failed.", self.id)
+            self.error, self.error_status = str(exc), 500
+            self._set_status("failed", error=self.error)
+
+    def summary(self) -> Dict:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "dataset": self.request.dataset,
+            "createdAt": self.created_at,
+            "finishedAt": self.finished_at,
+            "progress": self.progress,
+            "error": self.error,
+        }
+
+
+_jobs: "OrderedDict[str, TrainingJob]" = OrderedDict()
+_jobs_lock = threading.Lock()
+
+
+def _prune_jobs() -> None:
+    cutoff = time.time() - JOB_TTL_SECONDS
+    with _jobs_lock:
+        for job_id in [job_id for job_id, job in _jobs.items() if job.finished and job.finished_at < cutoff]:
+            del _jobs[job_id]
+        finished = [job_id for job_id, job in _jobs.items() if job.finished]
+        while len(_jobs) > MAX_JOBS and finished:
+            del _jobs[finished.pop(0)]
+
+
+def submit_training_job(request: TrainRequest) -> TrainingJob:
+    """Start training in the background; raises HTTPException(429) when the scheduler is saturated."""
+    get_training_scheduler().check_capacity()
+    _prune_jobs()
+    job = TrainingJob(request)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    threading.Thread(target=job.run, name=f"training-job-{job.id[:8]}", daemon=True).start()
+    return job
+
+
+def get_training_job(job_id: str) -> TrainingJob:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Training job not found.")
+    return job
+
+
+def _format_event(event_id: int, event: str, data: Dict) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(to_jsonable(data))}\n\n"
+
+
+async def job_event_stream(job: TrainingJob, last_event_id: int = -1) -> AsyncIterator[str]:
+    """SSE frames for the job's events after ``last_event_id``; ends once the job has finished."""
+    quiet_since = time.monotonic()
+    while True:
+        # Read the status first so no event emitted before it is finished can be missed.
+        finished = job.finished
+        events = job.events_after(last_event_id)
+        for event_id, event, data in events:
+            yield _format_event(event_id, event, data)
+            last_event_id = event_id
+        if finished:
+            return
+        if events:
+            quiet_since = time.monotonic()
+        elif time.monotonic() - quiet_since >= KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            quiet_since = time.monotonic()
+        await asyncio.sleep(EVENT_POLL_SECONDS)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import io
+import math
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+
+# ── Fit progress ─────────────────────────────────────────────────────────────
+# A TrainingProgress receives one report per boosting iteration, either from
+# an IGANN callback (when the model accepts one) or by parsing its verbose
+# output, which is captured per thread so concurrent fits do not mix. Each
+# report updates the early-stopping counter (iterations since the best
+# validation loss) and is forwarded to a listener. Both hooks run inside the
+# fit loop, so an abort request raises TrainingAborted there and the fit stops
+# at the next iteration instead of running to completion.
+
+_NUMBER = r"(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|nan|inf)"
+_ITERATION = re.compile(r"(?:(\d+)\s*\.?\s*iteration|(?:iteration|round)s?\b[^\d\n]{0,20}(\d+))", re.IGNORECASE)
+_TRAIN_LOSS = re.compile(r"train\w*\s*loss\w*\s*[:=]?\s*" + _NUMBER, re.IGNORECASE)
+_VAL_LOSS = re.compile(r"val\w*\s*loss\w*\s*[:=]?\s*" + _NUMBER, re.IGNORECASE)
+
+
+class TrainingAborted(Exception):
+    """Raised inside a fit whose job was asked to stop."""
+
+
+def _as_float(value) -> float | None:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+class TrainingProgress:
+    def __init__(
+        self,
+        n_estimators: int,
+        patience: int,
+        listener: Callable[[Dict], None],
+        abort_requested: Callable[[], bool] = lambda: False,
+    ) -> None:
+        self.n_estimators = n_estimators
+        self.patience = patience
+        self._listener = listener
+        self._abort_requested = abort_requested
+        self._buffer = ""
+        self._iterations = 0
+        self._best_val_loss: float | None = None
+        self._since_best = 0
+
+    def check_abort(self) -> None:
+        if self._abort_requested():
+            raise TrainingAborted()
+
+    def on_iteration(self, iteration=None, train_loss=None, val_loss=None, *_args, **_kwargs) -> None:
+        """IGANN callback: (iteration, train loss, validation loss, ...)."""
+        self.check_abort()
+        self._iterations += 1
+        iteration = int(iteration) if iteration is not None else self._iterations
+        val_loss = _as_float(val_loss)
+        if val_loss is not None:
+            if self._best_val_loss is None or val_loss < self._best_val_loss:
+                self._best_val_loss = val_loss
+                self._since_best = 0
+            else:
+                self._since_best += 1
+        self._listener({
+            "iteration": iteration,
+            "nEstimators": self.n_estimators,
+            "trainLoss": _as_float(train_loss),
+            "valLoss": val_loss,
+            "bestValLoss": self._best_val_loss,
+            "earlyStoppingCounter": self._since_best,
+            "earlyStoppingPatience": self.patience,
+        })
+
+    def on_output(self, text: str) -> None:
+        """Sink for captured verbose output; lines reporting losses become iterations."""
+        self.check_abort()
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            train = _TRAIN_LOSS.search(line)
+            val = _VAL_LOSS.search(line)
+            if train is None and val is None:
+                continue
+            iteration = _ITERATION.search(line)
+            number = next((group for group in iteration.groups() if group), None) if iteration else None
+            self.on_iteration(
+                int(number) if number is not None else None,
+                train.group(1) if train else None,
+                val.group(1) if val else None,
+            )
+
+
+class _ThreadRoutedOutput(io.TextIOBase):
+    """sys.stdout replacement sending writes from registered threads to their sink."""
+
+    def __init__(self, fallback) -> None:
+        self.fallback = fallback
+        self.sinks: Dict[int, Callable[[str], None]] = {}
+
+    def write(self, text: str) -> int:
+        sink = self.sinks.get(threading.get_ident())
+        if sink is None:
+            return self.fallback.write(text)
+        sink(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self.fallback.flush()
+
+    def writable(self) -> bool:
+        return True
+
+
+_router_lock = threading.Lock()
+
+
+@contextmanager
+def capture_thread_output(sink: Callable[[str], None]) -> Iterator[None]:
+    """Route this thread's ``print`` output to ``sink`` for the ``with`` block; other threads are unaffected."""
+    with _router_lock:
+        router = sys.stdout
+        if not isinstance(router, _ThreadRoutedOutput):
+            router = _ThreadRoutedOutput(sys.stdout)
+            sys.stdout = router
+        router.sinks[threading.get_ident()] = sink
+    try:
+        yield
+    finally:
+        with _router_lock:
+            router.sinks.pop(threading.get_ident(), None)
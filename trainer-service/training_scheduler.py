@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List
+
+from fastapi import HTTPException
+
+from paths import TRAINING_SLOTS_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms only get the per-process limit
+    fcntl = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# ── Training admission control ───────────────────────────────────────────────
+# Fits are admitted through a per-process scheduler: at most
+# TRAINING_MAX_CONCURRENT run at once, up to TRAINING_MAX_QUEUE more wait in
+# FIFO order, and anything beyond that is rejected with 429 and a Retry-After
+# estimated from recent fit durations. Across uvicorn workers a fit also needs
+# one of TRAINING_HOST_SLOTS host-wide slots (flock'ed files), so the host
+# total stays bounded however many workers run. BLAS/OpenMP and torch are
+# pinned to TRAINING_THREADS_PER_FIT threads so concurrent fits do not
+# oversubscribe the cores.
+#
+# Slots count fits, not requests: a request that also fits on the worker pool
+# (cross-validation folds, ensemble seeds, feature-selection candidates)
+# reserves one slot per fit it runs at once, up to max_fits per request, and
+# limits its pool submissions to what it reserved. Pool workers are pinned to
+# the same thread count as in-process fits.
+
+# Assumed fit duration until the first fit has been measured.
+INITIAL_FIT_SECONDS = 10.0
+# Weight of the newest fit in the moving average of fit durations.
+FIT_SECONDS_SMOOTHING = 0.2
+# Recent queue waits kept for the metrics endpoint.
+WAIT_HISTORY = 256
+# How often a fit waiting for a host-wide slot retries.
+HOST_SLOT_POLL_SECONDS = 0.05
+# How often a queued request checks whether it was cancelled.
+CANCEL_POLL_SECONDS = 0.25
+
+
+def _env_int(name: str, default: int, minimum: int = 1) -> int:
+    try:
+        return max(minimum, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def get_threads_per_fit() -> int:
+    return _env_int("TRAINING_THREADS_PER_FIT", max(1, min(4, (os.cpu_count() or 1) // 2)))
+
+
+def get_max_concurrent() -> int:
+    """Concurrent fits per process; defaults to as many as fit on the cores."""
+    return _env_int("TRAINING_MAX_CONCURRENT", max(1, (os.cpu_count() or 1) // get_threads_per_fit()))
+
+
+def get_host_slots() -> int:
+    """Concurrent fits across all processes on the host; 0 disables the host-wide limit."""
+    return _env_int("TRAINING_HOST_SLOTS", max(1, (os.cpu_count() or 1) // get_threads_per_fit()), minimum=0)
+
+
+def get_max_queue() -> int:
+    return _env_int("TRAINING_MAX_QUEUE", 16, minimum=0)
+
+
+def get_queue_timeout() -> float:
+    try:
+        return max(0.0, float(os.getenv("TRAINING_QUEUE_TIMEOUT", "300")))
+    except ValueError:
+        return 300.0
+
+
+def pin_fit_threads(threads: int) -> None:
+    """Limit BLAS/OpenMP (via threadpoolctl) and torch intra-op threads for this process."""
+    try:
+        from threadpoolctl import threadpool_limits
+    except ImportError:
+        threadpool_limits = None
+    if threadpool_limits is not None:
+        threadpool_limits(limits=threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+
+class _HostSlots:
+    """Host-wide slots: one lock file per slot, held with a non-blocking flock while fitting."""
+
+    def __init__(self, count: int) -> None:
+        self.count = count if fcntl is not None else 0
+
+    def acquire(self, deadline: float, count: int = 1) -> List:
+        """Lock ``count`` slots at once; partial sets are given back so two processes cannot deadlock."""
+        if not self.count:
+            return []
+        TRAINING_SLOTS_DIR.mkdir(parents=True, exist_ok=True)
+        while True:
+            handles = []
+            for slot in range(self.count):
+                handle = (TRAINING_SLOTS_DIR / f"slot-{slot}.lock").open("a+b")
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    handle.close()
+                    continue
+                handles.append(handle)
+                if len(handles) == count:
+                    return handles
+            self.release(handles)
+            if time.monotonic() >= deadline:
+                raise TimeoutError
+            time.sleep(HOST_SLOT_POLL_SECONDS)
+
+    @staticmethod
+    def release(handles: List) -> None:
+        for handle in handles:
+            handle.close()
+
+
+class _Ticket(threading.Event):
+    """A queued request and the number of slots it waits for."""
+
+    def __init__(self, fits: int) -> None:
+        super().__init__()
+        self.fits = fits
+
+
+class TrainingScheduler:
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        host_slots: int = 0,
+        queue_timeout: float = 300.0,
+        threads_per_fit: int | None = None,
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.threads_per_fit = threads_per_fit
+        self._host = _HostSlots(host_slots)
+        self._lock = threading.Lock()
+        self._running = 0
+        self._waiters: "deque[_Ticket]" = deque()
+        self._fit_seconds = INITIAL_FIT_SECONDS
+        self._waits: "deque[float]" = deque(maxlen=WAIT_HISTORY)
+        self._admitted = 0
+        self._rejected = 0
+        self._pinned = False
+
+    @property
+    def max_fits(self) -> int:
+        """Slots one request may hold: no more than fit in this process or on the host."""
+        return min(self.max_concurrent, self._host.count) if self._host.count else self.max_concurrent
+
+    def _estimated_wait(self, ahead: int) -> float:
+        """Seconds until a request with ``ahead`` requests queued in front of it would start."""
+        rounds = math.ceil((ahead + 1) / self.max_concurrent)
+        return rounds * self._fit_seconds
+
+    def _reject(self, ahead: int, reason: str) -> HTTPException:
+        self._rejected += 1
+        estimate = self._estimated_wait(ahead)
+        return HTTPException(
+            status_code=429,
+            detail=f"{reason}; estimated wait {estimate:.0f} s.",
+            headers={"Retry-After": str(max(1, math.ceil(estimate)))},
+        )
+
+    def _admit_waiters(self) -> None:
+        """Start queued requests in FIFO order while their slots are free; the caller holds the lock."""
+        while self._waiters and self._running + self._waiters[0].fits <= self.max_concurrent:
+            ticket = self._waiters.popleft()
+            self._running += ticket.fits
+            ticket.set()
+
+    def _release(self, fits: int) -> None:
+        with self._lock:
+            self._running -= fits
+            self._admit_waiters()
+
+    def _pin_threads_once(self) -> None:
+        if self._pinned or self.threads_per_fit is None:
+            return
+        self._pinned = True
+        pin_fit_threads(self.threads_per_fit)
+
+    def check_capacity(self) -> None:
+        """Raise HTTPException(429) if a request arriving now would be rejected."""
+        with self._lock:
+            if self._running >= self.max_concurrent and len(self._waiters) >= self.max_queue:
+                raise self._reject(len(self._waiters), "Training queue is full")
+
+    def _wait_turn(self, ticket: _Ticket, cancelled: Callable[[], bool] | None) -> bool:
+        if cancelled is None:
+            return ticket.wait(self.queue_timeout)
+        deadline = time.monotonic() + self.queue_timeout
+        while not ticket.wait(min(CANCEL_POLL_SECONDS, max(0.0, deadline - time.monotonic()))):
+            if cancelled():
+                with self._lock:
+                    if not ticket.is_set():
+                        self._waiters.remove(ticket)
+                        self._admit_waiters()
+                        raise InterruptedError("Cancelled while queued for a training slot.")
+                return True
+            if time.monotonic() >= deadline:
+                return False
+        return True
+
+    @contextmanager
+    def slot(self, cancelled: Callable[[], bool] | None = None, fits: int = 1) -> Iterator[None]:
+        """Hold ``fits`` training slots for the ``with`` block; raises HTTPException(429) when saturated.
+
+        ``fits`` is clamped to ``max_fits``. With ``cancelled``, a queued
+        request that gets cancelled gives up its place and raises ``InterruptedError``.
+        """
+        fits = max(1, min(fits, self.max_fits))
+        queued_at = time.monotonic()
+        with self._lock:
+            ticket = None
+            if self._running + fits <= self.max_concurrent and not self._waiters:
+                self._running += fits
+            elif len(self._waiters) >= self.max_queue:
+                raise self._reject(len(self._waiters), "Training queue is full")
+            else:
+                ticket = _Ticket(fits)
+                self._waiters.append(ticket)
+
+        if ticket is not None and not self._wait_turn(ticket, cancelled):
+            with self._lock:
+                if not ticket.is_set():
+                    self._waiters.remove(ticket)
+                    self._admit_waiters()
+                    raise self._reject(len(self._waiters), "Timed out waiting for a training slot")
+            # The slots were handed over just as the wait timed out; keep them.
+
+        try:
+            try:
+                host_slots = self._host.acquire(queued_at + self.queue_timeout, fits)
+            except TimeoutError:
+                with self._lock:
+                    raise self._reject(len(self._waiters), "All training slots on this host are busy") from None
+            self._pin_threads_once()
+            started_at = time.monotonic()
+            with self._lock:
+                self._admitted += 1
+                self._waits.append(started_at - queued_at)
+            try:
+                yield
+            finally:
+                _HostSlots.release(host_slots)
+                elapsed = time.monotonic() - started_at
+                with self._lock:
+                    self._fit_seconds += FIT_SECONDS_SMOOTHING * (elapsed - self._fit_seconds)
+        finally:
+            self._release(fits)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            waits = sorted(self._waits)
+            queued = len(self._waiters)
+            return {
+                "running": self._running,
+                "queued": queued,
+                "maxConcurrent": self.max_concurrent,
+                "maxFitsPerRequest": self.max_fits,
+                "maxQueue": self.max_queue,
+                "hostSlots": self._host.count,
+                "threadsPerFit": self.threads_per_fit,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "averageFitSeconds": self._fit_seconds,
+                "estimatedWaitSeconds": self._estimated_wait(queued) if self._running >= self.max_concurrent else 0.0,
+                "waitSeconds": {
+                    "count": len(waits),
+                    "mean": sum(waits) / len(waits) if waits else None,
+                    "p95": waits[min(len(waits) - 1, int(0.95 * len(waits)))] if waits else None,
+                    "max": waits[-1] if waits else None,
+                },
+            }
+
+
+_scheduler: TrainingScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_training_scheduler() -> TrainingScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TrainingScheduler(
+                max_concurrent=get_max_concurrent(),
+                max_queue=get_max_queue(),
+                host_slots=get_host_slots(),
+                queue_timeout=get_queue_timeout(),
+                threads_per_fit=get_threads_per_fit(),
+            )
+            logger.info("Training scheduler: %s", _scheduler.stats())
+        return _scheduler
+
+
+def get_max_fits_per_request() -> int:
+    return get_training_scheduler().max_fits
+
+
+@contextmanager
+def training_slot(cancelled: Callable[[], bool] | None = None, fits: int = 1) -> Iterator[None]:
+    """Admit a request running ``fits`` model fits at once (see ``TrainingScheduler.slot``)."""
+    with get_training_scheduler().slot(cancelled, fits):
+        yield